@@ -0,0 +1 @@
+from src.p3luche.catch_tables import *
@@ -0,0 +1 @@
+from src.p3luche.command_timing import *
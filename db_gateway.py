@@ -0,0 +1 @@
+from src.p3luche.db_gateway import *
@@ -0,0 +1 @@
+from src.p3luche.loop_watchdog import *
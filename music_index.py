@@ -0,0 +1 @@
+from src.p3luche.music_index import *
@@ -0,0 +1 @@
+from src.p3luche.sql_profiler import *
@@ -0,0 +1,195 @@
+"""
+Cache local em disco das faixas do Drive tocadas pela jukebox.
+
+Toda vez que uma faixa do acervo tocava, o FFmpeg a baixava de novo do Drive
+pelo `drive_url` (daí as flags de `-reconnect`): as mais pedidas eram
+baixadas dezenas de vezes por dia, e cada início dependia da latência e dos
+soluços do Drive.
+
+`AUDIO_CACHE` guarda uma cópia por arquivo do Drive (`drive_file_id`):
+
+- `lookup(chave)` devolve o caminho local (acerto) ou None (falta);
+- na falta, `schedule_fill` baixa a faixa em segundo plano enquanto ela toca
+  pelo stream de sempre; a próxima vez sai do disco;
+- o download vai para um `.part` no mesmo diretório e só vira o arquivo
+  final com `os.replace` — quem lê nunca vê arquivo pela metade, e um crash
+  deixa só lixo `.part`, apagado na próxima varredura;
+- o total fica abaixo de `max_bytes`: sai primeiro a faixa tocada há mais
+  tempo (LRU). A ordem sobrevive ao restart pelo mtime, renovado a cada
+  acerto;
+- `stats` conta acertos, faltas, downloads, falhas e remoções.
+
+Resposta HTML do Drive (página de confirmação de arquivo grande, cota
+estourada) não é áudio e não entra no cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import tempfile
+import threading
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES
+
+SUFFIX = ".audio"
+CHUNK_BYTES = 1024 * 1024
+DOWNLOAD_TIMEOUT_SECONDS = 30
+
+_DRIVE_ID = re.compile(r"^[A-Za-z0-9_-]{10,}$")
+_DRIVE_PATH_ID = re.compile(r"/d/([A-Za-z0-9_-]{10,})")
+
+
+def drive_file_key(drive_file_id: str | None, url: str | None = None) -> str | None:
+    """Chave do cache: o `drive_file_id`, ou o id tirado do link do Drive.
+
+    O music_cache do /musica não tem a coluna `drive_file_id`, só o link
+    (`uc?export=download&id=...` ou `/file/d/<id>/`).
+    """
+    if drive_file_id and _DRIVE_ID.match(drive_file_id):
+        return drive_file_id
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if "google" not in parts.netloc:
+        return None
+    candidate = (parse_qs(parts.query).get("id") or [None])[0]
+    if candidate is None:
+        match = _DRIVE_PATH_ID.search(parts.path)
+        candidate = match.group(1) if match else None
+    return candidate if candidate and _DRIVE_ID.match(candidate) else None
+
+
+class AudioCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # chave -> bytes, do menos para o mais recente
+        self._bytes = 0
+        self._filling = set()
+        self._tasks = set()
+        self.stats = {"hits": 0, "misses": 0, "fills": 0, "failures": 0, "evictions": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _load(self) -> None:
+        """Varre o diretório na primeira consulta (chamado com o lock)."""
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".part"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                elif entry.name.endswith(SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[: -len(SUFFIX)], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._bytes = sum(self._entries.values())
+        self._evict()
+
+    def _evict(self) -> None:
+        # A mais recente fica mesmo sozinha acima do limite: acabou de entrar.
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def lookup(self, key: str) -> str | None:
+        with self._lock:
+            self._load()
+            path = self._path(key)
+            if key in self._entries:
+                try:
+                    os.utime(path)
+                except OSError:
+                    # Apagado por fora: esquece e trata como falta.
+                    self._bytes -= self._entries.pop(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return path
+            self.stats["misses"] += 1
+            return None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load()
+            return key in self._entries
+
+    def fill(self, key: str, url: str, headers: dict | None = None) -> bool:
+        """Baixa `url` para o cache (bloqueante). True se a faixa entrou."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=key + ".", suffix=".part")
+        try:
+            size = 0
+            request = urllib.request.Request(url, headers=dict(headers or {}))
+            with os.fdopen(fd, "wb") as out, urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT_SECONDS) as resp:
+                content_type = resp.headers.get("Content-Type") or ""
+                if content_type.startswith("text/"):
+                    raise ValueError(f"resposta não é áudio ({content_type})")
+                while True:
+                    chunk = resp.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError("faixa maior que o cache inteiro")
+                    out.write(chunk)
+            if not size:
+                raise ValueError("download vazio")
+            os.replace(tmp, self._path(key))
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            with self._lock:
+                self.stats["failures"] += 1
+            return False
+
+        with self._lock:
+            self._load()
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stats["fills"] += 1
+            self._evict()
+        return True
+
+    def _fill_in_background(self, key: str, url: str, headers: dict | None) -> bool:
+        try:
+            return self.fill(key, url, headers)
+        finally:
+            with self._lock:
+                self._filling.discard(key)
+
+    def schedule_fill(self, key: str, url: str, headers: dict | None = None):
+        """Agenda o download no pool de threads, um por chave. Devolve a task ou None."""
+        with self._lock:
+            self._load()
+            if key in self._entries or key in self._filling:
+                return None
+            self._filling.add(key)
+        task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self._fill_in_background, key, url, headers)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+AUDIO_CACHE = AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES)
@@ -0,0 +1,96 @@
+"""
+Tabelas de captura pré-compiladas a partir de FISH_DB (sem dependência do discord.py).
+
+Antes, cada /eco pescar refazia várias list comprehensions sobre FISH_DB
+(pool de lixo, de iniciais, por tier, tier 2 da isca brilhante, do chip) e a
+armadilha AFK refazia uma por item sorteado. Aqui tudo é montado UMA vez, no
+import: um `CatchPool` por (tier máximo, modificador), com os pesos já
+acumulados — o sorteio é um `random()` + `bisect`, sem alocar nada.
+
+Pesos vêm de FISH_WEIGHTS (economy_constants); sem entrada, peso 1.0, o que
+reproduz o `random.choice` uniforme de antes.
+"""
+
+from __future__ import annotations
+
+import bisect
+import random
+from itertools import accumulate
+
+from economy_constants import FISH_DB, FISH_WEIGHTS, TRASH_ITEMS
+
+MAX_TIER = max(fish[4] for fish in FISH_DB)
+
+# Usado só se FISH_DB não tiver nenhum item de tier 0 (nunca deveria).
+FALLBACK_CATCH = ("Bota Velha", 0, 5, "👢", 0, "Que nojo!")
+
+# Modificadores de pool:
+#   "normal"    tiers 1..max (o sorteio comum; cai pro tier 0 se vazio)
+#   "brilhante" só tier 2, se max >= 2 (isca brilhante)
+#   "chip"      tiers >= 2, ignorando max (chip da sorte / isca elétrica)
+#   "lixo"      tier 0 que é lixo
+#   "iniciais"  tier 0 que é peixe
+#   "ate"       tiers 0..max (armadilhas, que não separam lixo de peixe)
+MODIFIERS = ("normal", "brilhante", "chip", "lixo", "iniciais", "ate")
+
+
+def _weight(fish: tuple) -> float:
+    return float(FISH_WEIGHTS.get(fish[0], 1.0))
+
+
+class CatchPool:
+    """Lista de capturas + pesos acumulados. Imutável depois de montado."""
+
+    __slots__ = ("entries", "names", "cum_weights", "total")
+
+    def __init__(self, entries):
+        entries = tuple(entry for entry in entries if _weight(entry) > 0)
+        self.entries = entries
+        self.names = tuple(entry[0] for entry in entries)
+        self.cum_weights = list(accumulate(_weight(entry) for entry in entries))
+        self.total = self.cum_weights[-1] if self.cum_weights else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def _index(self, rng) -> int:
+        i = bisect.bisect_right(self.cum_weights, rng.random() * self.total)
+        return min(i, len(self.entries) - 1)
+
+    def sample(self, rng=random) -> tuple:
+        """Uma tupla de FISH_DB, sorteada pelo peso. O pool não pode estar vazio."""
+        return self.entries[self._index(rng)]
+
+    def sample_name(self, rng=random) -> str:
+        return self.names[self._index(rng)]
+
+
+def build_pools(fish_db) -> dict:
+    tier0 = [f for f in fish_db if f[4] == 0]
+    lixo = CatchPool(f for f in tier0 if f[0] in TRASH_ITEMS)
+    iniciais = CatchPool(f for f in tier0 if f[0] not in TRASH_ITEMS)
+    chip = CatchPool(f for f in fish_db if f[4] >= 2) or CatchPool(f for f in fish_db if f[4] > 0)
+    tier0_pool = CatchPool(tier0) or CatchPool([FALLBACK_CATCH])
+
+    pools = {}
+    for max_tier in range(MAX_TIER + 1):
+        pools[(max_tier, "normal")] = CatchPool(f for f in fish_db if 0 < f[4] <= max_tier) or tier0_pool
+        pools[(max_tier, "brilhante")] = CatchPool(f for f in fish_db if f[4] == 2 and max_tier >= 2)
+        pools[(max_tier, "chip")] = chip
+        pools[(max_tier, "lixo")] = lixo
+        pools[(max_tier, "iniciais")] = iniciais
+        pools[(max_tier, "ate")] = CatchPool(f for f in fish_db if f[4] <= max_tier)
+    return pools
+
+
+_POOLS = build_pools(FISH_DB)
+
+
+def pool_for(max_tier: int, modifier: str = "normal") -> CatchPool:
+    """Pool pré-compilado. `max_tier` fora de 0..MAX_TIER é limitado à faixa
+    (vara tier 4 + clima com bônus dá 5, que sorteia o mesmo que 4)."""
+    max_tier = max(0, min(int(max_tier), MAX_TIER))
+    return _POOLS[(max_tier, modifier)]
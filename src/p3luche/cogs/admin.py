@@ -17,7 +17,6 @@ UI do Discord (escondido de quem não é admin do servidor); não substitui
 a checagem de backend.
 """
 import asyncio
-import json
 import time
 from datetime import datetime
 
@@ -26,6 +25,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from cogs.backup import _upload_db_sync
+from command_sync import sync_command_tree
 from config import (
     CATCHES_LOCK,
     CATCHES_SINCE_RESTART,
@@ -33,13 +33,17 @@ from config import (
     DB_PATH,
     get_bot_instance,
 )
+from cooldowns import COOLDOWNS
+from db_gateway import get_gateway
 from economy_db import (
     get_wallet,
     modify_wallet,
+    set_inventory_item,
     reset_all_players,
     reset_player_progress,
 )
 from permissions import is_bot_owner
+from sql_profiler import PROFILER
 from utils import log_to_gui
 
 # Mesmo canal de auditoria já usado por cogs/logs.py (SistemaLogs) — reaproveita
@@ -64,6 +68,11 @@ _INSPECTABLE_TABLES = [
     "economy",
 ]
 
+# Quantos statements/chamadores o /admin debug perf lista e quantos planos
+# de execução ele roda (cada EXPLAIN é uma query no banco de produção).
+PERF_TOP = 5
+PERF_EXPLAIN = 3
+
 
 def _cleanup_stale_catches() -> None:
     now = time.time()
@@ -142,6 +151,30 @@ def _dump_user_state(conn, user_id: int) -> str:
     return "\n".join(lines)[:1024]
 
 
+def _format_perf_rows(rows, width: int = 90) -> str:
+    """Linhas `contagem · total · pior · chave` do PROFILER, no limite de
+    1024 chars de um campo de embed."""
+    if not rows:
+        return "Sem dados ainda."
+    lines = []
+    for row in rows:
+        key = row["key"] if len(row["key"]) <= width else row["key"][: width - 1] + "…"
+        lines.append(
+            f"**{row['count']}x** · {row['total_ms']:.0f} ms · pior {row['max_ms']:.1f} ms\n`{key}`"
+        )
+    return "\n".join(lines)[:1024]
+
+
+def _format_perf_plans(plans) -> str:
+    if not plans:
+        return "Nenhum statement para analisar."
+    blocks = []
+    for plan in plans:
+        flag = "⚠️ " + "; ".join(plan["warnings"]) if plan["warnings"] else "✅ usa índice"
+        blocks.append(f"`{plan['key'][:80]}`\n{flag}\n" + "\n".join(f"└ {step}" for step in plan["plan"][:4]))
+    return "\n".join(blocks)[:1024]
+
+
 def _dump_table_sample(conn, table: str, user_id: int | None) -> str:
     """Contagem total + amostra de uma tabela permitida. `table` DEVE vir de
     _INSPECTABLE_TABLES (nome de tabela nunca é parametrizável em SQL) — a
@@ -240,12 +273,11 @@ class ResetGlobalModal(discord.ui.Modal, title="⚠️ Confirmar Reset Global"):
         await interaction.response.defer(ephemeral=True, thinking=True)
 
         # Backup ANTES de qualquer alteração — só prossegue se ele terminar
-        # com sucesso (mesma função síncrona que backup_loop usa em
-        # cogs/backup.py, aqui via asyncio.to_thread para não travar o loop).
-        ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        remote_name = f"bot_backup_pre_reset_global_{ts}.db"
+        # com sucesso (mesmo pipeline que backup_loop usa em cogs/backup.py,
+        # aqui via asyncio.to_thread para não travar o loop). O manifesto já
+        # leva o horário no nome; o rótulo marca o ponto de restauração.
         try:
-            backup_link = await asyncio.to_thread(_upload_db_sync, DB_PATH, remote_name)
+            backup_link = await asyncio.to_thread(_upload_db_sync, DB_PATH, "pre_reset_global")
         except Exception as e:
             log_to_gui(f"Backup pré-reset-global falhou: {e}", "ERROR")
             await interaction.followup.send(
@@ -265,6 +297,10 @@ class ResetGlobalModal(discord.ui.Modal, title="⚠️ Confirmar Reset Global"):
             return
 
         conn = get_bot_instance().db_conn
+        # Cooldowns em memória (e pendências do write-behind) são de antes do
+        # reset. Antes da escrita: um flush já em curso confere a geração e
+        # não regrava por cima do reset.
+        COOLDOWNS.forget()
         result = reset_all_players(conn)
 
         await interaction.followup.send(
@@ -520,6 +556,7 @@ class AdminCog(commands.Cog):
                 content="🚫 Reset cancelado (recusado ou expirou sem resposta).", view=None
             )
 
+        COOLDOWNS.forget(usuario.id)
         reset_player_progress(conn, usuario.id)
         await interaction.edit_original_response(
             content=f"✅ Progresso de {usuario.mention} foi resetado.", view=None
@@ -565,12 +602,9 @@ class AdminCog(commands.Cog):
     async def sistema_fix_cooldowns(self, interaction: discord.Interaction):
         conn = get_bot_instance().db_conn
         cursor = conn.cursor()
-        # Toca as duas tabelas: `economy` (legada, ainda lida por comandos
-        # não migrados) e `user_cooldowns` (v4, a que realmente controla
-        # /eco pescar e /eco explorar hoje). O comando original só tocava a
-        # legada — de nada adiantaria "corrigir" cooldowns que o fluxo real
-        # nem lê mais.
-        cursor.execute("UPDATE economy SET last_fish = NULL, last_explore = NULL")
+        # Só `user_cooldowns` (v4): é a que controla /eco pescar e /eco
+        # explorar, e a view `economy` lê os cooldowns dela.
+        COOLDOWNS.forget()
         cursor.execute("UPDATE user_cooldowns SET last_fish = NULL, last_explore = NULL")
         conn.commit()
         await interaction.response.send_message(
@@ -580,6 +614,22 @@ class AdminCog(commands.Cog):
             self.bot, _audit_embed("⏱️ Cooldowns globais resetados", interaction.user, discord.Color.blue())
         )
 
+    @sistema_group.command(
+        name="sincronizar", description="Força o sync dos slash commands com o Discord (ignora o fingerprint)."
+    )
+    @is_bot_owner()
+    async def sistema_sincronizar(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            result = await sync_command_tree(self.bot.tree, force=True)
+        except discord.HTTPException as e:
+            return await interaction.followup.send(f"❌ Erro ao sincronizar: {e}", ephemeral=True)
+        await interaction.followup.send(
+            f"✅ {result['count']} comandos sincronizados (fingerprint `{result['fingerprint'][:12]}`).",
+            ephemeral=True,
+        )
+        log_to_gui(f"Sync forçado da árvore de comandos por {interaction.user}.", "INFO")
+
     @sistema_group.command(
         name="resetar_tudo",
         description="☠️ RESET GLOBAL: zera economia/progresso de TODOS os jogadores (com backup automático).",
@@ -664,20 +714,13 @@ class AdminCog(commands.Cog):
         conn = get_bot_instance().db_conn
         cursor = conn.cursor()
 
-        row = cursor.execute("SELECT inventory FROM economy WHERE user_id = ?", (user_id,)).fetchone()
+        row = cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
         if not row:
             return await interaction.response.send_message("Crie uma conta pescando primeiro.", ephemeral=True)
 
-        try:
-            inv = json.loads(row["inventory"]) if row["inventory"] else {}
-        except (json.JSONDecodeError, TypeError):
-            inv = {}
-
-        inv["garrafa_incrustada"] = 1
-
         cursor.execute("UPDATE quest_progress SET current_chapter = 'inicio' WHERE user_id = ?", (user_id,))
-        cursor.execute("UPDATE economy SET inventory = ? WHERE user_id = ?", (json.dumps(inv), user_id))
         conn.commit()
+        set_inventory_item(conn, user_id, "garrafa_incrustada", 1)
 
         await interaction.response.send_message(
             "🛠️ **DEBUG:** Garrafa adicionada e Quest resetada.\nTeste agora usando `/ler_garrafa`.",
@@ -720,6 +763,54 @@ class AdminCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @debug_group.command(
+        name="perf", description="Tempo de banco por statement SQL e por função (profiler em memória)."
+    )
+    @is_bot_owner()
+    @app_commands.describe(acao="Relatório, relatório com plano de execução (EXPLAIN) ou zerar os contadores")
+    @app_commands.choices(
+        acao=[
+            app_commands.Choice(name="Relatório", value="relatorio"),
+            app_commands.Choice(name="Relatório + EXPLAIN", value="explain"),
+            app_commands.Choice(name="Zerar", value="zerar"),
+        ]
+    )
+    async def debug_perf(self, interaction: discord.Interaction, acao: app_commands.Choice[str] = None):
+        if acao is not None and acao.value == "zerar":
+            PROFILER.reset()
+            return await interaction.response.send_message("🧹 Contadores do profiler SQL zerados.", ephemeral=True)
+
+        totals = PROFILER.totals()
+        embed = discord.Embed(
+            title="⏱️ Profiler SQL",
+            description=(
+                f"{totals['count']} statements · {totals['total_ms']:.0f} ms de banco "
+                f"desde <t:{int(totals['since'])}:R>"
+            ),
+            color=discord.Color.dark_teal(),
+        )
+        embed.add_field(
+            name="Statements (tempo total)", value=_format_perf_rows(PROFILER.top_statements(PERF_TOP)), inline=False
+        )
+        embed.add_field(
+            name="Statements (pior execução)",
+            value=_format_perf_rows(PROFILER.top_statements(PERF_TOP, key="max_ms")),
+            inline=False,
+        )
+        embed.add_field(
+            name="Funções chamadoras", value=_format_perf_rows(PROFILER.top_callers(PERF_TOP)), inline=False
+        )
+        if acao is not None and acao.value == "explain":
+            # EXPLAIN não escreve: vai pelo pool de leitura, fora do event loop.
+            plans = await get_gateway(get_bot_instance()).read(PROFILER.explain, PERF_EXPLAIN)
+            embed.add_field(
+                name="Plano de execução (mais custosos)",
+                value=_format_perf_plans(plans),
+                inline=False,
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot):
     await bot.add_cog(AdminCog(bot))
@@ -1,34 +1,47 @@
 """
 Backup automático do SQLite para o Google Drive (executado em thread para não bloquear o loop).
+
+O pipeline (snapshot consistente, chunks, compressão, manifesto) vive em
+db_backup.py; aqui só se escolhe o alvo e se agenda.
 """
 import asyncio
 import os
-from datetime import datetime
 
 from discord.ext import commands, tasks
 
-from config import DB_PATH, DRIVE_FOLDER_ID, LOG_FOLDER, get_bot_instance, set_bot_instance
+from config import BACKUP_DIR, DB_PATH, DRIVE_FOLDER_ID, LOG_FOLDER, get_bot_instance, set_bot_instance
+from db_backup import DriveBackupTarget, LocalBackupTarget, backup_database
 from utils import log_to_gui
 
 
-def _upload_db_sync(local_path: str, remote_name: str) -> str:
-    """Upload síncrono (executar via asyncio.to_thread)."""
+def _backup_target():
+    """Diretório local se P3LUCHE_BACKUP_DIR estiver definido; senão, o Drive."""
+    if BACKUP_DIR:
+        return LocalBackupTarget(BACKUP_DIR)
     from cogs.musica import get_drive_service
-    from googleapiclient.http import MediaFileUpload
 
     if not DRIVE_FOLDER_ID:
         raise RuntimeError("DRIVE_FOLDER_ID não configurado.")
     service = get_drive_service()
     if not service:
         raise RuntimeError("Google Drive não autenticado.")
-    metadata = {"name": remote_name, "parents": [DRIVE_FOLDER_ID]}
-    media = MediaFileUpload(local_path, mimetype="application/x-sqlite3", resumable=True)
-    file = service.files().create(body=metadata, media_body=media, fields="id").execute()
-    fid = file.get("id")
-    # Sem permissions().create(): o arquivo fica privado, visível apenas para a
-    # conta (service account/OAuth) que já autentica o Drive do bot. Nunca
-    # compartilhar o backup do banco publicamente (contém economia, moderação etc).
-    return f"https://drive.google.com/file/d/{fid}/view"
+    # Sem permissions().create(): os arquivos ficam privados, visíveis apenas
+    # para a conta (service account/OAuth) que já autentica o Drive do bot.
+    # Nunca compartilhar o backup do banco publicamente (contém economia,
+    # moderação etc).
+    return DriveBackupTarget(service, DRIVE_FOLDER_ID)
+
+
+def _backup_db_sync(local_path: str, label: str) -> dict:
+    """Backup síncrono (executar via asyncio.to_thread). Devolve o resumo de
+    `db_backup.backup_database`."""
+    return backup_database(local_path, _backup_target(), label=label)
+
+
+def _upload_db_sync(local_path: str, label: str) -> str:
+    """Como `_backup_db_sync`, devolvendo só onde ficou o manifesto (link do
+    Drive ou caminho local) — é o que o reset global mostra e audita."""
+    return _backup_db_sync(local_path, label)["location"]
 
 
 class BackupCog(commands.Cog):
@@ -47,11 +60,14 @@ class BackupCog(commands.Cog):
 
     @tasks.loop(hours=24)
     async def backup_loop(self):
-        ts = datetime.now().strftime("%Y-%m-%d_%H%M")
-        remote = f"bot_backup_{ts}.db"
         try:
-            link = await asyncio.to_thread(_upload_db_sync, DB_PATH, remote)
-            log_to_gui(f"Backup automático enviado ao Drive: {remote} → {link}", "SUCCESS")
+            result = await asyncio.to_thread(_backup_db_sync, DB_PATH, "auto")
+            log_to_gui(
+                f"Backup automático {result['manifest']}: {result['uploaded']}/{result['chunks']} chunks novos "
+                f"({result['uploaded_bytes'] / 1024:.0f} KB enviados de {result['size'] / 1024:.0f} KB) "
+                f"→ {result['location']}",
+                "SUCCESS",
+            )
         except Exception as e:
             log_to_gui(f"Falha no backup automático: {e}", "ERROR")
 
@@ -17,16 +17,24 @@ from discord import app_commands
 from discord.ext import commands
 
 from config import get_bot_instance
+from db_gateway import get_gateway
 from economy_db import get_wallet, modify_wallet
+from edit_scheduler import EDITS
 from utils import log_to_gui
 
 casino_group = app_commands.Group(name="casino", description="Jogos de casino do P3LUCHE.")
 
 
-def _check_bet(interaction: discord.Interaction, aposta: int) -> tuple[bool, str]:
+def _db():
+    """Gateway do banco: escrita serializada fora do event loop (ver db_gateway)."""
+    return get_gateway(get_bot_instance())
+
+
+async def _check_bet(interaction: discord.Interaction, aposta: int) -> tuple[bool, str]:
     if aposta < 10:
         return False, "❌ Aposta mínima: 10 Sachês."
-    wallet = get_wallet(get_bot_instance().db_conn, interaction.user.id)
+    # get_wallet passa por ensure_user (pode inserir a linha) → vai pelo escritor.
+    wallet = await _db().write(get_wallet, interaction.user.id)
     if wallet < aposta:
         return False, f"💸 Saldo insuficiente ({wallet} < {aposta})."
     return True, ""
@@ -186,7 +194,7 @@ class PokerView(discord.ui.View):
 
         p_score = _best_of_seven(self.player + self.community)
         b_score = _best_of_seven(self.bot_hand + self.community)
-        conn = get_bot_instance().db_conn
+        db = _db()
         uid = interaction.user.id
         name = interaction.user.display_name
 
@@ -194,12 +202,12 @@ class PokerView(discord.ui.View):
         # do Blackjack) — vitória paga a aposta de volta + o lucro (1:1);
         # derrota não debita de novo (já foi debitada); empate devolve.
         if p_score > b_score:
-            modify_wallet(conn, uid, self.aposta * 2, name)
+            await db.write(modify_wallet, uid, self.aposta * 2, name)
             result = f"🏆 Você venceu! +{self.aposta} Sachês\nMão: **{HAND_NAMES[p_score[0]]}**"
         elif p_score < b_score:
             result = f"💀 O bot venceu. -{self.aposta} Sachês\nMão do bot: **{HAND_NAMES[b_score[0]]}**"
         else:
-            modify_wallet(conn, uid, self.aposta, name)
+            await db.write(modify_wallet, uid, self.aposta, name)
             result = "🤝 Empate! Aposta devolvida."
 
         embed = self._embed(reveal_bot=True)
@@ -210,13 +218,13 @@ class PokerView(discord.ui.View):
 @casino_group.command(name="poker", description="Texas Hold'em simplificado contra o bot.")
 @app_commands.describe(aposta="Valor em Sachês")
 async def poker(interaction: discord.Interaction, aposta: int):
-    ok, msg = _check_bet(interaction, aposta)
+    ok, msg = await _check_bet(interaction, aposta)
     if not ok:
         return await interaction.response.send_message(msg, ephemeral=True)
     # Escrow: debita a aposta ANTES de abrir a mesa (mesmo padrão do
     # Blackjack), não só no showdown — fecha a janela em que o saldo fica
     # "livre" durante toda a mão (até 60s) mesmo com a aposta comprometida.
-    modify_wallet(get_bot_instance().db_conn, interaction.user.id, -aposta, interaction.user.display_name)
+    await _db().write(modify_wallet, interaction.user.id, -aposta, interaction.user.display_name)
     deck = _new_deck()
     random.shuffle(deck)
     view = PokerView(interaction.user.id, aposta, deck)
@@ -299,7 +307,7 @@ class BlackjackView(discord.ui.View):
 
         p_val = _bj_value(self.player)
         d_val = _bj_value(self.dealer)
-        conn = get_bot_instance().db_conn
+        db = _db()
         uid = self.user_id
 
         # A aposta (self.aposta, já dobrada se doubled=True) foi debitada
@@ -315,10 +323,10 @@ class BlackjackView(discord.ui.View):
             msg = f"💥 Estourou ({p_val})! -{self.aposta} Sachês"
         elif d_val > 21 or p_val > d_val:
             win = self.aposta * 2
-            modify_wallet(conn, uid, win)
+            await db.write(modify_wallet, uid, win)
             msg = f"🏆 Você venceu! +{win} Sachês"
         elif p_val == d_val:
-            modify_wallet(conn, uid, self.aposta)
+            await db.write(modify_wallet, uid, self.aposta)
             msg = f"🤝 Empate! Aposta devolvida (+{self.aposta} Sachês)"
         else:
             msg = f"💀 Banca vence ({d_val}). -{self.aposta} Sachês"
@@ -346,10 +354,11 @@ class BlackjackView(discord.ui.View):
     async def double(self, interaction: discord.Interaction, button: discord.ui.Button):
         if len(self.player) != 2 or self.doubled:
             return await interaction.response.send_message("❌ Só no início.", ephemeral=True)
-        wallet = get_wallet(get_bot_instance().db_conn, self.user_id)
+        db = _db()
+        wallet = await db.write(get_wallet, self.user_id)
         if wallet < self.aposta:
             return await interaction.response.send_message("💸 Sem saldo para dobrar.", ephemeral=True)
-        modify_wallet(get_bot_instance().db_conn, self.user_id, -self.aposta)
+        await db.write(modify_wallet, self.user_id, -self.aposta)
         self.aposta *= 2
         self.doubled = True
         self.player.append(self.deck.pop())
@@ -359,10 +368,10 @@ class BlackjackView(discord.ui.View):
 @casino_group.command(name="blackjack", description="21 contra a banca.")
 @app_commands.describe(aposta="Valor em Sachês")
 async def blackjack(interaction: discord.Interaction, aposta: int):
-    ok, msg = _check_bet(interaction, aposta)
+    ok, msg = await _check_bet(interaction, aposta)
     if not ok:
         return await interaction.response.send_message(msg, ephemeral=True)
-    modify_wallet(get_bot_instance().db_conn, interaction.user.id, -aposta, interaction.user.display_name)
+    await _db().write(modify_wallet, interaction.user.id, -aposta, interaction.user.display_name)
     deck = _new_deck()
     random.shuffle(deck)
     view = BlackjackView(interaction.user.id, aposta, deck)
@@ -456,16 +465,16 @@ class CrashView(discord.ui.View):
         for child in self.children:
             child.disabled = True
         winnings = int(self.aposta * self.multiplier)
-        # Responde ANTES de tocar no banco. `modify_wallet` faz BEGIN IMMEDIATE
-        # síncrono; sob disputa de lock ele segura o event loop por até o
-        # timeout do sqlite (5s por padrão) e estoura a janela de 3s que o
-        # Discord dá para confirmar a interação — era daí que vinha parte do
-        # "apertei e demorou para registrar".
+        # Responde ANTES de tocar no banco. Com o gateway o BEGIN IMMEDIATE de
+        # `modify_wallet` já não roda no event loop, mas a escrita ainda pode
+        # esperar na fila/lock por até o busy timeout (5s) — e a janela de 3s
+        # que o Discord dá para confirmar a interação não espera ninguém. Era
+        # daí que vinha parte do "apertei e demorou para registrar".
         await interaction.response.edit_message(
             content=f"✅ Cash out em **{self.multiplier:.2f}x**! +{winnings} Sachês",
             view=self,
         )
-        modify_wallet(get_bot_instance().db_conn, self.user_id, winnings)
+        await _db().write(modify_wallet, self.user_id, winnings)
         self.stop()
 
 
@@ -485,13 +494,16 @@ async def _edit_multiplier(msg_obj, multiplier: float, medida: dict) -> None:
     Sem `view=`: os componentes não mudam entre ticks, então não há por que
     reenviá-los em toda requisição.
 
+    Passa pelo agendador de edições (edit_scheduler), que divide o bucket do
+    canal com as outras rodadas e espaça as edições quando o Discord fica lento.
+
     Mede quanto a requisição demorou. Se ela custa mais que um tick, o teto do
     ritmo é a latência do Discord (rate limit ou rede), não a cadência daqui —
     e sem esse número o diagnóstico vira chute.
     """
     t0 = time.monotonic()
     try:
-        await msg_obj.edit(content=f"🚀 Multiplicador: **{multiplier:.2f}x**")
+        await EDITS.edit(msg_obj, content=f"🚀 Multiplicador: **{multiplier:.2f}x**")
     except discord.HTTPException:
         pass
     finally:
@@ -520,7 +532,7 @@ _crash_rounds_ativos: set[int] = set()
 @casino_group.command(name="crash", description="Avião sobe até crashar — saque a tempo!")
 @app_commands.describe(aposta="Valor em Sachês")
 async def crash(interaction: discord.Interaction, aposta: int):
-    ok, msg = _check_bet(interaction, aposta)
+    ok, msg = await _check_bet(interaction, aposta)
     if not ok:
         return await interaction.response.send_message(msg, ephemeral=True)
     if interaction.user.id in _crash_rounds_ativos:
@@ -528,7 +540,7 @@ async def crash(interaction: discord.Interaction, aposta: int):
             "⏳ Você já tem uma rodada de crash em andamento — termine ela primeiro.",
             ephemeral=True,
         )
-    modify_wallet(get_bot_instance().db_conn, interaction.user.id, -aposta, interaction.user.display_name)
+    await _db().write(modify_wallet, interaction.user.id, -aposta, interaction.user.display_name)
 
     await interaction.response.defer()
     crash_point = _draw_crash_point()
@@ -583,7 +595,8 @@ async def crash(interaction: discord.Interaction, aposta: int):
             for child in view.children:
                 child.disabled = True
             try:
-                await msg_obj.edit(
+                await EDITS.edit(
+                    msg_obj,
                     content=f"💥 **CRASH** em {crash_point:.2f}x! Você perdeu {aposta} Sachês.",
                     view=view,
                 )
@@ -608,17 +621,17 @@ async def crash(interaction: discord.Interaction, aposta: int):
 @casino_group.command(name="slots", description="Caça-níqueis com 3 rolos.")
 @app_commands.describe(aposta="Valor em Sachês")
 async def slots(interaction: discord.Interaction, aposta: int):
-    ok, msg = _check_bet(interaction, aposta)
+    ok, msg = await _check_bet(interaction, aposta)
     if not ok:
         return await interaction.response.send_message(msg, ephemeral=True)
 
-    conn = get_bot_instance().db_conn
+    db = _db()
     uid = interaction.user.id
     # Escrow: debita a aposta ANTES de girar os rolos, não só depois da
     # animação (~3s de sleeps). Sem isso, o saldo fica "livre" durante toda
     # a janela de giro, permitindo múltiplas chamadas simultâneas passarem
     # pela checagem de saldo antes de qualquer uma debitar.
-    modify_wallet(conn, uid, -aposta, interaction.user.display_name)
+    await db.write(modify_wallet, uid, -aposta, interaction.user.display_name)
 
     await interaction.response.defer()
     symbols = ["🍒", "🍋", "🍊", "🍉", "🔔", "💎"]
@@ -630,7 +643,9 @@ async def slots(interaction: discord.Interaction, aposta: int):
             description=f"| {' | '.join(line)} |\n\n*Girando...*",
             color=discord.Color.gold(),
         )
-        await interaction.edit_original_response(embed=embed)
+        # Quadros da animação não esperam o envio: se o Discord atrasar, o
+        # agendador descarta os intermediários e manda só o mais recente.
+        EDITS.submit(interaction, embed=embed)
         await asyncio.sleep(1)
 
     # Tabela "alto risco" (RTP alvo ~80%, house edge ~20% — antes RTP≈40,3%,
@@ -647,7 +662,7 @@ async def slots(interaction: discord.Interaction, aposta: int):
         premio = aposta
 
     if premio:
-        modify_wallet(conn, uid, premio)
+        await db.write(modify_wallet, uid, premio)
 
     result = f"| {' | '.join(final)} |"
     if premio:
@@ -656,7 +671,7 @@ async def slots(interaction: discord.Interaction, aposta: int):
         desc = f"{result}\n\n😢 Sem prêmio. -{aposta} Sachês"
 
     embed = discord.Embed(title="🎰 SLOTS — Resultado", description=desc, color=discord.Color.gold())
-    await interaction.edit_original_response(embed=embed)
+    await EDITS.edit(interaction, embed=embed)
 
 
 class CasinoCog(commands.Cog):
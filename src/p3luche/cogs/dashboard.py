@@ -57,6 +57,9 @@ FPS = 8
 #: Quantos erros recentes listar no painel.
 ERROR_LIST_SIZE = 3
 
+#: Quantos pontos de parada do event loop listar no painel.
+STALL_LIST_SIZE = 2
+
 
 class DashboardCog(commands.Cog):
     """Redesenha o painel a cada frame com dados frescos."""
@@ -155,6 +158,9 @@ class DashboardCog(commands.Cog):
             interactions=telemetry.recent_interactions(ACTIVITY_WINDOW_SECONDS, now),
             errors=telemetry.recent_errors(ERROR_LIST_SIZE),
             error_count_hour=telemetry.error_count(3600, now),
+            loop_lag=telemetry.loop_lag(),
+            stalls=telemetry.top_stalls(STALL_LIST_SIZE),
+            latencies=telemetry.command_latencies(),
         )
         live.update(renderable, refresh=True)
 
@@ -362,15 +362,23 @@ def build_economy_section(economy: dict, accent: str) -> Group:
     )
 
 
-def build_activity_section(interactions: list, accent: str, window_seconds: int) -> Group:
+def build_activity_section(interactions: list, accent: str, window_seconds: int,
+                           latencies: dict = None) -> Group:
+    """`latencies` (telemetry.command_latencies) acrescenta o p95 de conclusão
+    de cada comando listado."""
     minutes = window_seconds // 60
+    latencies = latencies or {}
     if not interactions:
         rows = [("—", Text("ninguém por agora", style="dim"))]
     else:
         rows = []
         for entry in interactions:
             when = entry["when"].strftime("%H:%M")
-            rows.append((when, f"{entry['user_name']} · /{entry['command_name']}"))
+            text = Text(f"{entry['user_name']} · /{entry['command_name']}")
+            done = (latencies.get(entry["command_name"]) or {}).get("done")
+            if done:
+                text.append(f" · p95 {done['p95_ms']:.0f}ms", style="dim")
+            rows.append((when, text))
     return _section(f"ATIVIDADE (últimos {minutes} min)", rows, accent)
 
 
@@ -390,8 +398,24 @@ def build_errors_section(errors: list, count_hour: int, accent: str) -> Group:
     return _section(title, rows, accent)
 
 
+def build_loop_section(lag: dict, stalls: list, accent: str) -> Group:
+    """Atraso do event loop e os pontos que mais o travaram (loop_watchdog)."""
+    last = lag.get("last_ms")
+    lag_text = Text("n/d" if last is None else f"{last:.0f} ms")
+    if lag.get("max_ms"):
+        lag_text.append(f" · pior {lag['max_ms']:.0f}", style="dim")
+    rows = [("atraso", lag_text)]
+    for entry in stalls:
+        site = entry["site"]
+        if len(site) > 38:
+            site = "…" + site[-37:]
+        rows.append((f"{entry['count']}x {entry['max'] * 1000:.0f}ms", Text(site, style="yellow")))
+    return _section("EVENT LOOP", rows, accent)
+
+
 def build_dashboard(frame, rng, connection, stats, economy, interactions, errors,
-                    error_count_hour, latency_tracker=None, now: datetime = None):
+                    error_count_hour, latency_tracker=None, now: datetime = None,
+                    loop_lag: dict = None, stalls: list = None, latencies: dict = None):
     """Monta o painel completo: TV à esquerda, dados à direita."""
     accent = ERROR_COLOR if frame.is_error else NORMAL_COLOR
 
@@ -400,9 +424,11 @@ def build_dashboard(frame, rng, connection, stats, economy, interactions, errors
         Text(""),
         build_process_section(stats, accent),
         Text(""),
+        build_loop_section(loop_lag or {}, stalls or [], accent),
+        Text(""),
         build_economy_section(economy, accent),
         Text(""),
-        build_activity_section(interactions, accent, ACTIVITY_WINDOW_SECONDS),
+        build_activity_section(interactions, accent, ACTIVITY_WINDOW_SECONDS, latencies),
         Text(""),
         build_errors_section(errors, error_count_hour, accent),
     )
@@ -2,7 +2,6 @@
 """
 Economia Scrap Seas — pescaria, loja, guilda, exploração, AFK traps e clima.
 """
-import sqlite3
 import threading
 import json
 import os
@@ -24,33 +23,51 @@ from config import (
     CATCHES_TTL_SECONDS,
     FISHING_CHANNEL_ID,
 )
+from db_gateway import get_gateway
 from utils import get_local_file, log_to_gui
+from catch_tables import FALLBACK_CATCH, MAX_TIER, pool_for
+from cooldowns import COOLDOWNS, FLUSH_SECONDS as COOLDOWN_FLUSH_SECONDS
+from leaderboard import LEADERBOARDS, guild_score
+from world_state import WORLD
 from economy_constants import FISH_DB, TRASH_ITEMS, TRASH_ROLL_RATIO
 from cogs.pesca_visuals import (
     resolve_fishing_asset,
     resolve_weather_asset,
 )
 from economy_db import (
+    PlayerSession,
     add_inventory_item,
+    add_party_member,
+    apply_inventory_deltas,
+    compact_fish_sales,
+    create_party,
+    disband_party,
     ensure_user,
-    ensure_v4_tables,
+    find_party,
     get_cooldowns,
+    get_current_rod,
     get_inventory,
     get_rod_upgrades,
     get_scrap,
+    get_trap,
     get_wallet,
-    log_fish_sale,
+    modify_scrap,
     modify_wallet,
+    remove_party_member,
+    reprice_market,
     seed_market_prices,
-    set_cooldown,
     set_current_rod,
-    sync_user_from_economy,
-    sync_user_to_economy,
+    set_trap,
     try_spend_wallet,
     try_upgrade_rod,
 )
 
 
+def _db():
+    """Gateway do banco: escrita serializada fora do event loop (ver db_gateway)."""
+    return get_gateway(get_bot_instance())
+
+
 def _cleanup_stale_catches() -> None:
     now = time.time()
     expired = [uid for uid, (_, ts) in CATCHES_SINCE_RESTART.items() if now - ts > CATCHES_TTL_SECONDS]
@@ -263,9 +280,8 @@ WEATHER_EFFECTS = {
 }
 
 def get_current_weather():
-    cursor = get_bot_instance().db_conn.cursor()
-    row = cursor.execute("SELECT current_weather FROM world_state WHERE id = 1").fetchone()
-    w_key = row['current_weather'] if row else "normal"
+    # Memória (world_state.WORLD): o weather_cycle grava banco e cache juntos.
+    w_key = WORLD.weather
     return w_key, WEATHER_EFFECTS.get(w_key, WEATHER_EFFECTS["normal"])
 
 # --- SISTEMA DE RANKS DA GUILDA (COM TRAVA NO RANK A) ---
@@ -469,6 +485,10 @@ def get_dialogue(npc, key):
     res = NPC_DIALOGUES.get(npc, {}).get(key, "...")
     return random.choice(res) if isinstance(res, list) else res
 def get_daily_shop():
+    # Sorteio fixo por dia: monta uma vez e reaproveita até a virada.
+    return WORLD.daily_shop(datetime.now().strftime("%Y-%m-%d"), _build_daily_shop)
+
+def _build_daily_shop():
     # 1. Lista de Itens ESSENCIAIS (Sempre aparecem fixos)
     # O Chip da Sorte NÃO está aqui (agora ele é rotativo/raro)
     essential_keys = [
@@ -621,8 +641,7 @@ async def loja(interaction: discord.Interaction):
         
         if not item_stats: return await inter.response.send_message("❌ Item sumiu.", ephemeral=True)
 
-        conn = get_bot_instance().db_conn
-        has_account = conn.execute("SELECT 1 FROM economy WHERE user_id = ?", (inter.user.id,)).fetchone()
+        has_account = await _db().read(_has_economy_account, inter.user.id)
         if not has_account: return await inter.response.send_message("❌ Crie conta com /eco pescar.", ephemeral=True)
 
         tipo = item_stats.get('type')
@@ -632,11 +651,13 @@ async def loja(interaction: discord.Interaction):
         # antes.
         if tipo == 'rod':
             custo = item_stats['price']
-            if not try_spend_wallet(conn, inter.user.id, custo, inter.user.name):
+            result = await _db().write(
+                _buy_shop_item, inter.user.id, inter.user.name, item_key, custo,
+                equip=True, require_account=False,
+            )
+            if not result["success"]:
                 return await inter.response.send_message(f"💸 Falta grana ({custo}).", ephemeral=True)
-
-            add_inventory_item(conn, inter.user.id, item_key, 1)
-            set_current_rod(conn, inter.user.id, item_key)
+            COOLDOWNS.recheck(inter.user.id, "last_fish")
 
             await inter.response.send_message(f"🎣 **Compra Efetuada!**\n**{item_stats['name']}** foi adicionada à mochila e equipada.", ephemeral=True)
 
@@ -664,7 +685,7 @@ async def comprar(interaction: discord.Interaction, item: str):
         if user_id != ID_DONO: return await interaction.response.send_message("🔥 Pesado demais para você.", ephemeral=True)
     else:
         # Checa se está na loja do dia
-        daily_shop = get_daily_shop()
+        daily_shop = {entry['key'] for entry in get_daily_shop()}
         # Isca e Energético sempre disponíveis
         if item not in daily_shop and item not in ["isca", "energetico"]:
             return await interaction.response.send_message(f"🚫 O item `{item}` não está na loja hoje.", ephemeral=True)
@@ -673,22 +694,13 @@ async def comprar(interaction: discord.Interaction, item: str):
 
     data = SHOP_ITEMS[item]
     price = data['price']
-    conn = get_bot_instance().db_conn
-
-    # Exige conta já existente (não cria uma nova aqui) — mesmo gate de
-    # antes, só que checando a tabela legada em vez de reler manualmente.
-    has_account = conn.execute("SELECT 1 FROM economy WHERE user_id = ?", (user_id,)).fetchone()
-    if not has_account: return await interaction.response.send_message("❌ Use /eco pescar primeiro.", ephemeral=True)
 
     # --- COMPRA E ARMAZENAMENTO (atômico: relê saldo fresco na hora de gravar) ---
-    if not try_spend_wallet(conn, user_id, price, interaction.user.name):
-        wallet_atual = get_wallet(conn, user_id)
-        return await interaction.response.send_message(f"💸 Sem saldo ({wallet_atual} < {price}).", ephemeral=True)
-
-    # Adiciona o item na mochila (SOMA +1). A coluna legada 'baits' é
-    # derivada automaticamente do inventário por sync_user_to_economy —
-    # não precisa mais de tratamento manual aqui.
-    add_inventory_item(conn, user_id, item, 1)
+    result = await _db().write(_buy_shop_item, user_id, interaction.user.name, item, price)
+    if result["reason"] == "no_account":
+        return await interaction.response.send_message("❌ Use /eco pescar primeiro.", ephemeral=True)
+    if not result["success"]:
+        return await interaction.response.send_message(f"💸 Sem saldo ({result['wallet']} < {price}).", ephemeral=True)
 
     # Mensagem de confirmação
     emoji_tipo = "🎒"
@@ -698,11 +710,82 @@ async def comprar(interaction: discord.Interaction, item: str):
     await interaction.response.send_message(f"✅ **Compra realizada!**\n{emoji_tipo} **{data['name']}** foi guardado na sua mochila.\nUse `/eco saldo` para ver ou usar.", ephemeral=True)
 
 
+def _has_economy_account(conn, user_id: int) -> bool:
+    """Leitura pura (vai pelo pool): o jogador já tem conta na economia?"""
+    return conn.execute("SELECT 1 FROM economy WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+
+def _buy_shop_item(
+    conn,
+    user_id: int,
+    user_name: str,
+    item: str,
+    price: int,
+    quantity: int = 1,
+    equip: bool = False,
+    require_account: bool = True,
+) -> dict:
+    """Job de escrita das compras (/eco comprar, /eco loja, Valerius).
+
+    Cobra, guarda o item e (se `equip`) equipa a vara na mesma ida à thread
+    escritora — nenhuma compra fica com o saldo debitado esperando o resto
+    numa segunda volta pelo event loop.
+    """
+    if require_account:
+        # Exige conta já existente (não cria uma nova aqui) — mesmo gate de
+        # antes, só que checando `users` em vez de reler manualmente.
+        has_account = conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if not has_account:
+            return {"success": False, "reason": "no_account"}
+    if not try_spend_wallet(conn, user_id, price, user_name):
+        return {"success": False, "reason": "insufficient_funds", "wallet": get_wallet(conn, user_id)}
+    # Soma no inventário pelo próprio SQLite. A coluna 'baits' da view
+    # `economy` é derivada do inventário — não precisa de tratamento aqui.
+    apply_inventory_deltas(conn, user_id, {item: quantity})
+    if equip:
+        set_current_rod(conn, user_id, item)
+    return {"success": True, "reason": None}
+
+
+def _guild_progress(rank: str, xp: int, gain: int):
+    """Aplica `gain` de XP de guilda. Devolve (rank, xp, subiu_de_rank).
+
+    Sobe no máximo um rank por vez; o Rank S nunca é alcançado por XP.
+    """
+    rank = rank or 'F'
+    xp = (xp or 0) + gain
+    rank_info = GUILD_RANKS.get(rank, GUILD_RANKS['F'])
+    if rank_info['next'] and rank_info['next'] != 'S' and xp >= rank_info['req_xp']:
+        return rank_info['next'], xp - rank_info['req_xp'], True
+    return rank, xp, False
+
+
+def _persist_catch(conn, session: PlayerSession, ctx: dict) -> dict:
+    """Job de escrita do fim da pesca: grava a sessão numa única transação."""
+    # Saldo, pescados e inventário vão como DELTA em cima do estado do banco
+    # (entre a leitura em pescar() e este ponto há awaits, e outro comando do
+    # mesmo usuário — ex: /eco comprar — pode ter mexido neles). Só o XP de
+    # guilda é absoluto: se a versão mudou, relê e recalcula em cima do novo.
+    for member_id in ctx.get("reward_members", ()):
+        ensure_user(conn, member_id)
+    valor = ctx["valor"]
+    session.add_wallet(valor)
+    session.add_fish_count(1)
+    if valor > 0 and not ctx.get("is_trash"):
+        session.log_sale(ctx["nome"], valor)
+
+    for _ in range(3):
+        rank, xp, _ = _guild_progress(session.guild_rank, session.guild_xp, ctx["xp_gain"])
+        session.set_guild(rank, xp)
+        result = session.flush(conn)
+        if result["success"]:
+            break
+        session.reload(conn)
+    return result
+
+
 async def _finalize_pescar(interaction: discord.Interaction, ctx: dict):
     """Persiste captura e envia embed final."""
-    conn = get_bot_instance().db_conn
-    user_id = ctx["user_id"]
-    inv = ctx["inv"]
     valor = ctx["valor"]
     nome = ctx["nome"]
     emoji = ctx["emoji"]
@@ -713,42 +796,22 @@ async def _finalize_pescar(interaction: discord.Interaction, ctx: dict):
     mission_msg = ctx["mission_msg"]
     mission_completed = ctx["mission_completed"]
     quest_trigger = ctx["quest_trigger"]
-    new_xp_total = ctx["new_xp_total"]
-    current_rank = ctx["current_rank"]
-    used_bait = ctx["used_bait"]
     w_key = ctx["w_key"]
     w_stats = ctx["w_stats"]
 
-    if used_bait and inv.get("isca", 0) <= 0:
-        inv.pop("isca", None)
-
-    # Aplica a pescaria como DELTA em cima do estado fresco do banco, em vez de
-    # sobrescrever com o snapshot lido no início de pescar(). Entre a leitura do
-    # snapshot e este ponto há awaits, e qualquer outro comando do mesmo usuário
-    # (ex: /eco comprar) pode ter alterado saldo/inventário nesse meio —
-    # sobrescrever com o snapshot reverteria essa mudança e duplicaria saldo.
-    # modify_wallet/add_inventory_item já releem o valor atual dentro de sua
-    # própria transação atômica, então não é preciso computar o diff aqui.
-    novo_saldo = modify_wallet(conn, user_id, valor, interaction.user.name)
-
-    inv_before = ctx["inv_before"]
-    for key in set(inv_before) | set(inv):
-        delta = inv.get(key, 0) - inv_before.get(key, 0)
-        if delta != 0:
-            add_inventory_item(conn, user_id, key, delta)
-    fresh_inv = get_inventory(conn, user_id)
-
-    conn.execute(
-        """
-        UPDATE users SET fish_count = fish_count + 1, guild_xp = ?, guild_rank = ?, user_name = ?
-        WHERE user_id = ?
-        """,
-        (new_xp_total, current_rank, interaction.user.name, user_id),
-    )
-    sync_user_to_economy(conn, user_id)
-    if valor > 0 and not ctx.get("is_trash"):
-        log_fish_sale(conn, nome, valor, user_id)
-    conn.commit()
+    result = await _db().write(_persist_catch, ctx["session"], ctx)
+    if not result["success"]:
+        # Nada foi gravado (a conta mudou por fora em todas as tentativas):
+        # não mostra a captura como salva e devolve o cooldown reservado.
+        log_to_gui(f"pescar: captura de {ctx['user_id']} não gravada ({result['reason']})", "WARNING")
+        COOLDOWNS.reset(ctx["user_id"], "last_fish")
+        return await interaction.followup.send(
+            "⚠️ **Falha ao salvar a pescaria.** Sua conta mudou durante a pesca e nada foi gravado "
+            "(iscas não foram gastas). Tente de novo.",
+            ephemeral=True,
+        )
+    novo_saldo = result["wallet"]
+    fresh_inv = result["inventory"]
 
     embed_color = discord.Color.from_rgb(46, 204, 113)
     if tier_p == 0:
@@ -799,51 +862,40 @@ async def pescar(interaction: discord.Interaction):
         log_to_gui(f"interaction.defer() falhou: {e}", "WARNING")
 
     user_id = interaction.user.id
+
+    # 0. RECUSA RÁPIDA: cooldown ativo conhecido responde da memória, sem
+    # tocar no SQLite (ver cooldowns.py). Spam de /eco pescar para aqui.
+    blocked = COOLDOWNS.blocked_until(user_id, "last_fish")
+    if blocked:
+        ready_at, rod_name = blocked
+        return await interaction.followup.send(
+            f"⏳ **{rod_name}:** Descansando... Volte <t:{int(ready_at)}:R>.", ephemeral=True
+        )
+
     conn = get_bot_instance().db_conn
     cursor = conn.cursor()
 
     # 1. BUSCA DADOS COMPLETOS (camada v4)
-    # A checagem de conta nova usa a tabela legada `economy` (não `users`)
-    # porque comandos ainda não migrados (saldo, rank...) só leem `economy`.
     # Fase 8: não interrompe mais o primeiro contato do jogador com um
-    # "conta criada, tente de novo" — ensure_user() já deixa todas as
-    # tabelas v4 (users/user_rods/rod_upgrades/user_cooldowns) com as linhas
-    # e defaults corretos (wallet=0, vara_bambu, cooldown livre etc.), então
-    # o fluxo cai direto na primeira pescaria de verdade, na mesma chamada.
-    is_new_account = not cursor.execute(
-        "SELECT 1 FROM economy WHERE user_id = ?", (user_id,)
-    ).fetchone()
-    ensure_user(conn, user_id, interaction.user.name)
-    if is_new_account:
-        sync_user_to_economy(conn, user_id)
-
-    row = cursor.execute("""
-        SELECT u.wallet, u.fish_count, u.guild_rank, u.guild_xp, u.scrap,
-               ur.current_rod, ru.luck_level, ru.cd_level,
-               uc.last_fish,
-               q.current_chapter
-        FROM users u
-        LEFT JOIN user_rods ur ON u.user_id = ur.user_id
-        LEFT JOIN rod_upgrades ru ON u.user_id = ru.user_id
-        LEFT JOIN user_cooldowns uc ON u.user_id = uc.user_id
-        LEFT JOIN quest_progress q ON u.user_id = q.user_id
-        WHERE u.user_id = ?
-    """, (user_id,)).fetchone()
-
-    # 2. CARREGA INVENTÁRIO E VARA
-    inv = get_inventory(conn, user_id)
-    # Snapshot do inventário no momento da leitura: usado para persistir a
-    # pescaria como DELTA (ganho/perda), não como substituição total do
-    # estado — evita apagar mudanças feitas por outros comandos do mesmo
-    # usuário entre esta leitura e a gravação final.
-    inv_before = dict(inv)
-
-    current_rod_key = row['current_rod'] if row['current_rod'] else 'vara_bambu'
+    # "conta criada, tente de novo" — PlayerSession.load() cria a conta
+    # (ensure_user) quando ela não existe, então o fluxo cai direto na
+    # primeira pescaria de verdade, na mesma chamada.
+    # A sessão traz users/vara/upgrades/cooldowns/inventário numa consulta só
+    # e acumula as mutações da pescaria até o flush final em _persist_catch.
+    # Lê pelo pool de leitura; só a conta nova (que precisa de INSERT) vai
+    # para o escritor do gateway.
+    session = await _db().read(PlayerSession.load, user_id, interaction.user.name, create=False)
+    if session is None:
+        session = await _db().write(PlayerSession.load, user_id, interaction.user.name)
+    quest = cursor.execute("SELECT current_chapter FROM quest_progress WHERE user_id = ?", (user_id,)).fetchone()
+    current_chapter = quest['current_chapter'] if quest else None
+
+    current_rod_key = session.current_rod
     if current_rod_key not in ROD_STATS: current_rod_key = 'vara_bambu'
     rod_data = ROD_STATS[current_rod_key]
 
     # 3. CARREGA UPGRADES
-    upgrades = {"luck": row['luck_level'] or 0, "cd": row['cd_level'] or 0}
+    upgrades = session.upgrades
 
     luck_bonus = 1 + (upgrades.get("luck", 0) * 0.10) # +10% por nível
     cd_reduction = 1 - (upgrades.get("cd", 0) * 0.05) # -5% por nível
@@ -855,68 +907,34 @@ async def pescar(interaction: discord.Interaction):
     agora = datetime.now()
     agora_str = agora.strftime("%Y-%m-%d %H:%M:%S.%f")
 
-    if row['last_fish']:
-        try:
-            last_fish_time = datetime.strptime(row['last_fish'], "%Y-%m-%d %H:%M:%S.%f")
-            diff = (agora - last_fish_time).total_seconds()
-            if diff < actual_cd:
-                wait_time = int(actual_cd - diff)
-                ts = int((datetime.now() + timedelta(seconds=wait_time)).timestamp())
-                return await interaction.followup.send(f"⏳ **{rod_data['name']}:** Descansando... Volte <t:{ts}:R>.", ephemeral=True)
-        except ValueError: pass
-
     # Reserva o cooldown IMEDIATAMENTE após a checagem passar, ANTES de
     # qualquer await. Sem isso, uma segunda chamada de /eco pescar do mesmo
     # usuário, enquanto a primeira ainda está suspensa em algum await antes de
-    # gravar, leria o last_fish antigo, passaria pela checagem acima e abriria
-    # um segundo fluxo em paralelo — duplicando a captura dentro do intervalo
-    # de um único cooldown. Não mova isto para depois do processamento.
-    set_cooldown(conn, user_id, "last_fish", agora_str)
+    # gravar, passaria pela checagem e abriria um segundo fluxo em paralelo —
+    # duplicando a captura dentro do intervalo de um único cooldown. Não mova
+    # isto para depois do processamento.
+    # Checagem e reserva são uma operação só no registro em memória; o
+    # last_fish lido do banco só importa no primeiro acesso depois do boot.
+    # A gravação em user_cooldowns sai no flush periódico (write-behind).
+    COOLDOWNS.seed(user_id, "last_fish", session.cooldowns.get("last_fish"), actual_cd, rod_data['name'])
+    reserved, ready_at = COOLDOWNS.try_reserve(
+        user_id, "last_fish", actual_cd, rod_data['name'], now=agora.timestamp()
+    )
+    if not reserved:
+        return await interaction.followup.send(
+            f"⏳ **{rod_data['name']}:** Descansando... Volte <t:{int(ready_at)}:R>.", ephemeral=True
+        )
 
     # 5. CONSUMO DE ITENS
-    used_bait = False; used_magnet = False; used_firewall = False; used_chip = False
-    # Fallback de compatibilidade com a coluna legada 'baits' (só leitura —
-    # a escrita dela agora é 100% derivada do inventário via sync_user_to_economy).
-    legacy_row = cursor.execute("SELECT baits FROM economy WHERE user_id = ?", (user_id,)).fetchone()
-    legacy_baits = (legacy_row['baits'] if legacy_row and legacy_row['baits'] else 0)
-
-    # Consome isca
-    if inv.get("isca", 0) > 0: 
-        inv["isca"] -= 1
-        if legacy_baits > 0: legacy_baits -= 1
-        used_bait = True
-    elif legacy_baits > 0: 
-        legacy_baits -= 1
-        used_bait = True
-    
-    if inv.get("isca", 0) <= 0: inv.pop("isca", None)
-
-    # Consome outros itens
-    if inv.get("firewall", 0) > 0: inv["firewall"] -= 1; used_firewall = True
-    if inv.get("firewall", 0) <= 0: inv.pop("firewall", None)
-    
-    if inv.get("chip_sorte", 0) > 0: inv["chip_sorte"] -= 1; used_chip = True
-    if inv.get("chip_sorte", 0) <= 0: inv.pop("chip_sorte", None)
-
-    used_brilhante = False
-    used_fedorenta = False
-    if inv.get("isca_brilhante", 0) > 0:
-        inv["isca_brilhante"] -= 1
-        used_brilhante = True
-    if inv.get("isca_brilhante", 0) <= 0:
-        inv.pop("isca_brilhante", None)
-
-    if inv.get("isca_fedorenta", 0) > 0:
-        inv["isca_fedorenta"] -= 1
-        used_fedorenta = True
-    if inv.get("isca_fedorenta", 0) <= 0:
-        inv.pop("isca_fedorenta", None)
-
-    if inv.get("isca_eletrica", 0) > 0:
-        inv["isca_eletrica"] -= 1
+    # (só em memória, na sessão — vai pro banco junto com a captura)
+    used_bait = session.consume_item("isca")
+    used_magnet = False
+    used_firewall = session.consume_item("firewall")
+    used_chip = session.consume_item("chip_sorte")
+    used_brilhante = session.consume_item("isca_brilhante")
+    used_fedorenta = session.consume_item("isca_fedorenta")
+    if session.consume_item("isca_eletrica"):
         used_chip = True
-    if inv.get("isca_eletrica", 0) <= 0:
-        inv.pop("isca_eletrica", None)
 
     # ==========================================================
     # 6. PESCA (RNG + CLIMA ATUALIZADO)
@@ -934,33 +952,30 @@ async def pescar(interaction: discord.Interaction):
 
     roll = random.randint(1, 100)
     
-    pool = []
+    # Pools pré-compilados (catch_tables): nada de varrer FISH_DB por pesca.
     if used_chip: 
-        pool = [p for p in FISH_DB if p[4] >= 2]
-        if not pool: pool = [p for p in FISH_DB if p[4] > 0]
+        pool = pool_for(MAX_TIER, "chip")
     elif roll <= trash_chance: 
         # O tier 0 mistura lixo e peixe inicial, então sortear uniformemente
         # entre eles amarraria a taxa de lixo à quantidade de linhas de cada
         # tipo no FISH_DB. Separamos os dois e usamos TRASH_ROLL_RATIO, para
         # que adicionar peixe ou lixo novo na tabela não mexa no balanceamento.
-        lixo_pool = [p for p in FISH_DB if p[4] == 0 and p[0] in TRASH_ITEMS]
-        iniciais_pool = [p for p in FISH_DB if p[4] == 0 and p[0] not in TRASH_ITEMS]
+        lixo_pool = pool_for(0, "lixo")
+        iniciais_pool = pool_for(0, "iniciais")
         if lixo_pool and iniciais_pool:
             pool = lixo_pool if random.random() < TRASH_ROLL_RATIO else iniciais_pool
         else:
             pool = lixo_pool or iniciais_pool
-        if not pool: pool = [("Bota Velha", 0, 5, "👢", 0, "Que nojo!")]
     else: 
         # Modifica o Tier Máximo com base no bônus do clima
         max_tier_possible = rod_data['tier'] + w_stats['tier_bonus']
-        pool = [p for p in FISH_DB if p[4] <= max_tier_possible and p[4] > 0]
+        pool = pool_for(max_tier_possible, "normal")
         if used_brilhante and random.random() < 0.2:
-            tier2_pool = [p for p in pool if p[4] == 2]
+            tier2_pool = pool_for(max_tier_possible, "brilhante")
             if tier2_pool:
                 pool = tier2_pool
-        if not pool: pool = [p for p in FISH_DB if p[4] == 0]
 
-    catch_data = random.choice(pool)
+    catch_data = pool.sample() if pool else FALLBACK_CATCH
     nome, v_min, v_max, emoji, tier_p, frase = catch_data
     
     # Cálculo de Valor (Aplicando Clima)
@@ -972,33 +987,22 @@ async def pescar(interaction: discord.Interaction):
 
     valor = 0
     if is_trash:
-        inv[nome] = inv.get(nome, 0) + 1
+        session.add_item(nome, 1)
     else:
         valor = base_val
-        if inv.get("ima_saches", 0) > 0:
+        if session.consume_item("ima_saches"):
             valor *= 2
-            inv["ima_saches"] -= 1
             used_magnet = True
-        
-        if inv.get("ima_saches", 0) <= 0:
-            inv.pop("ima_saches", None)
 
     # 7. PROGRESSO DE MISSÃO EM GRUPO
     mission_msg = ""
     mission_completed = False
+    xp_ganho = 0
+    # Demais membros premiados: a conta é garantida no job de escrita.
+    reward_members = []
     
-    all_parties = cursor.execute("SELECT leader_id, members_json, active_mission_id, mission_progress, mission_target FROM parties").fetchall()
-    my_party = None
-    
-    for p in all_parties:
-        is_leader = (p['leader_id'] == user_id)
-        try: mems = json.loads(p['members_json'])
-        except: mems = []
-        is_member = (user_id in mems)
-        if is_leader or is_member:
-            my_party = p
-            break
-    
+    my_party = find_party(conn, user_id)
+
     if my_party and my_party['active_mission_id']:
         m_id = my_party['active_mission_id']
         progress = my_party['mission_progress']
@@ -1023,7 +1027,7 @@ async def pescar(interaction: discord.Interaction):
             
             if inc > 0:
                 new_prog = progress + inc
-                cursor.execute("UPDATE parties SET mission_progress = ? WHERE leader_id = ?", (new_prog, my_party['leader_id']))
+                session.queue("UPDATE parties SET mission_progress = ? WHERE leader_id = ?", (new_prog, my_party['leader_id']))
                 mission_msg = f"\n📈 **Missão de Grupo:** {new_prog}/{target} (+{inc})"
                 
                 if new_prog >= target:
@@ -1042,37 +1046,38 @@ async def pescar(interaction: discord.Interaction):
 
                     for member_id in unique_members:
                         share = base_share + remainder if member_id == leader_id else base_share
-                        modify_wallet(conn, member_id, share)
-                        conn.execute("UPDATE users SET guild_xp = guild_xp + ? WHERE user_id = ?", (reward_xp, member_id))
-                        sync_user_to_economy(conn, member_id)
-
-                    cursor.execute("UPDATE parties SET active_mission_id = NULL, mission_progress = 0 WHERE leader_id = ?", (my_party['leader_id'],))
+                        if member_id == user_id:
+                            # A parte de quem pescou entra na própria sessão —
+                            # o XP soma no ganho da pescaria em vez de ser
+                            # sobrescrito pelo guild_xp gravado no flush.
+                            session.add_wallet(share)
+                            xp_ganho += reward_xp
+                            continue
+                        reward_members.append(member_id)
+                        session.queue(
+                            "UPDATE users SET wallet = MAX(0, wallet + ?), guild_xp = guild_xp + ?, version = version + 1 WHERE user_id = ?",
+                            (share, reward_xp, member_id),
+                            leaderboards=("wallet", "guild"),
+                        )
+
+                    session.queue("UPDATE parties SET active_mission_id = NULL, mission_progress = 0 WHERE leader_id = ?", (my_party['leader_id'],))
                     mission_msg = f"\n🎉 **MISSÃO CUMPRIDA!**\nGrupo completou: **{m_data['title']}**\nPrêmio: 💰 {reward_money} | ⭐ {reward_xp} XP!"
 
     # 8. XP DE GUILDA E RANK UP
-    xp_ganho = 0
-    if row['current_chapter'] in ['acesso_liberado', 'city_spotted', 'garrafa_encontrada']:
+    # O rank/XP final é calculado de novo em _persist_catch, em cima do
+    # estado do flush; aqui só decide a mensagem.
+    if current_chapter in ['acesso_liberado', 'city_spotted', 'garrafa_encontrada']:
         xp_table = {0: 2, 1: 10, 2: 25, 3: 100, 4: 500}
-        xp_ganho = xp_table.get(tier_p, 2)
+        xp_ganho += xp_table.get(tier_p, 2)
 
-    new_xp_total = (row['guild_xp'] or 0) + xp_ganho
-    
-    current_rank = row['guild_rank'] if row['guild_rank'] else 'F'
-    rank_info = GUILD_RANKS.get(current_rank, GUILD_RANKS['F'])
-    
-    if rank_info['next'] and new_xp_total >= rank_info['req_xp']:
-        if rank_info['next'] == 'S':
-             pass
-        else:
-            current_rank = rank_info['next']
-            new_xp_total -= rank_info['req_xp']
-            mission_msg += f"\n🌟 **RANK UP!** Agora você é Rank {current_rank}!"
+    current_rank, _, ranked_up = _guild_progress(session.guild_rank, session.guild_xp, xp_ganho)
+    if ranked_up:
+        mission_msg += f"\n🌟 **RANK UP!** Agora você é Rank {current_rank}!"
 
     # 9. QUEST DA GARRAFA
     quest_trigger = False
-    prev_fish_count = row['fish_count'] if row['fish_count'] else 0
-    new_fish_count = prev_fish_count + 1
-    already_has = inv.get('garrafa_incrustada', 0) > 0
+    new_fish_count = session.fish_count + 1
+    already_has = session.inventory.get('garrafa_incrustada', 0) > 0
 
     if not already_has:
         async with CATCHES_LOCK:
@@ -1081,31 +1086,27 @@ async def pescar(interaction: discord.Interaction):
             session_count = previous_count + 1
             CATCHES_SINCE_RESTART[user_id] = (session_count, time.time())
 
-        try:
-            cursor.execute("""
-                INSERT INTO persistent_catches(user_id, catch_count, updated_at)
-                VALUES (?, 1, ?)
-                ON CONFLICT(user_id) DO UPDATE SET catch_count = persistent_catches.catch_count + 1, updated_at = excluded.updated_at
-            """, (user_id, agora_str))
-            get_bot_instance().db_conn.commit()
-        except sqlite3.Error: pass
+        session.queue("""
+            INSERT INTO persistent_catches(user_id, catch_count, updated_at)
+            VALUES (?, 1, ?)
+            ON CONFLICT(user_id) DO UPDATE SET catch_count = persistent_catches.catch_count + 1, updated_at = excluded.updated_at
+        """, (user_id, agora_str))
 
         if session_count == 2: quest_trigger = True
         elif (new_fish_count % 5) == 0: quest_trigger = True
         elif random.randint(1, 4) == 1: quest_trigger = True
 
         if quest_trigger:
-            inv['garrafa_incrustada'] = 1
-            if not row['current_chapter'] or row['current_chapter'] == 'inicio':
-                cursor.execute("UPDATE quest_progress SET current_chapter = 'garrafa_encontrada' WHERE user_id = ?", (user_id,))
+            session.add_item('garrafa_incrustada', 1)
+            if not current_chapter or current_chapter == 'inicio':
+                session.queue("UPDATE quest_progress SET current_chapter = 'garrafa_encontrada' WHERE user_id = ?", (user_id,))
             else:
-                cursor.execute("INSERT OR IGNORE INTO quest_progress (user_id, current_chapter) VALUES (?, 'garrafa_encontrada')", (user_id,))
+                session.queue("INSERT OR IGNORE INTO quest_progress (user_id, current_chapter) VALUES (?, 'garrafa_encontrada')", (user_id,))
                 
     # 10. SALVA E ENTREGA O RESULTADO
     catch_ctx = {
         "user_id": user_id,
-        "inv": inv,
-        "inv_before": inv_before,
+        "session": session,
         "valor": valor,
         "nome": nome,
         "emoji": emoji,
@@ -1116,13 +1117,13 @@ async def pescar(interaction: discord.Interaction):
         "mission_msg": mission_msg,
         "mission_completed": mission_completed,
         "quest_trigger": quest_trigger,
-        "new_xp_total": new_xp_total,
-        "current_rank": current_rank,
+        "xp_gain": xp_ganho,
         "used_bait": used_bait,
         "agora_str": agora_str,
         "w_key": w_key,
         "w_stats": w_stats,
         "is_trash": is_trash,
+        "reward_members": reward_members,
     }
 
     await _finalize_pescar(interaction, catch_ctx)
@@ -1227,16 +1228,25 @@ class CityHubView(discord.ui.View):
         else: await interaction.response.send_message(embed=embed, view=TavernView(self.user_id), ephemeral=True)
 
 #(--- COMANDO DE EXPLORAÇÃO --- Atualizado para incluir lógica de missão de guilda)
+EXPLORE_COOLDOWN = 600  # 10 minutos de recarga do drone
+
 @eco_group.command(name="explorar", description="Envia o drone para a Ilha, Cidade ou Mar.")
 async def explorar(interaction: discord.Interaction):
     user_id = interaction.user.id
+
+    # Cooldown ativo conhecido: recusa da memória, sem tocar no SQLite.
+    blocked = COOLDOWNS.blocked_until(user_id, "last_explore")
+    if blocked:
+        return await interaction.response.send_message(
+            f"⏳ **Drone Recarregando!** <t:{int(blocked[0])}:R>.", ephemeral=True
+        )
+
     conn = get_bot_instance().db_conn
     cursor = conn.cursor()
 
     # 1. VERIFICAÇÕES BÁSICAS
     has_account = cursor.execute("SELECT 1 FROM economy WHERE user_id = ?", (user_id,)).fetchone()
     if not has_account: return await interaction.response.send_message("❌ Crie uma conta pescando primeiro.", ephemeral=True)
-    ensure_user(conn, user_id, interaction.user.name)
 
     quest = cursor.execute("SELECT current_chapter, inventory FROM quest_progress WHERE user_id = ?", (user_id,)).fetchone()
     city_spotted = quest and quest['current_chapter'] not in ['inicio', 'locked', None]
@@ -1248,21 +1258,19 @@ async def explorar(interaction: discord.Interaction):
     # view.wait() leria o cooldown/saldo antigos e passaria pela checagem
     # em paralelo com a 1ª.
     custo = 80
-    agora = datetime.now()
-    agora_str = agora.strftime("%Y-%m-%d %H:%M:%S.%f")
-
-    last_explore = get_cooldowns(conn, user_id)["last_explore"]
-    if last_explore:
-        try:
-            last_exp = datetime.strptime(last_explore, "%Y-%m-%d %H:%M:%S.%f")
-            if (agora - last_exp).total_seconds() < 600:
-                ts = int((last_exp + timedelta(minutes=10)).timestamp())
-                return await interaction.response.send_message(f"⏳ **Drone Recarregando!** <t:{ts}:R>.", ephemeral=True)
-        except ValueError: pass
-
-    if not try_spend_wallet(conn, user_id, custo, interaction.user.name):
+    if not COOLDOWNS.known(user_id, "last_explore"):
+        cooldowns = await _db().write(get_cooldowns, user_id)
+        COOLDOWNS.seed(user_id, "last_explore", cooldowns["last_explore"], EXPLORE_COOLDOWN)
+
+    # A reserva em memória vem ANTES do débito: a cobrança é um await no
+    # escritor do gateway, e uma 2ª chamada nesse meio já esbarra no
+    # cooldown reservado. Sem saldo, a reserva é desfeita.
+    reserved, ready_at = COOLDOWNS.try_reserve(user_id, "last_explore", EXPLORE_COOLDOWN)
+    if not reserved:
+        return await interaction.response.send_message(f"⏳ **Drone Recarregando!** <t:{int(ready_at)}:R>.", ephemeral=True)
+    if not await _db().write(try_spend_wallet, user_id, custo, interaction.user.name):
+        COOLDOWNS.reset(user_id, "last_explore")
         return await interaction.response.send_message(f"🔋 Precisa de {custo} Sachês para operar o drone.", ephemeral=True)
-    set_cooldown(conn, user_id, "last_explore", agora_str)
 
     # 3. DECISÃO (VIEW DE ESCOLHA) — só depois de custo+cooldown já reservados.
     modo_exploracao = "farm"
@@ -1289,12 +1297,8 @@ async def explorar(interaction: discord.Interaction):
     # --- LÓGICA DE MISSÃO DE GUILDA (EXPLORE COUNT) ---
     mission_msg = ""
     # (Lógica da missão mantida igual para economizar espaço visual, ela estava correta)
-    all_parties = cursor.execute("SELECT leader_id, members_json, active_mission_id, mission_progress, mission_target FROM parties").fetchall()
-    my_party = None
-    for p in all_parties:
-        if p['leader_id'] == user_id or user_id in json.loads(p['members_json']):
-            my_party = p; break
-            
+    my_party = find_party(conn, user_id)
+
     if my_party and my_party['active_mission_id']:
         m_id = my_party['active_mission_id']
         m_data = None
@@ -1319,8 +1323,9 @@ async def explorar(interaction: discord.Interaction):
                 for mid in unique_mems:
                     share = base_share + remainder if mid == leader_id else base_share
                     modify_wallet(conn, mid, share)
-                    conn.execute("UPDATE users SET guild_xp = guild_xp + ? WHERE user_id = ?", (rx, mid))
-                    sync_user_to_economy(conn, mid)
+                    conn.execute("UPDATE users SET guild_xp = guild_xp + ?, version = version + 1 WHERE user_id = ?", (rx, mid))
+                # O saldo já foi observado pelo modify_wallet; o XP de guilda não.
+                LEADERBOARDS.invalidate("guild")
                 cursor.execute("UPDATE parties SET active_mission_id=NULL, mission_progress=0 WHERE leader_id=?", (my_party['leader_id'],))
                 mission_msg = f"\n🎉 **Missão Completa!** Ganharam {rw} Sachês!"
 
@@ -1355,7 +1360,7 @@ async def explorar(interaction: discord.Interaction):
             # ACESSO NEGADO
             embed = discord.Embed(title="🚫 ACESSO NEGADO", description="Os guardas exigem o **Selo do Capitão**.\nVolte quando tiver autorização.", color=discord.Color.red())
             embed.set_footer(text="Dica: Pesque a Garrafa na ilha e use /ler_garrafa.")
-            set_cooldown(conn, user_id, "last_explore", None)  # Reembolsa só o cooldown (não o custo, igual antes)
+            COOLDOWNS.reset(user_id, "last_explore")  # Reembolsa só o cooldown (não o custo, igual antes)
             await interaction.followup.send(embed=embed)
         return
 
@@ -1392,7 +1397,7 @@ async def explorar(interaction: discord.Interaction):
              msg += f"\n\n📦 **Loot Raro!** Você achou uma Caixa Misteriosa."
              cor = discord.Color.gold()
         elif item_ganho == "energetico":
-             set_cooldown(conn, user_id, "last_fish", None)
+             COOLDOWNS.reset(user_id, "last_fish")
              msg += f"\n\n⚡ **Energia Pura!** Seu cooldown de PESCA foi resetado."
              cor = discord.Color.blue()
 
@@ -1459,19 +1464,17 @@ async def presentear(interaction: discord.Interaction, amigo: discord.Member, it
     if price == 0 and owned_key is None:
         return await interaction.response.send_message("🚫 Você não possui esse item para presentear.", ephemeral=True)
 
-    # 'rod_tier' (gate de "já tem vara melhor") não tem equivalente na v4 —
-    # só existe na tabela legada. Garante que a linha legada do destinatário
-    # existe antes de ler esse campo específico.
+    # Gate de "já tem vara melhor": o tier vem da vara equipada (user_rods),
+    # não mais da coluna 'rod_tier' da tabela legada, que só presentes
+    # atualizavam e que deixou de existir com a view `economy`.
     ensure_user(conn, amigo.id, amigo.name)
-    sync_user_to_economy(conn, amigo.id)
-    receiver_row = conn.execute("SELECT rod_tier FROM economy WHERE user_id = ?", (amigo.id,)).fetchone()
-    receiver_rod_tier = receiver_row['rod_tier'] if receiver_row and receiver_row['rod_tier'] else 0
+    receiver_rod_tier = ROD_STATS.get(get_current_rod(conn, amigo.id), {}).get('tier', 0)
 
     msg = ""
     if data['type'] == 'rod':
         if receiver_rod_tier >= data['tier']: return await interaction.response.send_message(f"⚠️ {amigo.name} já tem vara melhor.", ephemeral=True)
-        conn.execute("UPDATE economy SET rod_tier = ? WHERE user_id = ?", (data['tier'], amigo.id))
         set_current_rod(conn, amigo.id, data['key'])
+        COOLDOWNS.recheck(amigo.id, "last_fish")
         msg = f"🎣 **Presente:** {data['name']} entregue!"
     elif data['type'] == 'flex':
         add_inventory_item(conn, amigo.id, data['name'], 1)
@@ -1531,19 +1534,18 @@ class RodSelect(discord.ui.Select):
         conn = get_bot_instance().db_conn
 
         # Garante que a vara equipada esteja presente no inventário (não deve
-        # 'sumir'). Lê/escreve pela camada v4 (user_inventory) — escrever só
-        # na tabela legada `economy` aqui não bastava: ensure_user() só
-        # sincroniza user_rods/user_inventory da legada pra v4 na CRIAÇÃO da
-        # conta (INSERT OR IGNORE), não a cada chamada. Era por isso que
-        # trocar de vara "funcionava" (mensagem de sucesso) mas /eco pescar
-        # continuava usando a vara antiga, lida da tabela v4 que nunca era
-        # atualizada.
+        # 'sumir'). Lê/escreve pela camada v4 (user_inventory/user_rods) — é
+        # de lá que /eco pescar lê a vara. Antes isto escrevia só na tabela
+        # legada `economy`: a troca "funcionava" (mensagem de sucesso) mas a
+        # pescaria continuava usando a vara antiga.
         if new_rod != 'vara_bambu':
             inv = get_inventory(conn, self.user_id)
             if inv.get(new_rod, 0) <= 0:
                 add_inventory_item(conn, self.user_id, new_rod, 1)
 
         set_current_rod(conn, self.user_id, new_rod)
+        # A vara nova pode ter outro cooldown: o próximo /eco pescar recalcula.
+        COOLDOWNS.recheck(self.user_id, "last_fish")
 
         await interaction.response.send_message(f"✅ **Pronto!** Você equipou a **{rod_name}**.", ephemeral=True)
 
@@ -1610,14 +1612,13 @@ class ConsumeSelect(discord.ui.Select):
 
         # Pegamos o ID de quem clicou (Mais seguro que usar o salvo no init)
         user_id = interaction.user.id
-        cursor = get_bot_instance().db_conn.cursor()
+        conn = get_bot_instance().db_conn
         
         # Recarrega inventário para garantir que não houve dupe
-        row = cursor.execute("SELECT inventory, wallet FROM economy WHERE user_id = ?", (user_id,)).fetchone()
-        if not row: return
+        if not conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone(): return
         
-        inv = json.loads(row['inventory'])
-        wallet = row['wallet']
+        inv = get_inventory(conn, user_id)
+        consumed = False
         
         if inv.get(item_key, 0) <= 0:
             return await interaction.response.send_message("❌ Você não tem mais este item.", ephemeral=True)
@@ -1629,33 +1630,31 @@ class ConsumeSelect(discord.ui.Select):
 
         # 1. ENERGÉTICO (Reseta Cooldown)
         if item_key == "energetico":
-            inv[item_key] -= 1
+            consumed = True
             # Corrigido: escrevia em 'last_fish_time', uma coluna órfã nunca
             # lida pela checagem real de cooldown (que usa 'last_fish') —
             # o item não fazia NADA. Mesmo padrão de reset já usado
             # corretamente no evento "Energético Perdido" do drone.
-            set_cooldown(get_bot_instance().db_conn, user_id, "last_fish", None)
+            COOLDOWNS.reset(user_id, "last_fish")
             msg = "⚡ **Energético bebido!** Você está pilhado! O tempo de espera da pesca foi zerado."
 
         # 2. CAIXA MISTERIOSA (Sorteio)
         elif item_key == "caixa_misteriosa":
-            inv[item_key] -= 1
+            consumed = True
             premio = random.randint(100, 1000)
-            wallet += premio
-            cursor.execute("UPDATE economy SET wallet = ? WHERE user_id = ?", (wallet, user_id))
+            modify_wallet(conn, user_id, premio)
             msg = f"🎁 **Caixa Aberta!** Você encontrou 💰 **{premio} Sachês** dentro dela."
 
         # 3. REDE DE MÃO (Pesca 3 itens aleatórios instantâneos)
         elif item_key == "rede":
-            inv[item_key] -= 1
+            consumed = True
             # Sorteia 3 recompensas simples (dinheiro) para simular pesca
             lucro_rede = 0
             for _ in range(3):
                 val = random.randint(10, 50)
                 lucro_rede += val
             
-            wallet += lucro_rede
-            cursor.execute("UPDATE economy SET wallet = ? WHERE user_id = ?", (wallet, user_id))
+            modify_wallet(conn, user_id, lucro_rede)
             msg = f"🕸️ **Rede lançada!** Você puxou um monte de tralha e peixes pequenos, lucrando 💰 **{lucro_rede} Sachês**."
 
         # 4. BUFFS NOVOS (Ímã, Firewall, Chip)
@@ -1676,11 +1675,8 @@ class ConsumeSelect(discord.ui.Select):
             msg = f"❓ O item **{item_data.get('name', item_key)}** não pode ser usado através deste menu."
 
         # Salva alterações (se gastou algo)
-        if inv.get(item_key, 0) <= 0 and item_key in inv:
-            del inv[item_key] 
-            
-        cursor.execute("UPDATE economy SET inventory = ? WHERE user_id = ?", (json.dumps(inv), user_id))
-        get_bot_instance().db_conn.commit()
+        if consumed:
+            add_inventory_item(conn, user_id, item_key, -1)
 
         # SEGURANÇA FINAL
         if not msg:
@@ -1779,9 +1775,7 @@ async def saldo(interaction: discord.Interaction, usuario: discord.Member = None
 async def diario(interaction: discord.Interaction):
     user_id = interaction.user.id
     conn = get_bot_instance().db_conn
-    ensure_v4_tables(conn)
     ensure_user(conn, user_id, interaction.user.name)
-    sync_user_from_economy(conn, user_id)
 
     cursor = conn.cursor()
     row = cursor.execute(
@@ -1826,28 +1820,61 @@ async def diario(interaction: discord.Interaction):
         "UPDATE user_cooldowns SET last_daily = ?, daily_streak = ? WHERE user_id = ?",
         (agora_str, streak, user_id),
     )
-    sync_user_to_economy(conn, user_id)
     conn.commit()
+    novo_saldo = cursor.execute("SELECT wallet FROM users WHERE user_id = ?", (user_id,)).fetchone()[0]
+    LEADERBOARDS.observe("wallet", user_id, novo_saldo)
     await interaction.response.send_message(
         f"📅 **Diário dia {streak}!** Recebeu **{total}** Sachês (bônus de streak: +{bonus})."
     )
 
+# Categorias do /eco rank -> [(métrica do leaderboard, título do campo)].
+# "geral" é o Hall da Fama de sempre (saldo + pescados).
+RANK_CATEGORIES = {
+    "geral": [("wallet", "💰 Magnatas"), ("fish_count", "🎣 Pescadores")],
+    "guilda": [("guild", "🏛️ Guilda")],
+    "sucata": [("scrap", "⚙️ Sucateiros")],
+    "ilha": [("island_tier", "🏝️ Ilhas")],
+    "semana": [("weekly_catches", "📅 Peixes da Semana")],
+}
+
+
+def _format_rank_value(metric, row):
+    if metric == "guild":
+        return f"Rank {row['guild_rank'] or 'F'} ({row['guild_xp'] or 0} XP)"
+    if metric == "island_tier":
+        return f"Tier {row['value']}"
+    return str(row['value'])
+
+
 @eco_group.command(name="rank", description="Hall da Fama.")
-async def rank(interaction: discord.Interaction):
-    cursor = get_bot_instance().db_conn.cursor()
-    rows_m = cursor.execute("SELECT user_name, wallet FROM economy ORDER BY wallet DESC LIMIT 10").fetchall()
-    rows_f = cursor.execute("SELECT user_name, fish_count FROM economy ORDER BY fish_count DESC LIMIT 10").fetchall()
-    
-    def fmt(rows, type_v):
+@app_commands.describe(categoria="Qual ranking ver (padrão: saldo e pescados)")
+@app_commands.choices(categoria=[
+    app_commands.Choice(name="Geral (saldo e pescados)", value="geral"),
+    app_commands.Choice(name="Guilda", value="guilda"),
+    app_commands.Choice(name="Sucata", value="sucata"),
+    app_commands.Choice(name="Ilha", value="ilha"),
+    app_commands.Choice(name="Peixes da semana", value="semana"),
+])
+async def rank(interaction: discord.Interaction, categoria: app_commands.Choice[str] = None):
+    fields = RANK_CATEGORIES[categoria.value if categoria else "geral"]
+    metrics = [metric for metric, _ in fields]
+
+    # Na maioria das chamadas o top-N já está em memória e o SQLite nem é
+    # tocado; só as métricas invalidadas/expiradas vão ao pool de leitura.
+    boards = {metric: LEADERBOARDS.cached(metric) for metric in metrics}
+    missing = [metric for metric, rows in boards.items() if rows is None]
+    if missing:
+        boards.update(await _db().read(LEADERBOARDS.load, missing))
+
+    def fmt(metric, rows):
         txt = ""
         for i, r in enumerate(rows):
-            v = r['wallet'] if type_v == 'm' else r['fish_count']
-            txt += f"{'🥇🥈🥉'[i] if i<3 else f'**{i+1}.**'} **{r['user_name']}**: {v}\n"
+            txt += f"{'🥇🥈🥉'[i] if i<3 else f'**{i+1}.**'} **{r['user_name']}**: {_format_rank_value(metric, r)}\n"
         return txt or "Ninguém."
 
     embed = discord.Embed(title="🏆 Hall da Fama", color=discord.Color.gold())
-    embed.add_field(name="💰 Magnatas", value=fmt(rows_m, 'm'), inline=True)
-    embed.add_field(name="🎣 Pescadores", value=fmt(rows_f, 'f'), inline=True)
+    for metric, title in fields:
+        embed.add_field(name=title, value=fmt(metric, boards[metric]), inline=True)
     await interaction.response.send_message(embed=embed)
 
  
@@ -1899,13 +1926,16 @@ class MissionSelect(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         # Verifica se é o líder
-        cursor = get_bot_instance().db_conn.cursor()
+        conn = get_bot_instance().db_conn
+        cursor = conn.cursor()
         party = cursor.execute("SELECT leader_id, members_json FROM parties WHERE leader_id = ?", (self.user_id,)).fetchone()
         
         if not party:
             # Cria party solo se não existir
-            cursor.execute("INSERT OR IGNORE INTO parties (leader_id, leader_name, members_json) VALUES (?, ?, '[]')", (self.user_id, interaction.user.name))
-            get_bot_instance().db_conn.commit()
+            if not (await _db().write(create_party, self.user_id, interaction.user.name))["success"]:
+                return await interaction.response.send_message(
+                    "🚫 Você já está no grupo de outro líder. Só o líder escolhe a missão.", ephemeral=True
+                )
             party = {'leader_id': self.user_id}
 
         # Pega a missão escolhida
@@ -1967,20 +1997,12 @@ class PartyKickSelect(discord.ui.Select):
         if self.values[0] == "none": return
 
         kick_id = int(self.values[0])
-        cursor = get_bot_instance().db_conn.cursor()
-        
+
         # Atualiza a lista de membros no banco
-        party = cursor.execute("SELECT members_json FROM parties WHERE leader_id = ?", (self.leader_id,)).fetchone()
-        if party:
-            members = json.loads(party['members_json'])
-            if kick_id in members:
-                members.remove(kick_id)
-                cursor.execute("UPDATE parties SET members_json = ? WHERE leader_id = ?", (json.dumps(members), self.leader_id))
-                get_bot_instance().db_conn.commit()
-                
-                await interaction.response.send_message(f"👢 **Membro Expulso!** O jogador <@{kick_id}> foi removido do grupo.", ephemeral=True)
-            else:
-                await interaction.response.send_message("❌ Esse jogador já saiu.", ephemeral=True)
+        if await _db().write(remove_party_member, self.leader_id, kick_id):
+            await interaction.response.send_message(f"👢 **Membro Expulso!** O jogador <@{kick_id}> foi removido do grupo.", ephemeral=True)
+        else:
+            await interaction.response.send_message("❌ Esse jogador já saiu.", ephemeral=True)
 
 class PartyControlsView(discord.ui.View):
     def __init__(self, user_id, is_leader, party_row):
@@ -2002,23 +2024,14 @@ class PartyControlsView(discord.ui.View):
     # Botão de Ação Principal (Desfazer ou Sair)
     @discord.ui.button(label="Desfazer/Sair", style=discord.ButtonStyle.danger, emoji="🚪", row=2)
     async def leave_or_disband(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cursor = get_bot_instance().db_conn.cursor()
-        
         # Lógica de LÍDER (Desfazer Grupo)
         if interaction.user.id == self.party_row['leader_id']:
-            cursor.execute("DELETE FROM parties WHERE leader_id = ?", (self.user_id,))
-            get_bot_instance().db_conn.commit()
+            await _db().write(disband_party, self.user_id)
             msg = "💥 **Grupo Desfeito!** Você encerrou as atividades do esquadrão."
             
         # Lógica de MEMBRO (Sair do Grupo)
         else:
-            leader_id = self.party_row['leader_id']
-            members = json.loads(self.party_row['members_json'])
-            
-            if self.user_id in members:
-                members.remove(self.user_id)
-                cursor.execute("UPDATE parties SET members_json = ? WHERE leader_id = ?", (json.dumps(members), leader_id))
-                get_bot_instance().db_conn.commit()
+            if await _db().write(remove_party_member, self.party_row['leader_id'], self.user_id):
                 msg = "🏃 **Você saiu do grupo.** Agora está livre para seguir carreira solo."
             else:
                 msg = "❌ Você já não estava no grupo."
@@ -2154,8 +2167,12 @@ class GuildView(discord.ui.View):
                             return
                         new_rank = next_key
                         new_xp = xp_val - rdata['req_xp']
-                        cursor.execute("UPDATE economy SET guild_rank = ?, guild_xp = ? WHERE user_id = ?", (new_rank, new_xp, self.user_id))
+                        cursor.execute("UPDATE users SET guild_rank = ?, guild_xp = ?, version = version + 1 WHERE user_id = ?", (new_rank, new_xp, self.user_id))
                         get_bot_instance().db_conn.commit()
+                        LEADERBOARDS.observe(
+                            "guild", self.user_id, guild_score(new_rank, new_xp),
+                            guild_rank=new_rank, guild_xp=new_xp,
+                        )
                         await interaction.response.edit_message(embed=discord.Embed(description=f"🛡️ **Promoção Concedida!** Agora você é **Rank {new_rank}**."), view=self.view)
                         return
                     else:
@@ -2230,33 +2247,18 @@ class GuildView(discord.ui.View):
     # --- BOTÃO 3: GRUPO (HUD DIFERENCIADA LÍDER vs MEMBRO) ---
     @discord.ui.button(label="Gerenciar Grupo", style=discord.ButtonStyle.primary, emoji="👥", row=1)
     async def party_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cursor = get_bot_instance().db_conn.cursor()
+        conn = get_bot_instance().db_conn
+        cursor = conn.cursor()
         
         # 1. Tenta achar o grupo do usuário (seja líder ou membro)
-        party_row = None
-        is_leader = False
-        
-        # Busca onde sou líder
-        leader_check = cursor.execute("SELECT * FROM parties WHERE leader_id = ?", (self.user_id,)).fetchone()
-        
-        if leader_check:
-            party_row = leader_check
-            is_leader = True
-        else:
-            # Busca onde sou membro (varredura)
-            all_parties = cursor.execute("SELECT * FROM parties").fetchall()
-            for p in all_parties:
-                if self.user_id in json.loads(p['members_json']):
-                    party_row = p
-                    break
+        party_row = find_party(conn, self.user_id)
         
         # 2. Se não tem grupo, CRIA UM NOVO (Vira Líder)
         if not party_row:
-            cursor.execute("INSERT OR IGNORE INTO parties (leader_id, leader_name, members_json) VALUES (?, ?, '[]')", (self.user_id, self.user_name))
-            get_bot_instance().db_conn.commit()
+            await _db().write(create_party, self.user_id, self.user_name)
             # Recarrega
-            party_row = cursor.execute("SELECT * FROM parties WHERE leader_id = ?", (self.user_id,)).fetchone()
-            is_leader = True
+            party_row = find_party(conn, self.user_id)
+        is_leader = party_row['leader_id'] == self.user_id
 
         # --- PREPARAÇÃO DOS DADOS ---
         members_ids = json.loads(party_row['members_json'])
@@ -2388,8 +2390,7 @@ async def guilda(interaction: discord.Interaction):
 
     # 2. SE ENTROU:
     # Garante que ele tem um Rank inicial no banco
-    cursor.execute("INSERT OR IGNORE INTO economy (user_id, user_name, guild_rank) VALUES (?, ?, 'F')", (user_id, interaction.user.name))
-    get_bot_instance().db_conn.commit()
+    ensure_user(get_bot_instance().db_conn, user_id, interaction.user.name)
     
     # Mostra a "Recepção"
     embed = discord.Embed(title="🏛️ Guilda de Porto Solare", description="Bem-vindo ao quartel general. Selecione uma ação no terminal.", color=discord.Color.dark_blue())
@@ -2416,30 +2417,16 @@ class PartyInviteView(discord.ui.View):
         if interaction.user.id != self.target_id:
             return await interaction.response.send_message("Esse convite não é para você!", ephemeral=True)
         
-        cursor = get_bot_instance().db_conn.cursor()
-        
-        # 1. Verifica se o grupo ainda existe
-        party = cursor.execute("SELECT members_json FROM parties WHERE leader_id = ?", (self.leader_id,)).fetchone()
-        if not party:
+        # Checa e adiciona na mesma transação: grupo ainda existe? o
+        # convidado já lidera ou participa de outro grupo (party_members)?
+        result = await _db().write(add_party_member, self.leader_id, self.target_id)
+        if result["reason"] == "no_party":
             return await interaction.response.edit_message(content="❌ O grupo foi desfeito antes de você aceitar.", embed=None, view=None)
-        
-        # 2. Verifica se o usuário já tem grupo (Líder ou Membro)
-        check_leader = cursor.execute("SELECT leader_id FROM parties WHERE leader_id = ?", (self.target_id,)).fetchone()
-        if check_leader:
-             return await interaction.response.send_message("❌ Você é líder de outro grupo! Desfaça ele antes de entrar.", ephemeral=True)
-
-        # Adicione isso antes de adicionar o membro
-        check_member = cursor.execute("SELECT leader_id FROM parties WHERE members_json LIKE ?", (f"%{interaction.user.id}%",)).fetchone()
-        if check_member:
+        if result["reason"] == "is_leader":
+            return await interaction.response.send_message("❌ Você é líder de outro grupo! Desfaça ele antes de entrar.", ephemeral=True)
+        if result["reason"] == "in_party":
             return await interaction.response.send_message("❌ Você já é membro de outro grupo! Saia dele primeiro.", ephemeral=True)
 
-        # 3. Adiciona o membro
-        members = json.loads(party['members_json'])
-        if self.target_id not in members:
-            members.append(self.target_id)
-            cursor.execute("UPDATE parties SET members_json = ? WHERE leader_id = ?", (json.dumps(members), self.leader_id))
-            get_bot_instance().db_conn.commit()
-            
         await interaction.response.edit_message(content=f"🤝 **Squad Formado!** {interaction.user.mention} entrou para o grupo.", embed=None, view=None)
 
     @discord.ui.button(label="Recusar", style=discord.ButtonStyle.danger, emoji="✖️")
@@ -2545,10 +2532,10 @@ def process_afk_trap(trap_json):
     # Gera os itens (peixes aleatórios simples ou lixo)
     rewards = []
     # 70% chance de peixe comum, 30% lixo (afinal é automático)
+    pool = pool_for(1, "ate") # Tier 0 e 1
     for _ in range(loot_total):
         if random.random() < 0.7:
-            pool = [p[0] for p in FISH_DB if p[4] <= 1] # Tier 0 e 1
-            rewards.append(random.choice(pool))
+            rewards.append(pool.sample_name())
         else:
             rewards.append(random.choice(["Bota Velha", "Lata Vazia", "Alga"]))
             
@@ -2563,19 +2550,19 @@ class GaldinoView(discord.ui.View):
     # --- BOTÃO 1: RECICLAGEM (Gera Sucata) ---
     @discord.ui.button(label="Reciclar Sucata", style=discord.ButtonStyle.success, emoji="♻️", row=0)
     async def recycle_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cursor = get_bot_instance().db_conn.cursor()
-        row = cursor.execute("SELECT inventory, scrap FROM economy WHERE user_id = ?", (self.user_id,)).fetchone()
-        inv = json.loads(row['inventory']) if row['inventory'] else {}
+        conn = get_bot_instance().db_conn
+        inv = get_inventory(conn, self.user_id)
         
         gain = 0
+        removidos = {}
         for t in TRASH_ITEMS:
             if t in inv:
                 gain += inv[t] * 5
-                del inv[t]
+                removidos[t] = -inv[t]
+        apply_inventory_deltas(conn, self.user_id, removidos)
         
         if gain > 0:
-            cursor.execute("UPDATE economy SET inventory = ?, scrap = scrap + ? WHERE user_id = ?", (json.dumps(inv), gain, self.user_id))
-            get_bot_instance().db_conn.commit()
+            modify_scrap(conn, self.user_id, gain)
             msg = f"🔧 **Galdino:** 'Isso sim é material!'\n⚙️ Ganhou: {gain} Sucata."
         else:
             msg = "🔧 **Galdino:** 'Sua mochila tá limpa demais. Suma daqui!'"
@@ -2614,6 +2601,7 @@ class GaldinoView(discord.ui.View):
             result = try_upgrade_rod(conn, self.user_id, "cd", cost_per_level=100, max_level=5)
             if result["reason"] == "insufficient_scrap": return await inter.response.send_message("❌ Sucata insuficiente!", ephemeral=True)
             if result["reason"] == "max_level": return await inter.response.send_message("⚠️ Max Level!", ephemeral=True)
+            COOLDOWNS.recheck(self.user_id, "last_fish")
             await inter.response.send_message("✅ Cooldown reduzido!", ephemeral=True)
 
         b1 = discord.ui.Button(label="Upar Sorte", style=discord.ButtonStyle.success); b1.callback = up_luck
@@ -2624,12 +2612,9 @@ class GaldinoView(discord.ui.View):
     # --- BOTÃO 3: EXAMINAR MÁQUINA (QUEST + GERENCIAMENTO HÍBRIDO) ---
     @discord.ui.button(label="Examinar Máquina", style=discord.ButtonStyle.secondary, emoji="🦀", row=1)
     async def trap_manager(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cursor = get_bot_instance().db_conn.cursor()
-        row = cursor.execute("SELECT wallet, afk_trap, inventory FROM economy WHERE user_id = ?", (self.user_id,)).fetchone()
-        
-        trap_data = json.loads(row['afk_trap']) if row['afk_trap'] and row['afk_trap'] != "{}" else None
-        wallet = row['wallet']
-        inv = json.loads(row['inventory']) if row['inventory'] else {}
+        conn = get_bot_instance().db_conn
+        trap_data = get_trap(conn, self.user_id)
+        inv = get_inventory(conn, self.user_id)
 
         embed = discord.Embed(title="🦀 Oficina de Armadilhas", color=discord.Color.dark_orange())
 
@@ -2658,17 +2643,19 @@ class GaldinoView(discord.ui.View):
                 async def craft_callback(inter):
                     # Consome 50 lixos
                     removidos = 0
+                    deltas = {}
                     for t in TRASH_ITEMS:
-                        while inv.get(t, 0) > 0 and removidos < meta:
-                            inv[t] -= 1
-                            removidos += 1
+                        tirar = min(inv.get(t, 0), meta - removidos)
+                        if tirar > 0:
+                            deltas[t] = -tirar
+                            removidos += tirar
+                    apply_inventory_deltas(conn, self.user_id, deltas)
                     
                     # Instala Covo Básico (Grátis na primeira vez)
                     # Status Idle para ele poder dar o start manual
                     new_trap = {"type": "covo_basico", "status": "idle", "timer_end": 0}
                     
-                    cursor.execute("UPDATE economy SET inventory = ?, afk_trap = ? WHERE user_id = ?", (json.dumps(inv), json.dumps(new_trap), self.user_id))
-                    get_bot_instance().db_conn.commit()
+                    set_trap(conn, self.user_id, new_trap)
                     
                     await inter.response.send_message(f"{get_dialogue('galdino', 'afk_success')}\n(Agora clique em 'Examinar Máquina' novamente para usar!)", ephemeral=True)
 
@@ -2699,12 +2686,10 @@ class GaldinoView(discord.ui.View):
             
             btn_repair = discord.ui.Button(label=f"Consertar ({stats['repair_cost']} $)", style=discord.ButtonStyle.danger, emoji="🔨")
             async def repair_cb(inter):
-                curr_wallet = cursor.execute("SELECT wallet FROM economy WHERE user_id=?", (self.user_id,)).fetchone()[0]
-                if curr_wallet < stats['repair_cost']: return await inter.response.send_message("💸 Falta dinheiro.", ephemeral=True)
+                if not try_spend_wallet(conn, self.user_id, stats['repair_cost']): return await inter.response.send_message("💸 Falta dinheiro.", ephemeral=True)
                 
                 trap_data['status'] = 'idle'
-                cursor.execute("UPDATE economy SET wallet = wallet - ?, afk_trap = ? WHERE user_id = ?", (stats['repair_cost'], json.dumps(trap_data), self.user_id))
-                get_bot_instance().db_conn.commit()
+                set_trap(conn, self.user_id, trap_data)
                 await inter.response.send_message("🔨 **Consertado!**", ephemeral=True)
             
             btn_repair.callback = repair_cb
@@ -2718,8 +2703,7 @@ class GaldinoView(discord.ui.View):
                 view.add_item(discord.ui.Button(label="Aguarde...", disabled=True))
             else:
                 trap_data['status'] = 'ready'
-                cursor.execute("UPDATE economy SET afk_trap = ? WHERE user_id = ?", (json.dumps(trap_data), self.user_id))
-                get_bot_instance().db_conn.commit()
+                set_trap(conn, self.user_id, trap_data)
                 return await self.trap_manager(interaction, button)
 
         elif t_status == "ready":
@@ -2729,16 +2713,11 @@ class GaldinoView(discord.ui.View):
             btn_collect = discord.ui.Button(label="Puxar Rede", style=discord.ButtonStyle.success, emoji="🎣")
             async def collect_cb(inter):
                 # Re-check DB
-                fresh_row = cursor.execute("SELECT afk_trap FROM economy WHERE user_id = ?", (self.user_id,)).fetchone()
-                fresh_trap = json.loads(fresh_row['afk_trap'])
+                fresh_trap = get_trap(conn, self.user_id) or {}
                 if fresh_trap.get('status') != 'ready': return await inter.response.send_message("❌ Estado inválido.", ephemeral=True)
 
-                rewards = []
-                pool = [p[0] for p in FISH_DB if p[4] <= stats['loot_tier_max']]
-                for _ in range(stats['capacity']):
-                    fish = random.choice(pool)
-                    inv[fish] = inv.get(fish, 0) + 1
-                    rewards.append(fish)
+                pool = pool_for(stats['loot_tier_max'], "ate")
+                rewards = [pool.sample_name() for _ in range(stats['capacity'])]
 
                 from collections import Counter
                 c = Counter(rewards)
@@ -2752,8 +2731,8 @@ class GaldinoView(discord.ui.View):
                     trap_data['timer_end'] = now_ts + stats['reset_time']
                     msg = f"💰 **Coleta:** {reward_str}\n\n🕸️ Limpando a rede..."
 
-                cursor.execute("UPDATE economy SET inventory = ?, afk_trap = ? WHERE user_id = ?", (json.dumps(inv), json.dumps(trap_data), self.user_id))
-                get_bot_instance().db_conn.commit()
+                apply_inventory_deltas(conn, self.user_id, dict(c))
+                set_trap(conn, self.user_id, trap_data)
                 await inter.response.send_message(msg, ephemeral=True)
             
             btn_collect.callback = collect_cb
@@ -2766,8 +2745,7 @@ class GaldinoView(discord.ui.View):
                 view.add_item(discord.ui.Button(label="Limpando...", disabled=True))
             else:
                 trap_data['status'] = 'idle'
-                cursor.execute("UPDATE economy SET afk_trap = ? WHERE user_id = ?", (json.dumps(trap_data), self.user_id))
-                get_bot_instance().db_conn.commit()
+                set_trap(conn, self.user_id, trap_data)
                 return await self.trap_manager(interaction, button)
 
         elif t_status == "idle":
@@ -2778,8 +2756,7 @@ class GaldinoView(discord.ui.View):
             async def start_cb(inter):
                 trap_data['status'] = 'working'
                 trap_data['timer_end'] = now_ts + stats['wait_time']
-                cursor.execute("UPDATE economy SET afk_trap = ? WHERE user_id = ?", (json.dumps(trap_data), self.user_id))
-                get_bot_instance().db_conn.commit()
+                set_trap(conn, self.user_id, trap_data)
                 await inter.response.send_message("🌊 **Lançada!**", ephemeral=True)
             
             btn_start.callback = start_cb
@@ -2791,13 +2768,11 @@ class GaldinoView(discord.ui.View):
                 btn_buy = discord.ui.Button(label="Comprar Rede Industrial (1500$)", style=discord.ButtonStyle.secondary, row=1)
                 async def buy_better_cb(inter):
                     s_ind = TRAP_TYPES["rede_industrial"]
-                    curr_wallet = cursor.execute("SELECT wallet FROM economy WHERE user_id=?", (self.user_id,)).fetchone()[0]
-                    if curr_wallet < s_ind['cost']: return await inter.response.send_message("💸 Falta dinheiro.", ephemeral=True)
+                    if not try_spend_wallet(conn, self.user_id, s_ind['cost']): return await inter.response.send_message("💸 Falta dinheiro.", ephemeral=True)
                     
                     # Substitui a trap atual
                     new_trap = {"type": "rede_industrial", "status": "idle", "timer_end": 0}
-                    cursor.execute("UPDATE economy SET wallet = wallet - ?, afk_trap = ? WHERE user_id = ?", (s_ind['cost'], json.dumps(new_trap), self.user_id))
-                    get_bot_instance().db_conn.commit()
+                    set_trap(conn, self.user_id, new_trap)
                     await inter.response.send_message("✅ **Upgrade!** Você comprou a Rede de Arrasto.", ephemeral=True)
                 
                 btn_buy.callback = buy_better_cb
@@ -2832,17 +2807,18 @@ class CompraQuantidadeModal(discord.ui.Modal):
             return await interaction.response.send_message("❌ Digite apenas números válidos.", ephemeral=True)
 
         custo_total = self.stats['price'] * quantidade
-        conn = self.bot.db_conn
 
         # Atômico: relê o saldo na hora do submit (o modal pode ter ficado
         # aberto um tempo arbitrário desde que foi mostrado), em vez de usar
         # um saldo capturado quando o dropdown foi clicado.
-        if not try_spend_wallet(conn, self.user_id, custo_total, interaction.user.name):
-            wallet_atual = get_wallet(conn, self.user_id)
+        result = await get_gateway(self.bot).write(
+            _buy_shop_item, self.user_id, interaction.user.name, self.item_key, custo_total,
+            quantity=quantidade, require_account=False,
+        )
+        if not result["success"]:
+            wallet_atual = result["wallet"]
             return await interaction.response.send_message(f"💸 **Saldo Insuficiente!**\nVocê quer {quantidade}x ({custo_total} $), mas só tem {wallet_atual} $.", ephemeral=True)
 
-        add_inventory_item(conn, self.user_id, self.item_key, quantidade)
-
         # Feedback
         emoji = "📦"
         if self.stats.get('type') == 'buff': emoji = "🧪"
@@ -2877,24 +2853,13 @@ class ValeriusShopSelect(discord.ui.Select):
         item_key = self.values[0]
         data = SHOP_ITEMS[item_key]
         
-        cursor = get_bot_instance().db_conn.cursor()
-        
-        # Verifica Saldo
-        row = cursor.execute("SELECT wallet, inventory FROM economy WHERE user_id = ?", (self.user_id,)).fetchone()
-        if row['wallet'] < data['price']:
+        # Verifica saldo, desconta e guarda a vara no mesmo job de escrita
+        result = await _db().write(
+            _buy_shop_item, self.user_id, "", item_key, data['price'], require_account=False,
+        )
+        if not result["success"]:
             return await interaction.response.send_message("💰 **Valerius:** 'Sem ouro, sem conversa.' (Saldo insuficiente)", ephemeral=True)
         
-        # Processa a Compra
-        inv = json.loads(row['inventory']) if row['inventory'] else {}
-        
-        # Se for vara, equipa ou guarda
-        inv[item_key] = inv.get(item_key, 0) + 1
-        
-        # Atualiza o banco (Desconta dinheiro + Adiciona item)
-        cursor.execute("UPDATE economy SET wallet = wallet - ?, inventory = ? WHERE user_id = ?", 
-                      (data['price'], json.dumps(inv), self.user_id))
-        get_bot_instance().db_conn.commit()
-        
         await interaction.response.send_message(f"🤝 **Negócio Fechado!**\nVocê comprou: **{data['name']}** por {data['price']} Sachês.\n*Valerius sorri enquanto conta as moedas.*", ephemeral=True)
 
 
@@ -2914,23 +2879,39 @@ class EconomiaCog(commands.Cog):
         # porque a árvore resolve o nome pelo root_parent ("eco"), que já foi
         # registrado na linha acima.
         self.bot.tree.add_command(eco_group)
-        conn = self.bot.db_conn
-        ensure_v4_tables(conn)
-        seed_market_prices(conn, FISH_DB)
+        # Schema já foi migrado no setup_hook (migrations.apply_migrations);
+        # aqui só o seed, que é DML.
+        seed_market_prices(self.bot.db_conn, FISH_DB)
+        WORLD.load(self.bot.db_conn)
         if not self.weather_cycle.is_running():
             self.weather_cycle.start()
         if not self.market_cycle.is_running():
             self.market_cycle.start()
         if not self.catch_cleanup_loop.is_running():
             self.catch_cleanup_loop.start()
+        if not self.cooldown_flush_loop.is_running():
+            self.cooldown_flush_loop.start()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         if self.weather_cycle.is_running():
             self.weather_cycle.cancel()
         if self.market_cycle.is_running():
             self.market_cycle.cancel()
         if self.catch_cleanup_loop.is_running():
             self.catch_cleanup_loop.cancel()
+        if self.cooldown_flush_loop.is_running():
+            self.cooldown_flush_loop.cancel()
+        # Último flush do write-behind (o bot.close() descarrega as extensões).
+        try:
+            await get_gateway(self.bot).write(COOLDOWNS.flush)
+        except Exception as e:
+            log_to_gui(f"Falha ao gravar cooldowns pendentes: {e}", "ERROR")
+
+    @tasks.loop(seconds=COOLDOWN_FLUSH_SECONDS)
+    async def cooldown_flush_loop(self):
+        # Write-behind das reservas de /eco pescar e /eco explorar.
+        if COOLDOWNS.pending():
+            await _db().write(COOLDOWNS.flush)
 
     @tasks.loop(hours=1)
     async def catch_cleanup_loop(self):
@@ -2946,11 +2927,7 @@ class EconomiaCog(commands.Cog):
         options = ["normal", "bad", "good"]
         weights = [0.7, 0.2, 0.1]
         new_weather = random.choices(options, weights)[0]
-        cursor = self.bot.db_conn.cursor()
-        prev_row = cursor.execute("SELECT current_weather FROM world_state WHERE id = 1").fetchone()
-        prev_weather = prev_row['current_weather'] if prev_row else None
-        cursor.execute("UPDATE world_state SET current_weather = ? WHERE id = 1", (new_weather,))
-        self.bot.db_conn.commit()
+        prev_weather = await _db().write(WORLD.set_weather, new_weather)
         status_text = f"P3LUCHE | Clima: {WEATHER_EFFECTS[new_weather]['name']}"
         await self.bot.change_presence(activity=discord.Game(name=status_text))
         print(f"[CLIMA] O tempo mudou para: {new_weather.upper()}")
@@ -2992,33 +2969,16 @@ class EconomiaCog(commands.Cog):
 
     @tasks.loop(hours=1)
     async def market_cycle(self):
-        cursor = self.bot.db_conn.cursor()
-        cursor.execute(
-            """
-            UPDATE market_prices
-            SET current_price = CAST(current_price * 0.95 AS INTEGER),
-                last_updated = datetime('now')
-            WHERE fish_name IN (
-                SELECT fish_name FROM fish_sales_history
-                WHERE sale_time > datetime('now', '-1 day')
-                GROUP BY fish_name
-                ORDER BY COUNT(*) DESC LIMIT 5
-            )
-            """
-        )
-        cursor.execute(
-            """
-            UPDATE market_prices
-            SET current_price = CAST(current_price * 1.10 AS INTEGER),
-                last_updated = datetime('now')
-            WHERE fish_name NOT IN (
-                SELECT DISTINCT fish_name FROM fish_sales_history
-                WHERE sale_time > datetime('now', '-1 day')
-            )
-            """
+        # Compacta o histórico de vendas nos agregados horários e reajusta os
+        # preços lendo só os agregados — custo constante, não importa o
+        # tamanho do histórico.
+        compacted = await _db().write(compact_fish_sales)
+        await _db().write(reprice_market)
+        await _db().read(WORLD.refresh_prices)
+        print(
+            f"[MERCADO] Preços de peixes atualizados "
+            f"({compacted['folded']} agregados, {compacted['deleted']} vendas antigas removidas)."
         )
-        self.bot.db_conn.commit()
-        print("[MERCADO] Preços de peixes atualizados.")
 
     @market_cycle.before_loop
     async def before_market_cycle(self):
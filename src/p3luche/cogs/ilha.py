@@ -21,6 +21,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from config import get_bot_instance
+from db_gateway import get_gateway
 from utils import get_local_file
 from economy_db import (
     ensure_user,
@@ -223,10 +224,9 @@ class IlhaHubView(discord.ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("❌ Essa não é a sua ilha.", ephemeral=True)
 
-        conn = get_bot_instance().db_conn
+        db = get_gateway(get_bot_instance())
         stats = ISLAND_STRUCTURES[structure_key]
-        island = get_island(conn, self.user_id)
-        structures = get_island_structures(conn, self.user_id)
+        island, structures = await db.write(_load_island, self.user_id)
         state = structures.get(structure_key)
         level = state["level"] if state else 0
         status = state["status"] if state else "idle"
@@ -244,7 +244,9 @@ class IlhaHubView(discord.ui.View):
                 return await interaction.response.send_message(f"⏳ Ainda construindo. Pronta {eta}.", ephemeral=True)
 
             target_level = level + 1
-            result = finalize_island_construction(conn, self.user_id, structure_key, target_level, stats["is_core"])
+            result = await db.write(
+                finalize_island_construction, self.user_id, structure_key, target_level, stats["is_core"]
+            )
             if not result["success"]:
                 return await interaction.response.send_message("⏳ Ainda não está pronta.", ephemeral=True)
 
@@ -259,8 +261,8 @@ class IlhaHubView(discord.ui.View):
             return await interaction.response.send_message(f"✅ **{stats['name']}** está no {label}.", ephemeral=True)
 
         cost = _structure_cost(structure_key, level)
-        result = start_island_construction(
-            conn,
+        result = await db.write(
+            start_island_construction,
             self.user_id,
             structure_key,
             cost["target_level"],
@@ -293,6 +295,18 @@ class IlhaHubView(discord.ui.View):
         )
 
 
+def _load_island(conn, user_id: int):
+    """Ilha + estruturas num único job do gateway (uma ida à fila, não duas)."""
+    return get_island(conn, user_id), get_island_structures(conn, user_id)
+
+
+def _load_hub(conn, user_id: int, user_name: str):
+    """Tudo que o hub `/ilha` mostra, lido de uma vez na thread do banco."""
+    ensure_user(conn, user_id, user_name)
+    island, structures = _load_island(conn, user_id)
+    return island, structures, get_wallet(conn, user_id), get_scrap(conn, user_id)
+
+
 class IlhaCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -300,13 +314,8 @@ class IlhaCog(commands.Cog):
     @app_commands.command(name="ilha", description="Sua ilha pessoal: tier, recursos e construções.")
     async def ilha(self, interaction: discord.Interaction):
         user_id = interaction.user.id
-        conn = get_bot_instance().db_conn
-        ensure_user(conn, user_id, interaction.user.name)
-
-        island = get_island(conn, user_id)
-        structures = get_island_structures(conn, user_id)
-        wallet = get_wallet(conn, user_id)
-        scrap = get_scrap(conn, user_id)
+        db = get_gateway(get_bot_instance())
+        island, structures, wallet, scrap = await db.write(_load_hub, user_id, interaction.user.name)
 
         embed = build_island_embed(interaction.user.name, island, structures, wallet, scrap)
         view = IlhaHubView(user_id, interaction.user.name, island, structures)
@@ -18,7 +18,7 @@ import os
 import re
 import sqlite3
 import tempfile
-import unicodedata
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Optional
@@ -26,13 +26,6 @@ from typing import Any, Optional
 import discord
 from discord import app_commands
 from discord.ext import commands
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from yt_dlp import YoutubeDL
 
 from config import (
     CLIENT_SECRET_FILE,
@@ -41,8 +34,12 @@ from config import (
     get_bot_instance,
     set_bot_instance,
 )
+from audio_cache import AUDIO_CACHE, drive_file_key
 from utils import COOKIE_FILE, log_to_gui
 from cogs.musica import check_channel_permission
+from music_index import CATALOG, search_key
+from music_search import search_music
+from stream_cache import STREAMS
 
 
 # Cores padronizadas para embeds
@@ -54,16 +51,9 @@ COLOR_WAITING = discord.Color.yellow()
 GENERIC_THUMBNAIL = "https://cdn-icons-png.flaticon.com/512/727/727240.png"
 
 
-def normalize(text: str) -> str:
-    """Remove acentos, baixa caixa e caracteres especiais para busca."""
-    if not text:
-        return ""
-    normalized = unicodedata.normalize("NFKD", text)
-    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-    normalized = normalized.lower()
-    normalized = re.sub(r"[^a-z0-9\s]", " ", normalized)
-    normalized = re.sub(r"\s+", " ", normalized).strip()
-    return normalized
+# A mesma normalização do índice em memória (music_index.search_key): o que
+# vai para normalized_title e o que o autocomplete compara são iguais.
+normalize = search_key
 
 
 def _seconds_to_text(seconds: Optional[int]) -> str:
@@ -111,6 +101,14 @@ def _music_cache_timestamp_column(columns: set[str]) -> str:
 
 def _get_drive_service():
     """Cria cliente do Google Drive (Service Account ou OAuth legado)."""
+    # Imports locais (ver cogs/musica.py, seção GOOGLE DRIVE & YT-DLP): a pilha
+    # do Google só é paga na primeira chamada, já fora do event loop.
+    from google.auth.transport.requests import Request
+    from google.oauth2 import service_account
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON", "").strip()
     scopes = ["https://www.googleapis.com/auth/drive"]
 
@@ -152,19 +150,16 @@ def _db_fetch_music_candidates(normalized_query: str, limit: int = 5) -> list[sq
     conn = _get_db_conn()
     cur = conn.cursor()
     columns = _music_cache_columns(cur)
-    drive_file_select = "drive_file_id" if "drive_file_id" in columns else "NULL AS drive_file_id"
+    drive_file_select = "music_cache.drive_file_id" if "drive_file_id" in columns else "NULL AS drive_file_id"
     url_col = _music_cache_url_column(columns)
-    cur.execute(
-        f"""
-        SELECT id, title, normalized_title, {drive_file_select}, {url_col} AS drive_url, duration
-        FROM music_cache
-        WHERE normalized_title LIKE ?
-        ORDER BY title COLLATE NOCASE
-        LIMIT ?
-        """,
-        (f"%{normalized_query}%", limit),
+    return search_music(
+        conn,
+        "music_cache.id, music_cache.title, music_cache.normalized_title, "
+        f"{drive_file_select}, music_cache.{url_col} AS drive_url, music_cache.duration",
+        normalized_query,
+        limit=limit,
+        active_only="is_active" in columns,
     )
-    return cur.fetchall()
 
 
 def _db_insert_music_cache(
@@ -218,6 +213,7 @@ def _db_insert_music_cache(
             (title, normalized_title, drive_url, int(duration or 0)),
         )
     conn.commit()
+    CATALOG.add(cur.lastrowid, title, duration)
 
 
 def _db_update_missing_normalized_titles() -> int:
@@ -253,6 +249,8 @@ def _drive_list_audio_files() -> list[dict[str, str]]:
 
 
 def _drive_upload_audio(local_path: str, title: str) -> tuple[str, str]:
+    from googleapiclient.http import MediaFileUpload
+
     service = _get_drive_service()
     safe_name = re.sub(r'[<>:"/\\|?*]', "", title).strip() or "audio"
     metadata = {"name": f"{safe_name}.mp3", "parents": [JUKEBOX_DRIVE_FOLDER_ID]}
@@ -265,6 +263,8 @@ def _drive_upload_audio(local_path: str, title: str) -> tuple[str, str]:
 
 
 def _extract_stream_info(url: str) -> dict[str, Any]:
+    from yt_dlp import YoutubeDL
+
     opts: dict[str, Any] = {
         "quiet": True,
         "noplaylist": True,
@@ -292,6 +292,8 @@ def _extract_stream_info(url: str) -> dict[str, Any]:
 
 
 def _download_audio_to_mp3(url: str) -> tuple[str, str, int]:
+    from yt_dlp import YoutubeDL
+
     with tempfile.TemporaryDirectory() as tmp:
         out = os.path.join(tmp, "%(id)s.%(ext)s")
         opts = {
@@ -328,6 +330,54 @@ class QueueItem:
     origin: str = "db"
     source_page_url: str = ""
     http_headers: dict[str, str] = field(default_factory=dict)
+    drive_file_id: str = ""
+
+
+# Quanto antes do fim da faixa atual o FFmpeg da próxima é aberto. Um FFmpeg
+# aberto cedo demais enche o pipe em segundos e fica parado, com a conexão do
+# Drive/YouTube ociosa, até a troca. Com duração desconhecida (faixas do Drive
+# gravadas com 0), só a URL é resolvida antes; o FFmpeg abre na hora de tocar.
+PREFETCH_LEAD_SECONDS = 30
+
+
+@dataclass
+class _PlayClock:
+    """Tempo tocado da faixa atual, descontando o que ficou pausado."""
+
+    started: float
+    paused_at: Optional[float] = None
+    paused_total: float = 0.0
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        paused = self.paused_total + (now - self.paused_at if self.paused_at is not None else 0.0)
+        return now - self.started - paused
+
+    def pause(self, now: Optional[float] = None):
+        if self.paused_at is None:
+            self.paused_at = time.monotonic() if now is None else now
+
+    def resume(self, now: Optional[float] = None):
+        if self.paused_at is not None:
+            now = time.monotonic() if now is None else now
+            self.paused_total += now - self.paused_at
+            self.paused_at = None
+
+
+@dataclass
+class _Prefetch:
+    """Próxima faixa da fila sendo preparada enquanto a atual toca."""
+
+    item: QueueItem
+    task: Optional[asyncio.Task] = None
+    source: Optional[discord.AudioSource] = None
+    # True enquanto resolve a URL ou abre o FFmpeg (vale esperar); False no
+    # timer até a hora de abrir.
+    busy: bool = False
+    # FFmpeg já começou a ser aberto.
+    started: bool = False
+    # Acordado quando o relógio da faixa atual muda (pausa/retomada).
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
 
 
 class TrackChoiceView(discord.ui.View):
@@ -528,8 +578,23 @@ class MusicaV2(commands.Cog):
         self.current_tracks: dict[int, QueueItem] = {}
         self._locks: dict[int, asyncio.Lock] = {}
         self._alone_tasks: dict[int, asyncio.Task] = {}
+        self._prefetch: dict[int, _Prefetch] = {}
+        self._clocks: dict[int, _PlayClock] = {}
         set_bot_instance(bot)
 
+    async def cog_load(self):
+        try:
+            count = await asyncio.to_thread(CATALOG.load, _get_db_conn())
+            log_to_gui(f"Índice do acervo carregado: {count} faixas.", "INFO")
+        except Exception as exc:
+            # Sem índice, o autocomplete continua indo ao banco.
+            log_to_gui(f"Falha ao carregar o índice do acervo: {exc}", "WARNING")
+
+    async def cog_unload(self):
+        # FFmpeg já aberto para a próxima faixa não pode sobrar como processo órfão.
+        for guild_id in list(self._prefetch):
+            self._cancel_prefetch(guild_id)
+
     def _guild_lock(self, guild_id: int) -> asyncio.Lock:
         if guild_id not in self._locks:
             self._locks[guild_id] = asyncio.Lock()
@@ -541,6 +606,8 @@ class MusicaV2(commands.Cog):
         self.voice_clients.pop(guild_id, None)
         self.current_tracks.pop(guild_id, None)
         self._locks.pop(guild_id, None)
+        self._cancel_prefetch(guild_id)
+        self._clocks.pop(guild_id, None)
         task = self._alone_tasks.pop(guild_id, None)
         if task and not task.done():
             task.cancel()
@@ -640,12 +707,14 @@ class MusicaV2(commands.Cog):
         title = row["title"] if isinstance(row, sqlite3.Row) else row[1]
         drive_url = row["drive_url"] if isinstance(row, sqlite3.Row) else row[4]
         duration = row["duration"] if isinstance(row, sqlite3.Row) else row[5]
+        drive_file_id = row["drive_file_id"] if isinstance(row, sqlite3.Row) else row[3]
         return QueueItem(
             title=title or "Sem título",
             source_url=drive_url,
             duration=int(duration or 0),
             requested_by=requester,
             origin="db",
+            drive_file_id=drive_file_id or "",
         )
 
     async def _enqueue_and_start(self, guild: discord.Guild, item: QueueItem, to_front: bool = False):
@@ -657,6 +726,16 @@ class MusicaV2(commands.Cog):
         await self._start_next_if_idle(guild)
 
     def _build_ffmpeg_source(self, item: QueueItem) -> discord.FFmpegPCMAudio:
+        # Faixa do acervo já baixada: lê do disco, sem Drive no caminho. Na
+        # falta, toca pelo stream e baixa a cópia em segundo plano.
+        if item.origin == "db":
+            key = drive_file_key(item.drive_file_id, item.source_url)
+            if key:
+                local_path = AUDIO_CACHE.lookup(key)
+                if local_path:
+                    return discord.FFmpegPCMAudio(local_path, before_options="-nostdin", options="-vn")
+                AUDIO_CACHE.schedule_fill(key, item.source_url)
+
         before_options = (
             "-nostdin "
             "-reconnect 1 "
@@ -679,35 +758,152 @@ class MusicaV2(commands.Cog):
 
         return discord.FFmpegPCMAudio(item.source_url, before_options=before_options, options="-vn")
 
+    async def _refresh_stream(self, item: QueueItem):
+        """Para URLs externas, renova stream_url (evita URL expirada/cortada).
+
+        O cache só devolve URL que ainda dura a faixa inteira; senão extrai de novo.
+        """
+        refreshed = await STREAMS.resolve(item.source_page_url, _extract_stream_info)
+        if refreshed.get("stream_url"):
+            item.source_url = refreshed["stream_url"]
+            item.http_headers = dict(refreshed.get("http_headers") or {})
+            item.duration = int(refreshed.get("duration") or item.duration)
+
+    # ── Prefetch da próxima faixa ─────────────────────────────────────────
+    # Sem isto, a URL da próxima faixa era resolvida e o FFmpeg só era aberto
+    # no `after` da atual — segundos de silêncio a cada troca. Enquanto uma
+    # faixa toca, `queue[0]` já é resolvida (cache do yt-dlp) e, a
+    # `PREFETCH_LEAD_SECONDS` do fim (pelo tempo tocado, sem as pausas), o
+    # FFmpeg dela é aberto (conexão aquecida, áudio esperando no pipe).
+    # Qualquer mudança na fila que troque `queue[0]` descarta o que foi
+    # preparado; toda mutação da fila passa por `_start_next_if_idle`, que
+    # confere isso.
+
+    def _cancel_prefetch(self, guild_id: int):
+        prefetch = self._prefetch.pop(guild_id, None)
+        if prefetch is None:
+            return
+        if prefetch.task and not prefetch.task.done():
+            prefetch.task.cancel()
+        if prefetch.source is not None:
+            prefetch.source.cleanup()
+
+    def _prefetch_delay(self, guild_id: int) -> Optional[float]:
+        """Segundos até abrir o FFmpeg da próxima; None = não abrir por ora
+        (duração da atual desconhecida, ou reprodução pausada)."""
+        current = self.current_tracks.get(guild_id)
+        clock = self._clocks.get(guild_id)
+        if not current or not current.duration or clock is None or clock.paused_at is not None:
+            return None
+        return max(0.0, current.duration - PREFETCH_LEAD_SECONDS - clock.elapsed())
+
+    def _set_paused(self, guild_id: int, paused: bool):
+        clock = self._clocks.get(guild_id)
+        if clock is not None and paused:
+            clock.pause()
+        elif clock is not None:
+            clock.resume()
+        prefetch = self._prefetch.get(guild_id)
+        if prefetch is not None:
+            prefetch.wake.set()
+
+    def _ensure_prefetch(self, guild_id: int):
+        queue = self.queues.get(guild_id) or []
+        upcoming = queue[0] if queue else None
+        current = self._prefetch.get(guild_id)
+        if current is not None and current.item is upcoming:
+            return
+        self._cancel_prefetch(guild_id)
+        if upcoming is None:
+            return
+        prefetch = self._prefetch[guild_id] = _Prefetch(upcoming)
+        prefetch.task = asyncio.get_running_loop().create_task(self._run_prefetch(guild_id, prefetch))
+
+    async def _run_prefetch(self, guild_id: int, prefetch: _Prefetch):
+        item = prefetch.item
+        try:
+            # 1. Resolve a URL já (é o caro: yt-dlp).
+            if item.origin == "url" and item.source_page_url:
+                prefetch.busy = True
+                await self._refresh_stream(item)
+                prefetch.busy = False
+            # 2. Abre o FFmpeg só perto do fim da atual; o prazo é refeito a
+            # cada pausa/retomada.
+            while True:
+                prefetch.wake.clear()
+                delay = self._prefetch_delay(guild_id)
+                if delay is not None and delay <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(prefetch.wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            prefetch.busy = prefetch.started = True
+            prefetch.source = self._build_ffmpeg_source(item)
+        except Exception as exc:
+            # Na hora de tocar, o caminho normal tenta de novo.
+            log_to_gui(f"Prefetch de '{item.title}' falhou: {exc}", "WARNING")
+        finally:
+            prefetch.busy = False
+
+    async def _take_prefetched(self, guild_id: int, item: QueueItem) -> Optional[discord.AudioSource]:
+        prefetch = self._prefetch.pop(guild_id, None)
+        if prefetch is None:
+            return None
+        if prefetch.item is item and prefetch.busy and prefetch.task and not prefetch.task.done():
+            # Já estava resolvendo/abrindo: esperar sai mais barato que recomeçar.
+            await asyncio.shield(prefetch.task)
+        source = prefetch.source
+        prefetch.source = None
+        stale = (
+            prefetch.item is not item
+            or source is None
+            or (item.origin == "url" and STREAMS.get(item.source_page_url) is None)
+        )
+        if prefetch.task and not prefetch.task.done():
+            prefetch.task.cancel()
+        if stale:
+            if source is not None:
+                source.cleanup()
+            return None
+        return source
+
     async def _start_next_if_idle(self, guild: discord.Guild):
         guild_id = guild.id
         async with self._guild_lock(guild_id):
             voice = guild.voice_client
-            if not voice or voice.is_playing() or voice.is_paused():
+            if not voice:
+                return
+            if voice.is_playing() or voice.is_paused():
+                # A fila pode ter mudado: prepara (de novo) o que vem a seguir.
+                self._ensure_prefetch(guild_id)
                 return
             queue = self.queues.get(guild_id, [])
             if not queue:
+                self._cancel_prefetch(guild_id)
                 self.current_tracks.pop(guild_id, None)
                 return
             item = queue.pop(0)
             try:
-                # Para URLs externas, renova stream_url na hora de tocar (evita URL expirada/cortada).
-                if item.origin == "url" and item.source_page_url:
-                    refreshed = await asyncio.to_thread(_extract_stream_info, item.source_page_url)
-                    if refreshed.get("stream_url"):
-                        item.source_url = refreshed["stream_url"]
-                        item.http_headers = dict(refreshed.get("http_headers") or {})
-                        item.duration = int(refreshed.get("duration") or item.duration)
-
-                source = self._build_ffmpeg_source(item)
+                source = await self._take_prefetched(guild_id, item)
+                if source is None:
+                    if item.origin == "url" and item.source_page_url:
+                        await self._refresh_stream(item)
+                    source = self._build_ffmpeg_source(item)
+
                 def _after(err: Exception | None):
                     if err:
                         log_to_gui(f"Erro FFmpeg pós-faixa ({guild_id}): {err}", "ERROR")
+                        # URL em cache pode ter sido recusada (403): a próxima vez extrai de novo.
+                        if item.origin == "url":
+                            self.bot.loop.call_soon_threadsafe(STREAMS.forget, item.source_page_url)
                     asyncio.run_coroutine_threadsafe(self._start_next_if_idle(guild), self.bot.loop)
 
                 voice.play(source, after=_after)
                 self.current_tracks[guild_id] = item
+                self._clocks[guild_id] = _PlayClock(time.monotonic())
                 log_to_gui(f"Tocando em guild {guild_id}: {item.title}", "INFO")
+                self._ensure_prefetch(guild_id)
             except FileNotFoundError:
                 log_to_gui("FFmpeg não encontrado no ambiente.", "ERROR")
             except Exception as exc:
@@ -737,7 +933,12 @@ class MusicaV2(commands.Cog):
     ) -> list[app_commands.Choice[str]]:
         del interaction
         term = current.strip() if current else ""
-        results = await self._search_db(term, limit=25)
+        # Índice em memória: responde no próprio loop, sem thread nem SQLite.
+        # Só vai ao banco se o índice ainda não foi carregado.
+        if CATALOG.ready:
+            results = [{"title": e.title, "duration": e.duration} for e in CATALOG.search(term, limit=25)]
+        else:
+            results = await self._search_db(term, limit=25)
         choices: list[app_commands.Choice[str]] = []
         for item in results:
             title = item["title"] or "Sem título"
@@ -874,7 +1075,7 @@ class MusicaV2(commands.Cog):
             return
 
         try:
-            info = await asyncio.to_thread(_extract_stream_info, url)
+            info = await STREAMS.resolve(url, _extract_stream_info)
             if not info.get("stream_url"):
                 raise RuntimeError("yt-dlp não retornou stream_url.")
         except Exception as exc:
@@ -936,7 +1137,7 @@ class MusicaV2(commands.Cog):
         if not interaction.guild:
             return
         try:
-            info = await asyncio.to_thread(_extract_stream_info, url)
+            info = await STREAMS.resolve(url, _extract_stream_info)
         except Exception as exc:
             await interaction.followup.send(
                 embed=_music_embed("Falha na URL", f"Não foi possível processar: `{exc}`", COLOR_ERROR),
@@ -977,6 +1178,7 @@ class MusicaV2(commands.Cog):
             )
             return
         voice.pause()
+        self._set_paused(interaction.guild.id, True)
         await interaction.followup.send(embed=_music_embed("Pausado", "Reprodução pausada.", COLOR_INFO), ephemeral=True)
 
     @app_commands.command(name="retomar", description="Retoma a música pausada.")
@@ -991,6 +1193,7 @@ class MusicaV2(commands.Cog):
             )
             return
         voice.resume()
+        self._set_paused(interaction.guild.id, False)
         await interaction.followup.send(embed=_music_embed("Retomado", "Reprodução retomada.", COLOR_SUCCESS), ephemeral=True)
 
     @app_commands.command(name="parar", description="Para a reprodução e desconecta o bot.")
@@ -1097,6 +1300,7 @@ async def rebuild_database_from_drive(force: bool = False):
         if force:
             await asyncio.to_thread(cur.execute, "DELETE FROM music_cache")
             await asyncio.to_thread(conn.commit)
+            CATALOG.clear()
 
         inserted = 0
         for file in files:
@@ -1159,6 +1363,8 @@ async def rebuild_database_from_drive(force: bool = False):
                             (title, normalize(title), drive_url, 0, drive_url),
                         )
                 conn.commit()
+                if c.rowcount:
+                    CATALOG.add(c.lastrowid, title, 0)
                 return c.rowcount
 
             inserted += int(await asyncio.to_thread(_insert_or_ignore) or 0)
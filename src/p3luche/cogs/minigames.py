@@ -12,13 +12,16 @@ from discord import app_commands
 from discord.ext import commands, tasks
 
 from config import get_bot_instance
+from edit_scheduler import EDITS
 from economy_db import (
     add_inventory_item,
+    apply_inventory_deltas,
     consume_fish,
     ensure_user,
     get_cooldowns,
     get_inventory,
     get_wallet,
+    modify_scrap,
     modify_wallet,
     set_cooldown,
     set_inventory_item,
@@ -86,13 +89,6 @@ def build_auction_approval_embed(item_name: str, rarity: str, min_bid: int) -> d
     return embed
 
 
-def format_time_remaining(total_seconds: int) -> str:
-    remaining = max(0, total_seconds)
-    minutes, seconds = divmod(remaining, 60)
-    hours, minutes = divmod(minutes, 60)
-    return f"{hours}h {minutes}m {seconds}s"
-
-
 def build_auction_embed(item_name: str, rarity: str, min_bid: int, ends_at: datetime | None = None, participant: str | None = None, last_bid: int | None = None) -> discord.Embed:
     embed = discord.Embed(
         title="🔨 Leilão Secreto!",
@@ -104,7 +100,9 @@ def build_auction_embed(item_name: str, rarity: str, min_bid: int, ends_at: date
         color=discord.Color.purple(),
     )
     if ends_at is not None:
-        embed.add_field(name="⏳ Tempo restante", value=format_time_remaining(int((ends_at - datetime.now()).total_seconds())), inline=False)
+        # Timestamp relativo: o próprio cliente do Discord faz a contagem
+        # regressiva, então o embed só muda quando entra um lance novo.
+        embed.add_field(name="⏳ Tempo restante", value=f"<t:{int(ends_at.timestamp())}:R>", inline=False)
     embed.add_field(name="👤 Participante atual", value=participant or "Nenhum", inline=True)
     embed.add_field(name="💸 Último lance", value=f"{last_bid} Sachês" if last_bid is not None else "Nenhum", inline=True)
     return embed
@@ -141,15 +139,12 @@ async def craftar(interaction: discord.Interaction, tipo: str):
             ephemeral=True,
         )
 
-    for fish, qty in recipe["peixes"].items():
-        consume_fish(conn, uid, fish, qty)
-
-    conn.execute(
-        "UPDATE users SET scrap = scrap - ? WHERE user_id = ?",
-        (recipe["scrap"], uid),
-    )
-    add_inventory_item(conn, uid, recipe["result"], 1)
-    conn.commit()
+    # Peixes gastos e isca criada numa transação só (o mesmo delta-batch
+    # de apply_inventory_deltas), em vez de um commit por peixe.
+    deltas = {fish: -qty for fish, qty in recipe["peixes"].items()}
+    deltas[recipe["result"]] = deltas.get(recipe["result"], 0) + 1
+    apply_inventory_deltas(conn, uid, deltas)
+    modify_scrap(conn, uid, -recipe["scrap"])
 
     item_name = SHOP_ITEMS.get(recipe["result"], {}).get("name", recipe["result"])
     await interaction.response.send_message(
@@ -483,7 +478,7 @@ class AuctionView(discord.ui.View):
             bidder_name,
             suggested,
         )
-        await interaction.message.edit(embed=embed)
+        EDITS.submit(interaction.message, embed=embed)
 
         await interaction.response.send_message(
             f"✅ Lance de **{suggested} Sachês** aceito para **{self.item_name}**.",
@@ -593,8 +588,9 @@ class MinigamesCog(commands.Cog):
                     break
                 if datetime.now() >= auction["ends"]:
                     break
+                # Sem lance novo o embed sai idêntico e o agendador nem envia.
                 try:
-                    await msg.edit(embed=build_auction_embed(
+                    await EDITS.edit(msg, embed=build_auction_embed(
                         auction["item_name"],
                         auction.get("rarity", "common"),
                         auction.get("min_bid", min_bid),
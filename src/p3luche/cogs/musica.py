@@ -14,12 +14,6 @@ from datetime import datetime, timedelta
 import discord
 from discord import app_commands
 from discord.ext import commands
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from yt_dlp import YoutubeDL
 
 from config import (
     CLIENT_SECRET_FILE,
@@ -43,6 +37,8 @@ from utils import (
     log_to_gui,
     normalize_title,
 )
+from music_index import CATALOG
+from music_search import search_music
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CONFIGURAÇÃO DE COMPRESSÃO — ajuste estes valores se necessário
@@ -277,8 +273,18 @@ class LibrarySortView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=pagination_view)
 
 # ─── GOOGLE DRIVE & YT-DLP ───────────────────────────────────────────────────
+# Imports locais de propósito, como em lore_ai._generate_graph_image: a pilha
+# do Google (googleapiclient + google-auth + oauthlib, ~200ms) e o yt_dlp
+# (~80ms) eram importados no load_extension, no event loop, a cada startup.
+# Todas estas funções rodam em thread (asyncio.to_thread / run_in_executor),
+# então o custo da primeira chamada nem sequer cai no loop.
 
 def get_drive_service():
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     scopes = ["https://www.googleapis.com/auth/drive.file"]
     creds = None
     if os.path.exists(CREDENTIALS_PATH):
@@ -301,6 +307,8 @@ def get_drive_service():
 
 def get_song_info(youtube_url):
     """Obtém informações do vídeo usando cliente Android para evitar erro 403/SABR."""
+    from yt_dlp import YoutubeDL
+
     ydl_opts = {
         "format": "bestaudio[ext=m4a]/bestaudio/best",
         "quiet": True,
@@ -337,6 +345,8 @@ def download_audio_file(youtube_url, temp_dir_path):
     Realiza o download e extrai o áudio bruto (sem compressão ainda).
     A compressão para Etched é feita em etapa separada via _compress_audio_for_etched.
     """
+    from yt_dlp import YoutubeDL
+
     ydl_opts = {
         "format": "bestaudio[ext=m4a]/bestaudio/best",
         "outtmpl": os.path.join(temp_dir_path, "%(id)s.%(ext)s"),
@@ -367,6 +377,8 @@ def download_audio_file(youtube_url, temp_dir_path):
 
 def upload_to_drive(file_path, title):
     """Faz upload de qualquer arquivo de áudio para o Drive (suporta .mp3 e .ogg)."""
+    from googleapiclient.http import MediaFileUpload
+
     if not DRIVE_FOLDER_ID:
         raise Exception("ID da pasta do Google Drive não configurado.")
     service = get_drive_service()
@@ -455,6 +467,7 @@ async def _perform_song_download_upload_cache(
         )
 
     get_bot_instance().db_conn.commit()
+    CATALOG.refresh(get_bot_instance().db_conn, cursor.lastrowid)
     log_to_gui(f"'{actual_dl_title}' adicionada com sucesso por {user_name}.", "SUCCESS")
     return actual_dl_title, drive_link, compress_info
 
@@ -472,6 +485,7 @@ def rebuild_database_from_drive(force=False):
         log_to_gui("Limpando banco de dados (force=True)...", "INFO")
         cursor.execute("DELETE FROM music_cache")
         get_bot_instance().db_conn.commit()
+        CATALOG.clear()
     log_to_gui("Carregando arquivos da pasta do Drive...", "INFO")
     results = (
         service.files()
@@ -505,6 +519,7 @@ def rebuild_database_from_drive(force=False):
             ),
         )
     get_bot_instance().db_conn.commit()
+    CATALOG.load(get_bot_instance().db_conn)
     log_to_gui(f"Reconstrução concluída! {len(files)} músicas restauradas.", "SUCCESS")
 
 
@@ -669,6 +684,7 @@ async def process_file_music_addition(
             ),
         )
         get_bot_instance().db_conn.commit()
+        CATALOG.refresh(get_bot_instance().db_conn, cursor.lastrowid)
 
         # ── ETAPA 5: Resposta ──────────────────────────────────────────────
         channels_text = "estéreo" if compress_info.get("channels", 2) == 2 else "mono"
@@ -758,18 +774,14 @@ async def musica_adicionar(
 async def musica_buscar(interaction: discord.Interaction, termo: str):
     if not await check_channel_permission(interaction):
         return
-    cursor = get_bot_instance().db_conn.cursor()
     normalized_search = normalize_title(termo)
-
-    rows = cursor.execute(
-        """
-        SELECT id, title, drive_link
-        FROM music_cache
-        WHERE (normalized_title LIKE ? OR title LIKE ?) AND is_active = 1
-        ORDER BY title COLLATE NOCASE LIMIT 10
-        """,
-        (f"%{normalized_search}%", f"%{termo}%"),
-    ).fetchall()
+    rows = search_music(
+        get_bot_instance().db_conn,
+        "music_cache.id, music_cache.title, music_cache.drive_link",
+        normalized_search,
+        termo,
+        limit=10,
+    )
 
     if rows:
         description = "\n".join(
@@ -822,6 +834,7 @@ async def musica_editar(
         (novo_titulo, new_norm, interaction.user.name, datetime.now(), id_musica),
     )
     get_bot_instance().db_conn.commit()
+    CATALOG.refresh(get_bot_instance().db_conn, id_musica)
 
     embed = discord.Embed(title="✏️ Música Renomeada", color=discord.Color.gold())
     embed.add_field(name="Antes", value=old_title, inline=True)
@@ -857,6 +870,7 @@ async def musica_ocultar(interaction: discord.Interaction, id_musica: int):
         (interaction.user.name, datetime.now(), id_musica),
     )
     get_bot_instance().db_conn.commit()
+    CATALOG.refresh(get_bot_instance().db_conn, id_musica)
     await interaction.response.send_message(
         f"🗑️ A música **{song['title']}** foi movida para a lixeira (Oculta).",
         ephemeral=True,
@@ -888,6 +902,7 @@ async def musica_restaurar(interaction: discord.Interaction, id_musica: int):
         (interaction.user.name, datetime.now(), id_musica),
     )
     get_bot_instance().db_conn.commit()
+    CATALOG.refresh(get_bot_instance().db_conn, id_musica)
     await interaction.response.send_message(
         f"♻️ A música **{song['title']}** foi restaurada com sucesso!", ephemeral=True
     )
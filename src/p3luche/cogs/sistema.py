@@ -15,12 +15,33 @@ import psutil
 from discord import app_commands
 from discord.ext import commands
 
+import telemetry
 from config import MOD_ROLE_IDS, set_bot_instance
 from cogs.economia import WEATHER_EFFECTS
 from cogs.ilha import ISLAND_HUB_LORE
 from cogs.onboarding import ADD_APP_STEPS
 
 
+def format_command_latencies(slowest: list) -> str:
+    """Linhas do campo de latência do /stats: p50/p95/p99 da primeira resposta
+    e da conclusão de cada comando (telemetry.slowest_commands)."""
+    if not slowest:
+        return "Sem dados ainda."
+
+    def trio(phase):
+        if not phase:
+            return "—"
+        return f"{phase['p50_ms']:.0f}/{phase['p95_ms']:.0f}/{phase['p99_ms']:.0f}"
+
+    lines = []
+    for name, latency in slowest:
+        lines.append(
+            f"`/{name}` ×{latency['done']['count']} — "
+            f"1ª resp. `{trio(latency['first'])}` · fim `{trio(latency['done'])}`"
+        )
+    return "\n".join(lines)
+
+
 class HelpSelect(discord.ui.Select):
     def __init__(self, bot_ref, user):
         self.bot = bot_ref
@@ -463,6 +484,12 @@ class SistemaCog(commands.Cog):
             inline=False,
         )
 
+        embed.add_field(
+            name="🐢 Comandos mais lentos (ms, p50/p95/p99)",
+            value=format_command_latencies(telemetry.slowest_commands(5)),
+            inline=False,
+        )
+
         embed.set_footer(
             text=f"Solicitado por {interaction.user.name}",
             icon_url=interaction.user.avatar.url if interaction.user.avatar else None,
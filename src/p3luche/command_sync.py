@@ -0,0 +1,73 @@
+"""
+Sincronização da árvore de slash commands só quando ela muda.
+
+`bot.tree.sync()` é uma chamada HTTP que sobrescreve todos os comandos
+globais da aplicação e tem rate limit apertado. O `on_ready` dispara de novo
+a cada reconexão do gateway, e num loop de deploy o bot reinicia várias
+vezes seguidas com a mesma árvore — sincronizar em todas essas vezes só
+gasta a cota.
+
+`tree_fingerprint` serializa a árvore exatamente como ela seria enviada ao
+Discord (`to_dict` de cada comando/grupo/menu de contexto global) e tira um
+sha256. `sync_command_tree` compara com o último fingerprint sincronizado,
+guardado em `COMMAND_TREE_STATE_PATH` por application_id (o mesmo diretório
+pode servir a um bot de teste e ao de produção), e só chama `tree.sync()`
+quando ele mudou — ou quando `force=True`, que é o que o
+`/admin sistema sincronizar` usa se a árvore remota sair do lugar por fora.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+from config import COMMAND_TREE_STATE_PATH
+
+
+def tree_fingerprint(tree) -> str:
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda data: (data.get("type", 1), data["name"]),
+    )
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _load_state(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def stored_fingerprint(application_id, path: str = COMMAND_TREE_STATE_PATH) -> str | None:
+    return _load_state(path).get(str(application_id))
+
+
+def store_fingerprint(application_id, fingerprint: str, path: str = COMMAND_TREE_STATE_PATH) -> None:
+    state = _load_state(path)
+    state[str(application_id)] = fingerprint
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+async def sync_command_tree(tree, force: bool = False, path: str = COMMAND_TREE_STATE_PATH) -> dict:
+    """Sincroniza a árvore global se o fingerprint mudou (ou se `force`).
+
+    Devolve {"synced": bool, "count": int|None, "fingerprint": str}. O
+    fingerprint só é gravado depois que o `tree.sync()` deu certo: se a
+    chamada falhar, a próxima tentativa sincroniza de novo.
+    """
+    application_id = tree.client.application_id
+    fingerprint = tree_fingerprint(tree)
+    if not force and stored_fingerprint(application_id, path) == fingerprint:
+        return {"synced": False, "count": None, "fingerprint": fingerprint}
+
+    synced = await tree.sync()
+    store_fingerprint(application_id, fingerprint, path)
+    return {"synced": True, "count": len(synced), "fingerprint": fingerprint}
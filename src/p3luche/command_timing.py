@@ -0,0 +1,103 @@
+"""
+Latência de slash commands, medida num ponto só: a árvore de comandos.
+
+`TimedCommandTree` substitui a `CommandTree` padrão do bot (`tree_cls` em
+main.py) e cronometra `_call` — o método que o discord.py agenda para cada
+interação de comando (slash e menu de contexto) e que só retorna quando o
+callback termina. Mede duas coisas, a partir do recebimento da interação:
+
+- **primeira resposta** — quando o comando chamou defer/send_message/
+  edit_message/send_modal. É o número que o Discord vê (prazo de 3s);
+- **conclusão** — quando o callback terminou (inclui followups, escrita no
+  banco etc.).
+
+Ambos vão para `telemetry.record_command_latency` (histograma por comando).
+
+A primeira resposta não tem evento no discord.py: toda resposta passa por
+`InteractionResponse._response_type`, então `install_response_hook()` troca
+esse slot por um descritor que, na primeira atribuição, carimba o horário em
+`interaction.extras`. O slot original continua guardando o valor; o descritor
+só observa.
+
+A mesma árvore segura os comandos que chegam antes de as extensões
+terminarem de carregar (`bot.extensions_loaded`, ver main.py): em vez de um
+`CommandNotFound` para um comando que existe, o jogador recebe um aviso de
+que o bot ainda está subindo.
+"""
+
+from __future__ import annotations
+
+import time
+
+from discord import InteractionResponse, InteractionType, app_commands
+
+import telemetry
+
+FIRST_RESPONSE_KEY = "p3luche_first_response_at"
+STARTING_UP_MESSAGE = "⏳ Estou terminando de iniciar — tente de novo em alguns segundos."
+
+
+class _FirstResponseStamp:
+    """Descritor em volta do slot `_response_type` de InteractionResponse."""
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.slot.__get__(obj, owner)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+        if value is not None:
+            try:
+                obj._parent.extras.setdefault(FIRST_RESPONSE_KEY, time.perf_counter())
+            except Exception:
+                pass  # telemetria nunca atrapalha a resposta
+
+
+def install_response_hook() -> None:
+    """Idempotente: instala o carimbo de primeira resposta uma vez só."""
+    current = InteractionResponse.__dict__["_response_type"]
+    if not isinstance(current, _FirstResponseStamp):
+        InteractionResponse._response_type = _FirstResponseStamp(current)
+
+
+def command_name(interaction) -> str:
+    command = getattr(interaction, "command", None)
+    name = getattr(command, "qualified_name", None)
+    if name:
+        return name
+    data = getattr(interaction, "data", None) or {}
+    return data.get("name") or "?"
+
+
+class TimedCommandTree(app_commands.CommandTree):
+    """CommandTree que registra a latência de cada comando na telemetria."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        install_response_hook()
+
+    async def interaction_check(self, interaction) -> bool:
+        loading = getattr(self.client, "extensions_loaded", None)
+        if loading is None or loading.done():
+            return True
+        # Autocomplete não aceita mensagem: só fica sem sugestões.
+        if interaction.type == InteractionType.application_command:
+            await interaction.response.send_message(STARTING_UP_MESSAGE, ephemeral=True)
+        return False
+
+    async def _call(self, interaction) -> None:
+        received = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            done = time.perf_counter() - received
+            first = interaction.extras.get(FIRST_RESPONSE_KEY)
+            telemetry.record_command_latency(
+                command_name(interaction),
+                done,
+                None if first is None else max(0.0, first - received),
+            )
@@ -55,6 +55,16 @@ DRIVE_FOLDER_ID = "1U8-Pz2YamB1OSP-wAaT8Wzw-3VOKM8Hc"
 # Configure via .env: JUKEBOX_DRIVE_FOLDER_ID=<id_da_pasta>
 # Fallback para DRIVE_FOLDER_ID para não quebrar ambientes antigos.
 JUKEBOX_DRIVE_FOLDER_ID = os.getenv("JUKEBOX_DRIVE_FOLDER_ID", DRIVE_FOLDER_ID)
+# Backups do banco (db_backup.py): vão para uma subpasta de DRIVE_FOLDER_ID.
+# Com P3LUCHE_BACKUP_DIR=<pasta> no .env, vão para esse diretório local.
+BACKUP_DIR = os.getenv("P3LUCHE_BACKUP_DIR")
+# Fingerprint da árvore de slash commands já sincronizada (command_sync.py).
+# Fica ao lado do banco, então os testes também caem no diretório temporário.
+COMMAND_TREE_STATE_PATH = os.path.join(os.path.dirname(DB_PATH), "command_tree.json")
+# Cópias locais das faixas do Drive tocadas pela jukebox (audio_cache.py).
+# Limite em MB via .env: P3LUCHE_AUDIO_CACHE_MB=<mb> (padrão 2048).
+AUDIO_CACHE_DIR = os.path.join(os.path.dirname(DB_PATH), "audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("P3LUCHE_AUDIO_CACHE_MB", "2048")) * 1024 * 1024
 CLIENT_SECRET_FILE = os.path.join(os.getcwd(), "client_secret.json")
 CREDENTIALS_PATH = os.path.join(LOG_FOLDER, "credentials.json")
 
@@ -0,0 +1,193 @@
+"""
+Cooldowns de /eco pescar e /eco explorar servidos da memória (sem discord.py).
+
+Antes, toda tentativa — inclusive o spam que ia ser recusado — lia
+`user_cooldowns` (com `ensure_user`), fazia `strptime` do texto gravado e,
+quando passava, gravava o horário novo na hora via `set_cooldown` (mais um
+`ensure_user` + UPDATE + commit). Agora `COOLDOWNS` guarda, por
+(jogador, campo), o instante em epoch do último uso e o cooldown que valia
+naquela hora:
+
+- `blocked_until` responde a recusa sem tocar no SQLite. Só o primeiro acesso
+  de um jogador depois do boot (entrada desconhecida) vai ao banco, via
+  `seed`, com o valor que o comando já leu;
+- `try_reserve` é o check-and-reserve atômico: confere e reserva sob o mesmo
+  lock, então duas chamadas do mesmo jogador nunca passam juntas. A conferência
+  usa o cooldown ATUAL que o comando calculou (vara e upgrades de agora), não o
+  da reserva anterior — trocar para uma vara mais rápida no meio da espera vale
+  na hora, como valia quando o horário era relido do banco;
+- quem muda o cooldown de um jogador (equipar vara, upgrade de CD) chama
+  `recheck`: a recusa rápida deixa de responder por ele até o próximo
+  `try_reserve` recalcular;
+- as reservas e os `reset` viram pendências (write-behind) que `flush` grava
+  em lote em `user_cooldowns`, no formato de texto de sempre — a EconomiaCog
+  chama a cada `FLUSH_SECONDS` e no unload.
+
+Quem zera cooldowns direto no banco (admin) precisa chamar `forget` ANTES da
+escrita, senão a memória continuaria recusando. `forget` avança uma geração:
+um `flush` que já tinha pegado o lote confere a geração dentro da transação
+de escrita e descarta o que é de antes do reset, em vez de regravar por cima
+dele os horários antigos.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+
+from economy_db import write_cooldowns
+
+# Formato gravado em user_cooldowns (o mesmo lido pelo dashboard e pelo admin).
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+FLUSH_SECONDS = 15
+# Acima disto, entradas já liberadas e sem pendência saem da memória; a
+# próxima tentativa desse jogador passa pelo banco de novo.
+MAX_ENTRIES = 5000
+
+
+def parse_timestamp(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch).strftime(TIMESTAMP_FORMAT)
+
+
+class CooldownRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (user_id, campo) -> (último_uso, cooldown, rótulo). último_uso None = livre.
+        self._ready = {}
+        # (user_id, campo) -> texto (ou None) ainda não gravado no banco.
+        self._dirty = {}
+        # Avançam a cada forget() (global / de um jogador).
+        self._generation = 0
+        self._user_generation = {}
+
+    def known(self, user_id: int, field: str) -> bool:
+        return (user_id, field) in self._ready
+
+    def blocked_until(self, user_id: int, field: str, now: float | None = None) -> tuple | None:
+        """(libera_em, rótulo) se o cooldown está ativo; None se livre OU desconhecido."""
+        entry = self._ready.get((user_id, field))
+        if entry is None:
+            return None
+        last, cooldown, label = entry
+        if last is None or last + cooldown <= (time.time() if now is None else now):
+            return None
+        return last + cooldown, label
+
+    def seed(self, user_id: int, field: str, last, cooldown: float, label: str | None = None) -> None:
+        """Carrega o valor lido do banco. Não sobrescreve o que a memória já sabe."""
+        with self._lock:
+            self._ready.setdefault((user_id, field), (parse_timestamp(last), cooldown, label))
+
+    def try_reserve(
+        self, user_id: int, field: str, cooldown: float, label: str | None = None, now: float | None = None
+    ) -> tuple:
+        """(True, libera_em) e reserva; (False, libera_em) se ainda está em cooldown.
+
+        `cooldown` é o valor de agora: o último uso é reavaliado com ele.
+        """
+        now = time.time() if now is None else now
+        key = (user_id, field)
+        with self._lock:
+            entry = self._ready.get(key)
+            last = entry[0] if entry is not None else None
+            if last is not None and last + cooldown > now:
+                # Atualiza o cooldown guardado para a recusa rápida seguir
+                # respondendo com o horário certo.
+                self._ready[key] = (last, cooldown, label)
+                return False, last + cooldown
+            self._ready[key] = (now, cooldown, label)
+            self._dirty[key] = format_timestamp(now)
+            self._prune(now)
+        return True, now + cooldown
+
+    def reset(self, user_id: int, field: str) -> None:
+        """Libera o cooldown (energético, reembolso) e agenda o NULL no banco."""
+        with self._lock:
+            self._ready[(user_id, field)] = (None, 0.0, None)
+            self._dirty[(user_id, field)] = None
+
+    def recheck(self, user_id: int, field: str) -> None:
+        """O cooldown deste jogador mudou: o próximo acesso recalcula.
+
+        Mantém o último uso (nada vai ao banco); só tira a entrada da recusa
+        rápida, já que o cooldown guardado nela pode ser o da vara antiga.
+        """
+        with self._lock:
+            entry = self._ready.get((user_id, field))
+            if entry is not None:
+                self._ready[(user_id, field)] = (entry[0], 0.0, entry[2])
+
+    def forget(self, user_id: int | None = None) -> None:
+        """Descarta memória e pendências (de um jogador ou de todos).
+
+        Para quando o banco foi alterado por fora (reset de admin): a próxima
+        tentativa relê o valor gravado.
+        """
+        with self._lock:
+            if user_id is None:
+                self._generation += 1
+                self._user_generation.clear()
+                self._ready.clear()
+                self._dirty.clear()
+                return
+            self._user_generation[user_id] = self._user_generation.get(user_id, 0) + 1
+            for store in (self._ready, self._dirty):
+                for key in [k for k in store if k[0] == user_id]:
+                    del store[key]
+
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def flush(self, conn) -> int:
+        """Grava as pendências em `user_cooldowns`. Devolve quantas linhas."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            generation = self._generation
+            user_generation = {user_id: self._user_generation.get(user_id, 0) for user_id, _ in dirty}
+        if not dirty:
+            return 0
+
+        def still_current(rows):
+            # Chamado dentro do BEGIN IMMEDIATE: descarta o que um forget()
+            # tornou velho enquanto o lote esperava a vez de gravar.
+            with self._lock:
+                if self._generation != generation:
+                    return []
+                return [row for row in rows if self._user_generation.get(row[0], 0) == user_generation[row[0]]]
+
+        try:
+            return write_cooldowns(
+                conn, [(user_id, field, value) for (user_id, field), value in dirty.items()], keep=still_current
+            )
+        except Exception:
+            # Volta para a fila sem atropelar o que chegou durante a escrita
+            # nem ressuscitar o que um forget() descartou.
+            with self._lock:
+                if self._generation == generation:
+                    for key, value in dirty.items():
+                        if self._user_generation.get(key[0], 0) == user_generation[key[0]]:
+                            self._dirty.setdefault(key, value)
+            raise
+
+    def _prune(self, now: float) -> None:
+        if len(self._ready) <= MAX_ENTRIES:
+            return
+        for key in [
+            k
+            for k, (last, cooldown, _) in self._ready.items()
+            if (last is None or last + cooldown <= now) and k not in self._dirty
+        ]:
+            del self._ready[key]
+
+
+COOLDOWNS = CooldownRegistry()
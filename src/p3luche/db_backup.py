@@ -0,0 +1,371 @@
+"""
+Backup incremental do banco (sem dependência do discord.py).
+
+Antes, `BackupCog.backup_loop` e o `ResetGlobalModal` mandavam o arquivo
+`bot.db` vivo para o Drive com `MediaFileUpload`, com o bot escrevendo nele ao
+mesmo tempo (cópia possivelmente rasgada), e sempre o arquivo inteiro. O
+pipeline agora tem quatro estágios:
+
+1. **Snapshot consistente** — `sqlite3.Connection.backup` de uma conexão
+   somente leitura para um arquivo temporário, BACKUP_STEP_PAGES páginas por
+   passo com uma pausa entre eles: o escritor do bot nunca espera mais que um
+   passo. Se o banco muda no meio, o sqlite reinicia a cópia; depois de
+   SNAPSHOT_MAX_RESTARTS reinícios a cópia é feita de uma vez (em WAL isso não
+   bloqueia escritores, só o checkpoint).
+2. **Chunks definidos pelo conteúdo** — o snapshot é lido uma página por vez e
+   cortado em chunks de CHUNK_MIN_PAGES a CHUNK_MAX_PAGES páginas; o corte cai
+   depois de uma página cujo hash bate na CHUNK_BOUNDARY_MASK. Como o corte
+   depende do conteúdo e não da posição, páginas inseridas ou removidas no
+   meio do arquivo só mudam os chunks vizinhos. O sqlite escreve em páginas
+   inteiras, então o corte nunca precisa cair no meio de uma.
+3. **Compressão em fluxo** — cada chunk é comprimido (zlib) assim que fecha e
+   só sobe se o alvo ainda não tem aquele hash. A memória usada é a de um
+   chunk, não a do banco.
+4. **Manifesto** — JSON com a lista ordenada de hashes e o sha256 do arquivo
+   inteiro, gravado por último (um manifesto nunca aponta para chunk que não
+   subiu). Cada manifesto é um ponto de restauração: `restore_database`
+   remonta o banco de qualquer um deles, ou do último antes de uma data.
+
+Alvos: `LocalBackupTarget` (diretório; usado nos testes e com
+P3LUCHE_BACKUP_DIR) e `DriveBackupTarget` (subpasta de DRIVE_FOLDER_ID).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.005
+SNAPSHOT_MAX_RESTARTS = 3
+
+# Média de ~16 páginas por chunk (64 KB com página de 4 KB).
+CHUNK_MIN_PAGES = 4
+CHUNK_MAX_PAGES = 64
+CHUNK_BOUNDARY_MASK = 0x0F
+
+COMPRESSION_LEVEL = 6
+MANIFEST_VERSION = 1
+
+# O nome do manifesto começa pelo horário: ordem alfabética = ordem temporal.
+_MANIFEST_TIME_FORMAT = "%Y-%m-%dT%H%M%S"
+_LABEL_UNSAFE = re.compile(r"[^\w-]+")
+
+DRIVE_BACKUP_FOLDER = "p3luche_db_backups"
+_DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+class BackupError(RuntimeError):
+    """Backup ou restauração impossível (alvo vazio, chunk corrompido...)."""
+
+
+class _SnapshotRestarted(Exception):
+    pass
+
+
+# ──────────────────────────────────────────────
+#  SNAPSHOT
+# ──────────────────────────────────────────────
+
+def snapshot_database(db_path, dest_path, pages: int = BACKUP_STEP_PAGES,
+                      sleep: float = BACKUP_STEP_SLEEP) -> int:
+    """Cópia consistente de `db_path` em `dest_path`. Devolve o page_size."""
+    source = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        restarts = 0
+        last_remaining = None
+
+        def progress(_status, remaining, _total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts >= SNAPSHOT_MAX_RESTARTS:
+                    raise _SnapshotRestarted
+            last_remaining = remaining
+
+        dest = sqlite3.connect(dest_path)
+        try:
+            try:
+                source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+            except _SnapshotRestarted:
+                source.backup(dest, pages=-1)
+            return dest.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            dest.close()
+    finally:
+        source.close()
+
+
+# ──────────────────────────────────────────────
+#  CHUNKS
+# ──────────────────────────────────────────────
+
+def _is_boundary(page: bytes, mask: int) -> bool:
+    return hashlib.blake2b(page, digest_size=4).digest()[0] & mask == 0
+
+
+def iter_chunks(stream, page_size: int, min_pages: int = CHUNK_MIN_PAGES,
+                max_pages: int = CHUNK_MAX_PAGES, mask: int = CHUNK_BOUNDARY_MASK):
+    """Lê `stream` página a página e produz os chunks (bytes) em ordem."""
+    pages = []
+    while True:
+        page = stream.read(page_size)
+        if not page:
+            break
+        pages.append(page)
+        if len(pages) >= max_pages or (len(pages) >= min_pages and _is_boundary(page, mask)):
+            yield b"".join(pages)
+            pages = []
+    if pages:
+        yield b"".join(pages)
+
+
+# ──────────────────────────────────────────────
+#  ALVOS
+# ──────────────────────────────────────────────
+
+class LocalBackupTarget:
+    """Chunks e manifestos num diretório: `chunks/ab/abcd...` e `manifests/*.json`."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._chunks = self.root / "chunks"
+        self._manifests = self.root / "manifests"
+        self._chunks.mkdir(parents=True, exist_ok=True)
+        self._manifests.mkdir(parents=True, exist_ok=True)
+
+    def _chunk_path(self, chunk_id: str) -> Path:
+        return self._chunks / chunk_id[:2] / chunk_id
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def has_chunk(self, chunk_id: str) -> bool:
+        return self._chunk_path(chunk_id).exists()
+
+    def put_chunk(self, chunk_id: str, data: bytes) -> None:
+        self._write_atomic(self._chunk_path(chunk_id), data)
+
+    def get_chunk(self, chunk_id: str) -> bytes:
+        try:
+            return self._chunk_path(chunk_id).read_bytes()
+        except FileNotFoundError:
+            raise BackupError(f"chunk {chunk_id} ausente no backup") from None
+
+    def put_manifest(self, name: str, data: bytes) -> str:
+        path = self._manifests / f"{name}.json"
+        self._write_atomic(path, data)
+        return str(path)
+
+    def get_manifest(self, name: str) -> bytes:
+        try:
+            return (self._manifests / f"{name}.json").read_bytes()
+        except FileNotFoundError:
+            raise BackupError(f"manifesto {name} não encontrado") from None
+
+    def list_manifests(self) -> list:
+        return sorted(path.stem for path in self._manifests.glob("*.json"))
+
+
+class DriveBackupTarget:
+    """Chunks (`chunk-<hash>`) e manifestos (`manifest-<nome>.json`) numa
+    subpasta de `parent_id` no Drive. Os arquivos ficam privados, como o
+    upload antigo: nada de permissions().create()."""
+
+    def __init__(self, service, parent_id: str, folder_name: str = DRIVE_BACKUP_FOLDER):
+        self.service = service
+        self.folder_id = self._find_or_create_folder(parent_id, folder_name)
+        self._index = None
+
+    def _find_or_create_folder(self, parent_id: str, name: str) -> str:
+        query = (
+            f"name = '{name}' and '{parent_id}' in parents "
+            f"and mimeType = '{_DRIVE_FOLDER_MIME}' and trashed = false"
+        )
+        found = self.service.files().list(q=query, fields="files(id)").execute().get("files", [])
+        if found:
+            return found[0]["id"]
+        body = {"name": name, "mimeType": _DRIVE_FOLDER_MIME, "parents": [parent_id]}
+        return self.service.files().create(body=body, fields="id").execute()["id"]
+
+    def _files(self) -> dict:
+        """nome -> id de tudo que já está na pasta (listado uma vez por alvo)."""
+        if self._index is None:
+            index, token = {}, None
+            while True:
+                page = self.service.files().list(
+                    q=f"'{self.folder_id}' in parents and trashed = false",
+                    fields="nextPageToken, files(id, name)",
+                    pageSize=1000,
+                    pageToken=token,
+                ).execute()
+                index.update({f["name"]: f["id"] for f in page.get("files", [])})
+                token = page.get("nextPageToken")
+                if not token:
+                    break
+            self._index = index
+        return self._index
+
+    def _upload(self, name: str, data: bytes, mimetype: str) -> str:
+        from googleapiclient.http import MediaIoBaseUpload
+
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype, resumable=len(data) > 5 * 1024 * 1024)
+        body = {"name": name, "parents": [self.folder_id]}
+        fid = self.service.files().create(body=body, media_body=media, fields="id").execute()["id"]
+        self._files()[name] = fid
+        return fid
+
+    def _download(self, name: str) -> bytes:
+        from googleapiclient.http import MediaIoBaseDownload
+
+        fid = self._files().get(name)
+        if fid is None:
+            raise BackupError(f"{name} não encontrado no Drive")
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, self.service.files().get_media(fileId=fid))
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+        return buffer.getvalue()
+
+    def has_chunk(self, chunk_id: str) -> bool:
+        return f"chunk-{chunk_id}" in self._files()
+
+    def put_chunk(self, chunk_id: str, data: bytes) -> None:
+        self._upload(f"chunk-{chunk_id}", data, "application/octet-stream")
+
+    def get_chunk(self, chunk_id: str) -> bytes:
+        return self._download(f"chunk-{chunk_id}")
+
+    def put_manifest(self, name: str, data: bytes) -> str:
+        fid = self._upload(f"manifest-{name}.json", data, "application/json")
+        return f"https://drive.google.com/file/d/{fid}/view"
+
+    def get_manifest(self, name: str) -> bytes:
+        return self._download(f"manifest-{name}.json")
+
+    def list_manifests(self) -> list:
+        return sorted(
+            name[len("manifest-"):-len(".json")]
+            for name in self._files()
+            if name.startswith("manifest-") and name.endswith(".json")
+        )
+
+
+# ──────────────────────────────────────────────
+#  BACKUP / RESTAURAÇÃO
+# ──────────────────────────────────────────────
+
+def manifest_name(created: datetime, label: str) -> str:
+    safe = _LABEL_UNSAFE.sub("_", label).strip("_") or "backup"
+    return f"{created.strftime(_MANIFEST_TIME_FORMAT)}_{safe}"
+
+
+def backup_database(db_path, target, label: str = "auto", now: datetime = None) -> dict:
+    """Snapshot -> chunks -> compressão -> alvo -> manifesto. Síncrono:
+    rodar via asyncio.to_thread."""
+    created = now or datetime.now()
+    name = manifest_name(created, label)
+    chunk_ids = []
+    uploaded = uploaded_bytes = size = 0
+    digest = hashlib.sha256()
+
+    with tempfile.TemporaryDirectory(prefix="p3luche-backup-") as tmp:
+        snapshot = os.path.join(tmp, "snapshot.db")
+        page_size = snapshot_database(db_path, snapshot)
+        sent = set()
+        with open(snapshot, "rb") as stream:
+            for chunk in iter_chunks(stream, page_size):
+                digest.update(chunk)
+                size += len(chunk)
+                chunk_id = hashlib.sha256(chunk).hexdigest()
+                chunk_ids.append(chunk_id)
+                if chunk_id in sent or target.has_chunk(chunk_id):
+                    continue
+                data = zlib.compress(chunk, COMPRESSION_LEVEL)
+                target.put_chunk(chunk_id, data)
+                sent.add(chunk_id)
+                uploaded += 1
+                uploaded_bytes += len(data)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "name": name,
+        "label": label,
+        "created_at": created.isoformat(timespec="seconds"),
+        "source": os.path.basename(str(db_path)),
+        "page_size": page_size,
+        "size": size,
+        "sha256": digest.hexdigest(),
+        "chunks": chunk_ids,
+    }
+    location = target.put_manifest(name, json.dumps(manifest, indent=1).encode("utf-8"))
+    return {
+        "manifest": name,
+        "location": location,
+        "size": size,
+        "chunks": len(chunk_ids),
+        "uploaded": uploaded,
+        "uploaded_bytes": uploaded_bytes,
+    }
+
+
+def find_manifest(target, at: datetime = None):
+    """Nome do último manifesto (ou do último criado até `at`); None se não há."""
+    names = target.list_manifests()
+    if at is not None:
+        cutoff = at.strftime(_MANIFEST_TIME_FORMAT)
+        names = [name for name in names if name[: len(cutoff)] <= cutoff]
+    return names[-1] if names else None
+
+
+def restore_database(target, dest_path, manifest: str = None, at: datetime = None) -> dict:
+    """Remonta o banco de `manifest` (ou do último até `at`) em `dest_path`.
+
+    Nunca sobrescreve: `dest_path` não pode existir. Cada chunk e o arquivo
+    final são conferidos pelo sha256 antes do arquivo aparecer no destino.
+    """
+    name = manifest or find_manifest(target, at)
+    if name is None:
+        raise BackupError("nenhum backup disponível para restaurar")
+    dest = Path(dest_path)
+    if dest.exists():
+        raise BackupError(f"{dest} já existe; restaure para um caminho novo")
+
+    data = json.loads(target.get_manifest(name))
+    if data.get("version") != MANIFEST_VERSION:
+        raise BackupError(f"versão de manifesto desconhecida: {data.get('version')}")
+
+    partial = dest.with_name(dest.name + ".restoring")
+    digest = hashlib.sha256()
+    try:
+        with open(partial, "wb") as out:
+            for chunk_id in data["chunks"]:
+                try:
+                    chunk = zlib.decompress(target.get_chunk(chunk_id))
+                except zlib.error:
+                    raise BackupError(f"chunk {chunk_id} corrompido") from None
+                if hashlib.sha256(chunk).hexdigest() != chunk_id:
+                    raise BackupError(f"chunk {chunk_id} corrompido")
+                digest.update(chunk)
+                out.write(chunk)
+        if digest.hexdigest() != data["sha256"]:
+            raise BackupError(f"arquivo remontado não confere com o manifesto {name}")
+        os.replace(partial, dest)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+    return {"manifest": name, "created_at": data["created_at"], "size": data["size"]}
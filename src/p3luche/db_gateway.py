@@ -0,0 +1,261 @@
+"""Gateway assíncrono de acesso ao SQLite.
+
+Até aqui toda cog chamava a conexão única de `DatabaseManager.connect()`
+(aberta com `check_same_thread=False`) direto de dentro das corrotinas. Cada
+`BEGIN IMMEDIATE` de `economy_db.modify_wallet`/`try_spend_wallet` rodava no
+event loop: sob disputa de lock, o loop inteiro ficava parado até o busy
+timeout do sqlite — o comentário do Crash em `cogs/casino.py` já registrava
+isso.
+
+O gateway tira o banco do loop:
+
+- **Uma thread escritora** com conexão própria e uma fila serializada. Todo
+  job de escrita (qualquer helper de `economy_db` que receba `conn` como
+  primeiro argumento) roda lá, um por vez — então dois `BEGIN IMMEDIATE` do
+  próprio bot nunca disputam lock entre si.
+- **Um pool pequeno de leitores** com conexões somente leitura (`mode=ro`) em
+  WAL, para SELECTs puros que não precisam esperar a fila de escrita.
+
+As cogs usam `await gateway.read(fn, ...)` / `await gateway.write(fn, ...)`,
+onde `fn(conn, *args, **kwargs)` é exatamente a assinatura que os helpers de
+`economy_db` já têm. Atenção: os getters de `economy_db` passam por
+`ensure_user` (que pode inserir a linha do jogador), então eles vão pelo
+`write`; o `read` é só para consultas que nunca escrevem.
+
+Quando o gateway não está rodando (testes, banco `:memory:`, bot sem
+`setup_hook`), `get_gateway` devolve um `InlineGateway` que executa o mesmo
+`fn(conn, ...)` na conexão compartilhada, sem thread nenhuma — a API das cogs
+não muda e os patches dos testes (`patch.object(cog, "modify_wallet")`)
+continuam recebendo os mesmos argumentos.
+"""
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from config import get_bot_instance
+from sql_profiler import ProfiledConnection
+
+DEFAULT_READERS = 3
+DEFAULT_BUSY_TIMEOUT = 5.0
+
+# Sentinela de encerramento da fila do escritor.
+_STOP = object()
+
+
+def _is_memory_path(db_path) -> bool:
+    path = str(db_path)
+    return path == ":memory:" or path.startswith("file::memory:") or "mode=memory" in path
+
+
+class DatabaseGateway:
+    """Escritor serializado em thread própria + pool de leitores somente leitura."""
+
+    def __init__(self, db_path, readers: int = DEFAULT_READERS, busy_timeout: float = DEFAULT_BUSY_TIMEOUT):
+        self.db_path = str(db_path)
+        self.busy_timeout = busy_timeout
+        # Banco em memória não é compartilhável entre conexões: tudo vai pelo
+        # escritor (que é a única conexão que enxerga os dados).
+        self.readers = 0 if _is_memory_path(self.db_path) else max(0, int(readers))
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer_thread = None
+        self._writer_conn = None
+        self._ready = threading.Event()
+        self._read_pool = None
+        self._local = threading.local()
+        self._reader_conns = []
+        self._reader_lock = threading.Lock()
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self._reads = 0
+        self._write_busy_seconds = 0.0
+
+    # ──────────────────────────────────────────────
+    #  CICLO DE VIDA
+    # ──────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> "DatabaseGateway":
+        if self._running:
+            return self
+        self._ready.clear()
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="p3luche-db-writer", daemon=True
+        )
+        self._writer_thread.start()
+        self._ready.wait()
+        if self.readers:
+            self._read_pool = ThreadPoolExecutor(
+                max_workers=self.readers, thread_name_prefix="p3luche-db-reader"
+            )
+        self._running = True
+        return self
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Drena a fila do escritor e fecha todas as conexões."""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(_STOP)
+        if self._writer_thread is not None:
+            self._writer_thread.join(timeout)
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=True)
+            self._read_pool = None
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._reader_conns.clear()
+
+    # ──────────────────────────────────────────────
+    #  CONEXÕES
+    # ──────────────────────────────────────────────
+
+    def _open_writer(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.busy_timeout, check_same_thread=False, factory=ProfiledConnection
+        )
+        conn.row_factory = sqlite3.Row
+        if not _is_memory_path(self.db_path):
+            # WAL deixa os leitores lendo o último commit enquanto o escritor
+            # segura o lock — é o que permite o pool de leitura existir.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(
+                uri, uri=True, timeout=self.busy_timeout, check_same_thread=False, factory=ProfiledConnection
+            )
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    # ──────────────────────────────────────────────
+    #  ESCRITOR
+    # ──────────────────────────────────────────────
+
+    def _writer_loop(self) -> None:
+        self._writer_conn = self._open_writer()
+        self._ready.set()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+                fn, args, kwargs, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.perf_counter()
+                try:
+                    result = fn(self._writer_conn, *args, **kwargs)
+                except BaseException as e:
+                    # Um helper que estourou no meio de uma transação não pode
+                    # deixar o escritor preso nela para o próximo job.
+                    if self._writer_conn.in_transaction:
+                        try:
+                            self._writer_conn.rollback()
+                        except sqlite3.Error:
+                            pass
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                finally:
+                    with self._stats_lock:
+                        self._writes += 1
+                        self._write_busy_seconds += time.perf_counter() - started
+        finally:
+            self._writer_conn.close()
+            self._writer_conn = None
+
+    def submit_write(self, fn, *args, **kwargs) -> Future:
+        """Enfileira `fn(conn, ...)` no escritor. Seguro de chamar de qualquer thread."""
+        if not self._running:
+            raise RuntimeError("DatabaseGateway não está rodando (chame start()).")
+        future: Future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def _run_read(self, fn, args, kwargs):
+        result = fn(self._reader_conn(), *args, **kwargs)
+        with self._stats_lock:
+            self._reads += 1
+        return result
+
+    # ──────────────────────────────────────────────
+    #  API ASSÍNCRONA
+    # ──────────────────────────────────────────────
+
+    async def write(self, fn, *args, **kwargs):
+        """Executa `fn(conn, *args, **kwargs)` na thread escritora e devolve o resultado."""
+        return await asyncio.wrap_future(self.submit_write(fn, *args, **kwargs))
+
+    async def read(self, fn, *args, **kwargs):
+        """Executa `fn(conn, *args, **kwargs)` numa conexão somente leitura.
+
+        `fn` não pode escrever: a conexão é aberta com `mode=ro` e qualquer
+        INSERT/UPDATE levanta `sqlite3.OperationalError`. Sem leitores (banco
+        em memória), a leitura cai na fila do escritor.
+        """
+        if not self._running:
+            raise RuntimeError("DatabaseGateway não está rodando (chame start()).")
+        if self._read_pool is None:
+            return await self.write(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_pool, self._run_read, fn, args, kwargs)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "running": self._running,
+                "readers": self.readers,
+                "pending_writes": self._queue.qsize(),
+                "writes": self._writes,
+                "reads": self._reads,
+                "write_busy_seconds": self._write_busy_seconds,
+            }
+
+
+class InlineGateway:
+    """Mesma API do `DatabaseGateway`, executando direto numa conexão existente.
+
+    Usado quando não há gateway rodando: o comportamento é idêntico ao de
+    antes (chamada síncrona na conexão compartilhada), só que atrás da mesma
+    interface `await read/write` que as cogs já usam.
+    """
+
+    running = True
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def write(self, fn, *args, **kwargs):
+        return fn(self.conn, *args, **kwargs)
+
+    async def read(self, fn, *args, **kwargs):
+        return fn(self.conn, *args, **kwargs)
+
+
+def get_gateway(bot=None):
+    """Gateway do bot (`bot.db`) ou, na falta dele, um `InlineGateway` sobre `bot.db_conn`."""
+    if bot is None:
+        bot = get_bot_instance()
+    gateway = getattr(bot, "db", None)
+    if isinstance(gateway, DatabaseGateway) and gateway.running:
+        return gateway
+    return InlineGateway(bot.db_conn)
@@ -120,4 +120,9 @@ TRASH_ITEMS = frozenset({
     "Meia Furada",
     "Anzol Enferrujado",
     "Alga",
-})
\ No newline at end of file
+})
+# Peso relativo de sorteio por nome de peixe (ver catch_tables.py). Quem não
+# está aqui pesa 1.0, ou seja, sorteio uniforme dentro do pool — o
+# comportamento de sempre. Para deixar um peixe mais raro/comum dentro do
+# próprio tier, basta uma entrada aqui; nenhum ponto de sorteio muda.
+FISH_WEIGHTS = {}
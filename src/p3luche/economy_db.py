@@ -1,5 +1,9 @@
 """
-Helpers de economia normalizada (v4) com sincronização da tabela economy legada.
+Helpers de economia normalizada (v4).
+
+A tabela `economy` legada não recebe mais escrita: desde o passo 6 de
+`migrations.py` ela é uma view somente-leitura montada a partir das tabelas
+v4 (ver LEGACY_ECONOMY_VIEW_SQL). Toda mutação toca só as linhas normalizadas.
 """
 from __future__ import annotations
 
@@ -7,6 +11,8 @@ import json
 import sqlite3
 from datetime import datetime, timedelta
 
+from leaderboard import LEADERBOARDS, guild_score
+
 V4_TABLES_SQL = """
 CREATE TABLE IF NOT EXISTS users (
     user_id INTEGER PRIMARY KEY,
@@ -16,7 +22,8 @@ CREATE TABLE IF NOT EXISTS users (
     guild_rank TEXT DEFAULT 'F',
     guild_xp INTEGER DEFAULT 0,
     scrap INTEGER DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER DEFAULT 0
 );
 CREATE TABLE IF NOT EXISTS user_inventory (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -111,6 +118,11 @@ CREATE TABLE IF NOT EXISTS user_island_unlocks (
 
 
 def ensure_v4_tables(conn: sqlite3.Connection) -> None:
+    """DDL das tabelas v4. Só o passo 3 de `migrations.py` chama isto em runtime.
+
+    Não chame de helper/comando: `executescript` comita e reescreve o schema
+    inteiro. Os helpers deste módulo assumem o schema já migrado no startup.
+    """
     conn.executescript(V4_TABLES_SQL)
     cursor = conn.cursor()
     try:
@@ -130,194 +142,116 @@ def ensure_v4_tables(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 
-def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
-    row = cursor.execute(
-        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
-    ).fetchone()
-    return row is not None
+# Projeção de compatibilidade: mesmas colunas que os leitores antigos da
+# tabela `economy` usam (saldo, rank, guilda, auditoria...), calculadas na
+# hora a partir das tabelas v4. Substitui o `sync_user_to_economy` que
+# reescrevia a linha legada inteira a cada mutação. 'rod_tier' (só presentes
+# escreviam) e 'last_fish_time' (coluna órfã) não têm equivalente e saíram.
+LEGACY_ECONOMY_VIEW_SQL = """
+CREATE VIEW economy AS
+SELECT
+    u.user_id AS user_id,
+    u.user_name AS user_name,
+    u.wallet AS wallet,
+    u.fish_count AS fish_count,
+    u.guild_rank AS guild_rank,
+    u.guild_xp AS guild_xp,
+    u.scrap AS scrap,
+    COALESCE(
+        (SELECT json_group_object(i.item_key, i.quantity) FROM user_inventory i
+         WHERE i.user_id = u.user_id AND i.quantity > 0),
+        '{}'
+    ) AS inventory,
+    COALESCE(r.current_rod, 'vara_bambu') AS current_rod,
+    json_object('luck', COALESCE(ru.luck_level, 0), 'cd', COALESCE(ru.cd_level, 0)) AS rod_upgrades,
+    CASE WHEN t.trap_type IS NULL THEN '{}'
+         ELSE json_object('type', t.trap_type, 'status', t.status,
+                          'timer_end', t.timer_end, 'durability', t.durability)
+    END AS afk_trap,
+    c.last_fish AS last_fish,
+    c.last_daily AS last_daily,
+    c.last_explore AS last_explore,
+    COALESCE(
+        (SELECT b.quantity FROM user_inventory b
+         WHERE b.user_id = u.user_id AND b.item_key = 'isca' AND b.quantity > 0),
+        0
+    ) AS baits
+FROM users u
+LEFT JOIN user_rods r ON r.user_id = u.user_id
+LEFT JOIN rod_upgrades ru ON ru.user_id = u.user_id
+LEFT JOIN user_trap t ON t.user_id = u.user_id
+LEFT JOIN user_cooldowns c ON c.user_id = u.user_id
+"""
 
 
-def sync_user_from_economy(conn: sqlite3.Connection, user_id: int) -> None:
-    """Migra um usuário da tabela economy para as tabelas normalizadas."""
-    cursor = conn.cursor()
-    if not _table_exists(cursor, "economy"):
-        return
-    row = cursor.execute("SELECT * FROM economy WHERE user_id = ?", (user_id,)).fetchone()
-    if not row:
-        return
+def ensure_economy_view(conn: sqlite3.Connection) -> None:
+    """(Re)cria a view `economy`. Só o passo 6 de `migrations.py` chama isto.
 
-    cursor.execute(
-        """
-        INSERT INTO users (user_id, user_name, wallet, fish_count, guild_rank, guild_xp, scrap)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            user_name = excluded.user_name,
-            wallet = excluded.wallet,
-            fish_count = excluded.fish_count,
-            guild_rank = excluded.guild_rank,
-            guild_xp = excluded.guild_xp,
-            scrap = excluded.scrap
-        """,
-        (
-            row["user_id"],
-            row["user_name"],
-            row["wallet"],
-            row["fish_count"] or 0,
-            row["guild_rank"] or "F",
-            row["guild_xp"] or 0,
-            row["scrap"] or 0,
-        ),
-    )
-
-    try:
-        inv = json.loads(row["inventory"]) if row["inventory"] else {}
-    except (json.JSONDecodeError, TypeError):
-        inv = {}
-    for item_key, qtd in inv.items():
-        if qtd > 0:
-            cursor.execute(
-                """
-                INSERT INTO user_inventory (user_id, item_key, quantity) VALUES (?, ?, ?)
-                ON CONFLICT(user_id, item_key) DO UPDATE SET quantity = excluded.quantity
-                """,
-                (user_id, item_key, qtd),
-            )
+    Mesma regra de `ensure_v4_tables`: é DDL, não chame de helper/comando.
+    Assume que não existe mais uma TABELA `economy` (o passo 6 a renomeia
+    para `economy_legacy` antes).
+    """
+    conn.execute("DROP VIEW IF EXISTS economy")
+    conn.execute(LEGACY_ECONOMY_VIEW_SQL)
+    conn.commit()
 
-    current_rod = row["current_rod"] if row["current_rod"] else "vara_bambu"
-    cursor.execute(
-        "INSERT OR IGNORE INTO user_rods (user_id, current_rod) VALUES (?, ?)",
-        (user_id, current_rod),
-    )
 
-    try:
-        upgrades = json.loads(row["rod_upgrades"]) if row["rod_upgrades"] else {}
-    except (json.JSONDecodeError, TypeError):
-        upgrades = {}
-    cursor.execute(
-        """
-        INSERT OR IGNORE INTO rod_upgrades (user_id, luck_level, cd_level) VALUES (?, ?, ?)
-        """,
-        (user_id, upgrades.get("luck", 0), upgrades.get("cd", 0)),
-    )
+FISH_SALES_ROLLUP_SQL = """
+CREATE TABLE IF NOT EXISTS fish_sales_hourly (
+    fish_name TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    sum_price INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fish_name, hour)
+);
+CREATE INDEX IF NOT EXISTS idx_fish_sales_hourly_hour ON fish_sales_hourly(hour);
+CREATE TABLE IF NOT EXISTS fish_sales_rollup_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_id INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO fish_sales_rollup_state (id, last_id) VALUES (1, 0);
+"""
 
-    try:
-        trap = json.loads(row["afk_trap"]) if row["afk_trap"] else {}
-    except (json.JSONDecodeError, TypeError):
-        trap = {}
-    if trap:
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO user_trap (user_id, trap_type, status, timer_end, durability)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                user_id,
-                trap.get("type"),
-                trap.get("status"),
-                trap.get("timer_end"),
-                trap.get("durability"),
-            ),
-        )
 
-    cursor.execute(
-        """
-        INSERT OR IGNORE INTO user_cooldowns (user_id, last_fish, last_daily, last_explore)
-        VALUES (?, ?, ?, ?)
-        """,
-        (user_id, row["last_fish"], row["last_daily"], row["last_explore"]),
-    )
+def ensure_fish_sales_rollups(conn: sqlite3.Connection) -> None:
+    """Cria os agregados horários de venda. Só o passo 10 de `migrations.py`
+    chama isto (DDL, mesma regra de `ensure_v4_tables`)."""
+    conn.executescript(FISH_SALES_ROLLUP_SQL)
     conn.commit()
 
 
-def sync_user_to_economy(conn: sqlite3.Connection, user_id: int) -> None:
-    """Sincroniza tabelas normalizadas de volta para economy (compatibilidade legada)."""
-    cursor = conn.cursor()
-    if not _table_exists(cursor, "economy"):
-        return
-
-    user = cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
-    if not user:
-        return
-
-    inv_rows = cursor.execute(
-        "SELECT item_key, quantity FROM user_inventory WHERE user_id = ?", (user_id,)
-    ).fetchall()
-    inv = {r["item_key"]: r["quantity"] for r in inv_rows if r["quantity"] > 0}
-
-    rod = cursor.execute(
-        "SELECT current_rod FROM user_rods WHERE user_id = ?", (user_id,)
-    ).fetchone()
-    current_rod = rod["current_rod"] if rod else "vara_bambu"
+PARTY_MEMBERS_SQL = """
+CREATE TABLE IF NOT EXISTS party_members (
+    user_id INTEGER PRIMARY KEY,
+    leader_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_party_members_leader ON party_members(leader_id);
+"""
 
-    upg = cursor.execute(
-        "SELECT luck_level, cd_level FROM rod_upgrades WHERE user_id = ?", (user_id,)
-    ).fetchone()
-    upgrades = {"luck": upg["luck_level"] if upg else 0, "cd": upg["cd_level"] if upg else 0}
-
-    trap = cursor.execute("SELECT * FROM user_trap WHERE user_id = ?", (user_id,)).fetchone()
-    trap_json = {}
-    if trap and trap["trap_type"]:
-        trap_json = {
-            "type": trap["trap_type"],
-            "status": trap["status"],
-            "timer_end": trap["timer_end"],
-            "durability": trap["durability"],
-        }
 
-    cd = cursor.execute(
-        "SELECT last_fish, last_daily, last_explore FROM user_cooldowns WHERE user_id = ?",
-        (user_id,),
-    ).fetchone()
+def ensure_party_members(conn: sqlite3.Connection) -> None:
+    """Cria `party_members` e preenche a partir de `parties`. Só o passo 8 de
+    `migrations.py` chama isto (DDL, mesma regra de `ensure_v4_tables`).
 
-    baits = inv.get("isca", 0)
-    cursor.execute(
+    `parties.members_json` continua sendo a lista exibida nas telas de grupo;
+    `party_members` é o índice "em qual grupo este jogador está" — uma linha
+    por jogador, incluindo o próprio líder.
+    """
+    conn.executescript(PARTY_MEMBERS_SQL)
+    conn.execute("INSERT OR IGNORE INTO party_members (user_id, leader_id) SELECT leader_id, leader_id FROM parties")
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO party_members (user_id, leader_id)
+        SELECT CAST(j.value AS INTEGER), p.leader_id
+        FROM parties p, json_each(p.members_json) j
+        WHERE json_valid(p.members_json)
         """
-        INSERT INTO economy (user_id, user_name, wallet, fish_count, guild_rank, guild_xp, scrap,
-                             inventory, current_rod, rod_upgrades, afk_trap, last_fish, last_daily,
-                             last_explore, baits)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            user_name = excluded.user_name,
-            wallet = excluded.wallet,
-            fish_count = excluded.fish_count,
-            guild_rank = excluded.guild_rank,
-            guild_xp = excluded.guild_xp,
-            scrap = excluded.scrap,
-            inventory = excluded.inventory,
-            current_rod = excluded.current_rod,
-            rod_upgrades = excluded.rod_upgrades,
-            afk_trap = excluded.afk_trap,
-            last_fish = excluded.last_fish,
-            last_daily = excluded.last_daily,
-            last_explore = excluded.last_explore,
-            baits = excluded.baits
-        """,
-        (
-            user_id,
-            user["user_name"],
-            user["wallet"],
-            user["fish_count"],
-            user["guild_rank"],
-            user["guild_xp"],
-            user["scrap"],
-            json.dumps(inv),
-            current_rod,
-            json.dumps(upgrades),
-            json.dumps(trap_json),
-            cd["last_fish"] if cd else None,
-            cd["last_daily"] if cd else None,
-            cd["last_explore"] if cd else None,
-            baits,
-        ),
     )
     conn.commit()
 
 
 def ensure_user(conn: sqlite3.Connection, user_id: int, user_name: str = "") -> None:
     cursor = conn.cursor()
-    ensure_v4_tables(conn)
-    row = cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
-    sync_user_from_economy(conn, user_id)
     row = cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
     if not row:
         cursor.execute(
@@ -333,7 +267,11 @@ def ensure_user(conn: sqlite3.Connection, user_id: int, user_name: str = "") ->
         cursor.execute(
             "INSERT OR IGNORE INTO user_cooldowns (user_id) VALUES (?)", (user_id,)
         )
-        conn.commit()
+    # Sempre comita: a antiga sincronização com a tabela legada comitava aqui
+    # em toda chamada, e há chamadores que fazem UPDATE solto antes de um
+    # helper com BEGIN IMMEDIATE — sem isso o BEGIN falharia dentro da
+    # transação implícita aberta pelo UPDATE.
+    conn.commit()
 
 
 def _coerce_int(value: object, default: int = 0) -> int:
@@ -366,8 +304,8 @@ def modify_wallet(conn: sqlite3.Connection, user_id: int, delta: int, user_name:
             conn.execute(
                 "UPDATE users SET user_name = ? WHERE user_id = ?", (user_name, user_id)
             )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
+        LEADERBOARDS.observe("wallet", user_id, new_wallet)
         return new_wallet
     except Exception:
         conn.rollback()
@@ -401,8 +339,8 @@ def try_spend_wallet(conn: sqlite3.Connection, user_id: int, amount: int, user_n
             conn.execute(
                 "UPDATE users SET user_name = ? WHERE user_id = ?", (user_name, user_id)
             )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
+        LEADERBOARDS.observe("wallet", user_id, current_wallet - amount)
         return True
     except Exception:
         conn.rollback()
@@ -424,8 +362,8 @@ def modify_scrap(conn: sqlite3.Connection, user_id: int, delta: int, user_name:
         current_scrap = _coerce_int(row["scrap"] if row else 0)
         new_scrap = max(0, current_scrap + delta)
         conn.execute("UPDATE users SET scrap = ? WHERE user_id = ?", (new_scrap, user_id))
-        sync_user_to_economy(conn, user_id)
         conn.commit()
+        LEADERBOARDS.observe("scrap", user_id, new_scrap)
         return new_scrap
     except Exception:
         conn.rollback()
@@ -445,7 +383,6 @@ def set_current_rod(conn: sqlite3.Connection, user_id: int, rod_key: str) -> Non
     conn.execute(
         "UPDATE user_rods SET current_rod = ? WHERE user_id = ?", (rod_key, user_id)
     )
-    sync_user_to_economy(conn, user_id)
     conn.commit()
 
 
@@ -502,7 +439,6 @@ def try_upgrade_rod(
         conn.execute(
             f"UPDATE rod_upgrades SET {level_col} = ? WHERE user_id = ?", (new_level, user_id)
         )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
         return {"success": True, "reason": None, "scrap": new_scrap, "level": new_level, "cost": cost}
     except Exception:
@@ -510,6 +446,42 @@ def try_upgrade_rod(
         raise
 
 
+def get_trap(conn: sqlite3.Connection, user_id: int) -> dict | None:
+    """Armadilha AFK no mesmo formato do antigo JSON `afk_trap`, ou None."""
+    ensure_user(conn, user_id)
+    row = conn.execute(
+        "SELECT trap_type, status, timer_end, durability FROM user_trap WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    if not row or not row["trap_type"]:
+        return None
+    return {
+        "type": row["trap_type"],
+        "status": row["status"],
+        "timer_end": row["timer_end"],
+        "durability": row["durability"],
+    }
+
+
+def set_trap(conn: sqlite3.Connection, user_id: int, trap: dict | None) -> None:
+    """Grava a armadilha (dict com type/status/timer_end/durability). None limpa."""
+    ensure_user(conn, user_id)
+    trap = trap or {}
+    conn.execute(
+        """
+        INSERT INTO user_trap (user_id, trap_type, status, timer_end, durability)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            trap_type = excluded.trap_type,
+            status = excluded.status,
+            timer_end = excluded.timer_end,
+            durability = excluded.durability
+        """,
+        (user_id, trap.get("type"), trap.get("status"), trap.get("timer_end"), trap.get("durability")),
+    )
+    conn.commit()
+
+
 _COOLDOWN_FIELDS = ("last_fish", "last_daily", "last_explore", "last_memoria")
 
 
@@ -533,10 +505,44 @@ def set_cooldown(conn: sqlite3.Connection, user_id: int, field: str, value) -> N
         raise ValueError(f"campo de cooldown inválido: {field!r}")
     ensure_user(conn, user_id)
     conn.execute(f"UPDATE user_cooldowns SET {field} = ? WHERE user_id = ?", (value, user_id))
-    sync_user_to_economy(conn, user_id)
     conn.commit()
 
 
+def write_cooldowns(conn: sqlite3.Connection, rows, keep=None) -> int:
+    """Grava em lote [(user_id, campo, valor)] em `user_cooldowns`.
+
+    É o flush do registro em memória (cooldowns.py): uma transação só, com
+    `executemany` por campo, em vez de um `set_cooldown` (ensure_user +
+    UPDATE + commit) por tentativa. Cria a linha de cooldowns se faltar.
+
+    `keep(rows)`, se passado, é chamado já dentro do BEGIN IMMEDIATE e devolve
+    as linhas que ainda devem ser gravadas — com o lock de escrita na mão,
+    nenhum outro escritor muda o banco entre o filtro e o UPDATE.
+    """
+    rows = list(rows)
+    for _, field, _ in rows:
+        if field not in _COOLDOWN_FIELDS:
+            raise ValueError(f"campo de cooldown inválido: {field!r}")
+    if not rows:
+        return 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if keep is not None:
+            rows = list(keep(rows))
+        by_field = {}
+        for user_id, field, value in rows:
+            by_field.setdefault(field, []).append((value, user_id))
+        user_ids = sorted({(user_id,) for user_id, _, _ in rows})
+        conn.executemany("INSERT OR IGNORE INTO user_cooldowns (user_id) VALUES (?)", user_ids)
+        for field, params in by_field.items():
+            conn.executemany(f"UPDATE user_cooldowns SET {field} = ? WHERE user_id = ?", params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
 def get_inventory(conn: sqlite3.Connection, user_id: int) -> dict:
     ensure_user(conn, user_id)
     rows = conn.execute(
@@ -562,18 +568,63 @@ def set_inventory_item(conn: sqlite3.Connection, user_id: int, item_key: str, qu
                 """,
                 (user_id, item_key, quantity),
             )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
     except Exception:
         conn.rollback()
         raise
 
 
+_INVENTORY_DELTA_SQL = """
+INSERT INTO user_inventory (user_id, item_key, quantity) VALUES (?, ?, ?)
+ON CONFLICT(user_id, item_key) DO UPDATE SET quantity = quantity + excluded.quantity
+"""
+
+
+def _write_inventory_deltas(conn: sqlite3.Connection, user_id: int, deltas: dict) -> None:
+    """Soma os deltas no banco (`quantity + ?`) e apaga as linhas que zeraram.
+
+    Não abre nem fecha transação — quem chama já está dentro de uma.
+    """
+    conn.executemany(
+        _INVENTORY_DELTA_SQL,
+        [(user_id, item_key, delta) for item_key, delta in deltas.items() if delta],
+    )
+    conn.execute("DELETE FROM user_inventory WHERE user_id = ? AND quantity <= 0", (user_id,))
+
+
+def apply_inventory_deltas(conn: sqlite3.Connection, user_id: int, deltas: dict, user_name: str = "") -> dict:
+    """Aplica vários {item_key: delta} de uma vez, numa única transação.
+
+    O incremento é feito pelo próprio SQLite, então não há janela entre ler
+    e gravar: dois comandos simultâneos somam, não se sobrescrevem. Item que
+    cai para 0 (ou menos) some da mochila. Devolve a quantidade final de
+    cada chave tocada (0 para as removidas).
+    """
+    deltas = {item_key: delta for item_key, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+    ensure_user(conn, user_id, user_name)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _write_inventory_deltas(conn, user_id, deltas)
+        placeholders = ", ".join("?" for _ in deltas)
+        rows = conn.execute(
+            f"SELECT item_key, quantity FROM user_inventory WHERE user_id = ? AND item_key IN ({placeholders})",
+            (user_id, *deltas),
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    result = {item_key: 0 for item_key in deltas}
+    result.update({row["item_key"]: _coerce_int(row["quantity"]) for row in rows})
+    return result
+
+
 def add_inventory_item(conn: sqlite3.Connection, user_id: int, item_key: str, delta: int) -> int:
-    inv = get_inventory(conn, user_id)
-    new_qty = inv.get(item_key, 0) + delta
-    set_inventory_item(conn, user_id, item_key, new_qty)
-    return new_qty
+    if not delta:
+        return get_inventory(conn, user_id).get(item_key, 0)
+    return apply_inventory_deltas(conn, user_id, {item_key: delta})[item_key]
 
 
 def count_fish_in_inventory(conn: sqlite3.Connection, user_id: int, fish_name: str) -> int:
@@ -589,14 +640,256 @@ def consume_fish(conn: sqlite3.Connection, user_id: int, fish_name: str, amount:
     return True
 
 
+_FISH_SALE_SQL = "INSERT INTO fish_sales_history (fish_name, sale_price, user_id) VALUES (?, ?, ?)"
+
+
 def log_fish_sale(conn: sqlite3.Connection, fish_name: str, sale_price: int, user_id: int) -> None:
-    conn.execute(
-        "INSERT INTO fish_sales_history (fish_name, sale_price, user_id) VALUES (?, ?, ?)",
-        (fish_name, sale_price, user_id),
-    )
+    conn.execute(_FISH_SALE_SQL, (fish_name, sale_price, user_id))
     conn.commit()
 
 
+# --- SESSÃO DE JOGADOR (unit of work) ---
+# Comandos de vários passos (/eco pescar) chamavam um helper por mutação:
+# cada modify_wallet/add_inventory_item era um ensure_user + leitura + BEGIN
+# IMMEDIATE + commit próprio. A sessão lê o estado inteiro numa consulta,
+# acumula as mutações em memória e grava tudo num único BEGIN IMMEDIATE.
+#
+# Saldo, pescados e inventário são gravados como DELTA (`wallet + ?`,
+# `quantity + ?`), então comandos concorrentes não se sobrescrevem. Já os
+# valores absolutos calculados a partir da leitura (guild_rank/guild_xp,
+# cooldowns) só são gravados se `users.version` ainda for o lido — senão o
+# flush devolve reason "stale" sem gravar nada. Quem grava guild_rank ou
+# guild_xp fora de uma sessão precisa incrementar `version` junto.
+
+_SESSION_STATE_SQL = """
+SELECT u.user_name, u.wallet, u.fish_count, u.guild_rank, u.guild_xp, u.scrap, u.version,
+       r.current_rod, ru.luck_level, ru.cd_level,
+       c.last_fish, c.last_daily, c.last_explore, c.daily_streak, c.last_memoria,
+       (SELECT json_group_object(i.item_key, i.quantity) FROM user_inventory i
+        WHERE i.user_id = u.user_id AND i.quantity > 0) AS inventory
+FROM users u
+LEFT JOIN user_rods r ON r.user_id = u.user_id
+LEFT JOIN rod_upgrades ru ON ru.user_id = u.user_id
+LEFT JOIN user_cooldowns c ON c.user_id = u.user_id
+WHERE u.user_id = ?
+"""
+
+_SESSION_GUILD_FIELDS = ("guild_rank", "guild_xp")
+
+
+class PlayerSession:
+    """Estado de um jogador carregado de uma vez + mutações pendentes.
+
+    Os atributos (wallet, inventory, guild_xp...) já refletem as mutações
+    registradas; nada vai ao banco até `flush(conn)`. A sessão não guarda a
+    conexão: `load`/`flush` recebem `conn`, para o flush poder rodar no
+    escritor do gateway (`await _db().write(fn, ...)`).
+    """
+
+    def __init__(self, user_id: int, user_name: str = ""):
+        self.user_id = user_id
+        self.user_name = user_name
+        self.version = 0
+        self.wallet = 0
+        self.fish_count = 0
+        self.guild_rank = "F"
+        self.guild_xp = 0
+        self.scrap = 0
+        self.current_rod = "vara_bambu"
+        self.upgrades = {"luck": 0, "cd": 0}
+        self.cooldowns = {field: None for field in _COOLDOWN_FIELDS}
+        self.daily_streak = 0
+        self.inventory = {}
+        self._clear_pending()
+
+    def _clear_pending(self) -> None:
+        self._wallet_delta = 0
+        self._fish_delta = 0
+        self._inv_deltas = {}
+        self._guild = {}
+        self._cooldowns = {}
+        self._statements = []
+        self._stale_boards = set()
+
+    @classmethod
+    def load(
+        cls, conn: sqlite3.Connection, user_id: int, user_name: str = "", create: bool = True
+    ) -> "PlayerSession | None":
+        """Carrega o jogador (criando a conta, se preciso) numa única consulta.
+
+        Com `create=False` não escreve nada e devolve None se a conta não
+        existe — serve para carregar por uma conexão somente leitura.
+        """
+        session = cls(user_id, user_name)
+        row = conn.execute(_SESSION_STATE_SQL, (user_id,)).fetchone()
+        if row is None:
+            if not create:
+                return None
+            ensure_user(conn, user_id, user_name)
+            row = conn.execute(_SESSION_STATE_SQL, (user_id,)).fetchone()
+        session._apply_row(row)
+        return session
+
+    def reload(self, conn: sqlite3.Connection) -> None:
+        """Relê o estado base depois de um flush "stale".
+
+        Deltas e statements pendentes continuam valendo (são reaplicados sobre
+        o estado novo). Guilda e cooldowns pendentes são descartados: foram
+        calculados a partir da leitura antiga e o chamador deve recalculá-los.
+        """
+        row = conn.execute(_SESSION_STATE_SQL, (self.user_id,)).fetchone()
+        self._guild = {}
+        self._cooldowns = {}
+        self._apply_row(row)
+        self.wallet = max(0, self.wallet + self._wallet_delta)
+        self.fish_count += self._fish_delta
+        for item_key, delta in self._inv_deltas.items():
+            self._bump_item(item_key, delta)
+
+    def _apply_row(self, row: sqlite3.Row) -> None:
+        if not self.user_name:
+            self.user_name = row["user_name"] or ""
+        self.version = _coerce_int(row["version"])
+        self.wallet = _coerce_int(row["wallet"])
+        self.fish_count = _coerce_int(row["fish_count"])
+        self.guild_rank = row["guild_rank"] or "F"
+        self.guild_xp = _coerce_int(row["guild_xp"])
+        self.scrap = _coerce_int(row["scrap"])
+        self.current_rod = row["current_rod"] or "vara_bambu"
+        self.upgrades = {"luck": _coerce_int(row["luck_level"]), "cd": _coerce_int(row["cd_level"])}
+        self.cooldowns = {field: row[field] for field in _COOLDOWN_FIELDS}
+        self.daily_streak = _coerce_int(row["daily_streak"])
+        self.inventory = json.loads(row["inventory"]) if row["inventory"] else {}
+
+    def _bump_item(self, item_key: str, delta: int) -> None:
+        new_qty = self.inventory.get(item_key, 0) + delta
+        if new_qty > 0:
+            self.inventory[item_key] = new_qty
+        else:
+            self.inventory.pop(item_key, None)
+
+    # --- mutações (só em memória) ---
+
+    @property
+    def pending(self) -> bool:
+        return bool(
+            self._wallet_delta or self._fish_delta or self._inv_deltas
+            or self._guild or self._cooldowns or self._statements
+        )
+
+    def add_wallet(self, delta: int) -> None:
+        self._wallet_delta += delta
+        self.wallet = max(0, self.wallet + delta)
+
+    def add_fish_count(self, amount: int = 1) -> None:
+        self._fish_delta += amount
+        self.fish_count += amount
+
+    def add_item(self, item_key: str, delta: int) -> None:
+        if not delta:
+            return
+        self._inv_deltas[item_key] = self._inv_deltas.get(item_key, 0) + delta
+        self._bump_item(item_key, delta)
+
+    def consume_item(self, item_key: str) -> bool:
+        """Gasta 1 unidade se o jogador tiver; devolve se gastou."""
+        if self.inventory.get(item_key, 0) <= 0:
+            return False
+        self.add_item(item_key, -1)
+        return True
+
+    def set_guild(self, guild_rank: str, guild_xp: int) -> None:
+        self._guild = {"guild_rank": guild_rank, "guild_xp": guild_xp}
+        self.guild_rank = guild_rank
+        self.guild_xp = guild_xp
+
+    def set_cooldown(self, field: str, value) -> None:
+        if field not in _COOLDOWN_FIELDS:
+            raise ValueError(f"campo de cooldown inválido: {field!r}")
+        self._cooldowns[field] = value
+        self.cooldowns[field] = value
+
+    def log_sale(self, fish_name: str, sale_price: int) -> None:
+        self._statements.append((_FISH_SALE_SQL, (fish_name, sale_price, self.user_id)))
+
+    def queue(self, sql: str, params: tuple = (), leaderboards: tuple = ()) -> None:
+        """Statement extra (DML) que deve entrar na mesma transação do flush.
+
+        `leaderboards`: métricas do ranking que o statement pode mudar para
+        OUTROS jogadores — são invalidadas depois do commit.
+        """
+        self._statements.append((sql, tuple(params)))
+        self._stale_boards.update(leaderboards)
+
+    # --- gravação ---
+
+    def flush(self, conn: sqlite3.Connection) -> dict:
+        """Grava tudo que está pendente num único BEGIN IMMEDIATE.
+
+        Devolve {"success", "reason", "wallet", "inventory"}. Com reason
+        "stale" nada foi gravado: chame `reload` e refaça guilda/cooldowns.
+        """
+        if not self.pending:
+            return {"success": True, "reason": None, "wallet": self.wallet, "inventory": dict(self.inventory)}
+
+        checked = bool(self._guild or self._cooldowns)
+        sets = ["version = version + 1", "wallet = MAX(0, wallet + ?)", "fish_count = fish_count + ?"]
+        params = [self._wallet_delta, self._fish_delta]
+        if self.user_name:
+            sets.append("user_name = ?")
+            params.append(self.user_name)
+        for field in _SESSION_GUILD_FIELDS:
+            if field in self._guild:
+                sets.append(f"{field} = ?")
+                params.append(self._guild[field])
+        where = "user_id = ?"
+        params.append(self.user_id)
+        if checked:
+            where += " AND version = ?"
+            params.append(self.version)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(f"UPDATE users SET {', '.join(sets)} WHERE {where}", params)
+            if cur.rowcount == 0:
+                conn.rollback()
+                return {"success": False, "reason": "stale", "wallet": self.wallet, "inventory": dict(self.inventory)}
+            if self._cooldowns:
+                fields = list(self._cooldowns)
+                conn.execute(
+                    f"UPDATE user_cooldowns SET {', '.join(f'{f} = ?' for f in fields)} WHERE user_id = ?",
+                    [self._cooldowns[f] for f in fields] + [self.user_id],
+                )
+            if self._inv_deltas:
+                _write_inventory_deltas(conn, self.user_id, self._inv_deltas)
+            for sql, stmt_params in self._statements:
+                conn.execute(sql, stmt_params)
+            refresh = self._wallet_delta or self._fish_delta or self._inv_deltas
+            row = conn.execute(_SESSION_STATE_SQL, (self.user_id,)).fetchone() if refresh else None
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        guild_written = bool(self._guild)
+        stale_boards = self._stale_boards
+        self._clear_pending()
+        if row is not None:
+            self._apply_row(row)
+            LEADERBOARDS.observe("wallet", self.user_id, self.wallet)
+            LEADERBOARDS.observe("fish_count", self.user_id, self.fish_count)
+        else:
+            self.version += 1
+        if guild_written:
+            LEADERBOARDS.observe(
+                "guild", self.user_id, guild_score(self.guild_rank, self.guild_xp),
+                guild_rank=self.guild_rank, guild_xp=self.guild_xp,
+            )
+        for metric in stale_boards:
+            LEADERBOARDS.invalidate(metric)
+        return {"success": True, "reason": None, "wallet": self.wallet, "inventory": dict(self.inventory)}
+
+
 def seed_market_prices(conn: sqlite3.Connection, fish_db: list) -> None:
     now = datetime.now().isoformat()
     for entry in fish_db:
@@ -615,12 +908,210 @@ def seed_market_prices(conn: sqlite3.Connection, fish_db: list) -> None:
 
 
 def get_market_price(conn: sqlite3.Connection, fish_name: str, fallback: int) -> int:
+    # Leitura direta do banco; em comandos prefira world_state.WORLD.market_price.
     row = conn.execute(
         "SELECT current_price FROM market_prices WHERE fish_name = ?", (fish_name,)
     ).fetchone()
     return row["current_price"] if row else fallback
 
 
+# --- MERCADO: AGREGADOS DE VENDA ---
+# fish_sales_history recebe uma linha por peixe vendido e só cresce. O ciclo
+# do mercado (/hora) lê apenas `fish_sales_hourly` (um contador por peixe e
+# hora): o custo do reajuste depende de quantos peixes existem, não de há
+# quanto tempo o bot roda.
+#
+# Linhas cruas mais velhas que FISH_SALES_RETENTION_DAYS são apagadas depois
+# de somadas nos agregados. O ranking semanal (leaderboard.py) ainda lê as
+# linhas cruas dos últimos 7 dias, então a retenção não pode ficar abaixo disso.
+FISH_SALES_RETENTION_DAYS = 30
+
+_HOUR_FMT = "%Y-%m-%d %H:00:00"
+
+
+def compact_fish_sales(conn: sqlite3.Connection, retention_days: int = FISH_SALES_RETENTION_DAYS) -> dict:
+    """Soma nos agregados horários as vendas novas desde a última compactação
+    e apaga as linhas cruas já somadas e mais velhas que `retention_days`.
+
+    Incremental: `fish_sales_rollup_state.last_id` guarda até onde já foi
+    somado, então rodar duas vezes não conta nada em dobro.
+    """
+    retention_days = max(7, int(retention_days))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT last_id FROM fish_sales_rollup_state WHERE id = 1").fetchone()
+        last_id = _coerce_int(row["last_id"] if row else 0)
+        max_row = conn.execute("SELECT MAX(id) AS max_id FROM fish_sales_history").fetchone()
+        max_id = _coerce_int(max_row["max_id"] if max_row else 0, last_id)
+        folded = 0
+        if max_id > last_id:
+            folded = conn.execute(
+                f"""
+                INSERT INTO fish_sales_hourly (fish_name, hour, count, sum_price)
+                SELECT fish_name, strftime('{_HOUR_FMT}', sale_time), COUNT(*), SUM(sale_price)
+                FROM fish_sales_history
+                WHERE id > ? AND id <= ? AND strftime('{_HOUR_FMT}', sale_time) IS NOT NULL
+                GROUP BY fish_name, strftime('{_HOUR_FMT}', sale_time)
+                ON CONFLICT(fish_name, hour) DO UPDATE SET
+                    count = count + excluded.count,
+                    sum_price = sum_price + excluded.sum_price
+                """,
+                (last_id, max_id),
+            ).rowcount
+            conn.execute(
+                "INSERT INTO fish_sales_rollup_state (id, last_id) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET last_id = excluded.last_id",
+                (max_id,),
+            )
+        deleted = conn.execute(
+            "DELETE FROM fish_sales_history WHERE id <= ? AND sale_time < datetime('now', ?)",
+            (max(max_id, last_id), f"-{retention_days} days"),
+        ).rowcount
+        conn.commit()
+        return {"success": True, "folded": folded, "deleted": deleted}
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def reprice_market(conn: sqlite3.Connection) -> dict:
+    """Reajuste horário do mercado, lendo só os agregados das últimas 24h:
+    os 5 peixes mais vendidos caem 5%; os que não venderam nada sobem 10%.
+
+    Chame `compact_fish_sales` antes, para os agregados estarem em dia.
+    """
+    since = f"strftime('{_HOUR_FMT}', 'now', '-1 day')"
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cheaper = conn.execute(
+            f"""
+            UPDATE market_prices
+            SET current_price = CAST(current_price * 0.95 AS INTEGER),
+                last_updated = datetime('now')
+            WHERE fish_name IN (
+                SELECT fish_name FROM fish_sales_hourly
+                WHERE hour >= {since}
+                GROUP BY fish_name
+                ORDER BY SUM(count) DESC LIMIT 5
+            )
+            """
+        ).rowcount
+        pricier = conn.execute(
+            f"""
+            UPDATE market_prices
+            SET current_price = CAST(current_price * 1.10 AS INTEGER),
+                last_updated = datetime('now')
+            WHERE fish_name NOT IN (
+                SELECT fish_name FROM fish_sales_hourly WHERE hour >= {since}
+            )
+            """
+        ).rowcount
+        conn.commit()
+        return {"success": True, "cheaper": cheaper, "pricier": pricier}
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# --- GRUPOS (parties) ---
+# Toda mudança de membros passa por aqui, para `parties.members_json` e
+# `party_members` nunca divergirem.
+
+def find_party(conn: sqlite3.Connection, user_id: int):
+    """Grupo do jogador (como líder ou membro), ou None. Consulta pontual."""
+    return conn.execute(
+        """
+        SELECT p.* FROM party_members pm
+        JOIN parties p ON p.leader_id = pm.leader_id
+        WHERE pm.user_id = ?
+        """,
+        (user_id,),
+    ).fetchone()
+
+
+def create_party(conn: sqlite3.Connection, leader_id: int, leader_name: str = "") -> dict:
+    """Abre um grupo com `leader_id` de líder (nada muda se ele já lidera um).
+
+    Recusa com reason "in_party" quem já é membro do grupo de outro líder —
+    `parties` e `party_members` nunca podem discordar.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = conn.execute("SELECT leader_id FROM party_members WHERE user_id = ?", (leader_id,)).fetchone()
+        if current and current["leader_id"] != leader_id:
+            conn.rollback()
+            return {"success": False, "reason": "in_party"}
+        conn.execute(
+            "INSERT OR IGNORE INTO parties (leader_id, leader_name, members_json) VALUES (?, ?, '[]')",
+            (leader_id, leader_name),
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO party_members (user_id, leader_id) VALUES (?, ?)",
+            (leader_id, leader_id),
+        )
+        conn.commit()
+        return {"success": True, "reason": None}
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def add_party_member(conn: sqlite3.Connection, leader_id: int, member_id: int) -> dict:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        party = conn.execute("SELECT members_json FROM parties WHERE leader_id = ?", (leader_id,)).fetchone()
+        if not party:
+            conn.rollback()
+            return {"success": False, "reason": "no_party"}
+        current = conn.execute("SELECT leader_id FROM party_members WHERE user_id = ?", (member_id,)).fetchone()
+        if current:
+            conn.rollback()
+            reason = "is_leader" if current["leader_id"] == member_id else "in_party"
+            return {"success": False, "reason": reason}
+        members = json.loads(party["members_json"] or "[]")
+        if member_id not in members:
+            members.append(member_id)
+        conn.execute("UPDATE parties SET members_json = ? WHERE leader_id = ?", (json.dumps(members), leader_id))
+        conn.execute("INSERT INTO party_members (user_id, leader_id) VALUES (?, ?)", (member_id, leader_id))
+        conn.commit()
+        return {"success": True, "reason": None}
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def remove_party_member(conn: sqlite3.Connection, leader_id: int, member_id: int) -> bool:
+    """Tira `member_id` do grupo de `leader_id`. False se ele já não estava."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        party = conn.execute("SELECT members_json FROM parties WHERE leader_id = ?", (leader_id,)).fetchone()
+        members = json.loads(party["members_json"] or "[]") if party else []
+        if member_id not in members:
+            conn.rollback()
+            return False
+        members.remove(member_id)
+        conn.execute("UPDATE parties SET members_json = ? WHERE leader_id = ?", (json.dumps(members), leader_id))
+        conn.execute(
+            "DELETE FROM party_members WHERE user_id = ? AND leader_id = ?", (member_id, leader_id)
+        )
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def disband_party(conn: sqlite3.Connection, leader_id: int) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM parties WHERE leader_id = ?", (leader_id,))
+        conn.execute("DELETE FROM party_members WHERE leader_id = ?", (leader_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
 # --- ILHA PESSOAL (Fase 6) ---
 # Peixe nunca entra aqui: construção/upgrade só consome Sachê (wallet) e
 # sucata (scrap), os mesmos dois recursos já usados em try_upgrade_rod.
@@ -745,8 +1236,9 @@ def start_island_construction(
             """,
             (user_id, structure_key, current_level, timer_end),
         )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
+        LEADERBOARDS.observe("wallet", user_id, new_wallet)
+        LEADERBOARDS.observe("scrap", user_id, new_scrap)
         return {"success": True, "reason": None, "timer_end": timer_end, "wallet": new_wallet, "scrap": new_scrap}
     except Exception:
         conn.rollback()
@@ -810,6 +1302,8 @@ def finalize_island_construction(
             )
             new_tier = target_level
         conn.commit()
+        if new_tier is not None:
+            LEADERBOARDS.observe("island_tier", user_id, new_tier)
         return {"success": True, "reason": None, "level": target_level, "tier": new_tier}
     except Exception:
         conn.rollback()
@@ -840,7 +1334,8 @@ def reset_player_progress(conn: sqlite3.Connection, user_id: int) -> dict:
     conn.execute("BEGIN IMMEDIATE")
     try:
         conn.execute(
-            "UPDATE users SET wallet = 0, fish_count = 0, guild_rank = 'F', guild_xp = 0, scrap = 0 WHERE user_id = ?",
+            "UPDATE users SET wallet = 0, fish_count = 0, guild_rank = 'F', guild_xp = 0, scrap = 0, "
+            "version = version + 1 WHERE user_id = ?",
             (user_id,),
         )
         conn.execute("DELETE FROM user_inventory WHERE user_id = ?", (user_id,))
@@ -871,8 +1366,8 @@ def reset_player_progress(conn: sqlite3.Connection, user_id: int) -> dict:
         conn.execute("DELETE FROM user_island_unlocks WHERE user_id = ?", (user_id,))
         conn.execute("UPDATE persistent_catches SET catch_count = 0 WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM tournament_leaderboard WHERE user_id = ?", (user_id,))
-        sync_user_to_economy(conn, user_id)
         conn.commit()
+        LEADERBOARDS.invalidate()
         return {"success": True}
     except Exception:
         conn.rollback()
@@ -882,14 +1377,15 @@ def reset_player_progress(conn: sqlite3.Connection, user_id: int) -> dict:
 def reset_all_players(conn: sqlite3.Connection) -> dict:
     """Reset GLOBAL e destrutivo de TODOS os jogadores (`/admin sistema
     resetar_tudo`). Mantém as linhas nas tabelas singleton por jogador
-    (users, economy, user_rods, rod_upgrades, user_trap, user_cooldowns,
+    (users, user_rods, rod_upgrades, user_trap, user_cooldowns,
     quest_progress, user_islands, persistent_catches) — zeradas via UPDATE
     em massa, sem WHERE. Esvazia por completo as tabelas de coleção
     (user_inventory, achievements, tournament_leaderboard,
     user_island_structures, user_island_unlocks) e o registro de grupos
-    (parties), que ficariam órfãos/quebrados sem sentido após o reset.
+    (parties, party_members), que ficariam órfãos/quebrados sem sentido após o reset.
 
-    Deliberadamente NÃO toca: fish_sales_history (ledger histórico),
+    Deliberadamente NÃO toca: fish_sales_history e fish_sales_hourly (ledger
+    histórico e seus agregados),
     market_prices/world_state (estado de mundo, não de jogador) e
     auction_lots (leilão ativo, se houver, fica com estado inconsistente —
     não rode este comando durante um leilão em andamento).
@@ -903,14 +1399,8 @@ def reset_all_players(conn: sqlite3.Connection) -> dict:
         players_affected = players_row["c"] if players_row else 0
 
         conn.execute(
-            "UPDATE users SET wallet = 0, fish_count = 0, guild_rank = 'F', guild_xp = 0, scrap = 0"
-        )
-        conn.execute(
-            """
-            UPDATE economy SET wallet = 0, fish_count = 0, guild_rank = 'F', guild_xp = 0, scrap = 0,
-                inventory = '{}', current_rod = 'vara_bambu', rod_upgrades = '{}', afk_trap = '{}',
-                last_fish = NULL, last_daily = NULL, last_explore = NULL, baits = 0
-            """
+            "UPDATE users SET wallet = 0, fish_count = 0, guild_rank = 'F', guild_xp = 0, scrap = 0, "
+            "version = version + 1"
         )
         conn.execute("UPDATE user_rods SET current_rod = 'vara_bambu'")
         conn.execute("UPDATE rod_upgrades SET luck_level = 0, cd_level = 0")
@@ -936,8 +1426,10 @@ def reset_all_players(conn: sqlite3.Connection) -> dict:
         conn.execute("DELETE FROM user_island_structures")
         conn.execute("DELETE FROM user_island_unlocks")
         conn.execute("DELETE FROM parties")
+        conn.execute("DELETE FROM party_members")
 
         conn.commit()
+        LEADERBOARDS.invalidate()
         return {"success": True, "players_affected": players_affected}
     except Exception:
         conn.rollback()
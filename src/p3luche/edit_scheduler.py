@@ -0,0 +1,258 @@
+"""
+Agendador central de edições de mensagem, ciente do rate limit do Discord.
+
+Cada jogo animado editava a própria mensagem no próprio ritmo: o crash a
+cada tick, o slots três vezes com `sleep(1)`, o leilão a cada 10s mesmo sem
+lance novo. Todos dividem o mesmo orçamento — edição de mensagem tem bucket
+por canal (~5 por 5s) e o bot inteiro tem o teto global — então duas rodadas
+no mesmo canal disputavam os mesmos tokens e uma travava a outra.
+
+`EDITS.submit(alvo, **campos)` entrega a edição ao agendador e devolve um
+future que resolve quando aquele estado (ou um mais novo que o substituiu)
+chegou ao Discord; `await EDITS.edit(...)` é o mesmo, esperando. O alvo é uma
+`Message` (`.edit`) ou uma `Interaction` (`.edit_original_response`).
+
+- **Coalescência**: há no máximo uma edição em voo por mensagem. O que chega
+  enquanto isso é mesclado campo a campo no pendente, e só o estado mais
+  recente é enviado.
+- **Sem edição à toa**: o payload é serializado (embeds por `to_dict`, views
+  por `to_components`) e comparado com o último enviado; igual, não sai.
+- **Orçamento compartilhado**: antes de cada envio o agendador reserva um
+  token no bucket global e no do canal da mensagem (interações usam um
+  bucket próprio por interação, como o webhook do Discord). As reservas são
+  feitas em ordem de chegada, então jogos concorrentes se revezam em vez de
+  um esgotar o bucket do outro.
+- **Cadência adaptativa**: a latência de cada edição entra numa média móvel
+  por bucket. Quando ela passa de `SLOW_EDIT_SECONDS` (rate limit ou rede
+  ruim), edições seguidas da mesma mensagem passam a ser espaçadas por essa
+  latência, e os estados intermediários são coalescidos em vez de enfileirados.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+# Teto global do Discord é 50 req/s; a folga fica para o resto do bot.
+GLOBAL_EDITS_PER_SECOND = 40
+# Edição de mensagem: 5 por 5s por canal (e por webhook de interação).
+BUCKET_EDITS = 5
+BUCKET_WINDOW_SECONDS = 5.0
+LATENCY_ALPHA = 0.3
+SLOW_EDIT_SECONDS = 0.5
+MAX_SPACING_SECONDS = 5.0
+# Mensagens lembradas (último payload enviado, latência). As ociosas mais
+# antigas saem primeiro.
+MAX_TRACKED = 1000
+
+
+class TokenBucket:
+    """Bucket de tokens por reserva: quem reserva primeiro é atendido primeiro.
+
+    `reserve()` tira um token na hora (o saldo pode ficar negativo) e devolve
+    quanto esperar até ele existir. Não usa lock, então não prende o bucket a
+    um event loop.
+    """
+
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.rate = per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class _Slot:
+    __slots__ = ("target", "bucket", "pending", "futures", "signature", "sent_at", "worker")
+
+    def __init__(self, target, bucket):
+        self.target = target
+        self.bucket = bucket
+        self.pending = None
+        self.futures = []
+        self.signature = None
+        self.sent_at = 0.0
+        self.worker = None
+
+    def busy(self) -> bool:
+        return self.pending is not None or (self.worker is not None and not self.worker.done())
+
+
+def _target_key(target):
+    kind = "interacao" if hasattr(target, "edit_original_response") else "mensagem"
+    # Sem id (objetos de teste), a identidade do objeto serve: o slot guarda
+    # uma referência forte ao alvo, então o id() não é reaproveitado.
+    return (kind, getattr(target, "id", None) or id(target))
+
+
+def _bucket_for(target, key):
+    if key[0] == "interacao":
+        return key
+    channel = getattr(target, "channel", None)
+    channel_id = getattr(channel, "id", None)
+    return ("canal", channel_id) if channel_id is not None else None
+
+
+def _serializable(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "to_components"):
+        return value.to_components()
+    if isinstance(value, (list, tuple)):
+        return [_serializable(item) for item in value]
+    return value
+
+
+def payload_signature(payload: dict) -> str:
+    return json.dumps(
+        {name: _serializable(value) for name, value in payload.items()}, sort_keys=True, default=repr
+    )
+
+
+def _consume_exception(future) -> None:
+    # Quem usa `submit` sem esperar não vê o erro; sem isto o asyncio avisaria
+    # "exception was never retrieved" a cada edição perdida.
+    if not future.cancelled():
+        future.exception()
+
+
+class EditScheduler:
+    def __init__(self, global_per_second: float = GLOBAL_EDITS_PER_SECOND):
+        self.global_bucket = TokenBucket(global_per_second, global_per_second)
+        self._buckets = {}
+        self._latency = {}
+        self._slots = OrderedDict()
+        self.counters = {"enviadas": 0, "coalescidas": 0, "iguais": 0, "falhas": 0}
+
+    def submit(self, target, **payload) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        key = _target_key(target)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot(target, _bucket_for(target, key))
+            self._evict_idle()
+        else:
+            slot.target = target
+            self._slots.move_to_end(key)
+
+        future = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        if slot.pending is None:
+            slot.pending = dict(payload)
+        else:
+            self.counters["coalescidas"] += 1
+            slot.pending.update(payload)
+        slot.futures.append(future)
+
+        if slot.worker is None or slot.worker.done() or slot.worker.get_loop() is not loop:
+            slot.worker = loop.create_task(self._drain(slot))
+        return future
+
+    async def edit(self, target, **payload) -> bool:
+        """Agenda e espera. True se algo foi enviado, False se era igual ao atual."""
+        return await self.submit(target, **payload)
+
+    def _latency_key(self, bucket, key):
+        return bucket if bucket is not None else key
+
+    def _spacing(self, slot) -> float:
+        latency = self._latency.get(self._latency_key(slot.bucket, _target_key(slot.target)), 0.0)
+        return min(latency, MAX_SPACING_SECONDS) if latency > SLOW_EDIT_SECONDS else 0.0
+
+    def _observe(self, slot, seconds: float) -> None:
+        key = self._latency_key(slot.bucket, _target_key(slot.target))
+        previous = self._latency.get(key)
+        self._latency[key] = seconds if previous is None else previous + LATENCY_ALPHA * (seconds - previous)
+
+    def _reserve(self, slot) -> float:
+        wait = self.global_bucket.reserve()
+        if slot.bucket is not None:
+            bucket = self._buckets.get(slot.bucket)
+            if bucket is None:
+                bucket = self._buckets[slot.bucket] = TokenBucket(
+                    BUCKET_EDITS, BUCKET_EDITS / BUCKET_WINDOW_SECONDS
+                )
+            wait = max(wait, bucket.reserve())
+        return wait
+
+    def _take(self, slot):
+        payload, futures = slot.pending, slot.futures
+        slot.pending, slot.futures = None, []
+        return payload, futures
+
+    async def _drain(self, slot) -> None:
+        while slot.pending is not None:
+            gap = self._spacing(slot) - (time.monotonic() - slot.sent_at)
+            if gap > 0:
+                await asyncio.sleep(gap)
+
+            if payload_signature(slot.pending) == slot.signature:
+                self._skip(self._take(slot)[1])
+                continue
+            wait = self._reserve(slot)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            # O que saiu durante a espera foi mesclado no pendente: envia o
+            # estado mais recente, não o que existia na hora da reserva.
+            payload, futures = self._take(slot)
+            signature = payload_signature(payload)
+            if signature == slot.signature:
+                self._skip(futures)
+                continue
+
+            target = slot.target
+            send = getattr(target, "edit_original_response", None) or target.edit
+            started = time.monotonic()
+            try:
+                await send(**payload)
+            except asyncio.CancelledError:
+                # Worker cancelado no meio do envio: quem esperava por este
+                # estado não pode ficar pendurado num future que ninguém resolve.
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.counters["falhas"] += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.counters["enviadas"] += 1
+                slot.signature = signature
+                for future in futures:
+                    if not future.done():
+                        future.set_result(True)
+            finally:
+                slot.sent_at = time.monotonic()
+                self._observe(slot, slot.sent_at - started)
+
+    def _skip(self, futures) -> None:
+        self.counters["iguais"] += 1
+        for future in futures:
+            if not future.done():
+                future.set_result(False)
+
+    def _evict_idle(self) -> None:
+        while len(self._slots) > MAX_TRACKED:
+            for key, slot in self._slots.items():
+                if not slot.busy():
+                    del self._slots[key]
+                    # Bucket/latência de interação morrem com ela; os de canal ficam.
+                    if slot.bucket is None or slot.bucket == key:
+                        self._buckets.pop(key, None)
+                        self._latency.pop(key, None)
+                    break
+            else:
+                return
+
+
+EDITS = EditScheduler()
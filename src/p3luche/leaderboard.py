@@ -0,0 +1,140 @@
+"""
+Rankings do /eco rank servidos da memória (sem dependência do discord.py).
+
+Antes, cada /eco rank fazia dois `ORDER BY ... DESC LIMIT 10` na view legada
+`economy` — sem índice, ou seja, varredura + ordenação da base inteira a cada
+chamada. Agora cada métrica tem índice próprio (passo 9 de `migrations.py`) e
+o top-N fica guardado em `LEADERBOARDS`:
+
+- `cached(metric)` devolve o top-N da memória, sem tocar no SQLite;
+- `load(conn, metrics)` relê só o que faltar (roda no pool de leitura);
+- `observe(metric, user_id, value)` é chamado pelos helpers de escrita do
+  economy_db. Se o jogador já está no top e continua acima do corte, a linha
+  é atualizada ali mesmo; se a mudança pode cruzar o corte, a métrica é
+  invalidada; se não chega nem perto, nada acontece.
+
+UPDATE cru fora dos helpers também chama `observe`/`invalidate` logo depois
+do commit (ou vai por `PlayerSession.queue(..., leaderboards=...)`). Só a
+métrica semanal, que muda com o tempo, depende do TTL do cache.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+# Ordem dos ranks de guilda (F, o inicial, vale 0). O "score" de guilda junta
+# rank e XP num inteiro só — o XP zera a cada promoção, então não dá pra
+# ordenar só por ele.
+GUILD_RANK_ORDER = ("F", "E", "D", "C", "B", "A", "S")
+GUILD_SCORE_STEP = 1_000_000
+_GUILD_SCORE_SQL = (
+    "((CASE guild_rank "
+    + " ".join(f"WHEN '{r}' THEN {i}" for i, r in enumerate(GUILD_RANK_ORDER) if i)
+    + f" ELSE 0 END) * {GUILD_SCORE_STEP} + guild_xp)"
+)
+
+METRICS = {
+    "wallet": "SELECT user_id, user_name, wallet AS value FROM users ORDER BY wallet DESC LIMIT ?",
+    "fish_count": "SELECT user_id, user_name, fish_count AS value FROM users ORDER BY fish_count DESC LIMIT ?",
+    "scrap": "SELECT user_id, user_name, scrap AS value FROM users WHERE scrap > 0 ORDER BY scrap DESC LIMIT ?",
+    "guild": (
+        f"SELECT user_id, user_name, guild_rank, guild_xp, {_GUILD_SCORE_SQL} AS value "
+        f"FROM users ORDER BY {_GUILD_SCORE_SQL} DESC LIMIT ?"
+    ),
+    "island_tier": """
+        SELECT i.user_id, COALESCE(u.user_name, '') AS user_name, i.tier AS value
+        FROM user_islands i LEFT JOIN users u ON u.user_id = i.user_id
+        WHERE i.tier > 0 ORDER BY i.tier DESC LIMIT ?
+    """,
+    # Peixes (não lixo) pescados nos últimos 7 dias: toda captura com valor
+    # vira uma linha em fish_sales_history.
+    "weekly_catches": """
+        SELECT s.user_id, COALESCE(u.user_name, '') AS user_name, COUNT(*) AS value
+        FROM fish_sales_history s LEFT JOIN users u ON u.user_id = s.user_id
+        WHERE s.sale_time >= datetime('now', '-7 days')
+        GROUP BY s.user_id ORDER BY value DESC LIMIT ?
+    """,
+}
+
+LEADERBOARD_INDEXES_SQL = f"""
+CREATE INDEX IF NOT EXISTS idx_users_wallet ON users(wallet DESC);
+CREATE INDEX IF NOT EXISTS idx_users_fish_count ON users(fish_count DESC);
+CREATE INDEX IF NOT EXISTS idx_users_scrap ON users(scrap DESC);
+CREATE INDEX IF NOT EXISTS idx_users_guild_score ON users({_GUILD_SCORE_SQL} DESC);
+CREATE INDEX IF NOT EXISTS idx_user_islands_tier ON user_islands(tier DESC);
+CREATE INDEX IF NOT EXISTS idx_fish_sales_time ON fish_sales_history(sale_time, user_id);
+"""
+
+
+def guild_score(guild_rank: str, guild_xp: int) -> int:
+    """Mesmo valor que a coluna `value` da métrica "guild"."""
+    ordinal = GUILD_RANK_ORDER.index(guild_rank) if guild_rank in GUILD_RANK_ORDER else 0
+    return ordinal * GUILD_SCORE_STEP + (guild_xp or 0)
+
+
+class Leaderboards:
+    """Top-N por métrica, em memória. Thread-safe: os helpers do economy_db
+    rodam tanto no event loop quanto na thread escritora do gateway."""
+
+    def __init__(self, size: int = 10, ttl: float = 300.0, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._boards = {}
+        self._generation = {metric: 0 for metric in METRICS}
+
+    def cached(self, metric: str):
+        """Top-N da memória (lista de dicts), ou None se não houver/expirou."""
+        with self._lock:
+            board = self._boards.get(metric)
+            if board is None or self._clock() - board[1] > self.ttl:
+                return None
+            return [dict(row) for row in board[0]]
+
+    def load(self, conn, metrics) -> dict:
+        """Devolve {metric: linhas}, indo ao banco só para o que não está em cache."""
+        result = {}
+        for metric in metrics:
+            rows = self.cached(metric)
+            if rows is None:
+                with self._lock:
+                    generation = self._generation[metric]
+                rows = [dict(row) for row in conn.execute(METRICS[metric], (self.size,)).fetchall()]
+                with self._lock:
+                    # Se alguma escrita invalidou a métrica durante a consulta,
+                    # devolve o resultado mas não guarda (pode estar velho).
+                    if self._generation[metric] == generation:
+                        self._boards[metric] = ([dict(row) for row in rows], self._clock())
+            result[metric] = rows
+        return result
+
+    def observe(self, metric: str, user_id: int, value, **fields) -> None:
+        """Novo valor de `metric` para `user_id`, depois de uma escrita."""
+        with self._lock:
+            board = self._boards.get(metric)
+            if board is None:
+                return
+            rows = board[0]
+            full = len(rows) >= self.size
+            cutoff = rows[-1]["value"] if full else None
+            mine = next((row for row in rows if row["user_id"] == user_id), None)
+            if mine is not None and (not full or value >= cutoff):
+                mine["value"] = value
+                mine.update(fields)
+                rows.sort(key=lambda row: row["value"], reverse=True)
+            elif mine is not None or not full or value > cutoff:
+                self._drop(metric)
+
+    def invalidate(self, metric: str | None = None) -> None:
+        with self._lock:
+            for name in ([metric] if metric else list(METRICS)):
+                self._drop(name)
+
+    def _drop(self, metric: str) -> None:
+        self._boards.pop(metric, None)
+        self._generation[metric] += 1
+
+
+LEADERBOARDS = Leaderboards()
@@ -0,0 +1,133 @@
+"""
+Watchdog do event loop: mede o atraso do loop a partir de uma thread lateral e,
+quando ele para, diz ONDE parou.
+
+Até aqui bloqueio de loop era caçado à mão (ver tests/test_loop_blocking.py:
+cor da thumbnail, import do matplotlib). A thread do watchdog agenda uma batida
+no loop (`call_soon_threadsafe`) a cada PROBE_INTERVAL_SECONDS e espera o loop
+atendê-la. Se a batida demora mais que STALL_THRESHOLD_SECONDS, o loop está
+preso em código síncrono: a thread tira uma foto da pilha da thread do loop
+(`sys._current_frames`) naquele instante e, quando a batida finalmente roda,
+registra a parada em `telemetry.record_stall`, agregada por ponto de chamada.
+
+O ponto de chamada é o frame mais interno fora da stdlib e dos site-packages:
+um `BEGIN IMMEDIATE` síncrono aparece como a linha do `economy_db.py` que o
+executou, um parse de PDF como a linha da cog que chamou o pypdf.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import telemetry
+
+PROBE_INTERVAL_SECONDS = 0.1
+STALL_THRESHOLD_SECONDS = 0.2
+STACK_DEPTH = 8
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+_LIBRARY_PATHS = tuple(
+    str(Path(path).resolve())
+    for path in {sysconfig.get_paths()[key] for key in ("stdlib", "platstdlib", "purelib", "platlib")}
+)
+
+
+def _is_library(filename: str) -> bool:
+    try:
+        path = str(Path(filename).resolve())
+    except (OSError, ValueError):
+        return True
+    return filename.startswith("<") or path.startswith(_LIBRARY_PATHS)
+
+
+def _display_path(filename: str) -> str:
+    try:
+        return Path(filename).resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+def call_site(frames) -> str:
+    """`arquivo:linha (função)` do frame mais interno que é código nosso."""
+    if not frames:
+        return "?"
+    ours = [frame for frame in frames if not _is_library(frame.filename)]
+    frame = (ours or frames)[-1]
+    return f"{_display_path(frame.filename)}:{frame.lineno} ({frame.name})"
+
+
+class LoopWatchdog:
+    """Thread lateral que mede o atraso do loop. `start()` precisa ser chamado
+    de dentro do loop (é ele que identifica qual thread fotografar)."""
+
+    def __init__(self, threshold: float = STALL_THRESHOLD_SECONDS,
+                 interval: float = PROBE_INTERVAL_SECONDS, on_stall=None):
+        self.threshold = threshold
+        self.interval = interval
+        # on_stall(segundos, ponto, pilha): chamado da thread do watchdog só
+        # quando a parada é nova ou a pior daquele ponto (ver record_stall).
+        self.on_stall = on_stall
+        self._loop = None
+        self._loop_thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop=None, loop_thread_id: int = None) -> "LoopWatchdog":
+        if self.running:
+            return self
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = loop_thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="p3luche-loop-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return traceback.extract_stack(frame) if frame is not None else []
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            beat = threading.Event()
+            sent = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(beat.set)
+            except RuntimeError:
+                return  # loop fechado: o bot está encerrando
+            frames = None
+            if not beat.wait(self.threshold):
+                frames = self._sample()
+                while not beat.wait(self.interval):
+                    if self._stop.is_set() or self._loop.is_closed():
+                        return
+            lag = time.monotonic() - sent
+            telemetry.record_loop_lag(lag)
+            if frames is not None:
+                self._report(lag, frames)
+
+    def _report(self, lag: float, frames) -> None:
+        site = call_site(frames)
+        stack = "".join(traceback.format_list(frames[-STACK_DEPTH:]))
+        if telemetry.record_stall(lag, site, stack) and self.on_stall is not None:
+            try:
+                self.on_stall(lag, site, stack)
+            except Exception:
+                pass  # o watchdog nunca pode morrer por causa do callback
@@ -18,16 +18,26 @@ for _stream in (sys.stdout, sys.stderr):
     except (AttributeError, ValueError):
         pass  # stream sem suporte a reconfigure (ex: capturada em testes)
 
+# Perfil de startup (P3LUCHE_PROFILE_STARTUP=1): liga antes dos imports
+# abaixo para medi-los também. Desligado, não instala nada.
+from startup_profiler import STARTUP
+
+STARTUP.enable_from_env()
+
 import asyncio
-import sqlite3
 import threading
+import time
 from datetime import datetime
 
 import discord
 from discord.ext import commands
 
-from config import TOKEN, set_bot_instance
+from config import DB_PATH, TOKEN, set_bot_instance
 from database import db_manager
+from command_sync import sync_command_tree
+from command_timing import TimedCommandTree
+from db_gateway import DatabaseGateway
+from loop_watchdog import LoopWatchdog
 from utils import log_to_gui
 
 intents = discord.Intents.default()
@@ -35,51 +45,87 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# TimedCommandTree: cronometra cada slash command (primeira resposta e
+# conclusão) para o histograma de latência da telemetria.
+bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=TimedCommandTree)
+
+
+# Ordem de carregamento das extensões (uma por vez: import e setup das cogs
+# são síncronos, então não há o que sobrepor entre elas). Quem usa um objeto
+# de outra cog vem depois dela — load_extension re-executa o módulo, e só
+# assim enxerga o objeto que de fato foi registrado:
+# - cogs.spotify pendura comandos no musica_group de cogs.musica;
+# - cogs.minigames usa o eco_group de cogs.economia;
+# - cogs.sistema lê constantes de cogs.economia, cogs.ilha e cogs.onboarding;
+# - cogs.jukebox usa check_channel_permission de cogs.musica.
+EXTENSIONS = [
+    "cogs.lore_ai",
+    "cogs.moderacao",
+    "cogs.musica",
+    "cogs.economia",
+    "cogs.ilha",
+    "cogs.onboarding",
+    "cogs.casino",
+    "cogs.admin",
+    "cogs.backup",
+    "cogs.erros",
+    "cogs.logs",
+    "cogs.dashboard",
+    "cogs.jukebox",
+    "cogs.spotify",
+    "cogs.minigames",
+    "cogs.sistema",
+]
+
+
+async def _load_extension(ext: str) -> None:
+    started = time.perf_counter()
+    try:
+        await bot.load_extension(ext)
+    except Exception as e:
+        log_to_gui(f"Falha ao carregar {ext}: {e}", "ERROR")
+        return
+    elapsed = time.perf_counter() - started
+    STARTUP.record_extension(ext, elapsed)
+    log_to_gui(f"Extensão carregada: {ext} ({elapsed * 1000:.0f} ms)", "SUCCESS")
+    # Devolve o loop entre uma extensão e a próxima, para o handshake com o
+    # gateway andar durante a carga (ver setup_hook).
+    await asyncio.sleep(0)
+
+
+async def load_extensions() -> None:
+    for ext in EXTENSIONS:
+        await _load_extension(ext)
+    STARTUP.mark("extensões carregadas")
 
 
 async def setup_hook():
+    STARTUP.mark("setup_hook")
     bot.db_conn = db_manager.connect()
+    # Aplica só os passos de schema pendentes (PRAGMA user_version), inclusive
+    # a cópia única da economy legada para o v4 — nada disso roda de novo num
+    # banco já atualizado.
     db_manager.migrate()
-    try:
-        from migration_v4 import migrate_to_normalized
-
-        report = migrate_to_normalized()
-        if report["migrated"] > 0:
-            log_to_gui(
-                f"Migracao v4: {report['migrated']} jogador(es) sincronizados.",
-                "SUCCESS",
-            )
-    except Exception as e:
-        log_to_gui(f"Migracao v4: {e}", "WARNING")
+    # Gateway assíncrono: escritor serializado + leitores WAL, fora do event
+    # loop. `bot.db_conn` continua existindo para o código que ainda fala
+    # direto com a conexão compartilhada.
+    bot.db = DatabaseGateway(DB_PATH).start()
     set_bot_instance(bot)
+    # Mede o atraso do loop de uma thread lateral; cada parada nova (ou pior
+    # que a anterior no mesmo ponto) vira um WARNING com arquivo e linha.
+    bot.loop_watchdog = LoopWatchdog(
+        on_stall=lambda lag, site, _stack: log_to_gui(
+            f"Event loop parado por {lag * 1000:.0f} ms em {site}", "WARNING"
+        )
+    ).start()
 
-    # Ordem de carregamento: primeiro os módulos que fornecem contexto e IA,
-    # depois os que dependem de advertências ou integração com o resto do bot.
-    extensions = [
-        "cogs.lore_ai",
-        "cogs.moderacao",
-        "cogs.jukebox",
-        "cogs.musica",
-        "cogs.economia",
-        "cogs.minigames",
-        "cogs.ilha",
-        "cogs.onboarding",
-        "cogs.casino",
-        "cogs.spotify",
-        "cogs.sistema",
-        "cogs.admin",
-        "cogs.backup",
-        "cogs.erros",
-        "cogs.logs",
-        "cogs.dashboard",
-    ]
-    for ext in extensions:
-        try:
-            await bot.load_extension(ext)
-            log_to_gui(f"Extensão carregada: {ext}", "SUCCESS")
-        except Exception as e:
-            log_to_gui(f"Falha ao carregar {ext}: {e}", "ERROR")
+    # As extensões carregam em segundo plano enquanto o discord.py conecta ao
+    # gateway (HTTP, TLS, IDENTIFY, chunk de membros): o setup_hook retorna já
+    # e a rede anda em paralelo com os imports. O on_ready espera a carga
+    # terminar antes do sync da árvore, então nenhum comando fica de fora; e
+    # comando que chegar antes disso recebe "estou iniciando" da própria
+    # árvore (TimedCommandTree.interaction_check), não um CommandNotFound.
+    bot.extensions_loaded = asyncio.create_task(load_extensions())
 
 
 bot.setup_hook = setup_hook
@@ -88,22 +134,23 @@ bot.setup_hook = setup_hook
 @bot.event
 async def on_ready():
     bot.start_time = datetime.now()
+    await bot.extensions_loaded
     log_to_gui(f"Bot Online: {bot.user}", "SUCCESS")
-
-    try:
-        cursor = bot.db_conn.cursor()
-        cursor.execute(
-            "ALTER TABLE economy ADD COLUMN last_fish_time TEXT DEFAULT '1970-01-01T00:00:00'"
-        )
-        bot.db_conn.commit()
-        print("✅ Banco de dados atualizado: Coluna 'last_fish_time' adicionada.")
-    except sqlite3.OperationalError:
-        pass
-
+    if STARTUP.enabled:
+        STARTUP.mark("on_ready")
+        STARTUP.stop_imports()
+        log_to_gui(STARTUP.report(), "INFO")
+
+    # O on_ready roda de novo a cada reconexão do gateway: só sincroniza se a
+    # árvore mudou desde o último sync (fingerprint em command_sync.py).
+    # Forçar na mão: /admin sistema sincronizar.
     try:
-        synced = await bot.tree.sync()
-        print(f"✅ Sincronizado {len(synced)} comandos com sucesso!")
-        log_to_gui(f"Sincronizado {len(synced)} comandos.", "INFO")
+        result = await sync_command_tree(bot.tree)
+        if result["synced"]:
+            print(f"✅ Sincronizado {result['count']} comandos com sucesso!")
+            log_to_gui(f"Sincronizado {result['count']} comandos.", "INFO")
+        else:
+            log_to_gui("Árvore de comandos inalterada; sync pulado.", "INFO")
     except Exception as e:
         print(f"❌ Erro ao sincronizar: {e}")
 
@@ -153,3 +200,10 @@ if __name__ == "__main__":
                 bot.run(TOKEN)
     except Exception as e:
         print(f"Erro fatal ao iniciar: {e}")
+    finally:
+        # Drena a fila de escrita antes de sair: nada que já foi confirmado
+        # ao jogador pode ficar só na memória.
+        if getattr(bot, "loop_watchdog", None) is not None:
+            bot.loop_watchdog.stop()
+        if getattr(bot, "db", None) is not None:
+            bot.db.close()
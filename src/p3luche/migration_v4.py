@@ -2,13 +2,12 @@
 Migração v4: economy legada -> tabelas normalizadas + seed de mercado.
 Faça backup de database/bot.db antes de executar.
 """
-import json
 import os
 import sqlite3
 
 from config import DB_PATH
 from economy_constants import FISH_DB
-from economy_db import V4_TABLES_SQL, seed_market_prices, sync_user_to_economy
+from economy_db import seed_market_prices
 
 # DB_PATH vem do config (terceiro binding removido): antes este módulo derivava
 # o caminho de os.getcwd() por conta própria, ignorando qualquer override de
@@ -16,107 +15,169 @@ from economy_db import V4_TABLES_SQL, seed_market_prices, sync_user_to_economy
 # mesmo com os testes repontados para um banco temporário.
 
 
-def _add_column_safe(cursor: sqlite3.Cursor, table: str, column_def: str) -> None:
-    try:
-        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column_def}")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name" not in str(e):
-            raise
-
+# Tamanho do lote da cópia legada. Cada lote é uma transação que termina
+# gravando o watermark (maior user_id copiado); um crash no meio recomeça do
+# último lote confirmado em vez de refazer a tabela inteira.
+COPY_BATCH_SIZE = 1000
+COPY_CHECKPOINT = "economy_v4_copy"
+_MIN_USER_ID = -(2**63)
+
+# Linhas do lote cujo jogador ainda não existe em `users`. Quem já está nas
+# tabelas v4 tem lá o estado mais novo — a versão antiga desta cópia apagava
+# o inventário e regravava tudo a partir da economy legada, por cima do
+# progresso normalizado. Por isso `users` é sempre o último INSERT do lote.
+_PENDING = """
+    e.user_id > :lo AND e.user_id <= :hi
+    AND NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = e.user_id)
+"""
 
-def _migrate_user(cursor: sqlite3.Cursor, row: sqlite3.Row) -> None:
-    user_id = row["user_id"]
-    cursor.execute(
+_COPY_STATEMENTS = (
+    f"""
+    INSERT OR IGNORE INTO user_inventory (user_id, item_key, quantity)
+    SELECT e.user_id, j.key, j.value
+    FROM economy e, json_each(CASE WHEN json_valid(e.inventory) THEN e.inventory ELSE '{{}}' END) j
+    WHERE {_PENDING} AND j.type IN ('integer', 'real') AND j.value > 0
+    """,
+    f"""
+    INSERT OR IGNORE INTO user_rods (user_id, current_rod)
+    SELECT e.user_id, COALESCE(NULLIF(e.current_rod, ''), 'vara_bambu')
+    FROM economy e WHERE {_PENDING}
+    """,
+    f"""
+    INSERT OR IGNORE INTO rod_upgrades (user_id, luck_level, cd_level)
+    SELECT e.user_id,
+           COALESCE(CASE WHEN json_valid(e.rod_upgrades) THEN json_extract(e.rod_upgrades, '$.luck') END, 0),
+           COALESCE(CASE WHEN json_valid(e.rod_upgrades) THEN json_extract(e.rod_upgrades, '$.cd') END, 0)
+    FROM economy e WHERE {_PENDING}
+    """,
+    f"""
+    INSERT OR IGNORE INTO user_trap (user_id, trap_type, status, timer_end, durability)
+    SELECT e.user_id,
+           json_extract(e.afk_trap, '$.type'),
+           json_extract(e.afk_trap, '$.status'),
+           json_extract(e.afk_trap, '$.timer_end'),
+           json_extract(e.afk_trap, '$.durability')
+    FROM economy e
+    WHERE {_PENDING} AND json_valid(e.afk_trap) AND json_type(e.afk_trap) = 'object'
+      AND e.afk_trap <> '{{}}'
+    """,
+    f"""
+    INSERT OR IGNORE INTO user_cooldowns (user_id, last_fish, last_daily, last_explore)
+    SELECT e.user_id, e.last_fish, e.last_daily, e.last_explore
+    FROM economy e WHERE {_PENDING}
+    """,
+    f"""
+    INSERT INTO users (user_id, user_name, wallet, fish_count, guild_rank, guild_xp, scrap)
+    SELECT e.user_id, e.user_name, COALESCE(e.wallet, 0), COALESCE(e.fish_count, 0),
+           COALESCE(NULLIF(e.guild_rank, ''), 'F'), COALESCE(e.guild_xp, 0), COALESCE(e.scrap, 0)
+    FROM economy e WHERE {_PENDING}
+    """,
+)
+
+
+def _checkpoint(conn: sqlite3.Connection) -> tuple:
+    """(watermark, done) da cópia legada; cria a tabela de checkpoints se faltar."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS migration_checkpoints (
+            name TEXT PRIMARY KEY,
+            watermark INTEGER,
+            done INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
         """
-        INSERT INTO users (user_id, user_name, wallet, fish_count, guild_rank, guild_xp, scrap)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            user_name = excluded.user_name,
-            wallet = excluded.wallet,
-            fish_count = excluded.fish_count,
-            guild_rank = excluded.guild_rank,
-            guild_xp = excluded.guild_xp,
-            scrap = excluded.scrap
-        """,
-        (
-            user_id,
-            row["user_name"],
-            row["wallet"] or 0,
-            row["fish_count"] or 0,
-            row["guild_rank"] or "F",
-            row["guild_xp"] or 0,
-            row["scrap"] or 0,
-        ),
     )
+    row = conn.execute(
+        "SELECT watermark, done FROM migration_checkpoints WHERE name = ?", (COPY_CHECKPOINT,)
+    ).fetchone()
+    if row is None:
+        return None, False
+    return row[0], bool(row[1])
 
-    inv = json.loads(row["inventory"]) if row["inventory"] else {}
-    cursor.execute("DELETE FROM user_inventory WHERE user_id = ?", (user_id,))
-    for item_key, qtd in inv.items():
-        if qtd and qtd > 0:
-            cursor.execute(
-                """
-                INSERT INTO user_inventory (user_id, item_key, quantity) VALUES (?, ?, ?)
-                """,
-                (user_id, item_key, qtd),
-            )
 
-    current_rod = row["current_rod"] if row["current_rod"] else "vara_bambu"
-    cursor.execute(
+def _save_checkpoint(conn: sqlite3.Connection, watermark, done: bool) -> None:
+    conn.execute(
         """
-        INSERT INTO user_rods (user_id, current_rod) VALUES (?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET current_rod = excluded.current_rod
+        INSERT INTO migration_checkpoints (name, watermark, done, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(name) DO UPDATE SET
+            watermark = excluded.watermark,
+            done = excluded.done,
+            updated_at = excluded.updated_at
         """,
-        (user_id, current_rod),
+        (COPY_CHECKPOINT, watermark, int(done)),
     )
 
-    upgrades = json.loads(row["rod_upgrades"]) if row["rod_upgrades"] else {}
-    cursor.execute(
-        """
-        INSERT INTO rod_upgrades (user_id, luck_level, cd_level) VALUES (?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            luck_level = excluded.luck_level,
-            cd_level = excluded.cd_level
-        """,
-        (user_id, upgrades.get("luck", 0), upgrades.get("cd", 0)),
-    )
 
-    trap = json.loads(row["afk_trap"]) if row["afk_trap"] else {}
-    if trap:
-        cursor.execute(
-            """
-            INSERT INTO user_trap (user_id, trap_type, status, timer_end, durability)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET
-                trap_type = excluded.trap_type,
-                status = excluded.status,
-                timer_end = excluded.timer_end,
-                durability = excluded.durability
-            """,
-            (
-                user_id,
-                trap.get("type"),
-                trap.get("status"),
-                trap.get("timer_end"),
-                trap.get("durability"),
-            ),
-        )
-    else:
-        cursor.execute("DELETE FROM user_trap WHERE user_id = ?", (user_id,))
+def copy_legacy_rows(conn: sqlite3.Connection, batch_size: int = COPY_BATCH_SIZE) -> int:
+    """Copia a tabela economy para as tabelas v4. Devolve quantos jogadores novos.
+
+    É o corpo do passo 5 do registro em `migrations.py` (roda uma vez, no
+    boot em que o banco chega nessa versão) e também do script manual abaixo.
+
+    A cópia é feita em lotes de `batch_size` user_ids, cada um com meia dúzia
+    de `INSERT ... SELECT` (o inventário sai do JSON via `json_each`), em vez
+    de um punhado de statements por jogador. O progresso fica em
+    `migration_checkpoints`: o watermark avança junto com o lote, na mesma
+    transação, e quando a cópia termina ela é marcada como concluída e não
+    roda mais. Jogadores que já existem em `users` não são tocados.
+
+    Depois do passo 6, `economy` é uma view sobre as próprias tabelas v4 e a
+    tabela antiga fica congelada em `economy_legacy` — aí não há nada a fazer.
+    """
+    is_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='economy'"
+    ).fetchone()
+    if not is_table:
+        return 0
+    watermark, done = _checkpoint(conn)
+    conn.commit()
+    if done:
+        return 0
+
+    if watermark is None:
+        watermark = _MIN_USER_ID
+    copied = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            hi, count = conn.execute(
+                """
+                SELECT MAX(user_id), COUNT(*) FROM (
+                    SELECT user_id FROM economy WHERE user_id > ? ORDER BY user_id LIMIT ?
+                )
+                """,
+                (watermark, batch_size),
+            ).fetchone()
+            if not count:
+                _save_checkpoint(conn, watermark, True)
+                conn.commit()
+                break
+            params = {"lo": watermark, "hi": hi}
+            for statement in _COPY_STATEMENTS[:-1]:
+                conn.execute(statement, params)
+            copied += conn.execute(_COPY_STATEMENTS[-1], params).rowcount
+            _save_checkpoint(conn, hi, False)
+            conn.commit()
+            watermark = hi
+        except Exception:
+            conn.rollback()
+            raise
 
-    cursor.execute(
-        """
-        INSERT INTO user_cooldowns (user_id, last_fish, last_daily, last_explore)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            last_fish = excluded.last_fish,
-            last_daily = excluded.last_daily,
-            last_explore = excluded.last_explore
-        """,
-        (user_id, row["last_fish"], row["last_daily"], row["last_explore"]),
-    )
+    seed_market_prices(conn, FISH_DB)
+    return copied
 
 
 def migrate_to_normalized(db_path: str | None = None) -> dict:
+    """Execução manual: leva o schema à versão atual e recopia a economy legada.
+
+    O bot não chama mais isto a cada boot — o registro de migrações cuida da
+    cópia uma única vez. Rodar na mão também é seguro: a cópia retoma do
+    checkpoint, pula jogadores que já existem nas tabelas v4 e, num banco que
+    já passou do passo 6, não faz nada (ver `copy_legacy_rows`).
+    """
+    from migrations import apply_migrations
+
     path = db_path or DB_PATH
     if not os.path.exists(path):
         raise FileNotFoundError(f"Banco nao encontrado: {path}")
@@ -125,33 +186,15 @@ def migrate_to_normalized(db_path: str | None = None) -> dict:
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
-    cursor.executescript(V4_TABLES_SQL)
-    _add_column_safe(cursor, "user_cooldowns", "daily_streak INTEGER DEFAULT 0")
-
-    migrated = 0
-    try:
-        old_rows = cursor.execute("SELECT * FROM economy").fetchall()
-        for row in old_rows:
-            _migrate_user(cursor, row)
-            migrated += 1
-    except sqlite3.OperationalError:
-        old_rows = []
-
-    conn.commit()
-
-    seed_market_prices(conn, FISH_DB)
-
-    for row in old_rows:
-        sync_user_to_economy(conn, row["user_id"])
-
-    conn.commit()
+    apply_migrations(conn)
+    economy_rows = copy_legacy_rows(conn)
 
     report = {
-        "economy_rows": len(old_rows),
+        "economy_rows": economy_rows,
         "users_rows": cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0],
         "inventory_rows": cursor.execute("SELECT COUNT(*) FROM user_inventory").fetchone()[0],
         "market_prices_rows": cursor.execute("SELECT COUNT(*) FROM market_prices").fetchone()[0],
-        "migrated": migrated,
+        "migrated": economy_rows,
     }
     conn.close()
     return report
@@ -165,7 +208,7 @@ def print_report(report: dict) -> None:
     print(f"  market_prices:        {report['market_prices_rows']} peixes")
     print(f"  migrados nesta exec:  {report['migrated']}")
     if report["economy_rows"] == 0:
-        print("  nota: economy vazia — jogadores serao criados ao usar /eco pescar")
+        print("  nota: nada a copiar (economy vazia ou ja convertida em view)")
     print("Migracao concluida.")
 
 
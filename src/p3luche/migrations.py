@@ -0,0 +1,269 @@
+"""Registro versionado de migrações de schema (chaveado em `PRAGMA user_version`).
+
+Antes, o schema era garantido "na marra" em vários lugares e a cada chamada:
+`DatabaseManager.migrate()` no boot, `migration_v4.migrate_to_normalized()`
+também no boot, um `ALTER TABLE` solto no `on_ready` e — o pior —
+`economy_db.ensure_user` rodando `ensure_v4_tables` (executescript inteiro do
+v4 + dois ALTER + commit) em TODO getter. Um único `/eco pescar` executava
+esse DDL várias vezes.
+
+Agora cada mudança de schema é um passo numerado aqui. `apply_migrations`
+lê `PRAGMA user_version`, aplica só os passos pendentes, em ordem, e grava a
+versão nova depois de cada um. Roda uma vez no startup (via
+`DatabaseManager.migrate`); os helpers de runtime só executam DML.
+
+Regras para quem for adicionar um passo:
+
+- Nunca edite um passo já publicado: bancos em produção já passaram por ele.
+  Crie um passo novo com o próximo número.
+- Passos devem ser idempotentes (`IF NOT EXISTS`, `_add_column_safe`): um
+  banco anterior ao registro tem `user_version = 0` mas já tem boa parte das
+  tabelas, e um crash no meio de um passo faz ele rodar de novo.
+"""
+import sqlite3
+
+# Lista de (versão, descrição, função(conn)). Preenchida pelo decorator abaixo,
+# na ordem em que os passos aparecem no módulo.
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    """Registra um passo de migração. As versões precisam ser crescentes e únicas."""
+
+    def decorator(fn):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migração {version} fora de ordem (última: {MIGRATIONS[-1][0]}).")
+        MIGRATIONS.append((version, description, fn))
+        return fn
+
+    return decorator
+
+
+def _add_column_safe(conn: sqlite3.Connection, table: str, column_def: str) -> None:
+    """Tenta adicionar uma coluna, ignora se ela já existir."""
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column_def}")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def apply_migrations(conn: sqlite3.Connection) -> list:
+    """Aplica os passos com versão > `user_version`. Devolve as versões aplicadas."""
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        fn(conn)
+        # PRAGMA não aceita parâmetro; `version` vem do registro, nunca de input.
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+        applied.append(version)
+    return applied
+
+
+# ──────────────────────────────────────────────
+#  PASSOS
+# ──────────────────────────────────────────────
+
+@migration(1, "tabelas base (música, memórias, lore, moderação, mundo, economia legada, parties)")
+def _base_tables(conn):
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS music_cache (id INTEGER PRIMARY KEY, youtube_url TEXT UNIQUE, drive_link TEXT, title TEXT, normalized_title TEXT, duration INTEGER, added_by TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS user_memories (id INTEGER PRIMARY KEY, user_id INTEGER, user_name TEXT, memory_text TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS server_lore (id INTEGER PRIMARY KEY, content TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS player_lore (id INTEGER PRIMARY KEY, target_id INTEGER, target_name TEXT, character_name TEXT, content TEXT, added_by TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS warnings (id INTEGER PRIMARY KEY, user_id INTEGER, user_name TEXT, moderator_id INTEGER, moderator_name TEXT, reason TEXT, proof TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS lore_versions (id INTEGER PRIMARY KEY, lore_type TEXT, original_lore_id INTEGER, content TEXT, edited_by TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS lore_graph_cache (id INTEGER PRIMARY KEY CHECK (id = 1), mermaid_code TEXT, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS world_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            current_weather TEXT DEFAULT 'normal',
+            weather_end TIMESTAMP
+        )
+    """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO world_state (id, current_weather) VALUES (1, 'normal')"
+    )
+
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS quest_progress (
+        user_id INTEGER PRIMARY KEY,
+        current_chapter TEXT DEFAULT 'inicio',
+        quest_status TEXT DEFAULT 'locked',
+        inventory TEXT DEFAULT '{}',
+        reputation INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+    )
+
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS persistent_catches (
+        user_id INTEGER PRIMARY KEY,
+        catch_count INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+    )
+
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS economy (
+        user_id INTEGER PRIMARY KEY,
+        user_name TEXT,
+        wallet INTEGER DEFAULT 0,
+        last_fish TIMESTAMP,
+        last_daily TIMESTAMP,
+        fish_count INTEGER DEFAULT 0,
+        rod_tier INTEGER DEFAULT 0,
+        baits INTEGER DEFAULT 0,
+        inventory TEXT DEFAULT '{}',
+        current_rod TEXT DEFAULT 'vara_bambu',
+        last_explore TIMESTAMP,
+        guild_rank TEXT DEFAULT 'F',
+        guild_xp INTEGER DEFAULT 0,
+        scrap INTEGER DEFAULT 0,
+        afk_trap TEXT DEFAULT '{}',
+        rod_upgrades TEXT DEFAULT '{}'
+    )
+    """
+    )
+
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS parties (
+        leader_id INTEGER PRIMARY KEY,
+        leader_name TEXT,
+        members_json TEXT DEFAULT '[]',
+        active_mission_id TEXT,
+        mission_progress INTEGER DEFAULT 0,
+        mission_target INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+    )
+
+
+@migration(2, "colunas adicionadas depois em economy, warnings, music_cache, memórias e lore")
+def _late_columns(conn):
+    _add_column_safe(conn, "economy", "inventory TEXT DEFAULT '{}'")
+    _add_column_safe(conn, "economy", "guild_rank TEXT DEFAULT 'F'")
+    _add_column_safe(conn, "economy", "guild_xp INTEGER DEFAULT 0")
+    _add_column_safe(conn, "economy", "scrap INTEGER DEFAULT 0")
+    _add_column_safe(conn, "economy", "rod_upgrades TEXT DEFAULT '{}'")
+    _add_column_safe(conn, "economy", "afk_trap TEXT DEFAULT '{}'")
+
+    _add_column_safe(conn, "economy", "last_explore TIMESTAMP")
+    _add_column_safe(conn, "economy", "fish_count INTEGER DEFAULT 0")
+
+    _add_column_safe(conn, "warnings", "status TEXT DEFAULT 'active'")
+    _add_column_safe(conn, "warnings", "revoked_by TEXT")
+    _add_column_safe(conn, "warnings", "revoked_at TIMESTAMP")
+    _add_column_safe(conn, "music_cache", "is_active INTEGER DEFAULT 1")
+    _add_column_safe(conn, "music_cache", "edited_by TEXT")
+    _add_column_safe(conn, "music_cache", "edited_at TIMESTAMP")
+    _add_column_safe(conn, "user_memories", "tag TEXT")
+    _add_column_safe(conn, "player_lore", "edited_at TIMESTAMP")
+    _add_column_safe(conn, "user_memories", "is_active INTEGER DEFAULT 1")
+
+
+@migration(3, "economia normalizada v4 (users, inventário, varas, cooldowns, mercado, ilha)")
+def _v4_tables(conn):
+    from economy_db import ensure_v4_tables
+
+    ensure_v4_tables(conn)
+
+
+@migration(4, "economy.last_fish_time (antes um ALTER solto no on_ready)")
+def _economy_last_fish_time(conn):
+    _add_column_safe(conn, "economy", "last_fish_time TEXT DEFAULT '1970-01-01T00:00:00'")
+
+
+@migration(5, "cópia dos jogadores da tabela economy legada para as tabelas v4")
+def _copy_legacy_players(conn):
+    if not _table_exists(conn, "economy"):
+        return
+    from migration_v4 import copy_legacy_rows
+
+    copy_legacy_rows(conn)
+
+
+@migration(6, "economy legada vira view somente-leitura sobre as tabelas v4")
+def _economy_as_view(conn):
+    # A tabela antiga fica guardada como `economy_legacy` (backup congelado,
+    # ninguém mais lê nem escreve nela); o nome `economy` passa a ser a view
+    # de compatibilidade, para os leitores antigos continuarem funcionando.
+    if _table_exists(conn, "economy"):
+        conn.execute("ALTER TABLE economy RENAME TO economy_legacy")
+    from economy_db import ensure_economy_view
+
+    ensure_economy_view(conn)
+
+
+@migration(7, "users.version (checagem otimista do PlayerSession)")
+def _users_version(conn):
+    _add_column_safe(conn, "users", "version INTEGER DEFAULT 0")
+
+
+@migration(8, "party_members: índice de membros de grupo (antes varredura de parties.members_json)")
+def _party_members(conn):
+    from economy_db import ensure_party_members
+
+    ensure_party_members(conn)
+
+
+@migration(9, "índices dos rankings (/eco rank)")
+def _leaderboard_indexes(conn):
+    from leaderboard import LEADERBOARD_INDEXES_SQL
+
+    conn.executescript(LEADERBOARD_INDEXES_SQL)
+
+
+@migration(10, "agregados horários de fish_sales_history (mercado)")
+def _fish_sales_rollups(conn):
+    from economy_db import ensure_fish_sales_rollups
+
+    ensure_fish_sales_rollups(conn)
+
+
+@migration(11, "índice FTS5 trigram do acervo de música (antes LIKE '%termo%' em music_cache)")
+def _music_search(conn):
+    from music_search import ensure_music_search
+
+    ensure_music_search(conn)
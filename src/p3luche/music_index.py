@@ -0,0 +1,246 @@
+"""
+Índice do acervo de música em memória, para o autocomplete do `/tocar`.
+
+O autocomplete dispara a cada tecla. Antes, cada uma custava um salto de
+thread (`asyncio.to_thread`), um `PRAGMA table_info` e uma busca no banco.
+`CATALOG` responde direto no event loop, sem SQLite:
+
+- `_keys`: lista ordenada de (chave do título, id). Prefixo do título inteiro
+  é um intervalo achado por `bisect`;
+- `_postings`: palavra -> ids dos títulos que a contêm, e `_words`, o
+  vocabulário ordenado. Cada palavra digitada casa por prefixo (bisect no
+  vocabulário) e os conjuntos são intersectados — a ordem das palavras não
+  importa ("queen bohemian" acha "Bohemian Rhapsody - Queen");
+- substring no meio de palavra (o `LIKE '%termo%'` de antes) sai da mesma
+  interseção e é confirmada no título inteiro. As palavras que contêm um
+  termo vêm de `_grams` (bigramas e trigramas -> palavras do vocabulário):
+  termo de 2-3 letras é uma consulta direta; maior, a interseção dos seus
+  trigramas, conferida com `in`. Termo de uma letra não restringe nada — a
+  conferência no título inteiro cuida dele.
+
+A chave é `search_key` (sem acento, minúscula, só letras/dígitos), aplicada
+igual no título e na consulta. Carregado no `cog_load` da jukebox e mantido
+em dia por quem escreve em `music_cache` (`add`, `refresh`, `clear`).
+Faixas ocultas (`is_active = 0`) não entram.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+CatalogEntry = namedtuple("CatalogEntry", "id title key duration")
+
+# Substring no meio da palavra só a partir daqui; abaixo, só prefixo.
+MIN_SUBSTRING = 3
+# Tamanhos de n-grama indexados por palavra do vocabulário.
+_GRAM_SIZES = (2, 3)
+
+
+def search_key(text: str) -> str:
+    """Remove acentos, baixa caixa e caracteres especiais para busca."""
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKD", text)
+    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    normalized = normalized.lower()
+    normalized = re.sub(r"[^a-z0-9\s]", " ", normalized)
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return normalized
+
+
+# Maior que qualquer caractere de uma chave: `prefixo + _END` limita o fim do
+# intervalo de quem começa com `prefixo`.
+_END = "\uffff"
+
+
+def _prefix_range(items: list, prefix: str) -> tuple:
+    """Intervalo [i, j) da lista ordenada de palavras que começam com `prefix`."""
+    return bisect_left(items, prefix), bisect_left(items, prefix + _END)
+
+
+def _word_grams(word: str) -> set:
+    return {word[i:i + n] for n in _GRAM_SIZES for i in range(len(word) - n + 1)}
+
+
+class CatalogIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._keys = []
+        self._postings = {}
+        self._words = []
+        self._grams = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── escrita ───────────────────────────────────────────────────────────
+
+    def load(self, conn) -> int:
+        """(Re)constrói a partir de `music_cache`. Devolve quantas faixas."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(music_cache)").fetchall()}
+        active = " WHERE is_active = 1" if "is_active" in columns else ""
+        rows = conn.execute(f"SELECT id, title, duration FROM music_cache{active}").fetchall()
+        with self._lock:
+            self._reset()
+            for song_id, title, duration in rows:
+                self._insert(song_id, title, duration, keep_sorted=False)
+            self._keys.sort()
+            self._words = sorted(self._postings)
+            self.ready = True
+            return len(self._entries)
+
+    def add(self, song_id: int, title: str, duration=0) -> None:
+        with self._lock:
+            self._discard(song_id)
+            self._insert(song_id, title, duration)
+
+    def discard(self, song_id: int) -> None:
+        with self._lock:
+            self._discard(song_id)
+
+    def refresh(self, conn, song_id: int) -> None:
+        """Relê uma faixa do banco (inserida, renomeada, oculta ou reativada)."""
+        row = conn.execute(
+            "SELECT title, duration, is_active FROM music_cache WHERE id = ?", (song_id,)
+        ).fetchone()
+        if row is None or not row[2]:
+            self.discard(song_id)
+        else:
+            self.add(song_id, row[0], row[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._entries, self._keys, self._postings, self._words, self._grams = {}, [], {}, [], {}
+
+    def _insert(self, song_id, title, duration, keep_sorted=True) -> None:
+        entry = CatalogEntry(song_id, title or "", search_key(title), int(duration or 0))
+        self._entries[song_id] = entry
+        if keep_sorted:
+            insort(self._keys, (entry.key, song_id))
+        else:
+            self._keys.append((entry.key, song_id))
+        for word in set(entry.key.split()):
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                if keep_sorted:
+                    insort(self._words, word)
+                for gram in _word_grams(word):
+                    self._grams.setdefault(gram, set()).add(word)
+            ids.add(song_id)
+
+    def _discard(self, song_id) -> None:
+        entry = self._entries.pop(song_id, None)
+        if entry is None:
+            return
+        i = bisect_left(self._keys, (entry.key, song_id))
+        if i < len(self._keys) and self._keys[i] == (entry.key, song_id):
+            del self._keys[i]
+        for word in set(entry.key.split()):
+            ids = self._postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(song_id)
+            if not ids:
+                del self._postings[word]
+                j = bisect_left(self._words, word)
+                if j < len(self._words) and self._words[j] == word:
+                    del self._words[j]
+                for gram in _word_grams(word):
+                    words = self._grams.get(gram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self._grams[gram]
+
+    # ── leitura ───────────────────────────────────────────────────────────
+
+    def _words_containing(self, fragment: str):
+        """Palavras do vocabulário que contêm `fragment`; None se não dá para restringir."""
+        if len(fragment) < _GRAM_SIZES[0]:
+            return None
+        if len(fragment) <= _GRAM_SIZES[-1]:
+            return self._grams.get(fragment, ())
+        size = _GRAM_SIZES[-1]
+        postings = [self._grams.get(fragment[i:i + size]) for i in range(len(fragment) - size + 1)]
+        if not all(postings):
+            return ()
+        postings.sort(key=len)
+        words = set(postings[0]).intersection(*postings[1:])
+        return [word for word in words if fragment in word]
+
+    def _ids_for(self, fragment: str, substring: bool):
+        """Ids com palavra que casa com `fragment`; None = qualquer um (termo curto demais)."""
+        if substring:
+            words = self._words_containing(fragment)
+            if words is None:
+                return None
+        else:
+            start, end = _prefix_range(self._words, fragment)
+            words = self._words[start:end]
+        ids = set()
+        for word in words:
+            ids |= self._postings[word]
+        return ids
+
+    def search(self, query: str, limit: int = 25) -> list:
+        """Sugestões para o que foi digitado, em ordem de relevância:
+
+        1. títulos que começam com a consulta;
+        2. títulos com palavras que começam com cada termo;
+        3. títulos que contêm a consulta em qualquer ponto.
+
+        Dentro de cada grupo, ordem alfabética.
+        """
+        key = search_key(query)
+        with self._lock:
+            if not key:
+                return [self._entries[song_id] for _, song_id in self._keys[:limit]]
+
+            found = []
+            seen = set()
+
+            def take(song_ids):
+                for song_id in song_ids:
+                    if len(found) >= limit:
+                        return
+                    if song_id not in seen:
+                        seen.add(song_id)
+                        found.append(self._entries[song_id])
+
+            start, end = bisect_left(self._keys, (key,)), bisect_left(self._keys, (key + _END,))
+            take(song_id for _, song_id in self._keys[start:min(end, start + limit)])
+
+            terms = key.split()
+            for substring in (False, True):
+                if len(found) >= limit or (substring and len(key) < MIN_SUBSTRING):
+                    break
+                ids = None
+                for term in terms:
+                    matches = self._ids_for(term, substring)
+                    if matches is None:
+                        continue
+                    ids = matches if ids is None else ids & matches
+                    if not ids:
+                        break
+                if ids is None:
+                    # Só termos de uma letra: nenhum restringe, confere todos.
+                    ids = set(self._entries)
+                if ids:
+                    candidates = ids - seen
+                    if substring:
+                        candidates = [song_id for song_id in candidates if key in self._entries[song_id].key]
+                    take(sorted(candidates, key=lambda song_id: self._entries[song_id].key))
+            return found
+
+
+CATALOG = CatalogIndex()
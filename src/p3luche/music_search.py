@@ -0,0 +1,127 @@
+"""
+Busca no acervo de música por índice FTS5 trigram (sem dependência do discord.py).
+
+`/musica buscar` e o autocomplete do `/tocar` filtravam com
+`normalized_title LIKE '%termo%'` — curinga no começo, nenhum índice serve, e
+cada busca (ou tecla no autocomplete) varria `music_cache` inteira.
+
+`music_search` é uma tabela FTS5 de conteúdo externo sobre
+`music_cache(title, normalized_title)`, com o tokenizador `trigram`: qualquer
+trecho de 3+ caracteres vira consulta no índice, com a mesma semântica de
+substring do LIKE (sem diferenciar maiúsculas). Triggers mantêm o índice em
+dia com INSERT/UPDATE/DELETE em `music_cache`; o passo 11 de `migrations.py`
+cria tudo e indexa o que já existe. O resultado sai ordenado por `bm25`.
+
+Trigram não casa termos com menos de 3 caracteres. Para esses (e para bancos
+cujo SQLite não tem FTS5), `search_music` cai no LIKE de antes.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+MIN_FTS_TERM = 3
+
+MUSIC_SEARCH_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS music_search USING fts5(
+    title, normalized_title,
+    content='music_cache', content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS music_search_ai AFTER INSERT ON music_cache BEGIN
+    INSERT INTO music_search(rowid, title, normalized_title)
+    VALUES (new.id, new.title, new.normalized_title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS music_search_ad AFTER DELETE ON music_cache BEGIN
+    INSERT INTO music_search(music_search, rowid, title, normalized_title)
+    VALUES ('delete', old.id, old.title, old.normalized_title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS music_search_au AFTER UPDATE OF title, normalized_title ON music_cache BEGIN
+    INSERT INTO music_search(music_search, rowid, title, normalized_title)
+    VALUES ('delete', old.id, old.title, old.normalized_title);
+    INSERT INTO music_search(rowid, title, normalized_title)
+    VALUES (new.id, new.title, new.normalized_title);
+END;
+"""
+
+
+def ensure_music_search(conn: sqlite3.Connection) -> bool:
+    """Cria índice + triggers e indexa o acervo atual. False se não há FTS5."""
+    try:
+        conn.executescript(MUSIC_SEARCH_SQL)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return False
+    conn.execute("INSERT INTO music_search(music_search) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def match_expression(normalized: str, raw: str | None = None) -> str | None:
+    """Expressão MATCH para o termo normalizado (e o original, no título).
+
+    None quando nenhum dos dois tem tamanho para o trigram.
+    """
+    parts = []
+    if len(normalized or "") >= MIN_FTS_TERM:
+        parts.append(f"normalized_title : {_phrase(normalized)}")
+    if raw and raw != normalized and len(raw) >= MIN_FTS_TERM:
+        parts.append(f"title : {_phrase(raw)}")
+    return " OR ".join(parts) or None
+
+
+def search_music(
+    conn: sqlite3.Connection,
+    select: str,
+    normalized: str,
+    raw: str | None = None,
+    limit: int = 10,
+    active_only: bool = True,
+) -> list:
+    """Busca faixas cujo título contém o termo.
+
+    `select` é a lista de colunas de `music_cache` (vem do código, nunca do
+    usuário). `raw`, se dado, também é procurado em `title` — para quem
+    digita pontuação que a normalização remove.
+    """
+    active = " AND music_cache.is_active = 1" if active_only else ""
+    expression = match_expression(normalized, raw)
+    if expression is not None:
+        try:
+            return conn.execute(
+                f"""
+                SELECT {select}
+                FROM music_search JOIN music_cache ON music_cache.id = music_search.rowid
+                WHERE music_search MATCH ?{active}
+                ORDER BY bm25(music_search), music_cache.title COLLATE NOCASE
+                LIMIT ?
+                """,
+                (expression, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            if "music_search" not in str(e) and "fts5" not in str(e):
+                raise
+
+    where = "music_cache.normalized_title LIKE ?"
+    params = [f"%{normalized}%"]
+    if raw is not None:
+        where = f"({where} OR music_cache.title LIKE ?)"
+        params.append(f"%{raw}%")
+    return conn.execute(
+        f"""
+        SELECT {select}
+        FROM music_cache
+        WHERE {where}{active}
+        ORDER BY music_cache.title COLLATE NOCASE
+        LIMIT ?
+        """,
+        (*params, limit),
+    ).fetchall()
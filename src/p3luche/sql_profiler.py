@@ -0,0 +1,292 @@
+"""
+Profiler de statements SQL (sem dependência do discord.py).
+
+Não havia como saber quais queries dominam o tempo de banco. As conexões do
+bot (`DatabaseManager.connect()` e as do `DatabaseGateway`) agora são abertas
+com `factory=ProfiledConnection`: todo `execute`/`executemany`/`executescript`
+passa por um cursor que cronometra a chamada e registra em `PROFILER`,
+agregado de duas formas:
+
+- **por statement normalizado** — literais viram `?`, espaços colapsam e
+  listas `IN (?, ?, ...)` viram `IN (?...)`, então `WHERE user_id = 42` e
+  `WHERE user_id = 43` somam no mesmo balde;
+- **por função chamadora** — o primeiro frame fora deste módulo, como
+  `economy_db.modify_wallet` ou `cogs.economia.Economia.pescar`.
+
+Cada balde guarda contagem, tempo total e pior tempo. `explain(conn)` roda
+`EXPLAIN QUERY PLAN` nos statements que mais custaram e marca varredura
+completa de tabela (`SCAN` sem índice) e ordenação em B-tree temporária
+(`ORDER BY` sem índice) — é o relatório do `/admin debug perf`.
+
+O tempo medido é o do `execute`: para SELECT, o sqlite já avança até a
+primeira linha ali dentro, mas o resto do `fetchall()` fica de fora.
+`set_trace_callback` não serve aqui porque só avisa o início do statement,
+sem duração.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from collections.abc import Mapping
+import sys
+import threading
+import time
+
+# Limites de memória: o bot roda por dias e SQL montado dinamicamente (nome de
+# tabela no inspecionar, IN com N itens) não pode criar baldes sem fim.
+MAX_STATEMENTS = 500
+MAX_CALLERS = 300
+MAX_NORMALIZE_CACHE = 2048
+OVERFLOW_KEY = "(outros)"
+# A amostra de parâmetros do pior caso de cada balde fica viva até o próximo
+# reset: nada de segurar referência a um BLOB de backup ou a um JSON enorme.
+MAX_SAMPLE_PARAMS = 32
+MAX_SAMPLE_VALUE_LEN = 64
+
+# Só estes tipos de statement têm plano de execução que vale olhar.
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# "SCAN parties" / "SCAN TABLE parties AS p" (sqlite antigo); com "USING ...
+# INDEX" no fim é varredura de índice, não de tabela.
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: \(~\d+ rows\))?$")
+
+_THIS_FILE = __file__
+
+
+def normalize_sql(sql: str) -> str:
+    """Forma canônica de um statement para agregação."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip().rstrip(";").strip()
+    return _IN_LIST.sub("IN (?...)", text)
+
+
+def _caller() -> str:
+    """`modulo.funcao` do primeiro frame fora deste arquivo."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == _THIS_FILE:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _sample_value(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, (str, bytes)) and len(value) <= MAX_SAMPLE_VALUE_LEN:
+        return value
+    # O plano não depende do valor em si: NULL ocupa o mesmo placeholder.
+    return None
+
+
+def sample_params(params):
+    """Cópia pequena e ainda reexecutável dos parâmetros de um statement.
+
+    Valores grandes (ou de tipos adaptados) viram `None` e listas acima de
+    `MAX_SAMPLE_PARAMS` viram só NULLs — o EXPLAIN continua recebendo o
+    número certo de bindings, sem o profiler reter o objeto original.
+    """
+    if isinstance(params, Mapping):
+        if len(params) > MAX_SAMPLE_PARAMS:
+            return dict.fromkeys(params)
+        return {key: _sample_value(value) for key, value in params.items()}
+    try:
+        params = tuple(params)
+    except TypeError:
+        return ()
+    if len(params) > MAX_SAMPLE_PARAMS:
+        return (None,) * len(params)
+    return tuple(_sample_value(value) for value in params)
+
+
+def plan_warnings(plan_rows) -> list:
+    """Alertas de um `EXPLAIN QUERY PLAN` (linhas com a coluna `detail`)."""
+    warnings = []
+    for row in plan_rows:
+        detail = row[3]
+        match = _FULL_SCAN.match(detail)
+        if match:
+            warnings.append(f"varredura completa de `{match.group(1)}`")
+        elif detail.startswith("USE TEMP B-TREE"):
+            warnings.append(detail.replace("USE TEMP B-TREE FOR", "ordenação temporária para").lower())
+    return warnings
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max", "sample_sql", "sample_params")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sample_sql = None
+        self.sample_params = ()
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self, key: str) -> dict:
+        return {
+            "key": key,
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "avg_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+
+
+class SqlProfiler:
+    """Agregador thread-safe: registra das threads do gateway e do loop."""
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._normalized = {}
+        self._statements = {}
+        self._callers = {}
+        self.since = time.time()
+
+    def _normalize(self, sql: str) -> str:
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._normalized) >= MAX_NORMALIZE_CACHE:
+                self._normalized.clear()
+            self._normalized[sql] = key
+        return key
+
+    @staticmethod
+    def _bucket(table: dict, key: str, limit: int) -> _Stat:
+        stat = table.get(key)
+        if stat is None:
+            if len(table) >= limit:
+                key = OVERFLOW_KEY
+                stat = table.get(key)
+            if stat is None:
+                stat = table[key] = _Stat()
+        return stat
+
+    def record(self, sql: str, params, elapsed: float, caller: str) -> None:
+        with self._lock:
+            statement = self._bucket(self._statements, self._normalize(sql), MAX_STATEMENTS)
+            statement.add(elapsed)
+            if statement.sample_sql is None or elapsed >= statement.max:
+                statement.sample_sql = sql
+                statement.sample_params = sample_params(params)
+            self._bucket(self._callers, caller, MAX_CALLERS).add(elapsed)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._callers.clear()
+            self.since = time.time()
+
+    def _ranked(self, table: dict, limit: int, key: str) -> list:
+        with self._lock:
+            rows = [stat.as_dict(name) for name, stat in table.items()]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def top_statements(self, limit: int = 5, key: str = "total_ms") -> list:
+        """Statements ordenados por `key` (total_ms, max_ms, avg_ms ou count)."""
+        return self._ranked(self._statements, limit, key)
+
+    def top_callers(self, limit: int = 5, key: str = "total_ms") -> list:
+        return self._ranked(self._callers, limit, key)
+
+    def totals(self) -> dict:
+        with self._lock:
+            return {
+                "count": sum(stat.count for stat in self._statements.values()),
+                "total_ms": sum(stat.total for stat in self._statements.values()) * 1000,
+                "since": self.since,
+            }
+
+    def explain(self, conn, limit: int = 3) -> list:
+        """`EXPLAIN QUERY PLAN` dos `limit` statements de maior tempo total.
+
+        Usa a amostra mais lenta de cada balde (SQL e parâmetros reais) e um
+        `sqlite3.Cursor` cru, para o próprio EXPLAIN não entrar nas contas.
+        Devolve dicts com `key`, `plan` (linhas de detalhe) e `warnings`.
+        """
+        with self._lock:
+            ranked = sorted(self._statements.items(), key=lambda item: item[1].total, reverse=True)
+            samples = [
+                (name, stat.sample_sql, stat.sample_params)
+                for name, stat in ranked
+                if stat.sample_sql and name.split(" ", 1)[0].upper() in _EXPLAINABLE
+            ][:limit]
+
+        report = []
+        for name, sql, params in samples:
+            try:
+                rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            except sqlite3.Error as e:
+                report.append({"key": name, "plan": [f"erro: {e}"], "warnings": []})
+                continue
+            report.append({"key": name, "plan": [row[3] for row in rows], "warnings": plan_warnings(rows)})
+        return report
+
+
+PROFILER = SqlProfiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=(), /):
+        if not PROFILER.enabled:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            PROFILER.record(sql, parameters, time.perf_counter() - started, _caller())
+
+    def executemany(self, sql, seq_of_parameters, /):
+        if not PROFILER.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Sem amostra de parâmetros: o iterável já foi consumido.
+            PROFILER.record(sql, (), time.perf_counter() - started, _caller())
+
+    def executescript(self, sql_script, /):
+        if not PROFILER.enabled:
+            return super().executescript(sql_script)
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            PROFILER.record(sql_script, (), time.perf_counter() - started, _caller())
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Conexão cujo cursor padrão é o `ProfiledCursor`.
+
+    `Connection.execute` (em C) chama o execute do cursor em C, passando por
+    cima de um override em Python — por isso os atalhos são redefinidos aqui.
+    """
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self.cursor().executescript(sql_script)
@@ -0,0 +1,125 @@
+"""
+Perfil do startup do bot (sem dependência do discord.py).
+
+Ligado com `P3LUCHE_PROFILE_STARTUP=1` no ambiente. Mede, até o `on_ready`:
+
+- **import por módulo** — `builtins.__import__` é trocado por uma versão que
+  cronometra cada módulo na primeira carga, com tempo total (inclui o que ele
+  importou) e próprio (só o corpo dele), como o `python -X importtime`, mas
+  agregado e sem precisar relançar o processo;
+- **load_extension por cog** — registrado pelo `setup_hook` de main.py;
+- **marcos** — tempo desde o início do perfil até cada etapa (setup_hook,
+  extensões, on_ready).
+
+`report()` monta o relatório em texto; main.py o imprime no `on_ready` e
+desliga o gancho de import, que não deve ficar ativo com o bot rodando.
+Desligado, nada disso é instalado.
+"""
+
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+PROFILE_ENV = "P3LUCHE_PROFILE_STARTUP"
+REPORT_LIMIT = 15
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started = None
+        self._original_import = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._imports = {}
+        self._extensions = {}
+        self._marks = []
+
+    def enable_from_env(self) -> bool:
+        if os.getenv(PROFILE_ENV):
+            self.enable()
+        return self.enabled
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop_imports(self) -> None:
+        """Devolve o `__import__` original; o que já foi medido fica."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _resolve(self, name, globals, level) -> str:
+        if not level:
+            return name
+        package = (globals or {}).get("__package__") or (globals or {}).get("__name__", "")
+        return importlib.util.resolve_name("." * level + name, package)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or builtins.__import__
+        try:
+            fullname = self._resolve(name, globals, level)
+        except (ImportError, ValueError):
+            fullname = None
+        if fullname is None or fullname in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        # Pilha por thread: o tempo de cada filho é descontado do próprio do pai.
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self._imports.setdefault(fullname, (elapsed, elapsed - children))
+
+    def mark(self, label: str) -> None:
+        if self.enabled:
+            self._marks.append((label, time.perf_counter() - self.started))
+
+    def record_extension(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            with self._lock:
+                self._extensions[name] = seconds
+
+    def slowest_imports(self, limit: int = REPORT_LIMIT, key: str = "total") -> list:
+        """[(módulo, total_s, próprio_s)] ordenado por `key` ("total" ou "self")."""
+        index = 1 if key == "total" else 2
+        with self._lock:
+            rows = [(name, total, own) for name, (total, own) in self._imports.items()]
+        rows.sort(key=lambda row: row[index], reverse=True)
+        return rows[:limit]
+
+    def extensions(self) -> list:
+        with self._lock:
+            return sorted(self._extensions.items(), key=lambda item: item[1], reverse=True)
+
+    def report(self, limit: int = REPORT_LIMIT) -> str:
+        lines = ["── Perfil de startup ──"]
+        lines += [f"{label:<28}{seconds * 1000:>9.0f} ms" for label, seconds in self._marks]
+        lines.append("load_extension:")
+        lines += [f"  {name:<26}{seconds * 1000:>9.0f} ms" for name, seconds in self.extensions()]
+        lines.append(f"imports mais caros (total / próprio), top {limit}:")
+        lines += [
+            f"  {name:<40}{total * 1000:>7.0f} / {own * 1000:.0f} ms"
+            for name, total, own in self.slowest_imports(limit)
+        ]
+        return "\n".join(lines)
+
+
+STARTUP = StartupProfiler()
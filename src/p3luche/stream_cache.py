@@ -0,0 +1,171 @@
+"""
+Cache de resolução de URL de stream (yt-dlp) para a jukebox (sem discord.py).
+
+Cada faixa externa pagava uma extração completa do yt-dlp (segundos) ao
+entrar na fila (`/tocar_url`, `/adicionar_url`) e de novo na hora de tocar
+(`_start_next_if_idle` renova a URL). Repetir a mesma faixa na sessão pagava
+tudo outra vez.
+
+`STREAMS.resolve(url, extrair)` devolve o resultado de `extrair(url)` (roda em
+thread) guardado por vídeo:
+
+- **chave canônica**: o id do vídeo do YouTube, qualquer que seja a forma do
+  link (watch, youtu.be, shorts, music, com ou sem `&t=`/`&list=`); outros
+  sites usam a URL sem fragmento;
+- **validade pela própria URL**: a URL assinada do YouTube traz `expire`
+  (epoch). A entrada vale até `expire` menos a duração da faixa e uma folga —
+  quem começar a tocar do cache termina antes de a URL morrer (o FFmpeg
+  reabre a URL quando reconecta). Sem `expire`, vale `DEFAULT_TTL_SECONDS`;
+- **uma extração por vez por chave**: chamadas simultâneas para o mesmo
+  vídeo esperam a mesma extração em voo, que roda numa task própria — quem
+  desiste (comando cancelado) não cancela a espera dos outros, e o resultado
+  ainda entra no cache;
+- **LRU**: no máximo `MAX_ENTRIES` vídeos guardados.
+
+Uma extração pode ficar sob duas chaves (a URL pedida e a `webpage_url` que o
+yt-dlp devolve, para sites fora do YouTube). `forget` derruba todas as chaves
+da mesma entrada: depois de um erro do FFmpeg, nenhum apelido continua
+servindo a URL assinada recusada.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 300
+EXPIRY_MARGIN_SECONDS = 60
+
+_YOUTUBE_ID = re.compile(
+    r"(?:youtu\.be/|youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/))([A-Za-z0-9_-]{11})"
+)
+_PATH_EXPIRE = re.compile(r"/expire/(\d+)")
+
+
+def canonical_key(url: str) -> str:
+    match = _YOUTUBE_ID.search(url or "")
+    if match:
+        return f"youtube:{match.group(1)}"
+    parts = urlsplit((url or "").strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+def url_expiry(stream_url: str) -> float | None:
+    """Epoch do `expire` da URL assinada (query ou caminho), se houver."""
+    if not stream_url:
+        return None
+    parts = urlsplit(stream_url)
+    values = parse_qs(parts.query).get("expire")
+    raw = values[0] if values else None
+    if raw is None:
+        match = _PATH_EXPIRE.search(parts.path)
+        raw = match.group(1) if match else None
+    try:
+        return float(raw) if raw is not None else None
+    except ValueError:
+        return None
+
+
+def _valid_until(info: dict, now: float) -> float:
+    expire = url_expiry(info.get("stream_url"))
+    if expire is None:
+        return now + DEFAULT_TTL_SECONDS
+    return expire - EXPIRY_MARGIN_SECONDS - int(info.get("duration") or 0)
+
+
+def _copy(info: dict) -> dict:
+    # Quem recebe costuma mexer nos headers; o cache não pode ser alterado.
+    result = dict(info)
+    result["http_headers"] = dict(info.get("http_headers") or {})
+    return result
+
+
+class StreamCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # chave -> todas as chaves que guardam a mesma entrada (ela inclusa).
+        self._aliases = {}
+        self._inflight = {}
+        self.counters = {"hits": 0, "misses": 0, "shared": 0}
+
+    def get(self, url: str, now: float | None = None) -> dict | None:
+        key = canonical_key(url)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        valid_until, info = entry
+        if valid_until <= (time.time() if now is None else now):
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return _copy(info)
+
+    def put(self, url: str, info: dict, now: float | None = None) -> None:
+        if not info.get("stream_url"):
+            return
+        now = time.time() if now is None else now
+        valid_until = _valid_until(info, now)
+        if valid_until <= now:
+            return
+        entry = (valid_until, _copy(info))
+        keys = frozenset({canonical_key(url), canonical_key(info.get("webpage_url") or url)})
+        for key in keys:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._aliases[key] = keys
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self._aliases.pop(key, None)
+
+    def forget(self, url: str) -> None:
+        self._drop(canonical_key(url))
+
+    def _drop(self, key: str) -> None:
+        """Remove `key` e os apelidos que apontam para a mesma entrada."""
+        entry = self._entries.get(key)
+        for alias in self._aliases.pop(key, (key,)):
+            if alias == key or self._entries.get(alias) is entry:
+                self._entries.pop(alias, None)
+                self._aliases.pop(alias, None)
+
+    async def resolve(self, url: str, extract) -> dict:
+        cached = self.get(url)
+        if cached is not None:
+            self.counters["hits"] += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        key = canonical_key(url)
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.counters["shared"] += 1
+        else:
+            self.counters["misses"] += 1
+            # A extração é uma task de ninguém: cancelar quem pediu primeiro
+            # não derruba os outros que estão esperando a mesma faixa.
+            task = self._inflight[key] = loop.create_task(self._extract(key, url, extract))
+            task.add_done_callback(_consume_exception)
+        return _copy(await asyncio.shield(task))
+
+    async def _extract(self, key: str, url: str, extract) -> dict:
+        try:
+            info = await asyncio.to_thread(extract, url)
+            self.put(url, info)
+            return info
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+
+def _consume_exception(task) -> None:
+    # Se todos que esperavam foram cancelados, ninguém lê o erro; sem isto o
+    # asyncio avisaria "exception was never retrieved".
+    if not task.cancelled():
+        task.exception()
+
+STREAMS = StreamCache()
@@ -1,8 +1,9 @@
 """Estado de runtime compartilhado (telemetria em memória) do P3LUCHE.
 
-Guarda, em buffers circulares pequenos, dois sinais que o painel de status do
-terminal consome: as interações recentes (quem está usando o bot agora) e os
-erros recentes.
+Guarda, em buffers circulares pequenos, os sinais que o painel de status do
+terminal consome: as interações recentes (quem está usando o bot agora), os
+erros recentes, as paradas do event loop medidas por `loop_watchdog.py` e um
+histograma de latência por comando (alimentado por `command_timing.py`).
 
 Duas decisões importantes:
 
@@ -19,6 +20,7 @@ Duas decisões importantes:
    no `erros.py`.
 """
 import logging
+import math
 import threading
 from collections import deque
 from datetime import datetime, timedelta
@@ -27,6 +29,16 @@ from datetime import datetime, timedelta
 # uma fonte de vazamento de memória num bot que roda por dias.
 MAX_INTERACTIONS = 50
 MAX_ERRORS = 20
+MAX_STALL_SITES = 20
+
+# Histograma de latência: baldes logarítmicos de 1 ms a ~4 min, quatro por
+# dobra (erro relativo de no máximo ~19% no percentil). Memória constante por
+# comando, independente de quantas vezes ele roda.
+LATENCY_BASE_SECONDS = 0.001
+LATENCY_BUCKETS_PER_DOUBLING = 4
+LATENCY_BUCKETS = 72
+MAX_TIMED_COMMANDS = 200
+LATENCY_PHASES = ("first", "done")
 
 # Níveis que fazem a "TV" do painel entrar em estado de erro (vermelho).
 ERROR_LEVELS = ("ERROR", "CRITICAL")
@@ -36,6 +48,9 @@ ERROR_LOGGER_NAME = "P3LUCHE_ERROS"
 _lock = threading.Lock()
 _interactions: deque = deque(maxlen=MAX_INTERACTIONS)
 _errors: deque = deque(maxlen=MAX_ERRORS)
+_loop_lag = {"last": None, "max": 0.0}
+_stalls: dict = {}
+_latencies: dict = {}
 
 
 # ──────────────────────────────────────────────
@@ -144,11 +159,150 @@ def last_error_at(levels: tuple = ERROR_LEVELS) -> datetime:
     return max(candidates) if candidates else None
 
 
+# ──────────────────────────────────────────────
+#  EVENT LOOP (paradas medidas pelo loop_watchdog)
+# ──────────────────────────────────────────────
+
+def record_loop_lag(seconds: float) -> None:
+    """Atraso da última batida do watchdog (quanto o loop demorou a atendê-la)."""
+    try:
+        with _lock:
+            _loop_lag["last"] = float(seconds)
+            _loop_lag["max"] = max(_loop_lag["max"], float(seconds))
+    except Exception:
+        pass
+
+
+def loop_lag() -> dict:
+    """{"last_ms", "max_ms"} — `last_ms` é None antes da primeira batida."""
+    with _lock:
+        last, worst = _loop_lag["last"], _loop_lag["max"]
+    return {"last_ms": None if last is None else last * 1000, "max_ms": worst * 1000}
+
+
+def record_stall(seconds: float, site: str, stack: str = "", when: datetime = None) -> bool:
+    """Agrega uma parada do loop pelo ponto de chamada (`arquivo:linha (função)`).
+
+    Devolve True quando a parada é nova ou a pior já vista naquele ponto — é o
+    sinal para o watchdog logar sem repetir a mesma linha a cada ocorrência.
+    Guarda no máximo MAX_STALL_SITES pontos; o de menor tempo total sai primeiro.
+    """
+    try:
+        when = when or datetime.now()
+        with _lock:
+            entry = _stalls.get(site)
+            if entry is None:
+                if len(_stalls) >= MAX_STALL_SITES:
+                    del _stalls[min(_stalls, key=lambda key: _stalls[key]["total"])]
+                entry = _stalls[site] = {"site": site, "count": 0, "total": 0.0, "max": 0.0}
+            worse = seconds > entry["max"]
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["last_when"] = when
+            if worse:
+                entry["max"] = seconds
+                entry["stack"] = stack
+            return worse
+    except Exception:
+        return False
+
+
+def top_stalls(limit: int = 3) -> list:
+    """Pontos de parada com mais tempo de loop perdido, piores primeiro."""
+    with _lock:
+        snapshot = [dict(entry) for entry in _stalls.values()]
+    snapshot.sort(key=lambda entry: entry["total"], reverse=True)
+    return snapshot[:limit] if limit is not None else snapshot
+
+
+# ──────────────────────────────────────────────
+#  LATÊNCIA POR COMANDO
+# ──────────────────────────────────────────────
+
+def _latency_bucket(seconds: float) -> int:
+    if seconds <= LATENCY_BASE_SECONDS:
+        return 0
+    index = math.ceil(math.log2(seconds / LATENCY_BASE_SECONDS) * LATENCY_BUCKETS_PER_DOUBLING)
+    return min(index, LATENCY_BUCKETS - 1)
+
+
+def _bucket_upper_ms(index: int) -> float:
+    return LATENCY_BASE_SECONDS * 2 ** (index / LATENCY_BUCKETS_PER_DOUBLING) * 1000
+
+
+def record_command_latency(command_name: str, completion: float, first_response: float = None) -> None:
+    """Registra uma execução: segundos do recebimento da interação até a
+    primeira resposta (defer/send_message/modal; None se não respondeu) e até
+    o fim do comando. Nunca levanta exceção."""
+    try:
+        name = str(command_name or "?")
+        with _lock:
+            histogram = _latencies.get(name)
+            if histogram is None:
+                if len(_latencies) >= MAX_TIMED_COMMANDS:
+                    return
+                histogram = _latencies[name] = {phase: [0] * LATENCY_BUCKETS for phase in LATENCY_PHASES}
+            histogram["done"][_latency_bucket(completion)] += 1
+            if first_response is not None:
+                histogram["first"][_latency_bucket(first_response)] += 1
+    except Exception:
+        pass
+
+
+def _percentiles(counts: list) -> dict:
+    total = sum(counts)
+    if not total:
+        return None
+    out = {"count": total}
+    for label, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                out[label] = _bucket_upper_ms(index)
+                break
+    return out
+
+
+def command_latency(command_name: str) -> dict:
+    """{"first": {...}, "done": {...}} com count/p50_ms/p95_ms/p99_ms de cada
+    fase (None numa fase sem amostras), ou None se o comando nunca rodou."""
+    with _lock:
+        histogram = _latencies.get(command_name)
+        snapshot = {phase: list(counts) for phase, counts in histogram.items()} if histogram else None
+    if snapshot is None:
+        return None
+    return {phase: _percentiles(counts) for phase, counts in snapshot.items()}
+
+
+def command_latencies() -> dict:
+    """`command_latency` de todos os comandos medidos."""
+    with _lock:
+        names = list(_latencies)
+    return {name: command_latency(name) for name in names}
+
+
+def slowest_commands(limit: int = 5, phase: str = "done", percentile: str = "p95_ms") -> list:
+    """[(comando, latências)] ordenado pelo `percentile` da `phase`, piores primeiro."""
+    ranked = [
+        (name, latency)
+        for name, latency in command_latencies().items()
+        if latency and latency.get(phase)
+    ]
+    ranked.sort(key=lambda item: item[1][phase][percentile], reverse=True)
+    return ranked[:limit] if limit is not None else ranked
+
+
 def reset() -> None:
     """Zera os buffers (usado pelos testes)."""
     with _lock:
         _interactions.clear()
         _errors.clear()
+        _stalls.clear()
+        _latencies.clear()
+        _loop_lag["last"] = None
+        _loop_lag["max"] = 0.0
 
 
 # ──────────────────────────────────────────────
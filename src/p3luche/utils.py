@@ -4,16 +4,13 @@ Este módulo reúne funções pequenas e transversais, como logging, limpeza de
 texto, extração de conteúdo a partir de anexos, normalização de títulos e
 auxílios para construir elementos visuais nas respostas do bot.
 """
+import asyncio
 import os
 import re
 from datetime import timedelta
 from io import BytesIO
 
 import discord
-import docx
-import pypdf
-import requests
-from PIL import Image
 
 from config import LOG_FOLDER
 
@@ -60,24 +57,33 @@ def log_to_gui(message, level="INFO"):
             pass  # telemetria nunca pode atrapalhar o log em si
 
 
+def _parse_attachment_bytes(filename: str, file_bytes: bytes) -> str:
+    """Texto de um anexo já baixado. SÍNCRONA — roda via asyncio.to_thread."""
+    # Imports locais: `utils` é importado por quase todo módulo, e pypdf +
+    # python-docx (~240ms) entravam no startup do bot mesmo sem nenhum anexo
+    # ser lido. Como esta função roda em thread, nem o primeiro anexo paga o
+    # import (nem o parse do PDF) no event loop.
+    if filename.endswith(".pdf"):
+        import pypdf
+
+        reader = pypdf.PdfReader(BytesIO(file_bytes))
+        return "".join(page.extract_text() + "\n" for page in reader.pages)
+    if filename.endswith(".docx"):
+        import docx
+
+        doc = docx.Document(BytesIO(file_bytes))
+        return "\n".join([para.text for para in doc.paragraphs])
+    if filename.endswith(".txt") or filename.endswith(".md"):
+        return file_bytes.decode("utf-8")
+    return ""
+
+
 async def extract_text_from_attachment(attachment: discord.Attachment) -> str:
     """Extrai texto de PDF, DOCX, TXT ou MD."""
     filename = attachment.filename.lower()
     try:
         file_bytes = await attachment.read()
-        file_stream = BytesIO(file_bytes)
-        extracted_text = ""
-        if filename.endswith(".pdf"):
-            reader = pypdf.PdfReader(file_stream)
-            for page in reader.pages:
-                extracted_text += page.extract_text() + "\n"
-        elif filename.endswith(".docx"):
-            doc = docx.Document(file_stream)
-            extracted_text = "\n".join([para.text for para in doc.paragraphs])
-        elif filename.endswith(".txt") or filename.endswith(".md"):
-            extracted_text = file_bytes.decode("utf-8")
-        else:
-            return ""
+        extracted_text = await asyncio.to_thread(_parse_attachment_bytes, filename, file_bytes)
         return extracted_text.strip()
     except Exception as e:
         log_to_gui(f"Erro ao ler arquivo {filename}: {e}", "ERROR")
@@ -186,6 +192,11 @@ def get_thumbnail_dominant_color(url):
     Faz I/O de rede (requests, até 5s) e decodifica imagem; chamar direto de
     uma coroutine trava o event loop inteiro do bot por todo esse tempo.
     """
+    # Locais pelo mesmo motivo de extract_text_from_attachment; aqui a função
+    # já roda em thread, então nem a primeira chamada paga o import no loop.
+    import requests
+    from PIL import Image
+
     try:
         response = requests.get(url, timeout=5)
         img = (
@@ -0,0 +1,80 @@
+"""
+Estado de mundo (singleton) servido da memória (sem dependência do discord.py).
+
+Clima, preços do mercado e a loja do dia mudam no máximo de hora em hora, mas
+eram lidos do SQLite em toda interação (`get_current_weather()` fazia um
+SELECT em `world_state` a cada pesca). Agora ficam em `WORLD`:
+
+- `load(conn)` carrega clima e preços no startup (cog_load da economia);
+- `set_weather(conn, key)` grava no banco e na memória juntos (write-through)
+  — o `weather_cycle` é o único escritor do clima;
+- `refresh_prices(conn)` relê o snapshot do mercado depois do reajuste do
+  `market_cycle`;
+- `daily_shop(day, build)` monta a loja uma vez por dia e reaproveita.
+
+Quem lê (pescar, loja, comprar) nunca toca no banco.
+"""
+
+from __future__ import annotations
+
+import threading
+
+DEFAULT_WEATHER = "normal"
+
+
+class WorldState:
+    """Cópia em memória do estado de mundo. Thread-safe: `load`/`refresh_prices`
+    rodam nas threads do gateway, os leitores no event loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._weather = DEFAULT_WEATHER
+        self._prices = {}
+        self._shop_day = None
+        self._shop = []
+
+    @property
+    def weather(self) -> str:
+        return self._weather
+
+    def load(self, conn) -> None:
+        """Carrega clima e preços do banco (startup)."""
+        row = conn.execute("SELECT current_weather FROM world_state WHERE id = 1").fetchone()
+        with self._lock:
+            self._weather = (row["current_weather"] if row else None) or DEFAULT_WEATHER
+        self.refresh_prices(conn)
+
+    def set_weather(self, conn, weather: str) -> str:
+        """Grava o novo clima no banco e na memória. Devolve o clima anterior."""
+        conn.execute("UPDATE world_state SET current_weather = ? WHERE id = 1", (weather,))
+        conn.commit()
+        with self._lock:
+            previous, self._weather = self._weather, weather
+        return previous
+
+    def refresh_prices(self, conn) -> None:
+        prices = {
+            row["fish_name"]: row["current_price"]
+            for row in conn.execute("SELECT fish_name, current_price FROM market_prices").fetchall()
+        }
+        with self._lock:
+            self._prices = prices
+
+    def market_price(self, fish_name: str, fallback: int) -> int:
+        return self._prices.get(fish_name, fallback)
+
+    def market_snapshot(self) -> dict:
+        return dict(self._prices)
+
+    def daily_shop(self, day: str, build) -> list:
+        """Loja de `day` (lista de dicts de item). `build()` só roda na virada
+        do dia; cada chamada recebe cópias, então quem ordena/edita não
+        estraga o cache."""
+        with self._lock:
+            if self._shop_day != day:
+                self._shop = build()
+                self._shop_day = day
+            return [dict(item) for item in self._shop]
+
+
+WORLD = WorldState()
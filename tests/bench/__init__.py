@@ -0,0 +1,5 @@
+"""Benchmarks manuais (não são coletados pelo unittest/pytest: sem prefixo test_).
+
+Rode da raiz do repositório, por exemplo:
+    python -m tests.bench.bench_catch_tables
+"""
@@ -0,0 +1,70 @@
+"""Micro-benchmark do sorteio de captura: list comprehensions vs. catch_tables.
+
+    python -m tests.bench.bench_catch_tables [--n 200000]
+
+Compara, por pesca, o sorteio antigo (filtrar FISH_DB + random.choice) com o
+pool pré-compilado (random + bisect), nos três ramos do /eco pescar e no loot
+da armadilha AFK. Só usa economy_constants/catch_tables — não sobe o bot.
+"""
+
+import argparse
+import random
+import timeit
+
+from catch_tables import MAX_TIER, pool_for
+from economy_constants import FISH_DB, TRASH_ITEMS, TRASH_ROLL_RATIO
+
+
+def _legacy_normal(max_tier):
+    pool = [p for p in FISH_DB if p[4] <= max_tier and p[4] > 0]
+    if not pool:
+        pool = [p for p in FISH_DB if p[4] == 0]
+    return random.choice(pool)
+
+
+def _legacy_trash():
+    lixo = [p for p in FISH_DB if p[4] == 0 and p[0] in TRASH_ITEMS]
+    iniciais = [p for p in FISH_DB if p[4] == 0 and p[0] not in TRASH_ITEMS]
+    return random.choice(lixo if random.random() < TRASH_ROLL_RATIO else iniciais)
+
+
+def _legacy_chip():
+    return random.choice([p for p in FISH_DB if p[4] >= 2])
+
+
+def _legacy_afk_item():
+    return random.choice([p[0] for p in FISH_DB if p[4] <= 1])
+
+
+def _new_trash():
+    return (pool_for(0, "lixo") if random.random() < TRASH_ROLL_RATIO else pool_for(0, "iniciais")).sample()
+
+
+CASES = [
+    ("normal (tier 2)", lambda: _legacy_normal(2), lambda: pool_for(2).sample()),
+    (f"normal (tier {MAX_TIER})", lambda: _legacy_normal(MAX_TIER), lambda: pool_for(MAX_TIER).sample()),
+    ("lixo", _legacy_trash, _new_trash),
+    ("chip", _legacy_chip, lambda: pool_for(MAX_TIER, "chip").sample()),
+    ("item AFK", _legacy_afk_item, lambda: pool_for(1, "ate").sample_name()),
+]
+
+
+def _per_call_ns(fn, n):
+    return min(timeit.repeat(fn, number=n, repeat=5)) / n * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=200_000, help="sorteios por rodada")
+    args = parser.parse_args(argv)
+
+    print(f"FISH_DB: {len(FISH_DB)} entradas | {args.n} sorteios x 5 rodadas (melhor rodada)")
+    print(f"{'ramo':<18}{'antes (ns)':>12}{'depois (ns)':>13}{'ganho':>8}")
+    for name, legacy, new in CASES:
+        before = _per_call_ns(legacy, args.n)
+        after = _per_call_ns(new, args.n)
+        print(f"{name:<18}{before:>12.0f}{after:>13.0f}{before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Simulação de carga dos comandos quentes da economia.
+
+    DISCORD_TOKEN=x python -m tests.bench.bench_economy_load [--users 50] [--rounds 5]
+        [--only pescar,slots] [--baseline tests/bench/economy_load_baseline.json] [--save]
+
+Roda as corrotinas de verdade de `/eco pescar`, `/eco comprar`, `/eco explorar`
+(cogs/economia.py) e `/casino slots` (cogs/casino.py) com Interactions falsas,
+contra um banco temporário em arquivo montado pelas migrações e servido por um
+`DatabaseGateway` real (escritor em thread + leitores), como no bot.
+
+Em cada rodada, N jogadores disparam o comando ao mesmo tempo. Por comando,
+relata vazão, latência p50/p99, statements SQL por comando (todas as conexões:
+`bot.db_conn`, escritor e leitores) e a pior parada do event loop medida por
+um sentinela que acorda a cada 5ms.
+
+Os `asyncio.sleep` da animação do slots viram `sleep(0)` (use --real-sleeps
+para manter): sem isso a latência mede o sleep, não o código.
+
+Com --save o resultado vira o novo baseline; sem ele, se o baseline existir,
+imprime a variação de cada métrica contra ele.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from config import set_bot_instance
+from cooldowns import COOLDOWNS
+from db_gateway import DatabaseGateway
+from economy_constants import FISH_DB
+from economy_db import ensure_user, modify_wallet, seed_market_prices
+from migrations import apply_migrations
+from world_state import WORLD
+
+from cogs import casino, economia
+
+DEFAULT_BASELINE = Path(__file__).with_name("economy_load_baseline.json")
+STALL_PROBE_SECONDS = 0.005
+
+# Referência guardada antes de qualquer patch: o sentinela precisa do sleep real.
+_sleep = asyncio.sleep
+
+
+class _StatementCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, _statement):
+        with self._lock:
+            self.count += 1
+
+
+def _traced_connect(counter, connect=sqlite3.connect):
+    def traced(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(counter)
+        return conn
+
+    return traced
+
+
+class _FakeResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+
+    async def edit_message(self, *args, **kwargs):
+        self._done = True
+
+    async def send_modal(self, *args, **kwargs):
+        self._done = True
+
+
+class _FakeFollowup:
+    async def send(self, *args, **kwargs):
+        return None
+
+
+class FakeInteraction:
+    """O mínimo de `discord.Interaction` que os comandos medidos usam."""
+
+    def __init__(self, user_id: int):
+        name = f"bench{user_id}"
+        self.user = SimpleNamespace(id=user_id, name=name, display_name=name, mention=f"<@{user_id}>")
+        self.response = _FakeResponse()
+        self.followup = _FakeFollowup()
+
+    async def edit_original_response(self, *args, **kwargs):
+        return None
+
+    async def original_response(self):
+        return SimpleNamespace(edit=self.edit_original_response)
+
+
+COMMANDS = {
+    "pescar": lambda it: economia.pescar.callback(it),
+    "comprar": lambda it: economia.comprar.callback(it, "isca"),
+    "explorar": lambda it: economia.explorar.callback(it),
+    "slots": lambda it: casino.slots.callback(it, 10),
+}
+
+
+def _setup_db(path: str, users: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    seed_market_prices(conn, FISH_DB)
+    for uid in range(1, users + 1):
+        ensure_user(conn, uid, f"bench{uid}")
+        modify_wallet(conn, uid, 10**9, f"bench{uid}")
+    conn.commit()
+    return conn
+
+
+def _reset_round(conn: sqlite3.Connection) -> None:
+    """Zera cooldowns e quest entre rodadas. Sem zerar a quest, uma garrafa
+    pescada libera a cidade e o /eco explorar passa a abrir a view de destino
+    (que espera um clique por até 60s). Os cooldowns zeram também na memória
+    (cooldowns.py): senão, da 2ª rodada em diante, pescar e explorar só
+    mediriam a recusa."""
+    COOLDOWNS.forget()
+    conn.execute("UPDATE user_cooldowns SET last_fish = NULL, last_explore = NULL")
+    conn.execute("DELETE FROM quest_progress")
+    conn.commit()
+
+
+async def _stall_probe(stop: asyncio.Event, worst: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await _sleep(STALL_PROBE_SECONDS)
+        worst[0] = max(worst[0], time.perf_counter() - start - STALL_PROBE_SECONDS)
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _run_command(name, conn, gateway, counter, users, rounds) -> dict:
+    command = COMMANDS[name]
+    latencies = []
+
+    async def one(uid):
+        start = time.perf_counter()
+        await command(FakeInteraction(uid))
+        latencies.append(time.perf_counter() - start)
+
+    writes_before = gateway.stats()["writes"]
+    statements = 0
+    wall = 0.0
+    stop = asyncio.Event()
+    worst = [0.0]
+    probe = asyncio.create_task(_stall_probe(stop, worst))
+    try:
+        for _ in range(rounds):
+            _reset_round(conn)
+            counter.count = 0
+            start = time.perf_counter()
+            await asyncio.gather(*(one(uid) for uid in range(1, users + 1)))
+            wall += time.perf_counter() - start
+            statements += counter.count
+    finally:
+        stop.set()
+        await probe
+
+    total = users * rounds
+    latencies.sort()
+    return {
+        "commands": total,
+        "throughput_per_s": round(total / wall, 1) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "sql_per_command": round(statements / total, 1),
+        "gateway_writes_per_command": round((gateway.stats()["writes"] - writes_before) / total, 1),
+        "worst_loop_stall_ms": round(worst[0] * 1000, 2),
+    }
+
+
+async def run(users: int, rounds: int, only, real_sleeps: bool) -> dict:
+    counter = _StatementCounter()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(sqlite3, "connect", _traced_connect(counter)):
+        path = os.path.join(tmp, "bench.db")
+        conn = _setup_db(path, users)
+        WORLD.load(conn)
+        gateway = DatabaseGateway(path).start()
+        set_bot_instance(SimpleNamespace(db=gateway, db_conn=conn))
+        try:
+            sleep_patch = (
+                nullcontext() if real_sleeps
+                else patch.object(casino.asyncio, "sleep", lambda *_a, **_k: _sleep(0))
+            )
+            with sleep_patch:
+                for name in only:
+                    results[name] = await _run_command(name, conn, gateway, counter, users, rounds)
+        finally:
+            set_bot_instance(None)
+            gateway.close()
+            conn.close()
+    return results
+
+
+def _compare(current: dict, baseline: dict) -> None:
+    print("\nvariação contra o baseline:")
+    for name, metrics in current.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"  {name}: sem baseline")
+            continue
+        parts = []
+        for key, value in metrics.items():
+            before = old.get(key)
+            if key == "commands" or not before:
+                continue
+            parts.append(f"{key} {(value - before) / before * 100:+.0f}%")
+        print(f"  {name}: " + ", ".join(parts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="jogadores simultâneos por rodada")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--only", default=",".join(COMMANDS), help="comandos separados por vírgula")
+    parser.add_argument("--real-sleeps", action="store_true", help="mantém os sleeps da animação do slots")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="grava o resultado como novo baseline")
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(only) - set(COMMANDS)
+    if unknown:
+        parser.error(f"comandos desconhecidos: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args.users, args.rounds, only, args.real_sleeps))
+
+    print(f"{args.users} jogadores x {args.rounds} rodadas")
+    header = f"{'comando':<10}{'cmd/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'SQL/cmd':>9}{'escr/cmd':>9}{'stall ms':>10}"
+    print(header)
+    for name, m in results.items():
+        print(
+            f"{name:<10}{m['throughput_per_s']:>9}{m['p50_ms']:>9}{m['p99_ms']:>9}"
+            f"{m['sql_per_command']:>9}{m['gateway_writes_per_command']:>9}{m['worst_loop_stall_ms']:>10}"
+        )
+
+    report = {"users": args.users, "rounds": args.rounds, "results": results}
+    if args.save:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\nbaseline gravado em {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if (baseline.get("users"), baseline.get("rounds")) != (args.users, args.rounds):
+            print(
+                f"\naviso: baseline medido com {baseline.get('users')} jogadores x "
+                f"{baseline.get('rounds')} rodadas — latência e vazão não são comparáveis"
+            )
+        _compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
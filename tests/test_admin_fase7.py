@@ -8,6 +8,9 @@ import discord
 from config import CREATOR_ID
 from economy_db import (
     add_inventory_item,
+    create_party,
+    ensure_economy_view,
+    ensure_party_members,
     ensure_user,
     ensure_v4_tables,
     get_cooldowns,
@@ -29,30 +32,13 @@ from economy_db import (
 
 
 def _make_full_conn():
-    """Schema completo (legado `economy` + auxiliares + tabelas v4) — os
-    resets tocam tanto a legada quanto a v4, então o teste precisa de ambas,
-    igual ao fixture já usado em tests/test_economia.py."""
+    """Schema completo (auxiliares + tabelas v4 + view `economy`) — os
+    resets tocam tabelas fora da v4 (quest, parties...), então o teste
+    precisa delas, igual ao fixture já usado em tests/test_economia.py."""
     conn = sqlite3.connect(":memory:")
     conn.row_factory = sqlite3.Row
     conn.executescript(
         """
-        CREATE TABLE economy (
-            user_id INTEGER PRIMARY KEY,
-            user_name TEXT,
-            wallet INTEGER DEFAULT 0,
-            fish_count INTEGER DEFAULT 0,
-            guild_rank TEXT DEFAULT 'F',
-            guild_xp INTEGER DEFAULT 0,
-            scrap INTEGER DEFAULT 0,
-            inventory TEXT DEFAULT '{}',
-            current_rod TEXT DEFAULT 'vara_bambu',
-            rod_upgrades TEXT DEFAULT '{}',
-            afk_trap TEXT DEFAULT '{}',
-            last_fish TIMESTAMP,
-            last_daily TIMESTAMP,
-            last_explore TIMESTAMP,
-            baits INTEGER DEFAULT 0
-        );
         CREATE TABLE quest_progress (
             user_id INTEGER PRIMARY KEY,
             current_chapter TEXT DEFAULT 'inicio',
@@ -84,6 +70,8 @@ def _make_full_conn():
     )
     conn.execute("INSERT INTO world_state (id, current_weather) VALUES (1, 'normal')")
     ensure_v4_tables(conn)
+    ensure_economy_view(conn)
+    ensure_party_members(conn)
     conn.commit()
     return conn
 
@@ -230,10 +218,11 @@ class ResetAllPlayersTests(unittest.TestCase):
     def test_deletes_collection_tables_entirely(self):
         conn = _make_full_conn()
         _seed_full_progress(conn, 12)
+        create_party(conn, 12, "Tester")
 
         reset_all_players(conn)
 
-        for table in ("user_inventory", "achievements", "user_island_structures", "parties"):
+        for table in ("user_inventory", "achievements", "user_island_structures", "parties", "party_members"):
             row = conn.execute(f"SELECT COUNT(*) c FROM {table}").fetchone()
             self.assertEqual(row["c"], 0, f"{table} deveria estar vazia após reset global")
 
@@ -259,7 +248,7 @@ class ResetAllPlayersTests(unittest.TestCase):
         row = conn.execute("SELECT COUNT(*) c FROM fish_sales_history").fetchone()
         self.assertEqual(row["c"], 1, "ledger de vendas é histórico, não estado do jogador")
 
-    def test_legacy_economy_table_is_reset_too(self):
+    def test_legacy_economy_view_reflects_reset(self):
         conn = _make_full_conn()
         _seed_full_progress(conn, 15)
 
@@ -415,7 +404,7 @@ class EconomiaResetarIndividualTests(unittest.IsolatedAsyncioTestCase):
 
 
 class SistemaFixCooldownsTests(unittest.IsolatedAsyncioTestCase):
-    async def test_clears_cooldowns_in_legacy_and_v4_tables(self):
+    async def test_clears_cooldowns_in_v4_and_legacy_view(self):
         from cogs.admin import AdminCog
 
         conn = _make_full_conn()
@@ -479,14 +468,13 @@ class DebugQuestTests(unittest.IsolatedAsyncioTestCase):
 
         conn = _make_full_conn()
         ensure_user(conn, 90, "Tester")
-        conn.execute("INSERT OR IGNORE INTO economy (user_id, inventory) VALUES (90, '{}')")
-        conn.commit()
         cog = AdminCog(bot=_make_fake_bot())
         interaction = _make_interaction(user_id=90)
 
         with patch("cogs.admin.get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
             await AdminCog.debug_group.get_command("quest").callback(cog, interaction)
 
+        self.assertEqual(get_inventory(conn, 90).get("garrafa_incrustada"), 1)
         row = conn.execute("SELECT inventory FROM economy WHERE user_id = ?", (90,)).fetchone()
         self.assertIn("garrafa_incrustada", row["inventory"])
 
@@ -523,6 +511,44 @@ class DebugInspecionarTests(unittest.IsolatedAsyncioTestCase):
         interaction.response.send_message.assert_awaited_once()
 
 
+class DebugPerfTests(unittest.IsolatedAsyncioTestCase):
+    async def test_explain_report_lists_profiled_statements(self):
+        from cogs.admin import AdminCog
+        from sql_profiler import PROFILER, ProfiledConnection
+
+        conn = sqlite3.connect(":memory:", factory=ProfiledConnection)
+        conn.row_factory = sqlite3.Row
+        PROFILER.reset()
+        self.addCleanup(PROFILER.reset)
+        conn.execute("CREATE TABLE parties (leader_id INTEGER PRIMARY KEY, members_json TEXT)")
+        conn.execute("SELECT members_json FROM parties").fetchall()
+        cog = AdminCog(bot=_make_fake_bot())
+        interaction = _make_interaction()
+        acao = discord.app_commands.Choice(name="Relatório + EXPLAIN", value="explain")
+
+        with patch("cogs.admin.get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
+            await AdminCog.debug_group.get_command("perf").callback(cog, interaction, acao)
+
+        embed = interaction.response.send_message.call_args.kwargs["embed"]
+        fields = {field.name: field.value for field in embed.fields}
+        self.assertIn("SELECT members_json FROM parties", fields["Statements (tempo total)"])
+        self.assertIn("varredura completa de `parties`", fields["Plano de execução (mais custosos)"])
+
+    async def test_reset_clears_counters(self):
+        from cogs.admin import AdminCog
+        from sql_profiler import PROFILER
+
+        PROFILER.record("SELECT 1", (), 0.01, "teste")
+        cog = AdminCog(bot=_make_fake_bot())
+        interaction = _make_interaction()
+        acao = discord.app_commands.Choice(name="Zerar", value="zerar")
+
+        await AdminCog.debug_group.get_command("perf").callback(cog, interaction, acao)
+
+        self.assertEqual(PROFILER.totals()["count"], 0)
+        interaction.response.send_message.assert_awaited_once()
+
+
 class ResetGlobalModalFlowTests(unittest.IsolatedAsyncioTestCase):
     """Fluxo completo do comando mais perigoso do projeto: texto de
     confirmação errado não altera nada; confirmação certa mas backup falho
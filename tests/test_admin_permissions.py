@@ -86,10 +86,12 @@ class AdminGroupRegistrationTests(unittest.IsolatedAsyncioTestCase):
                 "falar",
                 "fix_cooldowns",
                 "inspecionar",
+                "perf",
                 "quest",
                 "remover",
                 "resetar",
                 "resetar_tudo",
+                "sincronizar",
             ],
         )
 
@@ -99,8 +101,8 @@ class AdminGroupRegistrationTests(unittest.IsolatedAsyncioTestCase):
         # original nunca é mutada e sempre teria binding=None.
         subgroups = {
             "economia": ["consultar", "corrigir", "dar", "remover", "resetar"],
-            "sistema": ["falar", "fix_cooldowns", "resetar_tudo"],
-            "debug": ["catches", "quest", "inspecionar"],
+            "sistema": ["falar", "fix_cooldowns", "resetar_tudo", "sincronizar"],
+            "debug": ["catches", "quest", "inspecionar", "perf"],
         }
         for group_name, command_names in subgroups.items():
             subgroup = admin.get_command(group_name)
@@ -125,30 +127,6 @@ class EconomiaCorrigirFlowTests(unittest.IsolatedAsyncioTestCase):
         conn.row_factory = sqlite3.Row
         from economy_db import ensure_v4_tables
 
-        # Schema legado completo: modify_wallet() sempre sincroniza de volta
-        # para a tabela `economy` via sync_user_to_economy (mesmo padrão de
-        # tests/test_economy_db.py).
-        conn.executescript(
-            """
-            CREATE TABLE economy (
-                user_id INTEGER PRIMARY KEY,
-                user_name TEXT,
-                wallet INTEGER DEFAULT 0,
-                fish_count INTEGER DEFAULT 0,
-                guild_rank TEXT DEFAULT 'F',
-                guild_xp INTEGER DEFAULT 0,
-                scrap INTEGER DEFAULT 0,
-                inventory TEXT DEFAULT '{}',
-                current_rod TEXT DEFAULT 'vara_bambu',
-                rod_upgrades TEXT DEFAULT '{}',
-                afk_trap TEXT DEFAULT '{}',
-                last_fish TIMESTAMP,
-                last_daily TIMESTAMP,
-                last_explore TIMESTAMP,
-                baits INTEGER DEFAULT 0
-            )
-            """
-        )
         ensure_v4_tables(conn)
         conn.execute("INSERT INTO users (user_id, user_name, wallet) VALUES (?, ?, ?)", (77, "Alvo", 500))
         conn.commit()
@@ -0,0 +1,109 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from audio_cache import AudioCache, drive_file_key
+from cogs import jukebox
+
+DRIVE_ID = "1AbCdEfGhIjKlMnOp"
+
+
+class AudioCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = pathlib.Path(tmp.name)
+        self.cache_dir = self.root / "cache"
+        self.sources = {}
+        for name, size in (("a", 400), ("b", 400), ("c", 400)):
+            path = self.root / f"{name}.mp3"
+            path.write_bytes(name.encode() * size)
+            self.sources[name] = path.as_uri()
+
+    def _cache(self, max_bytes=1000):
+        return AudioCache(str(self.cache_dir), max_bytes)
+
+    def test_fill_then_hit_reads_from_disk(self):
+        cache = self._cache()
+        self.assertIsNone(cache.lookup("a"))
+        self.assertTrue(cache.fill("a", self.sources["a"]))
+
+        path = cache.lookup("a")
+        self.assertEqual(pathlib.Path(path).read_bytes(), b"a" * 400)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+        self.assertEqual(cache.stats["fills"], 1)
+        self.assertEqual([p.name for p in self.cache_dir.iterdir()], ["a.audio"])
+
+    def test_evicts_least_recently_played_over_the_byte_limit(self):
+        cache = self._cache(max_bytes=1000)
+        cache.fill("a", self.sources["a"])
+        cache.fill("b", self.sources["b"])
+        cache.lookup("a")
+        cache.fill("c", self.sources["c"])
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertFalse((self.cache_dir / "b.audio").exists())
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_failed_download_leaves_no_partial_file(self):
+        cache = self._cache()
+        self.assertFalse(cache.fill("x", (self.root / "nao_existe.mp3").as_uri()))
+        html = self.root / "confirmar.html"
+        html.write_text("<html>virus scan</html>")
+        self.assertFalse(cache.fill("y", html.as_uri()))
+
+        self.assertEqual(cache.stats["failures"], 2)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+        self.assertIsNone(cache.lookup("y"))
+
+    def test_restart_keeps_lru_order_and_drops_leftover_parts(self):
+        cache = self._cache()
+        cache.fill("a", self.sources["a"])
+        cache.fill("b", self.sources["b"])
+        os.utime(self.cache_dir / "a.audio", (1, 1))
+        (self.cache_dir / "c.123.part").write_bytes(b"meio")
+
+        reopened = self._cache()
+        reopened.fill("c", self.sources["c"])
+        self.assertNotIn("a", reopened)
+        self.assertIn("b", reopened)
+        self.assertFalse((self.cache_dir / "c.123.part").exists())
+
+    def test_drive_key_from_id_or_link(self):
+        self.assertEqual(drive_file_key(DRIVE_ID), DRIVE_ID)
+        self.assertEqual(drive_file_key(None, f"https://drive.google.com/uc?export=download&id={DRIVE_ID}"), DRIVE_ID)
+        self.assertEqual(drive_file_key("", f"https://drive.google.com/file/d/{DRIVE_ID}/view"), DRIVE_ID)
+        self.assertIsNone(drive_file_key(None, "https://example.com/a.mp3?id=1AbCdEfGhIjKlMnOp"))
+        self.assertIsNone(drive_file_key("../../etc/passwd"))
+
+
+class JukeboxAudioCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_build_source_uses_local_copy_after_background_fill(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            track = pathlib.Path(tmp, "faixa.mp3")
+            track.write_bytes(b"\xff" * 2048)
+            cache = AudioCache(os.path.join(tmp, "cache"), 10_000)
+            cog = jukebox.MusicaV2(SimpleNamespace())
+            item = jukebox.QueueItem(title="Faixa", source_url=track.as_uri(), drive_file_id=DRIVE_ID)
+
+            with patch.object(jukebox, "AUDIO_CACHE", cache), \
+                 patch.object(jukebox.discord, "FFmpegPCMAudio", side_effect=lambda src, **kw: (src, kw)):
+                first, _ = cog._build_ffmpeg_source(item)
+                self.assertEqual(first, track.as_uri())
+                await next(iter(cache._tasks))
+
+                second, options = cog._build_ffmpeg_source(item)
+
+        self.assertTrue(second.endswith(f"{DRIVE_ID}.audio"))
+        self.assertNotIn("-reconnect", options["before_options"])
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1, "fills": 1, "failures": 0, "evictions": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
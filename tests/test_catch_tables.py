@@ -0,0 +1,71 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from catch_tables import MAX_TIER, CatchPool, build_pools, pool_for
+from economy_constants import FISH_DB, FISH_WEIGHTS, TRASH_ITEMS
+
+
+class _FixedRng:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+class CatchTablesTests(unittest.TestCase):
+    def test_pools_match_the_old_fish_db_filters(self):
+        """Os pools pré-compilados têm as mesmas entradas que as list
+        comprehensions que /eco pescar fazia a cada pesca."""
+        for max_tier in range(MAX_TIER + 1):
+            self.assertEqual(
+                pool_for(max_tier, "normal").entries,
+                tuple(p for p in FISH_DB if 0 < p[4] <= max_tier) or tuple(p for p in FISH_DB if p[4] == 0),
+            )
+            self.assertEqual(
+                pool_for(max_tier, "brilhante").entries,
+                tuple(p for p in FISH_DB if 0 < p[4] <= max_tier and p[4] == 2),
+            )
+        self.assertEqual(pool_for(0, "chip").entries, tuple(p for p in FISH_DB if p[4] >= 2))
+        self.assertEqual(
+            pool_for(0, "lixo").entries, tuple(p for p in FISH_DB if p[4] == 0 and p[0] in TRASH_ITEMS)
+        )
+        self.assertEqual(
+            pool_for(0, "iniciais").entries, tuple(p for p in FISH_DB if p[4] == 0 and p[0] not in TRASH_ITEMS)
+        )
+        self.assertEqual(pool_for(1, "ate").names, tuple(p[0] for p in FISH_DB if p[4] <= 1))
+
+    def test_max_tier_is_clamped(self):
+        # Vara tier 4 + Brisa Dourada (tier_bonus 1) pede tier 5.
+        self.assertIs(pool_for(MAX_TIER + 1), pool_for(MAX_TIER))
+        self.assertIs(pool_for(-1, "ate"), pool_for(0, "ate"))
+
+    def test_uniform_weights_cover_every_entry(self):
+        pool = pool_for(MAX_TIER)
+        n = len(pool)
+        picked = {pool.sample(_FixedRng((i + 0.5) / n)) for i in range(n)}
+        self.assertEqual(picked, set(pool.entries))
+        # Borda de cima do random() nunca estoura o índice.
+        self.assertEqual(pool.sample(_FixedRng(0.9999999999999999)), pool.entries[-1])
+
+    def test_fish_weights_change_odds_without_touching_call_sites(self):
+        tier4 = [p for p in FISH_DB if p[4] == 4]
+        heavy, others = tier4[0][0], [p[0] for p in tier4[1:]]
+        weights = {heavy: 1000.0, **{name: 0 for name in others}}
+        with patch.dict(FISH_WEIGHTS, weights):
+            pools = build_pools(FISH_DB)
+        pool = pools[(MAX_TIER, "normal")]
+        for name in others:
+            self.assertNotIn(name, pool.names)
+        rng = random.Random(7)
+        hits = sum(pool.sample(rng)[0] == heavy for _ in range(2000))
+        self.assertGreater(hits, 1500)
+
+    def test_empty_pool_is_falsy(self):
+        self.assertFalse(CatchPool([]))
+        self.assertFalse(pool_for(1, "brilhante"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from command_sync import stored_fingerprint, sync_command_tree, tree_fingerprint
+
+
+def _bot(*names, application_id=42):
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default(), application_id=application_id)
+    for name in names:
+        group = app_commands.Group(name=name, description=f"grupo {name}")
+
+        @group.command(name="ver", description="mostra")
+        async def ver(interaction: discord.Interaction):
+            pass
+
+        bot.tree.add_command(group)
+    bot.tree.sync = AsyncMock(side_effect=lambda: list(bot.tree.get_commands()))
+    return bot
+
+
+class TreeFingerprintTests(unittest.TestCase):
+    def test_same_tree_in_any_order_has_same_fingerprint(self):
+        self.assertEqual(tree_fingerprint(_bot("eco", "lore").tree), tree_fingerprint(_bot("lore", "eco").tree))
+
+    def test_any_change_to_the_payload_changes_fingerprint(self):
+        base = tree_fingerprint(_bot("eco").tree)
+        self.assertNotEqual(base, tree_fingerprint(_bot("eco", "casino").tree))
+
+        bot = _bot("eco")
+        bot.tree.get_command("eco").get_command("ver").description = "mostra outra coisa"
+        self.assertNotEqual(base, tree_fingerprint(bot.tree))
+
+
+class SyncCommandTreeTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "command_tree.json")
+
+    async def test_reconnect_with_unchanged_tree_skips_sync(self):
+        bot = _bot("eco", "musica")
+        first = await sync_command_tree(bot.tree, path=self.path)
+        again = await sync_command_tree(_bot("musica", "eco").tree, path=self.path)
+
+        self.assertEqual((first["synced"], first["count"]), (True, 2))
+        self.assertFalse(again["synced"])
+        self.assertEqual(stored_fingerprint(42, self.path), first["fingerprint"])
+
+    async def test_changed_tree_or_force_syncs_again(self):
+        await sync_command_tree(_bot("eco").tree, path=self.path)
+
+        changed = _bot("eco", "admin")
+        self.assertTrue((await sync_command_tree(changed.tree, path=self.path))["synced"])
+        self.assertTrue((await sync_command_tree(changed.tree, force=True, path=self.path))["synced"])
+        self.assertEqual(changed.tree.sync.await_count, 2)
+
+    async def test_fingerprints_are_kept_per_application(self):
+        await sync_command_tree(_bot("eco", application_id=1).tree, path=self.path)
+        other = _bot("eco", application_id=2)
+        self.assertTrue((await sync_command_tree(other.tree, path=self.path))["synced"])
+
+    async def test_failed_sync_is_retried_next_time(self):
+        bot = _bot("eco")
+        bot.tree.sync = AsyncMock(side_effect=discord.HTTPException(SimpleNamespace(status=429, reason="rate"), "lento"))
+        with self.assertRaises(discord.HTTPException):
+            await sync_command_tree(bot.tree, path=self.path)
+        self.assertIsNone(stored_fingerprint(42, self.path))
+
+
+class AdminForcedSyncTests(unittest.IsolatedAsyncioTestCase):
+    async def test_sincronizar_forces_sync(self):
+        from cogs.admin import AdminCog
+
+        bot = _bot("eco")
+        interaction = SimpleNamespace(
+            user="Criador",
+            response=SimpleNamespace(defer=AsyncMock()),
+            followup=SimpleNamespace(send=AsyncMock()),
+        )
+        result = {"synced": True, "count": 1, "fingerprint": "ab" * 32}
+        with patch("cogs.admin.sync_command_tree", AsyncMock(return_value=result)) as sync:
+            await AdminCog.sistema_group.get_command("sincronizar").callback(AdminCog(bot), interaction)
+
+        sync.assert_awaited_once_with(bot.tree, force=True)
+        self.assertIn("1 comandos sincronizados", interaction.followup.send.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Histograma de latência por comando (telemetry) e o gancho da árvore
+(command_timing.TimedCommandTree)."""
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import discord
+from discord import InteractionResponse, app_commands
+from discord.enums import InteractionResponseType
+
+import telemetry
+from command_timing import (
+    FIRST_RESPONSE_KEY,
+    STARTING_UP_MESSAGE,
+    TimedCommandTree,
+    install_response_hook,
+)
+from cogs.sistema import format_command_latencies
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+
+    def test_percentiles_are_within_one_bucket(self):
+        for ms in range(1, 101):
+            telemetry.record_command_latency("eco pescar", ms / 1000, first_response=ms / 2000)
+
+        latency = telemetry.command_latency("eco pescar")
+        self.assertEqual(latency["done"]["count"], 100)
+        for key, expected in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+            self.assertGreaterEqual(latency["done"][key], expected)
+            self.assertLessEqual(latency["done"][key], expected * 1.2)
+        self.assertLess(latency["first"]["p50_ms"], latency["done"]["p50_ms"])
+
+    def test_samples_become_bucket_counts(self):
+        for _ in range(10_000):
+            telemetry.record_command_latency("eco comprar", 0.02)
+        done = telemetry.command_latency("eco comprar")["done"]
+        self.assertEqual(done["count"], 10_000)
+        self.assertEqual(done["p50_ms"], done["p99_ms"])
+
+    def test_very_slow_commands_land_in_the_last_bucket(self):
+        telemetry.record_command_latency("lore grafo", 10_000.0)
+        self.assertGreater(telemetry.command_latency("lore grafo")["done"]["p99_ms"], 60_000)
+
+    def test_missing_first_response_only_counts_completion(self):
+        telemetry.record_command_latency("eco rank", 0.5)
+        latency = telemetry.command_latency("eco rank")
+        self.assertIsNone(latency["first"])
+        self.assertEqual(latency["done"]["count"], 1)
+        self.assertIsNone(telemetry.command_latency("nunca rodou"))
+
+    def test_slowest_commands_orders_by_p95(self):
+        telemetry.record_command_latency("rapido", 0.01)
+        telemetry.record_command_latency("lento", 2.0)
+        names = [name for name, _ in telemetry.slowest_commands()]
+        self.assertEqual(names, ["lento", "rapido"])
+        self.assertIn("/lento", format_command_latencies(telemetry.slowest_commands()))
+        self.assertEqual(format_command_latencies([]), "Sem dados ainda.")
+
+
+class TimedCommandTreeTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+
+    def test_response_hook_stamps_only_the_first_response(self):
+        install_response_hook()
+        install_response_hook()  # idempotente
+        parent = SimpleNamespace(extras={})
+        response = InteractionResponse(parent)
+        self.assertNotIn(FIRST_RESPONSE_KEY, parent.extras)
+
+        response._response_type = InteractionResponseType.deferred_channel_message
+        first = parent.extras[FIRST_RESPONSE_KEY]
+        response._response_type = InteractionResponseType.channel_message
+
+        self.assertTrue(response.is_done())
+        self.assertEqual(response.type, InteractionResponseType.channel_message)
+        self.assertEqual(parent.extras[FIRST_RESPONSE_KEY], first)
+
+    async def test_call_records_first_response_and_completion(self):
+        tree = TimedCommandTree(discord.Client(intents=discord.Intents.none()))
+        interaction = SimpleNamespace(extras={}, command=SimpleNamespace(qualified_name="eco pescar"))
+        interaction.response = InteractionResponse(interaction)
+
+        async def fake_call(_tree, inter):
+            inter.response._response_type = InteractionResponseType.deferred_channel_message
+            await asyncio.sleep(0.05)
+
+        with patch.object(app_commands.CommandTree, "_call", fake_call):
+            await tree._call(interaction)
+
+        latency = telemetry.command_latency("eco pescar")
+        self.assertEqual(latency["first"]["count"], 1)
+        self.assertLess(latency["first"]["p50_ms"], 20)
+        self.assertGreaterEqual(latency["done"]["p50_ms"], 50)
+
+
+
+class StartupGateTests(unittest.IsolatedAsyncioTestCase):
+    def _interaction(self, kind=discord.InteractionType.application_command):
+        return SimpleNamespace(type=kind, response=SimpleNamespace(send_message=AsyncMock()))
+
+    async def test_commands_wait_for_extensions_to_load(self):
+        client = discord.Client(intents=discord.Intents.none())
+        tree = TimedCommandTree(client)
+        gate = asyncio.Event()
+        client.extensions_loaded = asyncio.create_task(gate.wait())
+
+        interaction = self._interaction()
+        self.assertFalse(await tree.interaction_check(interaction))
+        interaction.response.send_message.assert_awaited_once_with(STARTING_UP_MESSAGE, ephemeral=True)
+
+        autocomplete = self._interaction(discord.InteractionType.autocomplete)
+        self.assertFalse(await tree.interaction_check(autocomplete))
+        autocomplete.response.send_message.assert_not_awaited()
+
+        gate.set()
+        await client.extensions_loaded
+        self.assertTrue(await tree.interaction_check(self._interaction()))
+
+    async def test_no_gate_without_background_load(self):
+        tree = TimedCommandTree(discord.Client(intents=discord.Intents.none()))
+        self.assertTrue(await tree.interaction_check(self._interaction()))
+
+
+if __name__ == "__main__":
+    unittest.main()
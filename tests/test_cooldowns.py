@@ -0,0 +1,158 @@
+import sqlite3
+import unittest
+
+from cooldowns import CooldownRegistry, format_timestamp, parse_timestamp
+from economy_db import ensure_user, ensure_v4_tables, get_cooldowns, set_cooldown, write_cooldowns
+
+
+class _ResetDuringFlush:
+    """Conexão que roda `on_begin` (o reset do admin) quando o flush abre a
+    transação — o lote já saiu do registro, mas ainda não foi gravado."""
+
+    def __init__(self, conn, on_begin):
+        self._conn = conn
+        self._on_begin = on_begin
+
+    def execute(self, sql, *args):
+        if sql == "BEGIN IMMEDIATE":
+            self._on_begin()
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    ensure_v4_tables(conn)
+    return conn
+
+
+class CooldownRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = _conn()
+        self.addCleanup(self.conn.close)
+        ensure_user(self.conn, 1, "Tester")
+        self.registry = CooldownRegistry()
+
+    def test_reserve_then_reject_without_touching_sqlite(self):
+        ok, ready_at = self.registry.try_reserve(1, "last_fish", 300, "Vara de Bambu", now=1000.0)
+        self.assertTrue(ok)
+        self.assertEqual(ready_at, 1300.0)
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        self.assertEqual(self.registry.blocked_until(1, "last_fish", now=1100.0), (1300.0, "Vara de Bambu"))
+        self.assertEqual(self.registry.try_reserve(1, "last_fish", 300, now=1100.0), (False, 1300.0))
+        self.assertEqual(statements, [])
+
+        self.assertIsNone(self.registry.blocked_until(1, "last_fish", now=1300.0))
+        self.assertTrue(self.registry.try_reserve(1, "last_fish", 300, now=1300.0)[0])
+
+    def test_flush_writes_pending_reservations_once(self):
+        self.registry.try_reserve(1, "last_fish", 300, now=1000.0)
+        self.registry.try_reserve(2, "last_explore", 600, now=1000.0)
+        self.assertIsNone(get_cooldowns(self.conn, 1)["last_fish"])
+
+        self.assertEqual(self.registry.flush(self.conn), 2)
+        self.assertEqual(self.registry.pending(), 0)
+        self.assertEqual(parse_timestamp(get_cooldowns(self.conn, 1)["last_fish"]), 1000.0)
+        # Jogador ainda sem linha em user_cooldowns: o flush cria.
+        self.assertEqual(get_cooldowns(self.conn, 2)["last_explore"], format_timestamp(1000.0))
+        self.assertEqual(self.registry.flush(self.conn), 0)
+
+    def test_failed_flush_keeps_entries_pending(self):
+        self.registry.try_reserve(1, "last_fish", 300, now=1000.0)
+        broken = sqlite3.connect(":memory:")
+        broken.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            self.registry.flush(broken)
+        self.assertEqual(self.registry.pending(), 1)
+        self.assertEqual(self.registry.flush(self.conn), 1)
+
+    def test_reset_frees_and_persists_null(self):
+        set_cooldown(self.conn, 1, "last_fish", format_timestamp(1000.0))
+        self.registry.seed(1, "last_fish", format_timestamp(1000.0), 300)
+        self.assertIsNotNone(self.registry.blocked_until(1, "last_fish", now=1100.0))
+
+        self.registry.reset(1, "last_fish")
+        self.assertIsNone(self.registry.blocked_until(1, "last_fish", now=1100.0))
+        self.registry.flush(self.conn)
+        self.assertIsNone(get_cooldowns(self.conn, 1)["last_fish"])
+
+    def test_seed_never_overrides_what_memory_already_knows(self):
+        self.registry.try_reserve(1, "last_fish", 300, now=2000.0)
+        # Valor antigo do banco (o flush ainda não rodou) não pode liberar.
+        self.registry.seed(1, "last_fish", format_timestamp(1000.0), 300)
+        self.assertEqual(self.registry.blocked_until(1, "last_fish", now=2100.0)[0], 2300.0)
+
+        self.registry.seed(2, "last_fish", None, 300)
+        self.assertTrue(self.registry.known(2, "last_fish"))
+        self.assertIsNone(self.registry.blocked_until(2, "last_fish", now=2100.0))
+        self.registry.seed(3, "last_fish", "lixo", 300)
+        self.assertIsNone(self.registry.blocked_until(3, "last_fish", now=2100.0))
+
+    def test_faster_rod_mid_cooldown_takes_effect(self):
+        self.registry.try_reserve(1, "last_fish", 600, "Vara Pesada", now=1000.0)
+        self.assertEqual(self.registry.blocked_until(1, "last_fish", now=1200.0), (1600.0, "Vara Pesada"))
+
+        # Equipou uma vara de 150s: quem trocou a vara avisa o registro...
+        self.registry.recheck(1, "last_fish")
+        self.assertIsNone(self.registry.blocked_until(1, "last_fish", now=1200.0))
+        # ...e o caminho lento reavalia o último uso com o cooldown novo.
+        self.assertTrue(self.registry.try_reserve(1, "last_fish", 150, "Vara Leve", now=1200.0)[0])
+
+    def test_reserve_recomputes_with_the_current_cooldown(self):
+        self.registry.try_reserve(1, "last_fish", 600, "Vara Pesada", now=1000.0)
+        self.registry.recheck(1, "last_fish")
+
+        # Ainda dentro do cooldown novo: recusa com o horário dele, e a
+        # recusa rápida passa a responder com esse horário.
+        self.assertEqual(self.registry.try_reserve(1, "last_fish", 300, "Vara Média", now=1100.0), (False, 1300.0))
+        self.assertEqual(self.registry.blocked_until(1, "last_fish", now=1100.0), (1300.0, "Vara Média"))
+        self.assertEqual(self.registry.pending(), 1)
+
+    def test_forget_drops_one_player_or_everyone(self):
+        self.registry.try_reserve(1, "last_fish", 300, now=1000.0)
+        self.registry.try_reserve(2, "last_fish", 300, now=1000.0)
+
+        self.registry.forget(1)
+        self.assertFalse(self.registry.known(1, "last_fish"))
+        self.assertTrue(self.registry.known(2, "last_fish"))
+        self.assertEqual(self.registry.pending(), 1)
+
+        self.registry.forget()
+        self.assertFalse(self.registry.known(2, "last_fish"))
+        self.assertEqual(self.registry.pending(), 0)
+
+    def test_flush_in_flight_does_not_overwrite_an_admin_reset(self):
+        ensure_user(self.conn, 2, "Outro")
+        self.registry.try_reserve(1, "last_fish", 300, now=1000.0)
+        self.registry.try_reserve(2, "last_fish", 300, now=1000.0)
+
+        self.assertEqual(self.registry.flush(_ResetDuringFlush(self.conn, self.registry.forget)), 0)
+        self.assertIsNone(get_cooldowns(self.conn, 1)["last_fish"])
+        self.assertIsNone(get_cooldowns(self.conn, 2)["last_fish"])
+
+        # Reset de um jogador só: o lote dos outros continua valendo.
+        self.registry.try_reserve(1, "last_fish", 300, now=2000.0)
+        self.registry.try_reserve(2, "last_fish", 300, now=2000.0)
+        self.assertEqual(
+            self.registry.flush(_ResetDuringFlush(self.conn, lambda: self.registry.forget(1))), 1
+        )
+        self.assertIsNone(get_cooldowns(self.conn, 1)["last_fish"])
+        self.assertEqual(parse_timestamp(get_cooldowns(self.conn, 2)["last_fish"]), 2000.0)
+        self.assertEqual(self.registry.pending(), 0)
+
+
+class WriteCooldownsTests(unittest.TestCase):
+    def test_rejects_unknown_field(self):
+        conn = _conn()
+        self.addCleanup(conn.close)
+        with self.assertRaises(ValueError):
+            write_cooldowns(conn, [(1, "user_id; DROP TABLE users", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
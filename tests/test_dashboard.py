@@ -17,6 +17,7 @@ from cogs import dashboard_art as art
 from cogs.dashboard_panel import (
     DashboardData,
     LatencyTracker,
+    build_activity_section,
     build_dashboard,
     format_gateway_latency,
     collect_connection,
@@ -779,6 +780,35 @@ class BuildDashboardSmokeTests(unittest.TestCase):
         frame = anim.Frame(anim.ERROR_STATE, anim.GLITCH_STATIC, 2.0)
         self.assertIsNotNone(self._build(frame))
 
+    def test_builds_with_loop_stalls(self):
+        renderable = build_dashboard(
+            frame=anim.Frame(anim.NORMAL_STATE, None, 1.0),
+            rng=random.Random(0),
+            connection={"uptime": timedelta(0), "latency_ms": None, "connected": True},
+            stats={"cpu_percent": None, "ram_mb": None, "ram_percent": None},
+            economy={"total_players": None, "active_today": None, "total_sachets": None},
+            interactions=[],
+            errors=[],
+            error_count_hour=0,
+            loop_lag={"last_ms": 3.0, "max_ms": 812.0},
+            stalls=[{"site": "cogs/economia.py:1234 (explorar)", "count": 2, "total": 1.1, "max": 0.8}],
+        )
+        self.assertIsNotNone(renderable)
+
+    def test_activity_rows_show_command_p95(self):
+        from rich.console import Console
+
+        section = build_activity_section(
+            [{"when": datetime(2026, 8, 20, 12, 0, 0), "user_name": "a", "command_name": "eco pescar"}],
+            "white",
+            600,
+            {"eco pescar": {"first": None, "done": {"count": 3, "p50_ms": 40.0, "p95_ms": 90.0, "p99_ms": 120.0}}},
+        )
+        console = Console(width=120, record=True, file=open(os.devnull, "w"))
+        console.print(section)
+        console.file.close()
+        self.assertIn("p95 90ms", console.export_text())
+
     def test_builds_with_empty_activity_and_errors(self):
         renderable = build_dashboard(
             frame=anim.Frame(anim.NORMAL_STATE, None, 1.0),
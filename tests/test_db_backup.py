@@ -0,0 +1,122 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from db_backup import (
+    BackupError,
+    LocalBackupTarget,
+    backup_database,
+    find_manifest,
+    iter_chunks,
+    restore_database,
+    snapshot_database,
+)
+
+
+def _make_db(path, rows=20000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, wallet INTEGER, bio TEXT)")
+    conn.executemany(
+        "INSERT INTO users (user_id, wallet, bio) VALUES (?, ?, ?)",
+        ((uid, uid * 10, f"jogador {uid} " * 8) for uid in range(rows)),
+    )
+    conn.commit()
+    return conn
+
+
+def _wallet(path, user_id):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT wallet FROM users WHERE user_id = ?", (user_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class DbBackupTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.db_path = os.path.join(self.tmp, "bot.db")
+        self.conn = _make_db(self.db_path)
+        self.addCleanup(self.conn.close)
+        self.target = LocalBackupTarget(os.path.join(self.tmp, "backups"))
+
+    def test_snapshot_ignores_uncommitted_writes(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("UPDATE users SET wallet = -1 WHERE user_id = 5")
+        snapshot = os.path.join(self.tmp, "snap.db")
+        try:
+            snapshot_database(self.db_path, snapshot, pages=8, sleep=0)
+        finally:
+            self.conn.rollback()
+        self.assertEqual(_wallet(snapshot, 5), 50)
+
+    def test_second_backup_only_uploads_changed_chunks(self):
+        first = backup_database(self.db_path, self.target, now=datetime(2026, 1, 1, 3, 0))
+        self.assertEqual(first["uploaded"], first["chunks"])
+        self.assertLess(first["uploaded_bytes"], first["size"])
+
+        self.conn.execute("UPDATE users SET wallet = 999 WHERE user_id = 1500")
+        self.conn.commit()
+        second = backup_database(self.db_path, self.target, now=datetime(2026, 1, 2, 3, 0))
+
+        self.assertGreater(second["uploaded"], 0)
+        # Página 1 (contador de mudanças do cabeçalho) + a folha alterada.
+        self.assertLessEqual(second["uploaded"], 2)
+        self.assertGreater(second["chunks"], 10)
+
+    def test_point_in_time_restore(self):
+        backup_database(self.db_path, self.target, now=datetime(2026, 1, 1, 3, 0))
+        self.conn.execute("UPDATE users SET wallet = 999 WHERE user_id = 7")
+        self.conn.commit()
+        backup_database(self.db_path, self.target, label="pre_reset_global", now=datetime(2026, 1, 2, 3, 0))
+
+        old = os.path.join(self.tmp, "old.db")
+        result = restore_database(self.target, old, at=datetime(2026, 1, 1, 12, 0))
+        self.assertEqual(result["manifest"], "2026-01-01T030000_auto")
+        self.assertEqual(_wallet(old, 7), 70)
+
+        latest = os.path.join(self.tmp, "latest.db")
+        restore_database(self.target, latest)
+        self.assertEqual(_wallet(latest, 7), 999)
+        self.assertEqual(find_manifest(self.target), "2026-01-02T030000_pre_reset_global")
+        self.assertIsNone(find_manifest(self.target, at=datetime(2025, 12, 31)))
+
+    def test_restore_refuses_corrupted_chunk_and_existing_destination(self):
+        result = backup_database(self.db_path, self.target, now=datetime(2026, 1, 1, 3, 0))
+        with self.assertRaises(BackupError):
+            restore_database(self.target, self.db_path)
+
+        chunk_dir = os.path.join(self.tmp, "backups", "chunks")
+        victim_dir = os.path.join(chunk_dir, sorted(os.listdir(chunk_dir))[0])
+        victim = os.path.join(victim_dir, os.listdir(victim_dir)[0])
+        with open(victim, "wb") as f:
+            f.write(b"lixo")
+
+        dest = os.path.join(self.tmp, "restored.db")
+        with self.assertRaises(BackupError):
+            restore_database(self.target, dest, manifest=result["manifest"])
+        self.assertFalse(os.path.exists(dest))
+        self.assertFalse(os.path.exists(dest + ".restoring"))
+
+
+class IterChunksTests(unittest.TestCase):
+    def test_boundaries_follow_content_not_offset(self):
+        page_size = 64
+        pages = [bytes([i % 251]) * page_size for i in range(300)]
+        before = list(iter_chunks(io.BytesIO(b"".join(pages)), page_size))
+        # Uma página nova no começo do arquivo desloca tudo, mas os cortes
+        # dependem do conteúdo: a maioria dos chunks se repete.
+        after = list(iter_chunks(io.BytesIO(b"\xff" * page_size + b"".join(pages)), page_size))
+
+        self.assertEqual(b"".join(before), b"".join(pages))
+        self.assertGreater(len(set(before) & set(after)), len(before) // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from db_gateway import DatabaseGateway, InlineGateway, get_gateway
+from economy_db import ensure_user, ensure_v4_tables, get_wallet, modify_wallet
+
+
+def _make_db_file():
+    tmp = tempfile.mkdtemp(prefix="p3luche-gateway-")
+    path = os.path.join(tmp, "gateway.db")
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    ensure_v4_tables(conn)
+    conn.commit()
+    conn.close()
+    return path
+
+
+class DatabaseGatewayTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        path = _make_db_file()
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), True)
+        self.gateway = DatabaseGateway(path, readers=2).start()
+
+    async def asyncTearDown(self):
+        self.gateway.close()
+
+    async def test_write_then_read_sees_committed_state(self):
+        await self.gateway.write(ensure_user, 1, "Tester")
+        novo = await self.gateway.write(modify_wallet, 1, 250)
+        self.assertEqual(novo, 250)
+
+        row = await self.gateway.read(lambda conn: conn.execute(
+            "SELECT wallet FROM users WHERE user_id = 1"
+        ).fetchone())
+        self.assertEqual(row["wallet"], 250)
+
+    async def test_concurrent_writes_are_serialized_without_lost_updates(self):
+        await self.gateway.write(ensure_user, 1, "Tester")
+        await asyncio.gather(*(self.gateway.write(modify_wallet, 1, 1) for _ in range(50)))
+        self.assertEqual(await self.gateway.write(get_wallet, 1), 50)
+
+    async def test_read_connection_rejects_writes(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            await self.gateway.read(lambda conn: conn.execute(
+                "INSERT INTO users (user_id, user_name) VALUES (9, 'x')"
+            ))
+
+    async def test_failed_write_rolls_back_and_writer_keeps_serving(self):
+        def quebra(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO users (user_id, user_name) VALUES (7, 'x')")
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await self.gateway.write(quebra)
+        row = await self.gateway.read(lambda conn: conn.execute(
+            "SELECT 1 FROM users WHERE user_id = 7"
+        ).fetchone())
+        self.assertIsNone(row)
+        self.assertEqual(await self.gateway.write(modify_wallet, 2, 5), 5)
+
+    async def test_slow_write_does_not_stall_the_event_loop(self):
+        """Heartbeat: o loop continua batendo enquanto o escritor está ocupado."""
+        batidas = []
+
+        async def heartbeat():
+            for _ in range(10):
+                batidas.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        escrita = self.gateway.write(lambda conn: time.sleep(0.3))
+        await asyncio.gather(escrita, heartbeat())
+
+        maior_intervalo = max(b - a for a, b in zip(batidas, batidas[1:]))
+        self.assertLess(maior_intervalo, 0.15)
+
+    async def test_memory_database_routes_reads_through_writer(self):
+        gateway = DatabaseGateway(":memory:").start()
+        try:
+            self.assertEqual(gateway.readers, 0)
+            await gateway.write(ensure_v4_tables)
+            await gateway.write(modify_wallet, 1, 30)
+            self.assertEqual(await gateway.read(get_wallet, 1), 30)
+        finally:
+            gateway.close()
+
+
+class GetGatewayTests(unittest.IsolatedAsyncioTestCase):
+    async def test_falls_back_to_inline_over_db_conn(self):
+        chamadas = []
+        gateway = get_gateway(SimpleNamespace(db_conn="db"))
+        self.assertIsInstance(gateway, InlineGateway)
+        await gateway.write(lambda conn, *a: chamadas.append((conn, a)), 1, 2)
+        self.assertEqual(chamadas, [("db", (1, 2))])
+
+    async def test_uses_running_gateway_from_bot(self):
+        gateway = DatabaseGateway(":memory:").start()
+        try:
+            self.assertIs(get_gateway(SimpleNamespace(db=gateway, db_conn=None)), gateway)
+        finally:
+            gateway.close()
+        # Encerrado, volta para a conexão compartilhada.
+        self.assertIsInstance(get_gateway(SimpleNamespace(db=gateway, db_conn="db")), InlineGateway)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,21 @@
 import asyncio
 import json
+import random
 import sqlite3
 import unittest
 from datetime import datetime, timedelta
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
+from catch_tables import CatchPool
 from cogs import economia
+from cooldowns import COOLDOWNS
+from leaderboard import LEADERBOARDS
 from economy_db import (
+    PlayerSession,
     add_inventory_item,
+    ensure_economy_view,
+    ensure_party_members,
     ensure_user,
     ensure_v4_tables,
     get_cooldowns,
@@ -20,12 +27,27 @@ from economy_db import (
     modify_scrap,
     modify_wallet,
     set_cooldown,
-    sync_user_to_economy,
+    set_current_rod,
 )
 
 
+def _stored_cooldowns(conn, user_id):
+    """Cooldowns como ficam no banco depois do flush do write-behind."""
+    COOLDOWNS.flush(conn)
+    return get_cooldowns(conn, user_id)
+
+
+class _FreshCooldownsMixin:
+    """O registro de cooldowns é global ao processo: cada teste começa vazio."""
+
+    def setUp(self):
+        super().setUp()
+        COOLDOWNS.forget()
+        self.addCleanup(COOLDOWNS.forget)
+
+
 def _make_pescar_conn():
-    """Schema completo (tabela legada `economy` + tabelas v4) usado pelos
+    """Schema completo (tabelas v4 + view legada `economy`) usado pelos
     testes de pesca — mistura o que `test_economy_db.py` já usa com as
     tabelas auxiliares (quest_progress, parties, persistent_catches,
     world_state) que `pescar()`/`_finalize_pescar` também tocam.
@@ -34,24 +56,6 @@ def _make_pescar_conn():
     conn.row_factory = sqlite3.Row
     conn.executescript(
         """
-        CREATE TABLE economy (
-            user_id INTEGER PRIMARY KEY,
-            user_name TEXT,
-            wallet INTEGER DEFAULT 0,
-            fish_count INTEGER DEFAULT 0,
-            guild_rank TEXT DEFAULT 'F',
-            guild_xp INTEGER DEFAULT 0,
-            scrap INTEGER DEFAULT 0,
-            rod_tier INTEGER DEFAULT 0,
-            inventory TEXT DEFAULT '{}',
-            current_rod TEXT DEFAULT 'vara_bambu',
-            rod_upgrades TEXT DEFAULT '{}',
-            afk_trap TEXT DEFAULT '{}',
-            last_fish TIMESTAMP,
-            last_daily TIMESTAMP,
-            last_explore TIMESTAMP,
-            baits INTEGER DEFAULT 0
-        );
         CREATE TABLE quest_progress (
             user_id INTEGER PRIMARY KEY,
             current_chapter TEXT DEFAULT 'inicio',
@@ -90,6 +94,8 @@ def _make_pescar_conn():
     )
     conn.execute("INSERT INTO world_state (id, current_weather) VALUES (1, 'normal')")
     ensure_v4_tables(conn)
+    ensure_economy_view(conn)
+    ensure_party_members(conn)
     conn.commit()
     return conn
 
@@ -97,12 +103,12 @@ def _make_pescar_conn():
 class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
     """Regressão para o fix de duplicação de saldo/inventário na pesca.
 
-    Cenário: o snapshot (`inv_before`) é capturado no início de `/eco pescar`,
-    mas a escrita final só acontece depois — e há awaits no meio. Se, nessa
+    Cenário: a `PlayerSession` é carregada no início de `/eco pescar`, mas a
+    escrita final só acontece depois — e há awaits no meio. Se, nessa
     janela, outro comando (ex.: /eco comprar, já migrado pra v4) alterar
     saldo/inventário no banco, `_finalize_pescar` NÃO pode sobrescrever essa
-    mudança com o snapshot antigo — precisa aplicar a pescaria como delta em
-    cima do estado v4 fresco (via modify_wallet/add_inventory_item).
+    mudança com o estado lido antes — o flush da sessão aplica a pescaria
+    como delta em cima do estado v4 fresco.
 
     (A janela era bem maior quando o QTE existia, mas o fix não dependia dele:
     qualquer await entre a leitura e a gravação reabre a mesma corrida.)
@@ -127,11 +133,10 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
         modify_wallet(conn, user_id, 1000, "Tester")
         add_inventory_item(conn, user_id, "isca", 5)
 
-        # Snapshot capturado no início de pescar().
-        inv_before = {"isca": 5}
-        # Estado local após o consumo de 1 isca pela tentativa de pesca
-        # (mutação em memória feita antes da gravação, como no código real).
-        inv_after_local = {"isca": 4}
+        # Sessão carregada no início de pescar(), com o consumo de 1 isca
+        # registrado em memória (antes da gravação, como no código real).
+        session = PlayerSession.load(conn, user_id, "Tester")
+        session.consume_item("isca")
 
         # --- Ação externa antes da gravação final (ex: /eco comprar, v4) ---
         # Gasta 300 e ganha um item novo; NÃO mexe em "isca".
@@ -140,8 +145,7 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
 
         ctx = {
             "user_id": user_id,
-            "inv": inv_after_local,
-            "inv_before": inv_before,
+            "session": session,
             "valor": 300,
             "nome": "Tubarão Martelo",
             "emoji": "🔨",
@@ -152,8 +156,7 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
             "mission_msg": "",
             "mission_completed": False,
             "quest_trigger": False,
-            "new_xp_total": 0,
-            "current_rank": "F",
+            "xp_gain": 0,
             "used_bait": True,
             "agora_str": "2026-08-13 12:00:00.000000",
             "w_key": "normal",
@@ -176,8 +179,8 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
         # para o valor local antigo e perder o "novo_item" no processo.
         self.assertEqual(final_inv.get("isca"), 4)
 
-        # A tabela legada `economy` (ainda lida por /eco saldo, /eco rank...)
-        # precisa continuar em sincronia com o estado v4.
+        # A view legada `economy` (ainda lida por /eco saldo, /eco rank...)
+        # reflete o estado v4 sem nenhuma sincronização.
         legacy = conn.execute(
             "SELECT wallet, inventory FROM economy WHERE user_id = ?", (user_id,)
         ).fetchone()
@@ -194,11 +197,12 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
 
         ensure_user(conn, user_id, "Tester")
         add_inventory_item(conn, user_id, "isca", 2)
+        session = PlayerSession.load(conn, user_id, "Tester")
+        session.consume_item("isca")
 
         ctx = {
             "user_id": user_id,
-            "inv": {"isca": 1},
-            "inv_before": {"isca": 2},
+            "session": session,
             "valor": 400,
             "nome": "Leviatã",
             "emoji": "🐉",
@@ -209,8 +213,7 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
             "mission_msg": "",
             "mission_completed": False,
             "quest_trigger": False,
-            "new_xp_total": 0,
-            "current_rank": "F",
+            "xp_gain": 0,
             "used_bait": True,
             "agora_str": "2026-08-13 12:05:00.000000",
             "w_key": "normal",
@@ -225,6 +228,50 @@ class FinalizePescarDeltaTests(unittest.IsolatedAsyncioTestCase):
         # Exatamente o valor sorteado: nem 600 (x1.5) nem 0 (linha arrebentada).
         self.assertEqual(get_wallet(conn, user_id), 400)
 
+    async def test_stale_flush_reports_failure_instead_of_a_saved_catch(self):
+        conn = self._make_conn()
+        user_id = 78
+        self.addCleanup(COOLDOWNS.forget)
+
+        ensure_user(conn, user_id, "Tester")
+        add_inventory_item(conn, user_id, "isca", 2)
+        session = PlayerSession.load(conn, user_id, "Tester")
+        session.consume_item("isca")
+        COOLDOWNS.try_reserve(user_id, "last_fish", 300)
+
+        ctx = {
+            "user_id": user_id,
+            "session": session,
+            "valor": 400,
+            "nome": "Leviatã",
+            "emoji": "🐉",
+            "tier_p": 4,
+            "frase": "Grande demais pro balde.",
+            "rod_data": {"name": "Vara Teste", "luck": 1},
+            "actual_cd": 300,
+            "mission_msg": "",
+            "mission_completed": False,
+            "quest_trigger": False,
+            "xp_gain": 5,
+            "used_bait": True,
+            "agora_str": "2026-08-13 12:05:00.000000",
+            "w_key": "normal",
+            "w_stats": {"name": "Normal", "luck_mod": 1},
+            "is_trash": False,
+        }
+        stale = {"success": False, "reason": "stale", "wallet": 400, "inventory": {"isca": 1}}
+
+        interaction = self._make_interaction()
+        with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)), \
+             patch.object(session, "flush", return_value=stale):
+            await economia._finalize_pescar(interaction, ctx)
+
+        self.assertEqual(get_wallet(conn, user_id), 0)
+        self.assertEqual(get_inventory(conn, user_id).get("isca"), 2)
+        self.assertIn("Falha ao salvar", interaction.followup.send.call_args.args[0])
+        self.assertNotIn("embed", interaction.followup.send.call_args.kwargs)
+        self.assertIsNone(COOLDOWNS.blocked_until(user_id, "last_fish"))
+
     async def test_no_qte_entrypoints_remain(self):
         """Guarda contra o QTE voltar por engano."""
         for attr in ("TensionQTEView", "_finalize_pescar_timeout"):
@@ -291,6 +338,23 @@ class ComprarTests(unittest.IsolatedAsyncioTestCase):
         row = conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
         self.assertIsNone(row)
 
+    async def test_rotating_item_of_the_day_can_be_bought(self):
+        # `get_daily_shop()` devolve dicts; a checagem antiga (`item not in
+        # daily_shop`) comparava a chave com dicts e recusava toda a rotação.
+        conn = self._make_conn()
+        user_id = 13
+        ensure_user(conn, user_id, "Tester")
+        modify_wallet(conn, user_id, 10**7, "Tester")
+        essentials = {"isca", "energetico", "rede", "caixa_misteriosa", "ima_saches", "firewall", "chip_sorte"}
+        rotating = next(e["key"] for e in economia.get_daily_shop() if e["key"] not in essentials)
+
+        interaction = self._make_interaction(user_id)
+        with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
+            await economia.comprar.callback(interaction, rotating)
+
+        self.assertIn("Compra realizada", interaction.response.send_message.call_args.args[0])
+        self.assertEqual(get_inventory(conn, user_id).get(rotating), 1)
+
 
 class ShopRodPurchaseTests(unittest.IsolatedAsyncioTestCase):
     """ROTA A de /eco loja (compra direta de vara pelo dropdown), migrada
@@ -418,8 +482,8 @@ class CompraQuantidadeModalTests(unittest.IsolatedAsyncioTestCase):
 
 class PresentearTests(unittest.IsolatedAsyncioTestCase):
     """/eco presentear migrado pra v4 (saldo/inventário), preservando a
-    checagem de posse pra presentes grátis e o campo legado rod_tier (sem
-    equivalente na v4).
+    checagem de posse pra presentes grátis. O gate de "já tem vara melhor"
+    usa o tier da vara equipada (o campo legado rod_tier saiu com a view).
     """
 
     def _make_conn(self):
@@ -467,9 +531,7 @@ class PresentearTests(unittest.IsolatedAsyncioTestCase):
         ensure_user(conn, sender_id, "Sender")
         modify_wallet(conn, sender_id, 6000, "Sender")
         ensure_user(conn, receiver_id, "Amigo")
-        sync_user_to_economy(conn, receiver_id)
-        conn.execute("UPDATE economy SET rod_tier = 5 WHERE user_id = ?", (receiver_id,))
-        conn.commit()
+        set_current_rod(conn, receiver_id, "vara_quantum")
 
         interaction = self._make_interaction(sender_id)
         amigo = SimpleNamespace(id=receiver_id, name="Amigo")
@@ -480,7 +542,7 @@ class PresentearTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(get_wallet(conn, sender_id), 6000)
         self.assertIn("já tem vara melhor", interaction.response.send_message.call_args.args[0])
 
-    async def test_rod_gift_success_equips_and_sets_legacy_rod_tier(self):
+    async def test_rod_gift_success_equips_rod(self):
         conn = self._make_conn()
         sender_id, receiver_id = 46, 47
         ensure_user(conn, sender_id, "Sender")
@@ -493,8 +555,6 @@ class PresentearTests(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(get_wallet(conn, sender_id), 6000 - 600)
         self.assertEqual(get_current_rod(conn, receiver_id), "vara_plastico")
-        legacy = conn.execute("SELECT rod_tier FROM economy WHERE user_id = ?", (receiver_id,)).fetchone()
-        self.assertEqual(legacy["rod_tier"], 1)
 
     async def test_free_gift_consumes_sender_owned_copy(self):
         conn = self._make_conn()
@@ -528,7 +588,7 @@ class PresentearTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(get_inventory(conn, receiver_id).get("Coroa do Imperador", 0), 0)
 
 
-class ExplorarTests(unittest.IsolatedAsyncioTestCase):
+class ExplorarTests(_FreshCooldownsMixin, unittest.IsolatedAsyncioTestCase):
     """/eco explorar migrado pra v4. O foco é a reserva de custo+cooldown
     ANTES do `await view.wait()` (até 60s esperando o jogador escolher
     Ilha/Cidade) — mesmo padrão de fix já aplicado em /eco pescar.
@@ -545,10 +605,8 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
         )
 
     def _make_city_spotted_user(self, conn, user_id, wallet=1000):
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet) VALUES (?, ?, ?)",
-            (user_id, "Tester", wallet),
-        )
+        ensure_user(conn, user_id, "Tester")
+        modify_wallet(conn, user_id, wallet, "Tester")
         conn.execute(
             "INSERT INTO quest_progress (user_id, current_chapter) VALUES (?, 'city_spotted')",
             (user_id,),
@@ -576,7 +634,7 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
             # Custo e cooldown já reservados nesse ponto, mesmo com a 1ª
             # chamada ainda esperando o jogador escolher o destino.
             self.assertEqual(get_wallet(conn, user_id), 1000 - 80)
-            self.assertIsNotNone(get_cooldowns(conn, user_id)["last_explore"])
+            self.assertIsNotNone(_stored_cooldowns(conn, user_id)["last_explore"])
 
             # 2ª chamada do mesmo usuário enquanto a 1ª ainda está aberta.
             await economia.explorar.callback(interaction2)
@@ -612,24 +670,22 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
             await task
 
         self.assertEqual(get_wallet(conn, user_id), 1000 - 80)
-        self.assertIsNotNone(get_cooldowns(conn, user_id)["last_explore"])
+        self.assertIsNotNone(_stored_cooldowns(conn, user_id)["last_explore"])
         msg = interaction.followup.send.call_args.args[0]
         self.assertIn("perdeu o sinal", msg)
 
     async def test_farm_route_insufficient_wallet_refuses(self):
         conn = self._make_conn()
         user_id = 502
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet) VALUES (?, ?, ?)", (user_id, "Pobre", 10)
-        )
-        conn.commit()
+        ensure_user(conn, user_id, "Pobre")
+        modify_wallet(conn, user_id, 10, "Pobre")
 
         interaction = self._make_interaction(user_id)
         with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
             await economia.explorar.callback(interaction)
 
         self.assertEqual(get_wallet(conn, user_id), 10)
-        self.assertIsNone(get_cooldowns(conn, user_id)["last_explore"])
+        self.assertIsNone(_stored_cooldowns(conn, user_id)["last_explore"])
         self.assertIn("Precisa de", interaction.response.send_message.call_args.args[0])
 
     async def test_farm_route_cooldown_refuses(self):
@@ -637,7 +693,6 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
         user_id = 503
         ensure_user(conn, user_id, "Tester")
         modify_wallet(conn, user_id, 1000, "Tester")
-        sync_user_to_economy(conn, user_id)
         set_cooldown(conn, user_id, "last_explore", datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"))
 
         interaction = self._make_interaction(user_id)
@@ -653,14 +708,13 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
         ensure_user(conn, user_id, "Tester")
         modify_wallet(conn, user_id, 1000, "Tester")
         set_cooldown(conn, user_id, "last_fish", "2026-08-13 12:00:00.000000")
-        sync_user_to_economy(conn, user_id)
 
         interaction = self._make_interaction(user_id)
         with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)), \
              patch.object(economia.random, "choices", return_value=[("⚡ Energético Perdido", "Achou uma latinha.", 0, "energetico")]):
             await economia.explorar.callback(interaction)
 
-        self.assertIsNone(get_cooldowns(conn, user_id)["last_fish"])
+        self.assertIsNone(_stored_cooldowns(conn, user_id)["last_fish"])
         self.assertEqual(get_wallet(conn, user_id), 1000 - 80)  # custo do drone continua cobrado
 
     async def test_acesso_negado_refunds_cooldown_but_not_cost(self):
@@ -681,7 +735,7 @@ class ExplorarTests(unittest.IsolatedAsyncioTestCase):
         # Custo do drone continua cobrado (comportamento original preservado).
         self.assertEqual(get_wallet(conn, user_id), 1000 - 80)
         # Cooldown reembolsado — pode tentar de novo sem esperar 10min.
-        self.assertIsNone(get_cooldowns(conn, user_id)["last_explore"])
+        self.assertIsNone(_stored_cooldowns(conn, user_id)["last_explore"])
         embed = interaction.followup.send.call_args.kwargs["embed"]
         self.assertIn("ACESSO NEGADO", embed.title)
 
@@ -775,7 +829,7 @@ class GaldinoTuneBtnTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(get_rod_upgrades(conn, user_id)["cd"], 5)
 
 
-class EnergeticoFixTests(unittest.IsolatedAsyncioTestCase):
+class EnergeticoFixTests(_FreshCooldownsMixin, unittest.IsolatedAsyncioTestCase):
     """Energético: preço recalculado (150 -> 900) e bug de coluna corrigido
     (escrevia em 'last_fish_time', uma coluna órfã nunca lida pela checagem
     real de cooldown, que usa 'last_fish' — o item não fazia nada).
@@ -810,7 +864,7 @@ class EnergeticoFixTests(unittest.IsolatedAsyncioTestCase):
         # coluna que precisa ter sido zerada, não a órfã 'last_fish_time'
         # (nem presente no schema de teste — só existe em produção como
         # coluna morta, nunca lida por ninguém).
-        self.assertIsNone(get_cooldowns(conn, user_id)["last_fish"])
+        self.assertIsNone(_stored_cooldowns(conn, user_id)["last_fish"])
         legacy = conn.execute(
             "SELECT last_fish FROM economy WHERE user_id = ?", (user_id,)
         ).fetchone()
@@ -857,7 +911,6 @@ class DiarioStreakCapTests(unittest.IsolatedAsyncioTestCase):
             "UPDATE user_cooldowns SET last_daily = ?, daily_streak = ? WHERE user_id = ?",
             (yesterday.strftime("%Y-%m-%d %H:%M:%S.%f"), 90, user_id),
         )
-        sync_user_to_economy(conn, user_id)
         conn.commit()
 
         interaction = self._make_interaction(user_id)
@@ -888,7 +941,7 @@ class DiarioStreakCapTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(get_wallet(conn, user_id), 200 + 50)
 
 
-class PescarCooldownReservationTests(unittest.IsolatedAsyncioTestCase):
+class PescarCooldownReservationTests(_FreshCooldownsMixin, unittest.IsolatedAsyncioTestCase):
     """Regressão: /eco pescar disparado duas vezes em sequência rápida pelo
     mesmo usuário não pode abrir dois fluxos de captura em paralelo — a
     segunda chamada deve ser barrada pela checagem normal de cooldown.
@@ -921,14 +974,11 @@ class PescarCooldownReservationTests(unittest.IsolatedAsyncioTestCase):
         user_id = 999
 
         # Firewall zera a chance de lixo, garantindo que a 1ª chamada sempre
-        # sorteie um peixe real. Inserida direto na tabela legada pra simular
-        # um usuário que já existia antes desta migração — pescar() precisa
-        # sincronizar isso pra v4 sozinho antes de ler.
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet, current_rod, inventory) VALUES (?, ?, ?, ?, ?)",
-            (user_id, "Tester", 1000, "vara_void", json.dumps({"firewall": 1})),
-        )
-        conn.commit()
+        # sorteie um peixe real.
+        ensure_user(conn, user_id, "Tester")
+        modify_wallet(conn, user_id, 1000, "Tester")
+        set_current_rod(conn, user_id, "vara_void")
+        add_inventory_item(conn, user_id, "firewall", 1)
 
         interaction1 = self._make_interaction(user_id)
         interaction2 = self._make_interaction(user_id)
@@ -977,10 +1027,12 @@ class PescarCooldownReservationTests(unittest.IsolatedAsyncioTestCase):
         self.assertIn("Descansando", rejection_text)
         self.assertNotIn("embed", call2_kwargs)
 
-        # O cooldown foi reservado pela 1ª chamada (last_fish já gravado),
+        # O cooldown foi reservado pela 1ª chamada (last_fish gravado no
+        # flush),
         # mesmo com a pescaria dela ainda não finalizada (fish_count == 0,
-        # pois _finalize_pescar foi interceptado). Checa tanto a v4 quanto a
-        # tabela legada (têm que estar em sincronia).
+        # pois _finalize_pescar foi interceptado). Lido pela view legada, que
+        # projeta a v4.
+        COOLDOWNS.flush(conn)
         row = conn.execute(
             "SELECT fish_count, last_fish FROM economy WHERE user_id = ?", (user_id,)
         ).fetchone()
@@ -988,7 +1040,7 @@ class PescarCooldownReservationTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(row["fish_count"], 0)
 
 
-class NewAccountPescarFlowTests(unittest.IsolatedAsyncioTestCase):
+class NewAccountPescarFlowTests(_FreshCooldownsMixin, unittest.IsolatedAsyncioTestCase):
     """Fase 8: colapsa a criação de conta — a primeira chamada de
     /eco pescar de um usuário nunca visto antes não pode mais parar em
     '🆕 Conta criada! Tente pescar novamente.' Precisa criar a conta E
@@ -1014,20 +1066,20 @@ class NewAccountPescarFlowTests(unittest.IsolatedAsyncioTestCase):
         # tier 0 — força "Sardinha" (peixe de verdade, fora de TRASH_ITEMS)
         # em vez de deixar ao acaso, pra tornar o resultado determinístico
         # sem precisar tocar em nenhuma outra regra de sorteio/valor.
-        real_choice = economia.random.choice
+        real_sample = CatchPool.sample
 
-        def choose_sardinha(seq):
-            for item in seq:
-                if isinstance(item, tuple) and len(item) == 6 and item[0] == "Sardinha":
+        def choose_sardinha(pool, rng=random):
+            for item in pool.entries:
+                if item[0] == "Sardinha":
                     return item
-            return real_choice(seq)
+            return real_sample(pool, rng)
 
         # Pré-condição: usuário realmente não existe em nenhuma tabela ainda.
         self.assertIsNone(conn.execute("SELECT 1 FROM economy WHERE user_id = ?", (user_id,)).fetchone())
         self.assertIsNone(conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone())
 
         # A vara inicial tem 90% de chance de lixo, e nesse ramo o pool nem
-        # contem Sardinha - forcar so o random.choice deixava o resultado
+        # contem Sardinha - forcar so o sorteio do pool deixava o resultado
         # depender de sorte (o teste falhava de forma intermitente). A
         # rolagem de lixo, randint(1, 100), tambem precisa ser fixada acima
         # de trash_chance.
@@ -1038,7 +1090,7 @@ class NewAccountPescarFlowTests(unittest.IsolatedAsyncioTestCase):
 
         with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)), \
              patch.object(economia.random, "randint", side_effect=_sem_lixo), \
-             patch.object(economia.random, "choice", side_effect=choose_sardinha):
+             patch.object(CatchPool, "sample", autospec=True, side_effect=choose_sardinha):
             await economia.pescar.callback(interaction)
 
         # A conta foi materializada na mesma chamada (users e economy).
@@ -1056,19 +1108,81 @@ class NewAccountPescarFlowTests(unittest.IsolatedAsyncioTestCase):
 
         # A pescaria de verdade rodou (cooldown reservado), não só a criação
         # de conta.
-        from economy_db import get_cooldowns
-
-        cd = get_cooldowns(conn, user_id)
+        cd = _stored_cooldowns(conn, user_id)
         self.assertIsNotNone(cd["last_fish"])
 
 
-class RodSelectEquipTests(unittest.IsolatedAsyncioTestCase):
+class RankTests(unittest.IsolatedAsyncioTestCase):
+    """/eco rank servido pelo cache de leaderboard (leaderboard.py)."""
+
+    def setUp(self):
+        LEADERBOARDS.invalidate()
+        self.addCleanup(LEADERBOARDS.invalidate)
+
+    def _interaction(self):
+        return SimpleNamespace(user=SimpleNamespace(id=1, name="Tester"),
+                               response=SimpleNamespace(send_message=AsyncMock()))
+
+    async def _run(self, conn, categoria=None):
+        interaction = self._interaction()
+        with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
+            await economia.rank.callback(interaction, categoria)
+        return interaction.response.send_message.call_args.kwargs["embed"]
+
+    async def test_repeated_rank_does_not_query_sqlite(self):
+        conn = _make_pescar_conn()
+        modify_wallet(conn, 1, 500, "Rica")
+        modify_wallet(conn, 2, 50, "Pobre")
+
+        embed = await self._run(conn)
+        self.assertEqual([f.name for f in embed.fields], ["💰 Magnatas", "🎣 Pescadores"])
+        self.assertLess(embed.fields[0].value.index("Rica"), embed.fields[0].value.index("Pobre"))
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        await self._run(conn)
+        self.assertEqual(statements, [])
+
+        # Uma escrita que reordena o top aparece sem reconsultar o banco.
+        conn.set_trace_callback(None)
+        modify_wallet(conn, 2, 1000)
+        conn.set_trace_callback(statements.append)
+        embed = await self._run(conn)
+        self.assertEqual(statements, [])
+        self.assertLess(embed.fields[0].value.index("Pobre"), embed.fields[0].value.index("Rica"))
+
+    async def test_daily_reward_moves_player_into_cached_board(self):
+        conn = _make_pescar_conn()
+        modify_wallet(conn, 1, 500, "Rica")
+        ensure_user(conn, 2, "Diarista")
+        await self._run(conn)
+
+        interaction = SimpleNamespace(user=SimpleNamespace(id=2, name="Diarista"),
+                                      response=SimpleNamespace(send_message=AsyncMock()))
+        with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)), \
+             patch.object(economia.random, "randint", return_value=900):
+            await economia.diario.callback(interaction)
+
+        embed = await self._run(conn)
+        self.assertLess(embed.fields[0].value.index("Diarista"), embed.fields[0].value.index("Rica"))
+
+    async def test_guild_category(self):
+        conn = _make_pescar_conn()
+        ensure_user(conn, 1, "Veterano")
+        conn.execute("UPDATE users SET guild_rank = 'C', guild_xp = 120 WHERE user_id = 1")
+        conn.commit()
+
+        embed = await self._run(conn, SimpleNamespace(value="guilda"))
+        self.assertEqual(embed.fields[0].name, "🏛️ Guilda")
+        self.assertIn("Rank C (120 XP)", embed.fields[0].value)
+
+
+class RodSelectEquipTests(_FreshCooldownsMixin, unittest.IsolatedAsyncioTestCase):
     """Regressão: jogador reportou não conseguir trocar de vara depois de
     comprar uma nova. Causa raiz: RodSelect.callback só escrevia
-    current_rod na tabela legada `economy`, nunca em user_rods (v4) — e
-    ensure_user() só sincroniza legada->v4 nessa tabela com INSERT OR
-    IGNORE (só na criação da conta), então a troca "funcionava" (mensagem
-    de sucesso) mas /eco pescar continuava lendo a vara antiga da v4.
+    current_rod na tabela legada `economy`, nunca em user_rods (v4), então
+    a troca "funcionava" (mensagem de sucesso) mas /eco pescar continuava
+    lendo a vara antiga da v4.
     """
 
     def _make_conn(self):
@@ -1095,19 +1209,9 @@ class RodSelectEquipTests(unittest.IsolatedAsyncioTestCase):
         user_id = 5001
         # Usuário já existente com vara_bambu equipada e vara_ouro comprada
         # (já no inventário) — cenário exato do bug reportado.
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet, current_rod, inventory) VALUES (?, ?, ?, ?, ?)",
-            (user_id, "Tester", 5000, "vara_bambu", json.dumps({"vara_ouro": 1})),
-        )
-        conn.commit()
-        # Materializa user_rods (v4) ANTES da troca, simulando um jogador
-        # que já pescou antes — crítico para o teste ser fiel ao bug real:
-        # sync_user_from_economy só faz INSERT OR IGNORE em user_rods, ou
-        # seja, só sincroniza da legada pra v4 na CRIAÇÃO da linha. Se a
-        # linha não existisse ainda neste ponto, a própria chamada de
-        # ensure_user() dentro de pescar() faria essa sincronização de
-        # graça na 1ª vez, mascarando o bug em vez de reproduzi-lo.
         ensure_user(conn, user_id, "Tester")
+        modify_wallet(conn, user_id, 5000, "Tester")
+        add_inventory_item(conn, user_id, "vara_ouro", 1)
         self.assertEqual(get_current_rod(conn, user_id), "vara_bambu")
 
         select = self._make_rod_select(user_id, ["vara_bambu", "vara_ouro"], "vara_bambu", "vara_ouro")
@@ -1128,30 +1232,25 @@ class RodSelectEquipTests(unittest.IsolatedAsyncioTestCase):
 
         conn = self._make_conn()
         user_id = 5002
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet, current_rod, inventory) VALUES (?, ?, ?, ?, ?)",
-            (user_id, "Tester", 5000, "vara_bambu", json.dumps({"vara_ouro": 1, "firewall": 1})),
-        )
-        conn.commit()
-        # Mesmo motivo do teste acima: materializa user_rods ANTES da troca,
-        # simulando um jogador que já pescou antes (senão o bug fica
-        # mascarado pelo INSERT OR IGNORE de 1ª sincronização).
         ensure_user(conn, user_id, "Tester")
+        modify_wallet(conn, user_id, 5000, "Tester")
+        add_inventory_item(conn, user_id, "vara_ouro", 1)
+        add_inventory_item(conn, user_id, "firewall", 1)
 
         select = self._make_rod_select(user_id, ["vara_bambu", "vara_ouro"], "vara_bambu", "vara_ouro")
         equip_interaction = self._make_interaction(user_id)
 
-        real_choice = economia.random.choice
+        real_sample = CatchPool.sample
 
-        def choose_low_tier(seq):
-            candidates = [item for item in seq if isinstance(item, tuple) and len(item) == 6 and 0 < item[4] <= 2]
-            return candidates[0] if candidates else real_choice(seq)
+        def choose_low_tier(pool, rng=random):
+            candidates = [item for item in pool.entries if 0 < item[4] <= 2]
+            return candidates[0] if candidates else real_sample(pool, rng)
 
         with patch.object(economia, "get_bot_instance", return_value=SimpleNamespace(db_conn=conn)):
             await select.callback(equip_interaction)
 
             pescar_interaction = self._make_interaction(user_id)
-            with patch.object(economia.random, "choice", side_effect=choose_low_tier):
+            with patch.object(CatchPool, "sample", autospec=True, side_effect=choose_low_tier):
                 await economia.pescar.callback(pescar_interaction)
 
         pescar_interaction.followup.send.assert_awaited_once()
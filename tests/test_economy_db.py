@@ -1,59 +1,52 @@
+import json
 import sqlite3
 import unittest
 
 from economy_db import (
+    PlayerSession,
+    add_inventory_item,
+    add_party_member,
+    apply_inventory_deltas,
+    compact_fish_sales,
+    create_party,
+    disband_party,
+    ensure_economy_view,
     ensure_user,
     ensure_v4_tables,
+    find_party,
     get_cooldowns,
     get_current_rod,
+    get_inventory,
     get_rod_upgrades,
     get_scrap,
+    get_trap,
     get_wallet,
     modify_scrap,
+    modify_wallet,
+    remove_party_member,
+    reprice_market,
     set_cooldown,
     set_current_rod,
+    set_trap,
     try_spend_wallet,
     try_upgrade_rod,
 )
+from migrations import apply_migrations
 
 
 class EconomyDbTests(unittest.TestCase):
     def _make_conn(self):
         conn = sqlite3.connect(":memory:")
         conn.row_factory = sqlite3.Row
-        conn.execute(
-            """
-            CREATE TABLE economy (
-                user_id INTEGER PRIMARY KEY,
-                user_name TEXT,
-                wallet INTEGER DEFAULT 0,
-                fish_count INTEGER DEFAULT 0,
-                guild_rank TEXT DEFAULT 'F',
-                guild_xp INTEGER DEFAULT 0,
-                scrap INTEGER DEFAULT 0,
-                inventory TEXT DEFAULT '{}',
-                current_rod TEXT DEFAULT 'vara_bambu',
-                rod_upgrades TEXT DEFAULT '{}',
-                afk_trap TEXT DEFAULT '{}',
-                last_fish TIMESTAMP,
-                last_daily TIMESTAMP,
-                last_explore TIMESTAMP,
-                baits INTEGER DEFAULT 0
-            )
-            """
-        )
         ensure_v4_tables(conn)
+        ensure_economy_view(conn)
         return conn
 
-    def test_ensure_user_syncs_existing_users_row_from_economy(self):
+    def test_ensure_user_keeps_existing_users_row(self):
         conn = self._make_conn()
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet) VALUES (?, ?, ?)",
-            (42, "Teste", 250),
-        )
         conn.execute(
             "INSERT INTO users (user_id, user_name, wallet) VALUES (?, ?, ?)",
-            (42, "Teste", 0),
+            (42, "Teste", 250),
         )
         conn.commit()
 
@@ -63,18 +56,12 @@ class EconomyDbTests(unittest.TestCase):
 
     def test_get_wallet_normalizes_string_values(self):
         conn = self._make_conn()
-        conn.execute(
-            "INSERT INTO economy (user_id, user_name, wallet) VALUES (?, ?, ?)",
-            (43, "Texto", "300"),
-        )
         conn.execute(
             "INSERT INTO users (user_id, user_name, wallet) VALUES (?, ?, ?)",
-            (43, "Texto", "0"),
+            (43, "Texto", "300"),
         )
         conn.commit()
 
-        ensure_user(conn, 43, "Texto")
-
         self.assertEqual(get_wallet(conn, 43), 300)
         self.assertIsInstance(get_wallet(conn, 43), int)
 
@@ -190,5 +177,351 @@ class EconomyDbTests(unittest.TestCase):
             set_cooldown(conn, 58, "daily_streak", 5)
 
 
+    def test_trap_get_set_and_clear(self):
+        conn = self._make_conn()
+        ensure_user(conn, 59, "Armador")
+
+        self.assertIsNone(get_trap(conn, 59))
+
+        set_trap(conn, 59, {"type": "covo_basico", "status": "idle", "timer_end": 0})
+
+        self.assertEqual(get_trap(conn, 59)["type"], "covo_basico")
+        self.assertEqual(get_trap(conn, 59)["status"], "idle")
+
+        set_trap(conn, 59, None)
+
+        self.assertIsNone(get_trap(conn, 59))
+
+    def test_apply_inventory_deltas_batches_many_keys(self):
+        conn = self._make_conn()
+        add_inventory_item(conn, 42, "Sardinha", 5)
+        add_inventory_item(conn, 42, "Tilápia", 1)
+
+        result = apply_inventory_deltas(
+            conn, 42, {"Sardinha": -3, "Tilápia": -1, "isca_brilhante": 1, "nada": 0}
+        )
+
+        self.assertEqual(result, {"Sardinha": 2, "Tilápia": 0, "isca_brilhante": 1})
+        self.assertEqual(get_inventory(conn, 42), {"Sardinha": 2, "isca_brilhante": 1})
+        # Linha zerada some da tabela, não fica com quantity = 0.
+        zeros = conn.execute(
+            "SELECT COUNT(*) c FROM user_inventory WHERE user_id = 42 AND quantity <= 0"
+        ).fetchone()["c"]
+        self.assertEqual(zeros, 0)
+
+    def test_apply_inventory_deltas_increments_in_sql(self):
+        conn = self._make_conn()
+        add_inventory_item(conn, 42, "isca", 2)
+        # Escrita "de fora" entre uma leitura antiga e o delta: o delta soma
+        # em cima do valor atual do banco, não do que foi lido antes.
+        conn.execute("UPDATE user_inventory SET quantity = 10 WHERE user_id = 42 AND item_key = 'isca'")
+        conn.commit()
+        self.assertEqual(apply_inventory_deltas(conn, 42, {"isca": 3}), {"isca": 13})
+        self.assertEqual(add_inventory_item(conn, 42, "isca", -13), 0)
+
+
+class EconomyViewTests(unittest.TestCase):
+    """A tabela `economy` legada virou view: leitores antigos (saldo, rank,
+    auditoria) precisam ver o estado das tabelas v4 sem nenhuma sincronização.
+    """
+
+    def _make_conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        ensure_v4_tables(conn)
+        ensure_economy_view(conn)
+        return conn
+
+    def test_view_projects_normalized_state(self):
+        conn = self._make_conn()
+        modify_wallet(conn, 60, 120, "Vista")
+        add_inventory_item(conn, 60, "isca", 3)
+        add_inventory_item(conn, 60, "Sardinha", 2)
+        set_current_rod(conn, 60, "vara_ouro")
+        set_trap(conn, 60, {"type": "covo_basico", "status": "working", "timer_end": 10})
+
+        row = conn.execute("SELECT * FROM economy WHERE user_id = ?", (60,)).fetchone()
+
+        self.assertEqual(row["user_name"], "Vista")
+        self.assertEqual(row["wallet"], 120)
+        self.assertEqual(json.loads(row["inventory"]), {"isca": 3, "Sardinha": 2})
+        self.assertEqual(row["baits"], 3)
+        self.assertEqual(row["current_rod"], "vara_ouro")
+        self.assertEqual(json.loads(row["rod_upgrades"]), {"luck": 0, "cd": 0})
+        self.assertEqual(json.loads(row["afk_trap"])["status"], "working")
+
+    def test_view_defaults_for_fresh_account(self):
+        conn = self._make_conn()
+        ensure_user(conn, 61, "Novo")
+
+        row = conn.execute("SELECT * FROM economy WHERE user_id = ?", (61,)).fetchone()
+
+        self.assertEqual(row["inventory"], "{}")
+        self.assertEqual(row["afk_trap"], "{}")
+        self.assertEqual(row["baits"], 0)
+
+    def test_view_is_read_only(self):
+        conn = self._make_conn()
+        ensure_user(conn, 62, "Somente")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute("UPDATE economy SET wallet = 5 WHERE user_id = ?", (62,))
+
+
 if __name__ == "__main__":
     unittest.main()
+
+
+class PlayerSessionTests(unittest.TestCase):
+    """Unit of work do /eco pescar: carga numa consulta, flush num BEGIN IMMEDIATE."""
+
+    def _make_conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        ensure_v4_tables(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fish_sales_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fish_name TEXT NOT NULL,
+                sale_price INTEGER NOT NULL,
+                user_id INTEGER,
+                sale_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.commit()
+        return conn
+
+    def test_load_creates_account_and_reads_full_state(self):
+        conn = self._make_conn()
+        session = PlayerSession.load(conn, 42, "Teste")
+        self.assertEqual(session.wallet, 0)
+        self.assertEqual(session.current_rod, "vara_bambu")
+        self.assertEqual(session.inventory, {})
+
+        modify_wallet(conn, 42, 150)
+        add_inventory_item(conn, 42, "isca", 3)
+        set_cooldown(conn, 42, "last_fish", "2026-01-01 00:00:00.000000")
+        session = PlayerSession.load(conn, 42)
+        self.assertEqual(session.wallet, 150)
+        self.assertEqual(session.inventory, {"isca": 3})
+        self.assertEqual(session.cooldowns["last_fish"], "2026-01-01 00:00:00.000000")
+        self.assertEqual(session.user_name, "Teste")
+
+    def test_load_without_create_never_writes(self):
+        conn = self._make_conn()
+        self.assertIsNone(PlayerSession.load(conn, 42, "Teste", create=False))
+        self.assertIsNone(conn.execute("SELECT 1 FROM users WHERE user_id = 42").fetchone())
+
+        ensure_user(conn, 42, "Teste")
+        self.assertEqual(PlayerSession.load(conn, 42, create=False).user_id, 42)
+
+    def test_flush_applies_deltas_over_concurrent_writes(self):
+        conn = self._make_conn()
+        ensure_user(conn, 42, "Teste")
+        modify_wallet(conn, 42, 1000)
+        add_inventory_item(conn, 42, "isca", 5)
+
+        session = PlayerSession.load(conn, 42, "Teste")
+        self.assertTrue(session.consume_item("isca"))
+        session.add_item("bota_velha", 1)
+        session.add_wallet(300)
+        session.add_fish_count()
+
+        # Outro comando mexe no mesmo jogador antes do flush.
+        modify_wallet(conn, 42, -300)
+        add_inventory_item(conn, 42, "isca", 2)
+
+        result = session.flush(conn)
+        self.assertTrue(result["success"])
+        self.assertEqual(get_wallet(conn, 42), 1000)
+        self.assertEqual(get_inventory(conn, 42), {"isca": 6, "bota_velha": 1})
+        self.assertEqual(result["wallet"], 1000)
+        self.assertEqual(session.fish_count, 1)
+        self.assertFalse(session.pending)
+
+    def test_consumed_item_row_is_removed(self):
+        conn = self._make_conn()
+        ensure_user(conn, 42, "Teste")
+        add_inventory_item(conn, 42, "firewall", 1)
+        session = PlayerSession.load(conn, 42)
+        self.assertTrue(session.consume_item("firewall"))
+        self.assertFalse(session.consume_item("firewall"))
+        session.flush(conn)
+        count = conn.execute("SELECT COUNT(*) c FROM user_inventory WHERE user_id = 42").fetchone()["c"]
+        self.assertEqual(count, 0)
+
+    def test_stale_version_rejects_absolute_writes(self):
+        conn = self._make_conn()
+        ensure_user(conn, 42, "Teste")
+        session = PlayerSession.load(conn, 42)
+        session.add_wallet(50)
+        session.set_guild("E", 10)
+
+        # Promoção gravada por fora da sessão (bumpa a versão).
+        conn.execute("UPDATE users SET guild_rank = 'D', guild_xp = 0, version = version + 1 WHERE user_id = 42")
+        conn.commit()
+
+        result = session.flush(conn)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["reason"], "stale")
+        row = conn.execute("SELECT wallet, guild_rank FROM users WHERE user_id = 42").fetchone()
+        self.assertEqual((row["wallet"], row["guild_rank"]), (0, "D"))
+
+        session.reload(conn)
+        self.assertEqual(session.guild_rank, "D")
+        self.assertEqual(session.wallet, 50)
+        session.set_guild(session.guild_rank, session.guild_xp + 10)
+        self.assertTrue(session.flush(conn)["success"])
+        row = conn.execute("SELECT wallet, guild_rank, guild_xp FROM users WHERE user_id = 42").fetchone()
+        self.assertEqual((row["wallet"], row["guild_rank"], row["guild_xp"]), (50, "D", 10))
+
+    def test_catch_is_a_single_transaction(self):
+        conn = self._make_conn()
+        ensure_user(conn, 42, "Teste")
+        add_inventory_item(conn, 42, "isca", 2)
+        session = PlayerSession.load(conn, 42)
+        session.consume_item("isca")
+        session.add_wallet(120)
+        session.add_fish_count()
+        session.set_guild("F", 25)
+        session.log_sale("Tilápia", 120)
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        self.assertTrue(session.flush(conn)["success"])
+        conn.set_trace_callback(None)
+
+        self.assertEqual(sum(1 for s in statements if s.startswith("BEGIN")), 1)
+        self.assertEqual(sum(1 for s in statements if s == "COMMIT"), 1)
+        sales = conn.execute("SELECT fish_name, sale_price FROM fish_sales_history").fetchall()
+        self.assertEqual([tuple(r) for r in sales], [("Tilápia", 120)])
+
+
+class PartyMembersTests(unittest.TestCase):
+    """`party_members` acompanha `parties.members_json` em toda mudança."""
+
+    def _make_conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        apply_migrations(conn)
+        return conn
+
+    def _members_json(self, conn, leader_id):
+        row = conn.execute("SELECT members_json FROM parties WHERE leader_id = ?", (leader_id,)).fetchone()
+        return json.loads(row["members_json"])
+
+    def test_leader_and_members_find_the_same_party(self):
+        conn = self._make_conn()
+        create_party(conn, 1, "Líder")
+        self.assertTrue(add_party_member(conn, 1, 2)["success"])
+
+        self.assertEqual(find_party(conn, 1)["leader_id"], 1)
+        self.assertEqual(find_party(conn, 2)["leader_id"], 1)
+        self.assertIsNone(find_party(conn, 3))
+        self.assertEqual(self._members_json(conn, 1), [2])
+
+    def test_cannot_join_two_parties(self):
+        conn = self._make_conn()
+        create_party(conn, 1, "A")
+        create_party(conn, 5, "B")
+        add_party_member(conn, 1, 2)
+
+        self.assertEqual(add_party_member(conn, 5, 2)["reason"], "in_party")
+        self.assertEqual(add_party_member(conn, 1, 5)["reason"], "is_leader")
+        self.assertEqual(add_party_member(conn, 99, 3)["reason"], "no_party")
+        self.assertEqual(self._members_json(conn, 5), [])
+
+    def test_member_of_another_party_cannot_open_one(self):
+        conn = self._make_conn()
+        create_party(conn, 1, "Líder")
+        add_party_member(conn, 1, 2)
+
+        self.assertEqual(create_party(conn, 2, "Membro"), {"success": False, "reason": "in_party"})
+        self.assertIsNone(conn.execute("SELECT 1 FROM parties WHERE leader_id = 2").fetchone())
+        self.assertEqual(find_party(conn, 2)["leader_id"], 1)
+        # Líder reabrindo o próprio grupo não é erro.
+        self.assertTrue(create_party(conn, 1, "Líder")["success"])
+
+    def test_leave_and_disband_clear_membership(self):
+        conn = self._make_conn()
+        create_party(conn, 1, "Líder")
+        add_party_member(conn, 1, 2)
+        add_party_member(conn, 1, 3)
+
+        self.assertTrue(remove_party_member(conn, 1, 2))
+        self.assertFalse(remove_party_member(conn, 1, 2))
+        self.assertIsNone(find_party(conn, 2))
+        self.assertEqual(self._members_json(conn, 1), [3])
+
+        disband_party(conn, 1)
+        self.assertIsNone(find_party(conn, 1))
+        self.assertIsNone(find_party(conn, 3))
+        self.assertEqual(conn.execute("SELECT COUNT(*) c FROM party_members").fetchone()["c"], 0)
+
+
+class FishSalesRollupTests(unittest.TestCase):
+    """O mercado lê só `fish_sales_hourly`; o histórico cru é compactado."""
+
+    def _make_conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        apply_migrations(conn)
+        return conn
+
+    def _sell(self, conn, fish, price, when="+0 days"):
+        conn.execute(
+            "INSERT INTO fish_sales_history (user_id, fish_name, sale_price, sale_time) "
+            "VALUES (1, ?, ?, datetime('now', ?))",
+            (fish, price, when),
+        )
+        conn.commit()
+
+    def _hourly(self, conn, fish):
+        row = conn.execute(
+            "SELECT SUM(count) AS n, SUM(sum_price) AS total FROM fish_sales_hourly WHERE fish_name = ?",
+            (fish,),
+        ).fetchone()
+        return row["n"], row["total"]
+
+    def test_compaction_is_incremental(self):
+        conn = self._make_conn()
+        self._sell(conn, "Tilápia", 10)
+        self._sell(conn, "Tilápia", 12)
+        self.assertEqual(compact_fish_sales(conn)["folded"], 1)
+        self.assertEqual(compact_fish_sales(conn)["folded"], 0)
+        self._sell(conn, "Tilápia", 8)
+        compact_fish_sales(conn)
+
+        self.assertEqual(self._hourly(conn, "Tilápia"), (3, 30))
+
+    def test_retention_deletes_only_old_folded_rows(self):
+        conn = self._make_conn()
+        self._sell(conn, "Bagre", 5, "-40 days")
+        self._sell(conn, "Bagre", 7)
+
+        result = compact_fish_sales(conn, retention_days=30)
+
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(conn.execute("SELECT COUNT(*) c FROM fish_sales_history").fetchone()["c"], 1)
+        self.assertEqual(self._hourly(conn, "Bagre"), (2, 12))
+
+    def test_reprice_reads_rollups(self):
+        conn = self._make_conn()
+        conn.execute("DELETE FROM market_prices")
+        conn.executemany(
+            "INSERT INTO market_prices (fish_name, base_price, current_price) VALUES (?, 100, 100)",
+            [("Tilápia",), ("Bagre",)],
+        )
+        conn.commit()
+        self._sell(conn, "Tilápia", 100)
+        compact_fish_sales(conn)
+        # O histórico cru não é mais consultado pelo reajuste.
+        conn.execute("DELETE FROM fish_sales_history")
+        conn.commit()
+
+        reprice_market(conn)
+
+        prices = dict(conn.execute("SELECT fish_name, current_price FROM market_prices").fetchall())
+        self.assertEqual(prices, {"Tilápia": 95, "Bagre": 110})
@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import discord
+
+from edit_scheduler import SLOW_EDIT_SECONDS, EditScheduler, TokenBucket
+
+
+def _message(channel_id=10, message_id=None, edit=None):
+    return SimpleNamespace(
+        id=message_id, channel=SimpleNamespace(id=channel_id), edit=edit or AsyncMock()
+    )
+
+
+class EditSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_edits_queued_behind_an_inflight_one_are_coalesced(self):
+        gate = asyncio.Event()
+        sent = []
+
+        async def slow_edit(**payload):
+            sent.append(payload)
+            if len(sent) == 1:
+                await gate.wait()
+
+        scheduler = EditScheduler()
+        msg = _message(edit=slow_edit)
+        first = scheduler.submit(msg, content="1.00x", view="botoes")
+        await asyncio.sleep(0)
+        middle = scheduler.submit(msg, content="1.09x")
+        last = scheduler.submit(msg, content="1.18x")
+        gate.set()
+
+        self.assertEqual(await asyncio.gather(first, middle, last), [True, True, True])
+        # Só o estado mais recente sai depois do que estava em voo.
+        self.assertEqual(sent, [{"content": "1.00x", "view": "botoes"}, {"content": "1.18x"}])
+        self.assertEqual(scheduler.counters["coalescidas"], 1)
+
+    async def test_unchanged_payload_is_not_sent(self):
+        scheduler = EditScheduler()
+        msg = _message()
+        embed = discord.Embed(title="Leilão", description="sem lances")
+
+        self.assertTrue(await scheduler.edit(msg, embed=embed))
+        self.assertFalse(await scheduler.edit(msg, embed=discord.Embed(title="Leilão", description="sem lances")))
+        self.assertTrue(await scheduler.edit(msg, embed=discord.Embed(title="Leilão", description="lance: 10")))
+        self.assertEqual(msg.edit.await_count, 2)
+
+    async def test_interaction_targets_use_edit_original_response(self):
+        scheduler = EditScheduler()
+        interaction = SimpleNamespace(edit_original_response=AsyncMock())
+
+        await scheduler.edit(interaction, content="🎰")
+
+        interaction.edit_original_response.assert_awaited_once_with(content="🎰")
+
+    async def test_errors_reach_whoever_awaits(self):
+        scheduler = EditScheduler()
+        gone = discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        msg = _message(edit=AsyncMock(side_effect=gone))
+
+        with self.assertRaises(discord.NotFound):
+            await scheduler.edit(msg, content="x")
+        # Fire-and-forget não explode nem deixa exceção órfã.
+        scheduler.submit(msg, content="y")
+        await asyncio.sleep(0.01)
+        self.assertEqual(scheduler.counters["falhas"], 2)
+
+    async def test_cancelled_worker_cancels_the_edits_it_was_sending(self):
+        started = asyncio.Event()
+
+        async def hanging_edit(**payload):
+            started.set()
+            await asyncio.Event().wait()
+
+        scheduler = EditScheduler()
+        msg = _message(edit=hanging_edit)
+        future = scheduler.submit(msg, content="x")
+        await started.wait()
+
+        worker = scheduler._slots[("mensagem", id(msg))].worker
+        worker.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await worker
+        self.assertTrue(future.cancelled())
+
+    async def test_slow_discord_spaces_out_edits_of_the_same_message(self):
+        async def edit(**payload):
+            if payload["content"] == "lento":
+                await asyncio.sleep(SLOW_EDIT_SECONDS + 0.1)
+
+        scheduler = EditScheduler()
+        msg = _message(edit=AsyncMock(side_effect=edit))
+        await scheduler.edit(msg, content="lento")
+
+        first = scheduler.submit(msg, content="a")
+        await asyncio.sleep(0.05)
+        second = scheduler.submit(msg, content="b")
+        await asyncio.gather(first, second)
+
+        # Com latência alta o agendador espera antes de editar de novo, e os
+        # dois estados que chegaram nesse meio-tempo viram uma edição só.
+        self.assertEqual([c.kwargs["content"] for c in msg.edit.await_args_list], ["lento", "b"])
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_reservations_past_capacity_wait_in_arrival_order(self):
+        bucket = TokenBucket(5, 1.0)
+        waits = [bucket.reserve() for _ in range(7)]
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 1.0, delta=0.05)
+        self.assertAlmostEqual(waits[6], 2.0, delta=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,27 +20,6 @@ from cogs.ilha import ISLAND_STRUCTURES, _structure_cost
 def _make_conn():
     conn = sqlite3.connect(":memory:")
     conn.row_factory = sqlite3.Row
-    conn.execute(
-        """
-        CREATE TABLE economy (
-            user_id INTEGER PRIMARY KEY,
-            user_name TEXT,
-            wallet INTEGER DEFAULT 0,
-            fish_count INTEGER DEFAULT 0,
-            guild_rank TEXT DEFAULT 'F',
-            guild_xp INTEGER DEFAULT 0,
-            scrap INTEGER DEFAULT 0,
-            inventory TEXT DEFAULT '{}',
-            current_rod TEXT DEFAULT 'vara_bambu',
-            rod_upgrades TEXT DEFAULT '{}',
-            afk_trap TEXT DEFAULT '{}',
-            last_fish TIMESTAMP,
-            last_daily TIMESTAMP,
-            last_explore TIMESTAMP,
-            baits INTEGER DEFAULT 0
-        )
-        """
-    )
     ensure_v4_tables(conn)
     return conn
 
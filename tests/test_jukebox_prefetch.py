@@ -0,0 +1,166 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from cogs import jukebox
+from stream_cache import StreamCache
+
+
+class FakeVoice:
+    def __init__(self):
+        self.playing = None
+        self.paused = False
+
+    def is_playing(self):
+        return self.playing is not None
+
+    def is_paused(self):
+        return self.paused
+
+    def play(self, source, after=None):
+        self.playing = source
+
+    def finish(self):
+        self.playing = None
+
+
+def _item(title, origin="db", page="", duration=20):
+    # Padrão: faixa curta, já dentro de PREFETCH_LEAD_SECONDS — a próxima abre na hora.
+    return jukebox.QueueItem(
+        title=title, source_url=f"https://drive/{title}", duration=duration, origin=origin, source_page_url=page
+    )
+
+
+class PrefetchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cog = jukebox.MusicaV2(SimpleNamespace(loop=asyncio.get_running_loop()))
+        self.voice = FakeVoice()
+        self.guild = SimpleNamespace(id=1, voice_client=self.voice)
+        self.built = []
+
+        def build(item):
+            source = MagicMock(name=f"source:{item.title}")
+            source.item = item
+            self.built.append(item.title)
+            return source
+
+        patcher = patch.object(self.cog, "_build_ffmpeg_source", side_effect=build)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _settle(self):
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_next_track_is_prepared_while_current_plays_and_swapped_in(self):
+        self.cog.queues[1] = [_item("A"), _item("B")]
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+
+        self.assertEqual(self.voice.playing.item.title, "A")
+        self.assertEqual(self.built, ["A", "B"])
+
+        self.voice.finish()
+        await self.cog._start_next_if_idle(self.guild)
+
+        # B tocou com a fonte já aberta durante A — nada foi construído de novo.
+        self.assertEqual(self.voice.playing.item.title, "B")
+        self.assertEqual(self.built, ["A", "B"])
+
+    async def test_queue_change_discards_the_prepared_source(self):
+        self.cog.queues[1] = [_item("A"), _item("B")]
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+        prepared = self.cog._prefetch[1].source
+
+        # Como o /tocar_url: fura a fila e chama _start_next_if_idle.
+        self.cog.queues[1].insert(0, _item("C"))
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+
+        prepared.cleanup.assert_called_once()
+        self.assertEqual(self.cog._prefetch[1].item.title, "C")
+        self.voice.finish()
+        await self.cog._start_next_if_idle(self.guild)
+        self.assertEqual(self.voice.playing.item.title, "C")
+        self.assertEqual(self.built, ["A", "B", "C"])
+
+    async def test_prefetch_waits_until_near_the_end_of_a_known_duration(self):
+        first = _item("A")
+        first.duration = 600
+        self.cog.queues[1] = [first, _item("B")]
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+
+        self.assertEqual(self.built, ["A"])
+        self.assertFalse(self.cog._prefetch[1].started)
+
+        # Pulou antes da hora: B é aberta no caminho normal, sem esperar o atraso.
+        self.voice.finish()
+        await self.cog._start_next_if_idle(self.guild)
+        self.assertEqual(self.voice.playing.item.title, "B")
+        self.assertEqual(self.built, ["A", "B"])
+
+    async def test_paused_time_does_not_count_toward_the_prefetch_deadline(self):
+        self.cog.queues[1] = [_item("A", duration=600), _item("B")]
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+        self.assertEqual(self.built, ["A"])
+
+        # Pausado, o prazo não corre — mesmo que o relógio de parede passe do fim.
+        self.cog._set_paused(1, True)
+        self.cog._clocks[1].started -= 1000
+        self.cog._clocks[1].paused_at -= 1000
+        await self._settle()
+        self.assertEqual(self.built, ["A"])
+        self.assertLess(self.cog._clocks[1].elapsed(), 1)
+
+        # Retomado com 575s já tocados: dentro dos 30s finais, abre o FFmpeg.
+        self.cog._clocks[1].started -= 575
+        self.cog._set_paused(1, False)
+        await self._settle()
+        self.assertEqual(self.built, ["A", "B"])
+
+    async def test_url_tracks_are_resolved_once_for_prefetch_and_play(self):
+        calls = []
+
+        def extract(url):
+            calls.append(url)
+            return {
+                "title": "Externa",
+                "duration": 0,
+                "stream_url": "https://rr.googlevideo.com/videoplayback?expire=9999999999",
+                "http_headers": {},
+                "webpage_url": url,
+            }
+
+        url = "https://youtu.be/dQw4w9WgXcQ"
+        with patch.object(jukebox, "STREAMS", StreamCache()), patch.object(jukebox, "_extract_stream_info", extract):
+            # Duração da atual desconhecida: a URL da próxima é resolvida já,
+            # mas o FFmpeg dela só abre na hora de tocar.
+            self.cog.queues[1] = [_item("A", duration=0), _item("Externa", origin="url", page=url)]
+            await self.cog._start_next_if_idle(self.guild)
+            await self._settle()
+            self.assertEqual(calls, [url])
+            self.assertEqual(self.built, ["A"])
+            self.voice.finish()
+            await self.cog._start_next_if_idle(self.guild)
+
+        self.assertEqual(calls, [url])
+        self.assertEqual(self.built, ["A", "Externa"])
+        self.assertEqual(self.voice.playing.item.source_url, "https://rr.googlevideo.com/videoplayback?expire=9999999999")
+
+    async def test_cleanup_kills_prepared_ffmpeg(self):
+        self.cog.queues[1] = [_item("A"), _item("B")]
+        await self.cog._start_next_if_idle(self.guild)
+        await self._settle()
+        prepared = self.cog._prefetch[1].source
+
+        self.cog._cleanup_guild_state(1)
+        prepared.cleanup.assert_called_once()
+        self.assertNotIn(1, self.cog._prefetch)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import sqlite3
+import unittest
+
+from economy_db import ensure_user, modify_scrap, modify_wallet, reset_all_players
+from leaderboard import LEADERBOARDS, Leaderboards, guild_score
+from migrations import apply_migrations
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _conn_with_players(n):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    for uid in range(1, n + 1):
+        conn.execute(
+            "INSERT INTO users (user_id, user_name, wallet, fish_count) VALUES (?, ?, ?, ?)",
+            (uid, f"p{uid}", uid * 100, uid),
+        )
+    conn.commit()
+    return conn
+
+
+class LeaderboardsTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = _conn_with_players(5)
+        self.clock = _Clock()
+        self.boards = Leaderboards(size=3, ttl=60, clock=self.clock)
+        self.statements = []
+        self.conn.set_trace_callback(self.statements.append)
+
+    def _values(self, metric="wallet"):
+        return [row["value"] for row in self.boards.cached(metric)]
+
+    def test_second_read_is_served_from_memory(self):
+        first = self.boards.load(self.conn, ["wallet"])["wallet"]
+        self.assertEqual([r["user_id"] for r in first], [5, 4, 3])
+        queries = len(self.statements)
+
+        self.boards.load(self.conn, ["wallet"])
+        self.assertEqual(len(self.statements), queries)
+
+    def test_change_inside_the_top_updates_in_place(self):
+        self.boards.load(self.conn, ["wallet"])
+        self.boards.observe("wallet", 3, 900)
+        self.assertEqual(self._values(), [900, 500, 400])
+
+    def test_change_far_below_the_cutoff_keeps_the_cache(self):
+        self.boards.load(self.conn, ["wallet"])
+        self.boards.observe("wallet", 1, 250)
+        self.assertEqual(self._values(), [500, 400, 300])
+
+    def test_crossing_the_cutoff_invalidates(self):
+        self.boards.load(self.conn, ["wallet"])
+        self.boards.observe("wallet", 1, 350)
+        self.assertIsNone(self.boards.cached("wallet"))
+
+        self.boards.load(self.conn, ["wallet"])
+        # Quem estava no corte e caiu abaixo dele também invalida.
+        self.boards.observe("wallet", 3, 10)
+        self.assertIsNone(self.boards.cached("wallet"))
+
+    def test_ttl_expires_the_board(self):
+        self.boards.load(self.conn, ["fish_count"])
+        self.clock.now = 61
+        self.assertIsNone(self.boards.cached("fish_count"))
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        real_execute = self.conn.execute
+        boards = self.boards
+
+        class _RacingConn:
+            def execute(self, sql, params=()):
+                boards.invalidate("wallet")
+                return real_execute(sql, params)
+
+        rows = self.boards.load(_RacingConn(), ["wallet"])["wallet"]
+        self.assertEqual(len(rows), 3)
+        self.assertIsNone(self.boards.cached("wallet"))
+
+    def test_guild_orders_by_rank_then_xp(self):
+        self.conn.execute("UPDATE users SET guild_rank = 'E', guild_xp = 10 WHERE user_id = 1")
+        self.conn.execute("UPDATE users SET guild_rank = 'F', guild_xp = 400 WHERE user_id = 2")
+        self.conn.execute("UPDATE users SET guild_rank = 'E', guild_xp = 50 WHERE user_id = 3")
+        self.conn.commit()
+
+        rows = self.boards.load(self.conn, ["guild"])["guild"]
+        self.assertEqual([r["user_id"] for r in rows], [3, 1, 2])
+        self.assertEqual(rows[0]["value"], guild_score("E", 50))
+
+
+class LeaderboardHooksTests(unittest.TestCase):
+    """Os helpers de escrita do economy_db mantêm o cache global em dia."""
+
+    def setUp(self):
+        LEADERBOARDS.invalidate()
+        self.addCleanup(LEADERBOARDS.invalidate)
+        self.conn = _conn_with_players(3)
+
+    def test_modify_wallet_moves_player_inside_cached_board(self):
+        LEADERBOARDS.load(self.conn, ["wallet"])
+        modify_wallet(self.conn, 1, 1000)
+        self.assertEqual(LEADERBOARDS.cached("wallet")[0]["user_id"], 1)
+        self.assertEqual(LEADERBOARDS.cached("wallet")[0]["value"], 1100)
+
+    def test_new_scrap_holder_enters_board(self):
+        LEADERBOARDS.load(self.conn, ["scrap"])
+        self.assertEqual(LEADERBOARDS.cached("scrap"), [])
+        ensure_user(self.conn, 9, "novato")
+        modify_scrap(self.conn, 9, 30)
+        rows = LEADERBOARDS.load(self.conn, ["scrap"])["scrap"]
+        self.assertEqual([(r["user_name"], r["value"]) for r in rows], [("novato", 30)])
+
+    def test_global_reset_drops_every_board(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        apply_migrations(conn)
+        LEADERBOARDS.load(conn, ["wallet", "fish_count"])
+        reset_all_players(conn)
+        self.assertIsNone(LEADERBOARDS.cached("wallet"))
+        self.assertIsNone(LEADERBOARDS.cached("fish_count"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,13 +8,18 @@ gateway. Mas a medição encontrou dois bloqueios genuínos, corrigidos aqui:
      quadrático de cor) durante /musica adicionar.
   C) matplotlib/networkx/scipy eram importados no topo de cogs/lore_ai.py,
      bloqueando o loop por ~1s no startup mesmo para quem nunca usa /lore grafo.
+  D) `extract_text_from_attachment` importava pypdf/python-docx e fazia o parse
+     do anexo dentro da coroutine, no loop.
 """
 import ast
 import inspect
 import pathlib
+import sys
+import threading
 import unittest
 from io import BytesIO
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
 from PIL import Image
 
@@ -41,7 +46,7 @@ class DominantColorTests(unittest.TestCase):
         class FakeResponse:
             content = payload
 
-        with patch.object(utils.requests, "get", return_value=FakeResponse()):
+        with patch("requests.get", return_value=FakeResponse()):
             return utils.get_thumbnail_dominant_color("http://exemplo/t.png")
 
     def test_returns_the_most_frequent_color(self):
@@ -56,7 +61,7 @@ class DominantColorTests(unittest.TestCase):
         self.assertEqual((color.r, color.g, color.b), (10, 200, 30))
 
     def test_network_failure_falls_back_to_blurple(self):
-        with patch.object(utils.requests, "get", side_effect=OSError("sem rede")):
+        with patch("requests.get", side_effect=OSError("sem rede")):
             color = utils.get_thumbnail_dominant_color("http://exemplo/t.png")
         import discord
 
@@ -165,5 +170,34 @@ class LazyGraphImportTests(unittest.TestCase):
         self.assertEqual(result.stdout.strip(), "False", result.stderr[-500:])
 
 
+class AttachmentParseTests(unittest.IsolatedAsyncioTestCase):
+    """D — o parse (e o import de pypdf/docx) roda em thread, não no loop."""
+
+    async def test_parse_runs_off_the_event_loop(self):
+        # `utils` da raiz só reexporta os nomes públicos; o patch vai no módulo real.
+        impl = sys.modules[utils.extract_text_from_attachment.__module__]
+        threads = []
+        original = impl._parse_attachment_bytes
+
+        def spy(filename, file_bytes):
+            threads.append(threading.current_thread())
+            return original(filename, file_bytes)
+
+        attachment = SimpleNamespace(filename="Notas.MD", read=AsyncMock(return_value="  olá\n".encode()))
+        with patch.object(impl, "_parse_attachment_bytes", side_effect=spy):
+            text = await utils.extract_text_from_attachment(attachment)
+
+        self.assertEqual(text, "olá")
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_broken_pdf_reports_error_text(self):
+        attachment = SimpleNamespace(filename="a.pdf", read=AsyncMock(return_value=b"nao e pdf"))
+        impl = sys.modules[utils.extract_text_from_attachment.__module__]
+        with patch.object(impl, "log_to_gui"):
+            text = await utils.extract_text_from_attachment(attachment)
+        self.assertTrue(text.startswith("[Erro ao ler arquivo:"))
+
+
 if __name__ == "__main__":
     unittest.main()
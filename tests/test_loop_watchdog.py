@@ -0,0 +1,92 @@
+"""Watchdog do event loop (loop_watchdog.py) e a agregação em telemetry."""
+import asyncio
+import sysconfig
+import time
+import traceback
+import unittest
+from pathlib import Path
+
+import telemetry
+from loop_watchdog import LoopWatchdog, call_site
+
+
+def _block_the_loop(seconds):
+    time.sleep(seconds)  # o tipo de chamada síncrona que o watchdog precisa apontar
+
+
+class LoopWatchdogTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+
+    async def test_stall_is_attributed_to_the_blocking_call_site(self):
+        reported = []
+        watchdog = LoopWatchdog(threshold=0.05, interval=0.01, on_stall=lambda *args: reported.append(args))
+        watchdog.start()
+        self.addCleanup(watchdog.stop)
+
+        await asyncio.sleep(0.05)
+        _block_the_loop(0.3)
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+
+        stalls = telemetry.top_stalls(None)
+        self.assertEqual(len(stalls), 1)
+        self.assertIn("test_loop_watchdog.py", stalls[0]["site"])
+        self.assertIn("(_block_the_loop)", stalls[0]["site"])
+        self.assertGreaterEqual(stalls[0]["max"], 0.25)
+        self.assertEqual(len(reported), 1)
+        self.assertGreaterEqual(telemetry.loop_lag()["max_ms"], 250)
+
+    async def test_idle_loop_records_lag_but_no_stall(self):
+        watchdog = LoopWatchdog(threshold=0.2, interval=0.01).start()
+        self.addCleanup(watchdog.stop)
+
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+
+        self.assertIsNotNone(telemetry.loop_lag()["last_ms"])
+        self.assertEqual(telemetry.top_stalls(), [])
+
+
+class CallSiteTests(unittest.TestCase):
+    def test_skips_library_frames(self):
+        stdlib = str(Path(sysconfig.get_paths()["stdlib"]) / "sqlite3" / "dbapi2.py")
+        frames = [
+            traceback.FrameSummary(str(Path(__file__).resolve()), 10, "pescar"),
+            traceback.FrameSummary(stdlib, 99, "execute"),
+        ]
+        self.assertIn(":10 (pescar)", call_site(frames))
+
+    def test_falls_back_to_innermost_frame(self):
+        stdlib = str(Path(sysconfig.get_paths()["stdlib"]) / "json" / "decoder.py")
+        self.assertIn(":7 (decode)", call_site([traceback.FrameSummary(stdlib, 7, "decode")]))
+
+
+class StallAggregationTests(unittest.TestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+
+    def test_aggregates_by_site_and_flags_only_new_or_worse(self):
+        self.assertTrue(telemetry.record_stall(0.3, "economy_db.py:10 (f)"))
+        self.assertFalse(telemetry.record_stall(0.2, "economy_db.py:10 (f)"))
+        self.assertTrue(telemetry.record_stall(0.5, "economy_db.py:10 (f)"))
+        telemetry.record_stall(0.4, "utils.py:5 (g)")
+
+        top = telemetry.top_stalls()
+        self.assertEqual([entry["site"] for entry in top], ["economy_db.py:10 (f)", "utils.py:5 (g)"])
+        self.assertEqual(top[0]["count"], 3)
+        self.assertAlmostEqual(top[0]["total"], 1.0)
+        self.assertEqual(top[0]["max"], 0.5)
+
+    def test_keeps_a_bounded_number_of_sites(self):
+        for i in range(telemetry.MAX_STALL_SITES + 5):
+            telemetry.record_stall(0.1 + i, f"site{i}")
+        sites = {entry["site"] for entry in telemetry.top_stalls(None)}
+        self.assertEqual(len(sites), telemetry.MAX_STALL_SITES)
+        self.assertNotIn("site0", sites)
+
+
+if __name__ == "__main__":
+    unittest.main()
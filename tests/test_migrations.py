@@ -0,0 +1,205 @@
+import sqlite3
+import unittest
+
+from economy_db import ensure_user, get_wallet, modify_wallet
+from migrations import MIGRATIONS, apply_migrations, get_schema_version, latest_version
+
+
+def _conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class MigrationRegistryTests(unittest.TestCase):
+    def test_versions_are_strictly_increasing(self):
+        versions = [v for v, _, _ in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_fresh_database_reaches_latest_version(self):
+        conn = _conn()
+        applied = apply_migrations(conn)
+        self.assertEqual(applied, [v for v, _, _ in MIGRATIONS])
+        self.assertEqual(get_schema_version(conn), latest_version())
+        kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'economy'").fetchone()[0]
+        self.assertEqual(kind, "view")
+        # A tabela antiga fica guardada, com o schema completo até o passo 4.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(economy_legacy)").fetchall()}
+        self.assertIn("last_fish_time", columns)
+
+    def test_second_run_applies_nothing(self):
+        conn = _conn()
+        apply_migrations(conn)
+        self.assertEqual(apply_migrations(conn), [])
+
+    def test_pre_registry_database_is_migrated_in_place(self):
+        """Banco anterior ao registro: user_version 0, mas tabelas e colunas já existem."""
+        conn = _conn()
+        # Só o passo 1 "na marra", como o boot antigo fazia: economy ainda é tabela.
+        MIGRATIONS[0][2](conn)
+        conn.execute(
+            "INSERT INTO economy (user_id, user_name, wallet, inventory) VALUES (1, 'Velho', 77, '{\"isca\": 3}')"
+        )
+        conn.commit()
+        self.assertEqual(get_schema_version(conn), 0)
+
+        apply_migrations(conn)
+
+        self.assertEqual(get_schema_version(conn), latest_version())
+        # Lido direto das tabelas v4: a cópia veio do passo 5.
+        self.assertEqual(conn.execute("SELECT wallet FROM users WHERE user_id = 1").fetchone()[0], 77)
+        self.assertEqual(
+            conn.execute("SELECT quantity FROM user_inventory WHERE user_id = 1 AND item_key = 'isca'").fetchone()[0],
+            3,
+        )
+        # Passo 6: a view mostra o mesmo jogador e a linha original ficou no backup.
+        self.assertEqual(conn.execute("SELECT baits FROM economy WHERE user_id = 1").fetchone()[0], 3)
+        self.assertEqual(conn.execute("SELECT wallet FROM economy_legacy WHERE user_id = 1").fetchone()[0], 77)
+
+    def test_party_members_backfilled_from_members_json(self):
+        conn = _conn()
+        MIGRATIONS[0][2](conn)
+        conn.execute("INSERT INTO parties (leader_id, leader_name, members_json) VALUES (10, 'Líder', '[11, 12]')")
+        conn.execute("INSERT INTO parties (leader_id, leader_name, members_json) VALUES (20, 'Quebrado', 'lixo')")
+        conn.commit()
+
+        apply_migrations(conn)
+
+        rows = conn.execute("SELECT user_id, leader_id FROM party_members ORDER BY user_id").fetchall()
+        self.assertEqual([tuple(r) for r in rows], [(10, 10), (11, 10), (12, 10), (20, 20)])
+
+    def test_legacy_copy_is_noop_once_economy_is_a_view(self):
+        from migration_v4 import copy_legacy_rows
+
+        conn = _conn()
+        apply_migrations(conn)
+        conn.execute("INSERT INTO economy_legacy (user_id, user_name, wallet) VALUES (2, 'Congelado', 10)")
+        modify_wallet(conn, 2, 500, "Congelado")
+
+        self.assertEqual(copy_legacy_rows(conn), 0)
+        self.assertEqual(get_wallet(conn, 2), 500)
+
+    def test_helpers_run_no_ddl_after_migration(self):
+        conn = _conn()
+        apply_migrations(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        ensure_user(conn, 5, "Tester")
+        modify_wallet(conn, 5, 10)
+        get_wallet(conn, 5)
+
+        ddl = [s for s in statements if s.lstrip().upper().startswith(("CREATE", "ALTER", "DROP"))]
+        self.assertEqual(ddl, [])
+
+
+def _legacy_conn(players=0):
+    """Banco parado antes do passo 5: economy ainda é tabela, v4 já existe."""
+    conn = _conn()
+    for version, _, fn in MIGRATIONS:
+        if version < 5:
+            fn(conn)
+    conn.executemany(
+        "INSERT INTO economy (user_id, user_name, wallet, inventory) VALUES (?, ?, ?, ?)",
+        ((uid, f"J{uid}", uid * 10, '{"isca": 2, "velha": 0}') for uid in range(1, players + 1)),
+    )
+    conn.commit()
+    return conn
+
+
+class LegacyCopyTests(unittest.TestCase):
+    def test_bulk_copy_maps_every_column(self):
+        from migration_v4 import copy_legacy_rows
+
+        conn = _legacy_conn()
+        conn.execute(
+            """
+            INSERT INTO economy (user_id, user_name, wallet, inventory, current_rod, guild_rank,
+                                 rod_upgrades, afk_trap, last_daily)
+            VALUES (7, 'Sete', 70, '{"isca": 3, "bota": 0, "nome": "x"}', NULL, 'B',
+                    '{"luck": 2}', '{"type": "rede", "status": "armada", "durability": 4}', '2026-01-01')
+            """
+        )
+        conn.execute("INSERT INTO economy (user_id, user_name, inventory, rod_upgrades, afk_trap) VALUES (8, 'Oito', 'lixo', 'lixo', '{}')")
+        conn.commit()
+
+        self.assertEqual(copy_legacy_rows(conn), 2)
+
+        self.assertEqual(tuple(conn.execute("SELECT wallet, guild_rank FROM users WHERE user_id = 7").fetchone()), (70, "B"))
+        inventory = conn.execute("SELECT item_key, quantity FROM user_inventory WHERE user_id = 7").fetchall()
+        self.assertEqual([tuple(r) for r in inventory], [("isca", 3)])
+        self.assertEqual(conn.execute("SELECT current_rod FROM user_rods WHERE user_id = 7").fetchone()[0], "vara_bambu")
+        self.assertEqual(tuple(conn.execute("SELECT luck_level, cd_level FROM rod_upgrades WHERE user_id = 7").fetchone()), (2, 0))
+        self.assertEqual(
+            tuple(conn.execute("SELECT trap_type, status, durability FROM user_trap WHERE user_id = 7").fetchone()),
+            ("rede", "armada", 4),
+        )
+        self.assertEqual(conn.execute("SELECT last_daily FROM user_cooldowns WHERE user_id = 7").fetchone()[0], "2026-01-01")
+        # JSON quebrado não derruba a cópia: o jogador entra com os padrões.
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user_inventory WHERE user_id = 8").fetchone()[0], 0)
+        self.assertEqual(tuple(conn.execute("SELECT luck_level, cd_level FROM rod_upgrades WHERE user_id = 8").fetchone()), (0, 0))
+        self.assertIsNone(conn.execute("SELECT 1 FROM user_trap WHERE user_id = 8").fetchone())
+
+    def test_existing_v4_players_are_not_clobbered(self):
+        from migration_v4 import copy_legacy_rows
+
+        conn = _legacy_conn(players=2)
+        conn.execute("INSERT INTO users (user_id, user_name, wallet) VALUES (1, 'J1', 5000)")
+        conn.execute("INSERT INTO user_inventory (user_id, item_key, quantity) VALUES (1, 'perola', 1)")
+        conn.commit()
+
+        self.assertEqual(copy_legacy_rows(conn), 1)
+
+        self.assertEqual(get_wallet(conn, 1), 5000)
+        items = conn.execute("SELECT item_key FROM user_inventory WHERE user_id = 1").fetchall()
+        self.assertEqual([r[0] for r in items], ["perola"])
+        self.assertEqual(get_wallet(conn, 2), 20)
+
+    def test_interrupted_copy_resumes_from_watermark(self):
+        from migration_v4 import copy_legacy_rows
+
+        conn = _legacy_conn(players=25)
+        # Derruba o terceiro lote no meio; os dois primeiros já foram confirmados.
+        conn.execute(
+            """
+            CREATE TEMP TRIGGER queda BEFORE INSERT ON users WHEN NEW.user_id = 25
+            BEGIN SELECT RAISE(ABORT, 'queda no meio do lote'); END
+            """
+        )
+        with self.assertRaises(sqlite3.IntegrityError):
+            copy_legacy_rows(conn, batch_size=10)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 20)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user_inventory").fetchone()[0], 20)
+        self.assertEqual(tuple(conn.execute("SELECT watermark, done FROM migration_checkpoints").fetchone()), (20, 0))
+
+        conn.execute("DROP TRIGGER queda")
+        statements = []
+        conn.set_trace_callback(statements.append)
+        self.assertEqual(copy_legacy_rows(conn, batch_size=10), 5)
+        conn.set_trace_callback(None)
+
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 25)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user_inventory").fetchone()[0], 25)
+        self.assertEqual(tuple(conn.execute("SELECT watermark, done FROM migration_checkpoints").fetchone()), (25, 1))
+        # Só o lote que faltava: os 20 primeiros não são varridos de novo.
+        self.assertEqual(sum("INSERT INTO users" in s for s in statements), 1)
+
+    def test_finished_copy_is_skipped(self):
+        from migration_v4 import copy_legacy_rows
+
+        conn = _legacy_conn(players=3)
+        self.assertEqual(copy_legacy_rows(conn), 3)
+        conn.execute("INSERT INTO economy (user_id, user_name, wallet) VALUES (99, 'Tarde', 1)")
+        conn.commit()
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        self.assertEqual(copy_legacy_rows(conn), 0)
+        conn.set_trace_callback(None)
+
+        self.assertFalse(any("economy e" in s for s in statements))
+        self.assertIsNone(conn.execute("SELECT 1 FROM users WHERE user_id = 99").fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
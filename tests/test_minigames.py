@@ -60,9 +60,6 @@ class MinigamesTests(unittest.TestCase):
         self.assertEqual(embed.fields[2].name, "💸 Último lance")
         self.assertEqual(embed.fields[2].value, "Nenhum")
 
-    def test_format_time_remaining_formats_hours_minutes_and_seconds(self):
-        self.assertEqual(minigames.format_time_remaining(3661), "1h 1m 1s")
-
 
 class BatalharConsumeFishTests(unittest.IsolatedAsyncioTestCase):
     """Regressão: /eco batalhar checava presença de peixe no inventário mas
@@ -0,0 +1,130 @@
+import sqlite3
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from cogs import jukebox
+from migrations import apply_migrations
+from music_index import CATALOG, CatalogIndex, search_key
+
+
+def _conn(titles):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    conn.executemany(
+        "INSERT INTO music_cache (youtube_url, title, normalized_title, duration) VALUES (?, ?, ?, ?)",
+        ((f"yt{i}", title, search_key(title), 60 * (i + 1)) for i, title in enumerate(titles)),
+    )
+    conn.commit()
+    return conn
+
+
+def _titles(entries):
+    return [entry.title for entry in entries]
+
+
+class _NoScan(list):
+    def __iter__(self):
+        raise AssertionError("varreu o vocabulário inteiro")
+
+
+class CatalogIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = _conn(
+            [
+                "Bohemian Rhapsody - Queen",
+                "Rhapsody in Blue",
+                "Garota de Ipanema",
+                "Canção do Expedicionário",
+                "Queen of the Night",
+            ]
+        )
+        self.addCleanup(self.conn.close)
+        self.index = CatalogIndex()
+        self.assertEqual(self.index.load(self.conn), 5)
+
+    def test_title_prefix_comes_before_word_and_substring_matches(self):
+        self.assertEqual(
+            _titles(self.index.search("rhap")),
+            ["Rhapsody in Blue", "Bohemian Rhapsody - Queen"],
+        )
+        self.assertEqual(_titles(self.index.search("apsod")), ["Bohemian Rhapsody - Queen", "Rhapsody in Blue"])
+
+    def test_words_match_in_any_order_and_accents_are_folded(self):
+        self.assertEqual(_titles(self.index.search("queen bohem")), ["Bohemian Rhapsody - Queen"])
+        self.assertEqual(_titles(self.index.search("CANCAO")), ["Canção do Expedicionário"])
+        self.assertEqual(self.index.search("queen jazz"), [])
+
+    def test_substring_across_words_is_checked_against_the_whole_title(self):
+        self.assertEqual(_titles(self.index.search("a de ipa")), ["Garota de Ipanema"])
+        self.assertEqual(self.index.search("ota ipa"), [])
+
+    def test_mid_word_terms_come_from_the_gram_index(self):
+        self.assertEqual(_titles(self.index.search("hemia")), ["Bohemian Rhapsody - Queen"])
+        self.assertEqual(_titles(self.index.search("ipan ota")), [])
+        self.assertEqual(_titles(self.index.search("a b")), [])
+        self.assertEqual(self.index.search("zzzz"), [])
+        # Sem varrer o vocabulário: a lista ordenada só serve ao prefixo.
+        self.index._words = _NoScan(self.index._words)
+        self.assertEqual(_titles(self.index.search("ipanem")), ["Garota de Ipanema"])
+
+    def test_discarded_words_leave_the_gram_index(self):
+        self.index.add(99, "Xylofone", 0)
+        self.assertEqual(_titles(self.index.search("ylof")), ["Xylofone"])
+        self.index.discard(99)
+        self.assertEqual(self.index.search("ylof"), [])
+        self.assertNotIn("xylofone", self.index._grams.get("ylo", ()))
+
+    def test_empty_query_lists_alphabetically_up_to_limit(self):
+        self.assertEqual(
+            _titles(self.index.search("", limit=2)),
+            ["Bohemian Rhapsody - Queen", "Canção do Expedicionário"],
+        )
+
+    def test_incremental_add_discard_and_refresh(self):
+        self.index.add(99, "Rhapsody Nova", 30)
+        self.assertEqual(_titles(self.index.search("rhapsody n")), ["Rhapsody Nova"])
+        self.index.discard(99)
+        self.assertEqual(self.index.search("rhapsody n"), [])
+
+        song_id = self.conn.execute("SELECT id FROM music_cache WHERE title = 'Rhapsody in Blue'").fetchone()[0]
+        self.conn.execute("UPDATE music_cache SET is_active = 0 WHERE id = ?", (song_id,))
+        self.index.refresh(self.conn, song_id)
+        self.assertEqual(_titles(self.index.search("rhap")), ["Bohemian Rhapsody - Queen"])
+
+        self.conn.execute("UPDATE music_cache SET is_active = 1, title = 'Blue Monday' WHERE id = ?", (song_id,))
+        self.index.refresh(self.conn, song_id)
+        self.assertEqual(_titles(self.index.search("blue")), ["Blue Monday"])
+        self.assertEqual(len(self.index), 5)
+
+    def test_hidden_tracks_are_not_loaded(self):
+        self.conn.execute("UPDATE music_cache SET is_active = 0 WHERE title LIKE 'Queen%'")
+        self.assertEqual(self.index.load(self.conn), 4)
+        self.assertEqual(_titles(self.index.search("queen")), ["Bohemian Rhapsody - Queen"])
+
+
+class TocarAutocompleteTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.addCleanup(CATALOG.clear)
+        self.addCleanup(setattr, CATALOG, "ready", False)
+
+    async def test_loaded_index_answers_without_the_database(self):
+        CATALOG.load(_conn(["Aquarela", "Asa Branca"]))
+        cog = jukebox.MusicaV2(SimpleNamespace())
+        with patch.object(cog, "_search_db", new=AsyncMock()) as search_db:
+            choices = await cog._tocar_autocomplete(None, "aqua")
+        search_db.assert_not_awaited()
+        self.assertEqual([c.value for c in choices], ["Aquarela"])
+        self.assertEqual(choices[0].name, "Aquarela (1:00)")
+
+    async def test_insert_updates_the_index(self):
+        conn = _conn([])
+        CATALOG.load(conn)
+        with patch.object(jukebox, "_get_db_conn", return_value=conn):
+            jukebox._db_insert_music_cache("Trem das Onze", "trem das onze", "f1", "https://x", 200)
+        self.assertEqual(_titles(CATALOG.search("onze")), ["Trem das Onze"])
+
+
+if __name__ == "__main__":
+    unittest.main()
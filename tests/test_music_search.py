@@ -0,0 +1,93 @@
+import sqlite3
+import unittest
+
+from migrations import apply_migrations
+from music_search import ensure_music_search, match_expression, search_music
+
+SELECT = "music_cache.id, music_cache.title"
+
+
+def _conn(titles=()):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    conn.executemany(
+        "INSERT INTO music_cache (youtube_url, title, normalized_title) VALUES (?, ?, ?)",
+        ((f"yt{i}", title, title.lower()) for i, title in enumerate(titles)),
+    )
+    conn.commit()
+    return conn
+
+
+def _titles(rows):
+    return [row["title"] for row in rows]
+
+
+class MusicSearchTests(unittest.TestCase):
+    def test_substring_match_uses_the_fts_index(self):
+        conn = _conn(["Bohemian Rhapsody", "Rhapsody in Blue", "Yellow Submarine"])
+        self.assertEqual(sorted(_titles(search_music(conn, SELECT, "rhapsod"))), ["Bohemian Rhapsody", "Rhapsody in Blue"])
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        search_music(conn, SELECT, "rhapsod")
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT {SELECT} FROM music_search JOIN music_cache "
+            "ON music_cache.id = music_search.rowid WHERE music_search MATCH ?",
+            (match_expression("rhapsod"),),
+        ).fetchall()
+        self.assertTrue(any("music_search MATCH" in s for s in statements))
+        self.assertFalse(any("SCAN music_cache" in row["detail"] for row in plan))
+
+    def test_triggers_follow_insert_rename_and_delete(self):
+        conn = _conn(["Garota de Ipanema"])
+        conn.execute(
+            "INSERT INTO music_cache (youtube_url, title, normalized_title) VALUES ('x', 'Aquarela', 'aquarela')"
+        )
+        self.assertEqual(_titles(search_music(conn, SELECT, "quarel")), ["Aquarela"])
+
+        conn.execute("UPDATE music_cache SET title = 'Chega de Saudade', normalized_title = 'chega de saudade' WHERE youtube_url = 'x'")
+        self.assertEqual(search_music(conn, SELECT, "quarel"), [])
+        self.assertEqual(_titles(search_music(conn, SELECT, "saudade")), ["Chega de Saudade"])
+
+        conn.execute("DELETE FROM music_cache WHERE youtube_url = 'x'")
+        self.assertEqual(search_music(conn, SELECT, "saudade"), [])
+        # Levanta erro se o índice divergiu do conteúdo de music_cache.
+        conn.execute("INSERT INTO music_search(music_search) VALUES ('integrity-check')")
+
+    def test_inactive_tracks_are_filtered(self):
+        conn = _conn(["Asa Branca", "Asa Morena"])
+        conn.execute("UPDATE music_cache SET is_active = 0 WHERE title = 'Asa Morena'")
+        self.assertEqual(_titles(search_music(conn, SELECT, "asa ")), ["Asa Branca"])
+        self.assertEqual(len(search_music(conn, SELECT, "asa ", active_only=False)), 2)
+
+    def test_ranked_by_bm25(self):
+        conn = _conn(["Samba de uma nota só com samba no pé e samba na alma", "Samba"])
+        rows = search_music(conn, SELECT, "samba")
+        self.assertEqual(_titles(rows)[0], "Samba")
+
+    def test_raw_term_searches_the_original_title(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        apply_migrations(conn)
+        conn.execute("INSERT INTO music_cache (youtube_url, title, normalized_title) VALUES ('a', 'AC/DC - T.N.T.', 'ac dc t n t')")
+        self.assertEqual(_titles(search_music(conn, SELECT, "ac dc", "AC/DC")), ["AC/DC - T.N.T."])
+        self.assertEqual(_titles(search_music(conn, SELECT, "t n t", "T.N.T")), ["AC/DC - T.N.T."])
+
+    def test_short_terms_fall_back_to_like(self):
+        conn = _conn(["U2 - One", "Abba"])
+        self.assertIsNone(match_expression("u2"))
+        self.assertEqual(_titles(search_music(conn, SELECT, "u2")), ["U2 - One"])
+        self.assertEqual(len(search_music(conn, SELECT, "")), 2)
+
+    def test_existing_catalog_is_indexed_and_quotes_are_escaped(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.execute("CREATE TABLE music_cache (id INTEGER PRIMARY KEY, title TEXT, normalized_title TEXT, is_active INTEGER DEFAULT 1)")
+        conn.execute("""INSERT INTO music_cache (title, normalized_title) VALUES ('O "Rei" do Baião', 'o "rei" do baiao')""")
+        self.assertTrue(ensure_music_search(conn))
+        self.assertEqual(_titles(search_music(conn, SELECT, 'o "rei"')), ['O "Rei" do Baião'])
+
+
+if __name__ == "__main__":
+    unittest.main()
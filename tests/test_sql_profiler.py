@@ -0,0 +1,132 @@
+import sqlite3
+import unittest
+
+from sql_profiler import (
+    MAX_SAMPLE_PARAMS,
+    MAX_SAMPLE_VALUE_LEN,
+    MAX_STATEMENTS,
+    OVERFLOW_KEY,
+    ProfiledConnection,
+    SqlProfiler,
+    PROFILER,
+    normalize_sql,
+    plan_warnings,
+    sample_params,
+)
+
+
+def _profiled_conn():
+    conn = sqlite3.connect(":memory:", factory=ProfiledConnection)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        CREATE TABLE users (user_id INTEGER PRIMARY KEY, wallet INTEGER, guild_xp INTEGER);
+        CREATE TABLE parties (leader_id INTEGER PRIMARY KEY, members_json TEXT);
+        """
+    )
+    return conn
+
+
+def _lookup_wallet(conn, user_id):
+    return conn.execute("SELECT wallet FROM users WHERE user_id = ?", (user_id,)).fetchone()
+
+
+class NormalizeSqlTests(unittest.TestCase):
+    def test_literals_and_whitespace_collapse(self):
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM users\n  WHERE user_id = 42 AND name = 'O''Brien';"),
+            "SELECT * FROM users WHERE user_id = ? AND name = ?",
+        )
+
+    def test_in_lists_of_any_size_share_a_bucket(self):
+        self.assertEqual(
+            normalize_sql("DELETE FROM t WHERE id IN (?, ?, ?)"),
+            normalize_sql("DELETE FROM t WHERE id IN (1,2)"),
+        )
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(normalize_sql("SELECT col1 FROM t2"), "SELECT col1 FROM t2")
+
+
+class ProfiledConnectionTests(unittest.TestCase):
+    def setUp(self):
+        PROFILER.reset()
+        self.addCleanup(PROFILER.reset)
+
+    def test_connection_execute_is_aggregated_per_statement_and_caller(self):
+        conn = _profiled_conn()
+        PROFILER.reset()
+        for uid in range(5):
+            _lookup_wallet(conn, uid)
+        conn.cursor().execute("UPDATE users SET wallet = 1 WHERE user_id = 3")
+
+        statements = {row["key"]: row for row in PROFILER.top_statements(10)}
+        self.assertEqual(statements["SELECT wallet FROM users WHERE user_id = ?"]["count"], 5)
+        self.assertEqual(statements["UPDATE users SET wallet = ? WHERE user_id = ?"]["count"], 1)
+        callers = {row["key"]: row["count"] for row in PROFILER.top_callers(10)}
+        self.assertEqual(callers[f"{__name__}._lookup_wallet"], 5)
+        self.assertEqual(PROFILER.totals()["count"], 6)
+
+    def test_disabled_profiler_records_nothing(self):
+        conn = _profiled_conn()
+        PROFILER.reset()
+        PROFILER.enabled = False
+        try:
+            _lookup_wallet(conn, 1)
+        finally:
+            PROFILER.enabled = True
+        self.assertEqual(PROFILER.totals()["count"], 0)
+
+    def test_explain_flags_full_scan_and_temp_sort(self):
+        conn = _profiled_conn()
+        PROFILER.reset()
+        conn.execute("SELECT members_json FROM parties").fetchall()
+        conn.execute("SELECT user_id FROM users ORDER BY guild_xp DESC LIMIT 10").fetchall()
+        _lookup_wallet(conn, 1)
+        count = PROFILER.totals()["count"]
+
+        report = {entry["key"]: entry["warnings"] for entry in PROFILER.explain(conn, limit=10)}
+
+        self.assertIn("varredura completa de `parties`", report["SELECT members_json FROM parties"])
+        sort_warnings = report["SELECT user_id FROM users ORDER BY guild_xp DESC LIMIT ?"]
+        self.assertTrue(any("order by" in warning for warning in sort_warnings))
+        self.assertEqual(report["SELECT wallet FROM users WHERE user_id = ?"], [])
+        # O próprio EXPLAIN não entra nas contas.
+        self.assertEqual(PROFILER.totals()["count"], count)
+
+
+class SqlProfilerLimitsTests(unittest.TestCase):
+    def test_new_statements_past_the_cap_go_to_overflow(self):
+        profiler = SqlProfiler()
+        for i in range(MAX_STATEMENTS + 10):
+            profiler.record(f"SELECT * FROM t{i}", (), 0.001, "caller")
+        keys = [row["key"] for row in profiler.top_statements(MAX_STATEMENTS + 10)]
+        self.assertEqual(len(keys), MAX_STATEMENTS + 1)
+        self.assertIn(OVERFLOW_KEY, keys)
+
+    def test_sample_params_drop_large_values_but_keep_binding_count(self):
+        blob = b"x" * (MAX_SAMPLE_VALUE_LEN + 1)
+        self.assertEqual(sample_params([1, "ok", blob, None]), (1, "ok", None, None))
+        self.assertEqual(sample_params({"a": blob, "b": 2}), {"a": None, "b": 2})
+        many = list(range(MAX_SAMPLE_PARAMS + 1))
+        self.assertEqual(sample_params(many), (None,) * len(many))
+
+    def test_record_keeps_a_copy_not_the_callers_params(self):
+        profiler = SqlProfiler()
+        params = ["y" * 10_000, 1]
+        profiler.record("UPDATE users SET user_name = ? WHERE user_id = ?", params, 0.5, "caller")
+        (stat,) = profiler._statements.values()
+        self.assertIsNot(stat.sample_params, params)
+        self.assertEqual(stat.sample_params, (None, 1))
+
+    def test_plan_warnings_ignore_index_scans(self):
+        rows = [
+            (2, 0, 0, "SCAN users USING COVERING INDEX idx_users_rank"),
+            (3, 0, 0, "SEARCH users USING INTEGER PRIMARY KEY (rowid=?)"),
+            (4, 0, 0, "SCAN TABLE parties AS p"),
+        ]
+        self.assertEqual(plan_warnings(rows), ["varredura completa de `parties`"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Startup: perfil de import/extensões e imports pesados fora do caminho de carga."""
+import ast
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from startup_profiler import StartupProfiler
+
+
+class StartupProfilerTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = pathlib.Path(tmp.name)
+        (root / "perf_pai.py").write_text(
+            textwrap.dedent(
+                """
+                import time
+                import perf_filho
+                time.sleep(0.02)
+                """
+            ),
+            encoding="utf-8",
+        )
+        (root / "perf_filho.py").write_text("import time\ntime.sleep(0.05)\n", encoding="utf-8")
+        sys.path.insert(0, tmp.name)
+        self.addCleanup(sys.path.remove, tmp.name)
+        for name in ("perf_pai", "perf_filho"):
+            self.addCleanup(sys.modules.pop, name, None)
+
+    def test_child_time_is_discounted_from_parent_self_time(self):
+        profiler = StartupProfiler()
+        profiler.enable()
+        try:
+            import perf_pai  # noqa: F401
+        finally:
+            profiler.stop_imports()
+
+        rows = {name: (total, own) for name, total, own in profiler.slowest_imports(50)}
+        parent_total, parent_own = rows["perf_pai"]
+        child_total, _ = rows["perf_filho"]
+        self.assertGreaterEqual(child_total, 0.05)
+        self.assertGreaterEqual(parent_total, child_total + 0.02)
+        self.assertLess(parent_own, 0.05)
+        self.assertEqual(profiler.slowest_imports(1, key="self")[0][0], "perf_filho")
+
+    def test_disabled_profiler_does_not_touch_import(self):
+        import builtins
+
+        original = builtins.__import__
+        profiler = StartupProfiler()
+        profiler.record_extension("cogs.economia", 0.1)
+        profiler.mark("on_ready")
+        self.assertIs(builtins.__import__, original)
+        self.assertEqual(profiler.extensions(), [])
+
+    def test_report_lists_extensions_and_imports(self):
+        profiler = StartupProfiler()
+        profiler.enable()
+        try:
+            import perf_pai  # noqa: F401
+            profiler.record_extension("cogs.economia", 0.25)
+            profiler.mark("on_ready")
+        finally:
+            profiler.stop_imports()
+
+        report = profiler.report()
+        self.assertIn("cogs.economia", report)
+        self.assertIn("perf_filho", report)
+        self.assertIn("on_ready", report)
+
+
+class LazyHeavyImportTests(unittest.TestCase):
+    """Dependências pesadas só entram na primeira chamada que precisa delas."""
+
+    HEAVY = {
+        "src/p3luche/utils.py": ("docx", "pypdf", "requests", "PIL"),
+        "src/p3luche/cogs/musica.py": ("google", "google_auth_oauthlib", "googleapiclient", "yt_dlp"),
+        "src/p3luche/cogs/jukebox.py": ("google", "google_auth_oauthlib", "googleapiclient", "yt_dlp"),
+    }
+
+    def test_heavy_libs_are_not_imported_at_module_level(self):
+        for path, libs in self.HEAVY.items():
+            tree = ast.parse(pathlib.Path(path).read_text(encoding="utf-8"))
+            top = set()
+            for node in tree.body:
+                if isinstance(node, ast.Import):
+                    top.update(alias.name.split(".")[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module:
+                    top.add(node.module.split(".")[0])
+            for lib in libs:
+                with self.subTest(path=path, lib=lib):
+                    self.assertNotIn(lib, top)
+
+    def test_loading_music_cogs_does_not_pull_heavy_libs(self):
+        code = (
+            "import sys; sys.path.insert(0, 'src/p3luche');"
+            "import cogs.musica, cogs.jukebox;"
+            "print(sorted(m for m in ('yt_dlp', 'googleapiclient', 'pypdf', 'docx') if m in sys.modules))"
+        )
+        env = dict(os.environ, DISCORD_TOKEN=os.environ.get("DISCORD_TOKEN", "x"))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        self.assertEqual(result.stdout.strip().splitlines()[-1:], ["[]"], result.stderr[-500:])
+
+
+if __name__ == "__main__":
+    unittest.main()
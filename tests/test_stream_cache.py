@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from stream_cache import EXPIRY_MARGIN_SECONDS, StreamCache, canonical_key, url_expiry
+
+
+def _info(video_id="dQw4w9WgXcQ", expire=None, duration=200):
+    expire = int(time.time()) + 6 * 3600 if expire is None else expire
+    return {
+        "title": "Faixa",
+        "duration": duration,
+        "stream_url": f"https://rr1.googlevideo.com/videoplayback?expire={expire}&id={video_id}",
+        "http_headers": {"User-Agent": "x"},
+        "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+
+class CanonicalKeyTests(unittest.TestCase):
+    def test_youtube_forms_share_one_key(self):
+        urls = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtu.be/dQw4w9WgXcQ?t=42",
+            "https://www.youtube.com/watch?list=PL1&v=dQw4w9WgXcQ&index=3",
+            "https://music.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtube.com/shorts/dQw4w9WgXcQ",
+        ]
+        self.assertEqual({canonical_key(url) for url in urls}, {"youtube:dQw4w9WgXcQ"})
+        self.assertEqual(canonical_key("HTTPS://Example.com/a.mp3#x"), "https://example.com/a.mp3")
+
+    def test_expire_from_query_or_path(self):
+        self.assertEqual(url_expiry("https://h/videoplayback?expire=1700000000&x=1"), 1700000000)
+        self.assertEqual(url_expiry("https://h/videoplayback/expire/1700000000/id/abc"), 1700000000)
+        self.assertIsNone(url_expiry("https://example.com/a.mp3"))
+
+
+class StreamCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_replay_and_other_url_forms_skip_extraction(self):
+        calls = []
+
+        def extract(url):
+            calls.append(url)
+            return _info()
+
+        cache = StreamCache()
+        first = await cache.resolve("https://youtu.be/dQw4w9WgXcQ", extract)
+        first["http_headers"]["User-Agent"] = "mexido"
+        again = await cache.resolve("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10", extract)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(again["http_headers"], {"User-Agent": "x"})
+        self.assertEqual(cache.counters["hits"], 1)
+
+    async def test_entry_expires_before_the_url_would_die_mid_track(self):
+        now = 1_000_000.0
+        cache = StreamCache()
+        info = _info(expire=int(now) + 1000, duration=300)
+        cache.put("https://youtu.be/dQw4w9WgXcQ", info, now=now)
+
+        deadline = now + 1000 - EXPIRY_MARGIN_SECONDS - 300
+        self.assertIsNotNone(cache.get("https://youtu.be/dQw4w9WgXcQ", now=deadline - 1))
+        self.assertIsNone(cache.get("https://youtu.be/dQw4w9WgXcQ", now=deadline))
+
+        # URL que nem daria para tocar a faixa inteira não entra.
+        cache.put("https://youtu.be/aaaaaaaaaaa", _info("aaaaaaaaaaa", expire=int(now) + 100), now=now)
+        self.assertIsNone(cache.get("https://youtu.be/aaaaaaaaaaa", now=now))
+
+    async def test_concurrent_requests_share_one_extraction(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def extract(url):
+            calls.append(url)
+            started.set()
+            release.wait(5)
+            return _info()
+
+        cache = StreamCache()
+        first = asyncio.create_task(cache.resolve("https://youtu.be/dQw4w9WgXcQ", extract))
+        await asyncio.to_thread(started.wait, 5)
+        others = [
+            asyncio.create_task(cache.resolve("https://www.youtube.com/watch?v=dQw4w9WgXcQ", extract))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first, *others)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.counters["shared"], 3)
+        self.assertEqual(len({r["stream_url"] for r in results}), 1)
+
+    async def test_cancelling_the_first_caller_does_not_cancel_the_others(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def extract(url):
+            calls.append(url)
+            started.set()
+            release.wait(5)
+            return _info()
+
+        cache = StreamCache()
+        first = asyncio.create_task(cache.resolve("https://youtu.be/dQw4w9WgXcQ", extract))
+        await asyncio.to_thread(started.wait, 5)
+        second = asyncio.create_task(cache.resolve("https://www.youtube.com/watch?v=dQw4w9WgXcQ", extract))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        release.set()
+
+        info = await second
+        self.assertIn("id=dQw4w9WgXcQ", info["stream_url"])
+        self.assertEqual(len(calls), 1)
+        self.assertIsNotNone(cache.get("https://youtu.be/dQw4w9WgXcQ"))
+
+    async def test_failure_is_not_cached(self):
+        calls = []
+
+        def extract(url):
+            calls.append(url)
+            raise RuntimeError("vídeo indisponível")
+
+        cache = StreamCache()
+        with self.assertRaises(RuntimeError):
+            await cache.resolve("https://youtu.be/dQw4w9WgXcQ", extract)
+        with self.assertRaises(RuntimeError):
+            await cache.resolve("https://youtu.be/dQw4w9WgXcQ", extract)
+        self.assertEqual(len(calls), 2)
+
+    async def test_forget_drops_every_alias_of_the_entry(self):
+        cache = StreamCache()
+        info = _info()
+        info["webpage_url"] = "https://vimeo.com/123"
+        info["stream_url"] = "https://cdn.vimeo.com/a.mp4?expire=9999999999"
+        cache.put("https://player.vimeo.com/video/123", info)
+        self.assertIsNotNone(cache.get("https://vimeo.com/123"))
+
+        cache.forget("https://player.vimeo.com/video/123")
+        self.assertIsNone(cache.get("https://vimeo.com/123"))
+        self.assertIsNone(cache.get("https://player.vimeo.com/video/123"))
+
+        # Um apelido já reaproveitado por outra extração não é derrubado.
+        cache.put("https://a.example/x", dict(info, webpage_url="https://b.example/x"))
+        cache.put("https://b.example/x", dict(info, webpage_url="https://b.example/x", title="Nova"))
+        cache.forget("https://a.example/x")
+        self.assertEqual(cache.get("https://b.example/x")["title"], "Nova")
+
+    async def test_lru_bound(self):
+        cache = StreamCache(max_entries=2)
+        for video_id in ("aaaaaaaaaaa", "bbbbbbbbbbb"):
+            cache.put(f"https://youtu.be/{video_id}", _info(video_id))
+        cache.get("https://youtu.be/aaaaaaaaaaa")
+        cache.put("https://youtu.be/ccccccccccc", _info("ccccccccccc"))
+
+        self.assertIsNotNone(cache.get("https://youtu.be/aaaaaaaaaaa"))
+        self.assertIsNone(cache.get("https://youtu.be/bbbbbbbbbbb"))
+        self.assertIsNotNone(cache.get("https://youtu.be/ccccccccccc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
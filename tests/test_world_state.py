@@ -0,0 +1,68 @@
+import sqlite3
+import unittest
+
+from migrations import apply_migrations
+from world_state import WorldState
+
+
+def _make_conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    conn.execute("DELETE FROM market_prices")
+    conn.execute("INSERT INTO market_prices (fish_name, base_price, current_price) VALUES ('Tilápia', 10, 12)")
+    conn.commit()
+    return conn
+
+
+class WorldStateTests(unittest.TestCase):
+    def test_load_reads_weather_and_prices(self):
+        conn = _make_conn()
+        conn.execute("UPDATE world_state SET current_weather = 'bad' WHERE id = 1")
+        conn.commit()
+        world = WorldState()
+
+        world.load(conn)
+
+        self.assertEqual(world.weather, "bad")
+        self.assertEqual(world.market_price("Tilápia", 0), 12)
+        self.assertEqual(world.market_price("Peixe Novo", 7), 7)
+
+    def test_set_weather_writes_through(self):
+        conn = _make_conn()
+        world = WorldState()
+        world.load(conn)
+
+        previous = world.set_weather(conn, "good")
+
+        self.assertEqual(previous, "normal")
+        self.assertEqual(world.weather, "good")
+        row = conn.execute("SELECT current_weather FROM world_state WHERE id = 1").fetchone()
+        self.assertEqual(row["current_weather"], "good")
+
+    def test_readers_do_not_touch_the_database(self):
+        conn = _make_conn()
+        world = WorldState()
+        world.load(conn)
+        conn.close()
+
+        self.assertEqual(world.weather, "normal")
+        self.assertEqual(world.market_snapshot(), {"Tilápia": 12})
+
+    def test_daily_shop_is_built_once_per_day(self):
+        world = WorldState()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return [{"key": f"item{len(calls)}"}]
+
+        first = world.daily_shop("2026-01-01", build)
+        first[0]["key"] = "mexido"
+        self.assertEqual(world.daily_shop("2026-01-01", build), [{"key": "item1"}])
+        self.assertEqual(world.daily_shop("2026-01-02", build), [{"key": "item2"}])
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+from src.p3luche.world_state import *